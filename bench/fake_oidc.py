@@ -0,0 +1,208 @@
+# bench/fake_oidc.py
+"""
+Emisor OIDC falso para benchmarks offline (sustituye a Keycloak).
+
+Sirve las mismas rutas que un realm de Keycloak:
+- {issuer}/.well-known/openid-configuration
+- {issuer}/protocol/openid-connect/certs   (JWKS)
+- {issuer}/protocol/openid-connect/token   (client_credentials)
+
+y firma tokens (RS256 por defecto; ES256 / EdDSA con `alg=`) con `resource_access.<client>.roles` como los de Keycloak.
+
+Uso standalone:
+    python bench/fake_oidc.py --port 18080
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import parse_qs
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm, RSAAlgorithm
+
+# alg -> (generador de clave privada, serializador JWK)
+_KEY_TYPES = {
+    "RS256": (lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048), RSAAlgorithm),
+    "ES256": (lambda: ec.generate_private_key(ec.SECP256R1()), ECAlgorithm),
+    "EdDSA": (ed25519.Ed25519PrivateKey.generate, OKPAlgorithm),
+}
+
+
+class FakeOIDCIssuer:
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        realm: str = "asrp",
+        alg: str = "RS256",
+        client_roles: Optional[Dict[str, Dict[str, Iterable[str]]]] = None,
+    ) -> None:
+        make_key, self._jwk_algorithm = _KEY_TYPES[alg]
+        self.alg = alg
+        self._key = make_key()
+        self.kid = uuid.uuid4().hex[:16]
+        self.realm = realm
+        # client_credentials: client_id -> {audience: roles}
+        self.client_roles = client_roles or {}
+        self.hits: Counter = Counter()
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    # -------------------------
+    # URLs
+    # -------------------------
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def issuer(self) -> str:
+        return f"{self.base_url}/realms/{self.realm}"
+
+    @property
+    def discovery_url(self) -> str:
+        return f"{self.issuer}/.well-known/openid-configuration"
+
+    @property
+    def jwks_url(self) -> str:
+        return f"{self.issuer}/protocol/openid-connect/certs"
+
+    @property
+    def token_url(self) -> str:
+        return f"{self.issuer}/protocol/openid-connect/token"
+
+    # -------------------------
+    # Tokens
+    # -------------------------
+    def jwks(self) -> Dict[str, Any]:
+        jwk = json.loads(self._jwk_algorithm.to_jwk(self._key.public_key()))
+        jwk.update({"kid": self.kid, "use": "sig", "alg": self.alg})
+        return {"keys": [jwk]}
+
+    def mint(
+        self,
+        *,
+        audience: str,
+        roles: Iterable[str] = (),
+        subject: str = "bench-user",
+        ttl_seconds: int = 3600,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        now = int(time.time())
+        claims: Dict[str, Any] = {
+            "iss": self.issuer,
+            "aud": audience,
+            "sub": subject,
+            "azp": "asrp-bench",
+            "iat": now,
+            "exp": now + ttl_seconds,
+            "jti": uuid.uuid4().hex,
+            "resource_access": {audience: {"roles": list(roles)}},
+        }
+        claims.update(extra or {})
+        return jwt.encode(claims, self._key, algorithm=self.alg, headers={"kid": self.kid})
+
+    # -------------------------
+    # Ciclo de vida
+    # -------------------------
+    def start(self) -> "FakeOIDCIssuer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-oidc", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOIDCIssuer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        issuer = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt: str, *args: Any) -> None:  # silencioso
+                return
+
+            def _json(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:  # noqa: N802
+                prefix = f"/realms/{issuer.realm}"
+                if self.path == f"{prefix}/.well-known/openid-configuration":
+                    issuer.hits["discovery"] += 1
+                    self._json(
+                        200,
+                        {
+                            "issuer": issuer.issuer,
+                            "jwks_uri": issuer.jwks_url,
+                            "token_endpoint": issuer.token_url,
+                            "id_token_signing_alg_values_supported": [issuer.alg],
+                        },
+                    )
+                elif self.path == f"{prefix}/protocol/openid-connect/certs":
+                    issuer.hits["jwks"] += 1
+                    self._json(200, issuer.jwks())
+                else:
+                    self._json(404, {"error": "not_found"})
+
+            def do_POST(self) -> None:  # noqa: N802
+                if self.path != f"/realms/{issuer.realm}/protocol/openid-connect/token":
+                    self._json(404, {"error": "not_found"})
+                    return
+                issuer.hits["token"] += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+                client_id = form.get("client_id", "")
+                if form.get("grant_type") != "client_credentials" or client_id not in issuer.client_roles:
+                    self._json(401, {"error": "invalid_client"})
+                    return
+                # Un token por audiencia configurada (suficiente para service-to-service)
+                audience, roles = next(iter(issuer.client_roles[client_id].items()))
+                token = issuer.mint(audience=audience, roles=roles, subject=f"service-account-{client_id}")
+                self._json(200, {"access_token": token, "token_type": "Bearer", "expires_in": 3600})
+
+        return _Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OIDC issuer (offline)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--realm", default="asrp")
+    parser.add_argument("--alg", choices=sorted(_KEY_TYPES), default="RS256")
+    args = parser.parse_args()
+
+    issuer = FakeOIDCIssuer(host=args.host, port=args.port, realm=args.realm, alg=args.alg).start()
+    print(f"issuer:    {issuer.issuer}")
+    print(f"discovery: {issuer.discovery_url}")
+    print("token (catalog_read):", issuer.mint(audience="asrp-catalog", roles=["catalog_read"]))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        issuer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# bench/loadgen.py
+"""Generador de carga async a concurrencia fija + estadísticas (RPS, p50/p95/p99)."""
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+import httpx
+
+from scenarios import Scenario
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank sobre una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    lat = sorted(latencies)
+    total = len(lat) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "rps": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(lat, 50) * 1000, 3),
+        "p95_ms": round(percentile(lat, 95) * 1000, 3),
+        "p99_ms": round(percentile(lat, 99) * 1000, 3),
+        "max_ms": round((lat[-1] if lat else 0.0) * 1000, 3),
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    *,
+    headers: Optional[Mapping[str, str]] = None,
+    concurrency: int = 16,
+    requests: int = 2000,
+    warmup: int = 50,
+) -> Dict[str, Any]:
+    """
+    Lanza `requests` peticiones con exactamente `concurrency` workers en vuelo.
+    Las `warmup` primeras no cuentan (JIT de caches: JWKS, pool, plan cache...).
+    """
+    latencies: List[float] = []
+    errors = 0
+
+    async def _one(i: int, record: bool) -> None:
+        nonlocal errors
+        kwargs: Dict[str, Any] = {"headers": headers}
+        if scenario.body is not None:
+            kwargs["json"] = scenario.body(i)
+        t0 = time.perf_counter()
+        try:
+            resp = await client.request(scenario.method, scenario.path(i), **kwargs)
+            ok = resp.status_code == scenario.expected_status
+        except httpx.HTTPError:
+            ok = False
+        dt = time.perf_counter() - t0
+        if not record:
+            return
+        if ok:
+            latencies.append(dt)
+        else:
+            errors += 1
+
+    async def _phase(first: int, last: int, record: bool) -> None:
+        next_i = first
+
+        async def _worker() -> None:
+            nonlocal next_i
+            while next_i < last:
+                i = next_i
+                next_i += 1
+                await _one(i, record)
+
+        await asyncio.gather(*(_worker() for _ in range(concurrency)))
+
+    await _phase(0, warmup, record=False)
+    t0 = time.perf_counter()
+    await _phase(warmup, warmup + requests, record=True)
+    elapsed = time.perf_counter() - t0
+
+    result = summarize(latencies, errors, elapsed)
+    result["concurrency"] = concurrency
+    return result
@@ -0,0 +1,235 @@
+# bench/run.py
+"""
+Benchmark offline de catalog-api y orders-api (sin Keycloak, sin contenedores).
+
+- Emisor OIDC falso (discovery + JWKS + tokens RS256 | ES256 | EdDSA con --alg) => el path de auth real se ejecuta.
+- SQLite por defecto (o PostgreSQL local con --catalog-database-url / --orders-database-url).
+- Modo `uvicorn` (HTTP real, 1 worker) o `inprocess` (httpx.ASGITransport, sin red).
+- Concurrencia fija; reporta RPS y p50/p95/p99 por endpoint.
+- Baselines en bench/baselines/<nombre>.json; --compare falla (exit 1) ante regresiones.
+
+    python bench/run.py --requests 2000 --concurrency 16 --save-baseline local
+    python bench/run.py --requests 2000 --concurrency 16 --compare local
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from fake_oidc import FakeOIDCIssuer
+from loadgen import run_scenario
+from scenarios import ServiceSpec, SERVICES
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASELINES_DIR = BENCH_DIR / "baselines"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _service_env(spec: ServiceSpec, issuer: FakeOIDCIssuer, database_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "DATABASE_URL": database_url,
+            "OIDC_DISCOVERY_URL": issuer.discovery_url,
+            "OIDC_ISSUER_EXPECTED": issuer.issuer,
+            "OIDC_AUDIENCE": spec.audience,
+            "KEYCLOAK_INTERNAL_BASE_URL": issuer.base_url,
+            "KEYCLOAK_REALM": issuer.realm,
+            "LOG_LEVEL": "WARNING",
+            "ENVIRONMENT": "bench",
+        }
+    )
+    env.update(spec.env)
+    return env
+
+
+def _headers(spec: ServiceSpec, issuer: FakeOIDCIssuer) -> Dict[str, Dict[str, str]]:
+    out: Dict[str, Dict[str, str]] = {}
+    for sc in spec.scenarios:
+        if sc.roles:
+            out[sc.name] = {"Authorization": f"Bearer {issuer.mint(audience=spec.audience, roles=sc.roles)}"}
+    return out
+
+
+def _worker(command: str, spec: ServiceSpec, env: Dict[str, str], stdin: Optional[str] = None) -> str:
+    proc = subprocess.run(
+        [sys.executable, str(BENCH_DIR / "service_worker.py"), command, spec.name],
+        cwd=spec.directory,
+        env=env,
+        input=stdin,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{spec.name} {command} failed:\n{proc.stderr}")
+    return proc.stdout
+
+
+def _wait_http(url: str, timeout_s: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"service not ready: {url}")
+
+
+async def _run_http(spec: ServiceSpec, base_url: str, headers: Dict[str, Dict[str, str]], args) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        for scenario in spec.scenarios:
+            if args.filter and args.filter not in scenario.name:
+                continue
+            results[scenario.name] = await run_scenario(
+                client,
+                scenario,
+                headers=headers.get(scenario.name),
+                concurrency=args.concurrency,
+                requests=args.requests,
+                warmup=args.warmup,
+            )
+    return results
+
+
+def bench_service(spec: ServiceSpec, issuer: FakeOIDCIssuer, workdir: Path, args) -> Dict[str, Any]:
+    database_url = getattr(args, f"{spec.name.split('-')[0]}_database_url") or f"sqlite:///{workdir / spec.name}.db"
+    env = _service_env(spec, issuer, database_url)
+    headers = _headers(spec, issuer)
+    _worker("seed", spec, env)
+
+    if args.mode == "inprocess":
+        config = {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "filter": args.filter,
+            "headers": headers,
+        }
+        return json.loads(_worker("inprocess", spec, env, stdin=json.dumps(config)).strip().splitlines()[-1])
+
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=spec.directory,
+        env=env,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        _wait_http(f"{base_url}/health")
+        return asyncio.run(_run_http(spec, base_url, headers, args))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+# =========================
+# Report + baselines
+# =========================
+
+def _print_table(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\n{'endpoint':<42} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, r in results.items():
+        print(f"{name:<42} {r['rps']:>9.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}")
+
+
+def compare(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """Regresión = RPS por debajo de baseline*(1-tol) o p95/p99 por encima de baseline*(1+tol), o errores nuevos."""
+    regressions: List[str] = []
+    for name, base in baseline.items():
+        cur = current.get(name)
+        if cur is None:
+            continue
+        if cur["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {cur['rps']} < baseline {base['rps']}")
+        for key in ("p95_ms", "p99_ms"):
+            if cur[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {cur[key]} > baseline {base[key]}")
+        if cur["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: errors {cur['errors']} > baseline {base.get('errors', 0)}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark for catalog-api / orders-api")
+    parser.add_argument("--services", default="catalog-api,orders-api")
+    parser.add_argument("--mode", choices=["uvicorn", "inprocess"], default="uvicorn")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="peticiones medidas por endpoint")
+    parser.add_argument("--warmup", type=int, default=100, help="peticiones de calentamiento (no cuentan)")
+    parser.add_argument("--alg", choices=["RS256", "ES256", "EdDSA"], default="RS256", help="alg de las claves del emisor falso")
+    parser.add_argument("--filter", default="", help="solo escenarios cuyo nombre contenga este texto")
+    parser.add_argument("--catalog-database-url", default=None)
+    parser.add_argument("--orders-database-url", default=None)
+    parser.add_argument("--output", default=None, help="guarda los resultados (JSON)")
+    parser.add_argument("--save-baseline", default=None, metavar="NAME")
+    parser.add_argument("--compare", default=None, metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with FakeOIDCIssuer(alg=args.alg) as issuer, tempfile.TemporaryDirectory(prefix="asrp-bench-") as tmp:
+        for name in [s.strip() for s in args.services.split(",") if s.strip()]:
+            spec = SERVICES[name]
+            for scenario, r in bench_service(spec, issuer, Path(tmp), args).items():
+                results[f"{name} {scenario}"] = r
+        oidc_hits = dict(issuer.hits)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "mode": args.mode,
+            "alg": args.alg,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "oidc_hits": oidc_hits,
+        },
+        "results": results,
+    }
+    _print_table(results)
+    print(f"\nfake OIDC hits: {oidc_hits}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        (BASELINES_DIR / f"{args.save_baseline}.json").write_text(json.dumps(report, indent=2) + "\n")
+        print(f"baseline saved: bench/baselines/{args.save_baseline}.json")
+    if args.compare:
+        baseline = json.loads((BASELINES_DIR / f"{args.compare}.json").read_text())
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nno regressions vs baseline '{args.compare}' (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
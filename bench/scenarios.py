@@ -0,0 +1,86 @@
+# bench/scenarios.py
+"""Escenarios por servicio. No importa `app`: lo usan tanto el runner como el worker in-process."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SEED_ROWS = 1000
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    path: Callable[[int], str]  # i = nº de petición (para variar sku/id)
+    roles: Tuple[str, ...] = ()
+    body: Optional[Callable[[int], Dict[str, Any]]] = None
+    expected_status: int = 200
+
+
+@dataclass(frozen=True)
+class ServiceSpec:
+    name: str
+    directory: Path
+    audience: str
+    scenarios: List[Scenario] = field(default_factory=list)
+    env: Dict[str, str] = field(default_factory=dict)
+
+
+def _sku(i: int) -> str:
+    return f"BENCH-{i % SEED_ROWS:05d}"
+
+
+def _lookup_path(i: int) -> str:
+    # Pedido típico: 20 SKUs distintos en una sola llamada batched
+    return "/v1/products/lookup?" + "&".join(f"sku={_sku(i * 20 + k)}" for k in range(20))
+
+
+def _order_body(i: int) -> Dict[str, Any]:
+    return {
+        "customer_ref": f"bench-{i}",
+        "lines": [{"sku": _sku(i + k), "quantity": 1 + k, "unit_price": "9.99"} for k in range(5)],
+    }
+
+
+SERVICES: Dict[str, ServiceSpec] = {
+    "catalog-api": ServiceSpec(
+        name="catalog-api",
+        directory=REPO_ROOT / "services" / "catalog-api",
+        audience="asrp-catalog",
+        scenarios=[
+            Scenario("health", "GET", lambda i: "/health"),
+            Scenario("products.list", "GET", lambda i: "/v1/products", roles=("catalog_read",)),
+            Scenario("products.lookup[20]", "GET", _lookup_path, roles=("catalog_read",)),
+            Scenario("stock.get", "GET", lambda i: f"/v1/stock/{_sku(i)}", roles=("catalog_read",)),
+        ],
+        env={
+            "OUTBOX_RELAY_ENABLED": "false",
+            "STOCK_SWEEPER_ENABLED": "false",
+            # un único cliente (mismo token) genera toda la carga: sin rate limit para medir el servicio
+            "RATE_LIMIT_ENABLED": "false",
+        },
+    ),
+    "orders-api": ServiceSpec(
+        name="orders-api",
+        directory=REPO_ROOT / "services" / "orders-api",
+        audience="asrp-orders",
+        scenarios=[
+            Scenario("health", "GET", lambda i: "/health"),
+            Scenario("orders.list[50]", "GET", lambda i: "/v1/orders?limit=50", roles=("orders_read",)),
+            Scenario("orders.get", "GET", lambda i: f"/v1/orders/{1 + i % SEED_ROWS}", roles=("orders_read",)),
+            Scenario(
+                "orders.create[5 lines]",
+                "POST",
+                lambda i: "/v1/orders",
+                roles=("orders_write",),
+                body=_order_body,
+                expected_status=201,
+            ),
+            Scenario("reports.daily", "GET", lambda i: "/v1/reports/orders/daily", roles=("orders_read",)),
+        ],
+        env={"OUTBOX_RELAY_ENABLED": "false", "CATALOG_VALIDATION_ENABLED": "false"},
+    ),
+}
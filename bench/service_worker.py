@@ -0,0 +1,100 @@
+# bench/service_worker.py
+"""
+Se ejecuta DENTRO del directorio de un servicio (cwd = services/<svc>), porque catalog-api y
+orders-api comparten el paquete `app` y no pueden importarse en el mismo proceso.
+
+    python bench/service_worker.py seed <service>
+    python bench/service_worker.py inprocess <service>   (config JSON por stdin, resultados JSON por stdout)
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+from decimal import Decimal
+from typing import Any, Dict
+
+sys.path.insert(0, os.getcwd())
+
+from scenarios import SEED_ROWS, SERVICES, _sku  # noqa: E402
+
+
+def _seed_catalog() -> None:
+    from app import inventory, models
+    from app.core.db import Base, get_engine, get_sessionmaker
+
+    Base.metadata.create_all(get_engine())
+    with get_sessionmaker()() as db:
+        if db.query(models.Product).count():
+            return
+        db.add_all(models.Product(sku=_sku(i), name=f"Bench product {i}") for i in range(SEED_ROWS))
+        db.commit()
+        for i in range(SEED_ROWS):
+            inventory.receive_stock(db, _sku(i), 1_000_000)
+
+
+def _seed_orders() -> None:
+    from app import models, repositories
+    from app.core.db import Base, get_engine, get_sessionmaker
+    from app.schemas import OrderCreate
+
+    Base.metadata.create_all(get_engine())
+    with get_sessionmaker()() as db:
+        if db.query(models.Order).count():
+            return
+        for i in range(SEED_ROWS):
+            repositories.create_order(
+                db,
+                OrderCreate(
+                    customer_ref=f"seed-{i}",
+                    lines=[{"sku": _sku(i + k), "quantity": 1, "unit_price": Decimal("9.99")} for k in range(3)],
+                ),
+            )
+
+
+SEEDERS = {"catalog-api": _seed_catalog, "orders-api": _seed_orders}
+
+
+async def _inprocess(service: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    import httpx
+
+    from app.main import app
+    from loadgen import run_scenario
+
+    results: Dict[str, Any] = {}
+    # ASGITransport no ejecuta el lifespan: lo arrancamos a mano (warm-up incluido)
+    async with app.router.lifespan_context(app):
+        warmup = getattr(app.state, "warmup", None)
+        if warmup is not None:
+            await warmup.wait(timeout=15.0)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in SERVICES[service].scenarios:
+                if config["filter"] and config["filter"] not in scenario.name:
+                    continue
+                headers = config["headers"].get(scenario.name)
+                results[scenario.name] = await run_scenario(
+                    client,
+                    scenario,
+                    headers=headers,
+                    concurrency=config["concurrency"],
+                    requests=config["requests"],
+                    warmup=config["warmup"],
+                )
+    return results
+
+
+def main() -> None:
+    command, service = sys.argv[1], sys.argv[2]
+    if command == "seed":
+        SEEDERS[service]()
+    elif command == "inprocess":
+        config = json.load(sys.stdin)
+        print(json.dumps(asyncio.run(_inprocess(service, config))))
+    else:
+        raise SystemExit(f"unknown command: {command}")
+
+
+if __name__ == "__main__":
+    main()
@@ -56,6 +56,10 @@ const CORS_ALLOW_CREDENTIALS = (process.env.CORS_ALLOW_CREDENTIALS ?? "false").t
 const JSON_BODY_LIMIT = process.env.JSON_BODY_LIMIT ?? "1mb";
 const URLENCODED_BODY_LIMIT = process.env.URLENCODED_BODY_LIMIT ?? "1mb";
 
+// [PERF] Presupuesto por request hacia los upstreams (ms). Se propaga como X-Request-Timeout-Ms
+// (lo que queda tras auth/colas del gateway) y los servicios lo aplican a DB/httpx; 0 = sin límite.
+const UPSTREAM_TIMEOUT_MS = Number(process.env.UPSTREAM_TIMEOUT_MS ?? "10000");
+
 // Proxy debug (opc.)
 const PROXY_DEBUG = (process.env.PROXY_DEBUG ?? "false").toLowerCase() === "true";
 const proxyLogger = PROXY_DEBUG ? console : undefined;
@@ -99,6 +103,24 @@ function ensureRequestId(req: Request, res: Response, next: NextFunction) {
 }
 app.use(ensureRequestId);
 
+// =========================
+// [PERF] Deadline del request: se fija al llegar; cada upstream recibe solo lo que queda
+// =========================
+function setRequestDeadline(req: Request, _res: Response, next: NextFunction) {
+  if (UPSTREAM_TIMEOUT_MS > 0) {
+    (req as any).deadlineAt = Date.now() + UPSTREAM_TIMEOUT_MS;
+  }
+  next();
+}
+app.use(setRequestDeadline);
+
+function propagateDeadline(proxyReq: ClientRequest, req: IncomingMessage) {
+  const deadlineAt = (req as any).deadlineAt as number | undefined;
+  if (typeof deadlineAt === "number") {
+    proxyReq.setHeader("x-request-timeout-ms", String(Math.max(1, deadlineAt - Date.now())));
+  }
+}
+
 // =========================
 // CORS (Cross-Origin Resource Sharing) estricto
 // =========================
@@ -275,6 +297,8 @@ app.use(
     {
       target: CATALOG_API_URL,
       changeOrigin: true,
+      // [PERF] El gateway deja de esperar cuando se agota el presupuesto
+      ...(UPSTREAM_TIMEOUT_MS > 0 ? { proxyTimeout: UPSTREAM_TIMEOUT_MS } : {}),
       pathRewrite: (path: string) => path.replace(/^\/catalog/, ""),
 
       on: {
@@ -290,6 +314,9 @@ app.use(
             proxyReq.setHeader("x-request-id", reqId);
           }
 
+          // [PERF] Presupuesto restante => statement_timeout / timeouts en el servicio
+          propagateDeadline(proxyReq, req);
+
           const xfwd = req.headers["x-forwarded-for"];
           if (typeof xfwd === "string" && xfwd.length > 0) {
             proxyReq.setHeader("x-forwarded-for", xfwd);
@@ -318,6 +345,8 @@ app.use(
     {
       target: ORDERS_API_URL,
       changeOrigin: true,
+      // [PERF] El gateway deja de esperar cuando se agota el presupuesto
+      ...(UPSTREAM_TIMEOUT_MS > 0 ? { proxyTimeout: UPSTREAM_TIMEOUT_MS } : {}),
       pathRewrite: (path: string) => path.replace(/^\/orders/, ""),
 
       on: {
@@ -333,6 +362,9 @@ app.use(
             proxyReq.setHeader("x-request-id", reqId);
           }
 
+          // [PERF] Presupuesto restante => statement_timeout / timeouts en el servicio
+          propagateDeadline(proxyReq, req);
+
           const xfwd = req.headers["x-forwarded-for"];
           if (typeof xfwd === "string" && xfwd.length > 0) {
             proxyReq.setHeader("x-forwarded-for", xfwd);
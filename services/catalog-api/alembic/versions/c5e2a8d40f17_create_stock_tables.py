@@ -0,0 +1,58 @@
+"""create stock levels and reservations tables
+
+Revision ID: c5e2a8d40f17
+Revises: a7c3e1f09b52
+Create Date: 2026-10-19 12:05:41.218904
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e2a8d40f17'
+down_revision: Union[str, Sequence[str], None] = 'a7c3e1f09b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stock_levels',
+    sa.Column('sku', sa.String(length=64), nullable=False),
+    sa.Column('on_hand', sa.Integer(), nullable=False),
+    sa.Column('available', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.CheckConstraint('available >= 0', name='ck_stock_levels_available_non_negative'),
+    sa.CheckConstraint('available <= on_hand', name='ck_stock_levels_available_le_on_hand'),
+    sa.ForeignKeyConstraint(['sku'], ['products.sku'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('sku')
+    )
+    op.create_table('stock_reservations',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('reference', sa.String(length=64), nullable=False),
+    sa.Column('sku', sa.String(length=64), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('reference', 'sku', name='uq_stock_reservations_reference_sku')
+    )
+    # Sweeper: solo reservas activas por caducidad (índice parcial)
+    op.create_index(
+        'ix_stock_reservations_active_expires_at',
+        'stock_reservations',
+        ['expires_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'active'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stock_reservations_active_expires_at', table_name='stock_reservations')
+    op.drop_table('stock_reservations')
+    op.drop_table('stock_levels')
@@ -0,0 +1,53 @@
+"""add product change feed (change_seq + tombstones)
+
+Revision ID: e8f42b6c1d95
+Revises: c5e2a8d40f17
+Create Date: 2026-10-19 16:42:10.504318
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8f42b6c1d95'
+down_revision: Union[str, Sequence[str], None] = 'c5e2a8d40f17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Contador de una fila: su row lock ordena las escrituras => change_seq crece en orden de commit
+    op.create_table('product_change_counter',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('last_seq', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('product_tombstones',
+    sa.Column('change_seq', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('sku', sa.String(length=64), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('change_seq')
+    )
+
+    # Backfill: los productos existentes entran en el feed en orden de id
+    op.add_column('products', sa.Column('change_seq', sa.BigInteger(), nullable=True))
+    op.execute("UPDATE products SET change_seq = id")
+    op.execute(
+        "INSERT INTO product_change_counter (id, last_seq) "
+        "SELECT 1, COALESCE(MAX(change_seq), 0) FROM products"
+    )
+    op.alter_column('products', 'change_seq', nullable=False)
+    op.create_index('ix_products_change_seq', 'products', ['change_seq'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_change_seq', table_name='products')
+    op.drop_column('products', 'change_seq')
+    op.drop_table('product_tombstones')
+    op.drop_table('product_change_counter')
@@ -1,11 +1,40 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from typing import Any, Dict, Optional
 
-from app.core.auth import require_roles  # --- FIX (RBAC): protección por roles ---
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import changes, fieldsets, inventory, product_cache, repositories
+from app.core import deadline, singleflight
+from app.core.auth import (  # --- FIX (RBAC): protección por roles ---
+    get_client_roles,
+    require_roles,
+)
+from app.core.config import settings
+from app.core.db import get_db, session_scope
+from app.core.revocation import get_revocation_list
+from app.schemas import (
+    ProductChangePage,
+    ProductRead,
+    ReservationCreate,
+    ReservationRead,
+    RevocationBatch,
+    RevocationResult,
+    StockRead,
+)
 
 router = APIRouter(prefix="/v1")  # --- FIX: añade prefijo /v1 para exponer /v1/products ---
 
+_PRODUCT_LIST = TypeAdapter(list[ProductRead])
+
+
+def _read_scope(claims: Dict[str, Any]) -> str:
+    # La respuesta de estas rutas solo depende de los roles del llamante (no de quién es)
+    return singleflight.roles_scope(get_client_roles(claims, settings.oidc_audience))
+
 
 @router.get("/products", dependencies=[Depends(require_roles(["catalog_read"]))])
 async def list_products():
@@ -14,3 +43,181 @@ async def list_products():
         {"sku": "SKU-001", "name": "Demo product 1"},
         {"sku": "SKU-002", "name": "Demo product 2"},
     ]
+
+
+# [PERF] Lookup por lotes: orders-api valida N SKUs de un pedido con 1 sola llamada
+# [PERF] Single-flight: lookups idénticos concurrentes comparten 1 query + 1 serialización
+# [PERF] Caché de productos por SKU (L1 por worker + L2 compartido): solo los misses van a
+# PostgreSQL
+@router.get("/products/lookup", response_model=list[ProductRead])
+async def lookup_products(
+    request: Request,
+    response: Response,
+    sku: list[str] = Query(min_length=1, max_length=500),
+    fields: Optional[str] = Query(default=None, max_length=200),
+    claims: Dict[str, Any] = Depends(require_roles(["catalog_read"])),
+):
+    unique_skus = list(dict.fromkeys(s.strip() for s in sku if s.strip()))
+    try:
+        columns = fieldsets.parse_fields(fields, ProductRead)
+    except fieldsets.InvalidFields as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "invalid_fields",
+                "fields": list(e.unknown),
+                "allowed": list(e.allowed),
+            },
+        )
+    # [PERF] Sparse fieldset (?fields=sku,name): SELECT + serialización solo de esos campos
+    adapter = (
+        _PRODUCT_LIST if columns is None else fieldsets.partial_list_adapter(ProductRead, columns)
+    )
+
+    def render() -> bytes:
+        with session_scope() as db:
+            if columns is None:
+                rows = repositories.get_products_by_skus(db, unique_skus)
+            else:
+                rows = repositories.get_products_by_skus(db, unique_skus, columns=columns)
+            return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+    async def render_cached() -> bytes:
+        return await product_cache.lookup_json(unique_skus, columns)
+
+    return await singleflight.respond(
+        request,
+        response,
+        _read_scope(claims),
+        render_cached if settings.product_cache_enabled or settings.snapshot_enabled else render,
+        enabled=settings.coalesce_enabled,
+    )
+
+
+# [PERF] Feed incremental: los clientes sincronizan en O(cambios) en vez de releer el catálogo.
+# Sin cambios y con ?wait=N, long-poll hasta el siguiente commit (o N s / deadline del gateway).
+@router.get(
+    "/products/changes",
+    response_model=ProductChangePage,
+    dependencies=[Depends(require_roles(["catalog_read"]))],
+)
+async def product_changes(
+    since: Optional[str] = Query(default=None, max_length=20),
+    limit: int = Query(default=100, ge=1, le=1000),
+    wait: float = Query(default=0.0, ge=0.0, le=300.0),
+):
+    try:
+        cursor = changes.parse_cursor(since)
+    except changes.InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    def read() -> ProductChangePage:
+        with session_scope() as db:
+            return changes.read_page(db, cursor, limit)
+
+    page = await run_in_threadpool(read)
+    budget = changes.wait_budget(wait, deadline.remaining())
+    if page.changes or budget <= 0:
+        return page
+
+    notifier = changes.get_change_notifier()
+    if notifier.waiters >= settings.changes_max_waiters:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many pending long-polls",
+            headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+        )
+    if await notifier.wait(cursor, budget):
+        page = await run_in_threadpool(read)
+    return page
+
+
+# =========================
+# Stock / reservas
+# =========================
+
+@router.get("/stock/{sku}", response_model=StockRead)
+async def get_stock(
+    sku: str,
+    request: Request,
+    response: Response,
+    claims: Dict[str, Any] = Depends(require_roles(["catalog_read"])),
+):
+    def render() -> bytes:
+        with session_scope() as db:
+            level = inventory.get_stock(db, sku)
+            if level is None:
+                raise HTTPException(status_code=404, detail="Stock not found")
+            stock = StockRead(sku=level.sku, on_hand=level.on_hand, available=level.available)
+        return stock.model_dump_json().encode()
+
+    return await singleflight.respond(
+        request, response, _read_scope(claims), render, enabled=settings.coalesce_enabled
+    )
+
+
+@router.post(
+    "/stock/reservations",
+    response_model=ReservationRead,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_roles(["catalog_write"]))],
+)
+def create_reservation(payload: ReservationCreate, db: Session = Depends(get_db)):
+    try:
+        reservation = inventory.reserve(
+            db,
+            payload.reference,
+            [(ln.sku, ln.quantity) for ln in payload.lines],
+            ttl_seconds=payload.ttl_seconds,
+        )
+    except inventory.InsufficientStock as e:
+        raise HTTPException(status_code=409, detail={"error": "insufficient_stock", "sku": e.sku})
+    except inventory.ReservationExists:
+        raise HTTPException(status_code=409, detail={"error": "reservation_exists"})
+    return ReservationRead(
+        reference=reservation.reference,
+        expires_at=reservation.expires_at,
+        lines=reservation.lines,
+        available=reservation.available,
+    )
+
+
+@router.post(
+    "/stock/reservations/{reference}/confirm",
+    dependencies=[Depends(require_roles(["catalog_write"]))],
+)
+def confirm_reservation(reference: str, db: Session = Depends(get_db)):
+    try:
+        lines = inventory.confirm(db, reference)
+    except inventory.ReservationNotFound:
+        raise HTTPException(status_code=404, detail="Active reservation not found")
+    return {"reference": reference, "status": "confirmed", "lines": lines}
+
+
+@router.delete(
+    "/stock/reservations/{reference}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(require_roles(["catalog_write"]))],
+)
+def release_reservation(reference: str, db: Session = Depends(get_db)):
+    try:
+        inventory.release(db, reference)
+    except inventory.ReservationNotFound:
+        raise HTTPException(status_code=404, detail="Active reservation not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+# =========================
+# Revocaciones (push desde el IdP / identity)
+# =========================
+
+@router.post(
+    "/internal/revocations",
+    response_model=RevocationResult,
+    dependencies=[Depends(require_roles([settings.revocation_webhook_role]))],
+)
+async def push_revocations(payload: RevocationBatch):
+    # Solo memoria local (sin I/O): aplica en este worker al instante
+    revocations = get_revocation_list()
+    applied = revocations.apply(item.model_dump() for item in payload.revocations)
+    return RevocationResult(applied=applied, size=len(revocations))
@@ -0,0 +1,253 @@
+# services/catalog-api/app/changes.py
+"""
+Feed incremental de cambios de productos (GET /v1/products/changes?since=<cursor>).
+
+- Cada alta/modificación de un Product recibe un `change_seq` nuevo; cada borrado deja una fila en
+  `product_tombstones` con su propio `change_seq`. Lo asigna un listener before_flush registrado en
+  el sessionmaker de la app (`register`, desde core.db): cualquier write path ORM entra en el feed
+  sin tocar los endpoints.
+- Las secuencias salen de `product_change_counter` (fila única): el UPDATE bloquea la fila hasta el
+  commit, así que crecen en orden de commit y un cursor nunca se salta un cambio.
+- Una página = productos con change_seq > cursor + tombstones con change_seq > cursor (ambos por
+  índice), mezclados en orden. Un producto modificado N veces aparece una vez (su última versión):
+  el cliente sincroniza en O(cambios), no O(catálogo).
+- Long-poll (`wait`): sin cambios, la request espera a un commit local (after_commit) o a que el
+  sondeo del contador (uno por worker, compartido por todas las esperas) vea uno de otra réplica.
+
+UPDATE/DELETE masivos fuera del ORM no pasan por el listener y no entran en el feed.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.db import session_scope
+from app.core.logging import get_logger
+from app.models import Product, ProductChangeCounter, ProductTombstone
+from app.schemas import ProductChange, ProductChangePage, ProductRead
+
+logger = get_logger(__name__)
+
+_PENDING_SEQ_KEY = "product_change_seq"
+
+
+class InvalidCursor(ValueError):
+    """Cursor que no es una secuencia del feed."""
+
+
+def parse_cursor(raw: Optional[str]) -> int:
+    if raw is None or raw == "":
+        return 0  # desde el principio: el catálogo entero, paginado
+    if not raw.isdigit():
+        raise InvalidCursor(raw)
+    return int(raw)
+
+
+# =========================
+# Write side (listeners ORM)
+# =========================
+
+def _allocate(conn: Connection, n: int) -> int:
+    """Reserva n secuencias; devuelve la última. Bloquea la fila del contador hasta el commit."""
+    last = conn.execute(
+        update(ProductChangeCounter)
+        .where(ProductChangeCounter.id == 1)
+        .values(last_seq=ProductChangeCounter.last_seq + n)
+        .returning(ProductChangeCounter.last_seq)
+    ).scalar()
+    if last is None:
+        # DB creada sin la migración (tests con create_all): la fila se crea con la primera
+        # escritura
+        conn.execute(insert(ProductChangeCounter).values(id=1, last_seq=n))
+        last = n
+    return last
+
+
+def _stamp(session: Session, flush_context, instances) -> None:
+    upserts = [o for o in session.new if isinstance(o, Product)]
+    upserts += [o for o in session.dirty if isinstance(o, Product) and session.is_modified(o)]
+    deleted = [o for o in session.deleted if isinstance(o, Product)]
+    if not upserts and not deleted:
+        return
+    last = _allocate(session.connection(), len(upserts) + len(deleted))
+    seq = itertools.count(last - len(upserts) - len(deleted) + 1)
+    for product in upserts:
+        product.change_seq = next(seq)
+    now = datetime.now(timezone.utc)
+    for product in deleted:
+        session.add(
+            ProductTombstone(
+                change_seq=next(seq), product_id=product.id, sku=product.sku, deleted_at=now
+            )
+        )
+    session.info[_PENDING_SEQ_KEY] = last
+
+
+def _notify(session: Session) -> None:
+    last = session.info.pop(_PENDING_SEQ_KEY, None)
+    if last is not None and get_change_notifier.cache_info().currsize:
+        get_change_notifier().notify(last)
+
+
+def _discard(session: Session) -> None:
+    session.info.pop(_PENDING_SEQ_KEY, None)
+
+
+_LISTENERS = (("before_flush", _stamp), ("after_commit", _notify), ("after_rollback", _discard))
+
+
+def register(target: Any) -> None:
+    """
+    [FIX] Engancha los listeners a un sessionmaker concreto (el de la app, desde
+    core.db.get_sessionmaker), no a todas las Session del proceso. Idempotente. Las sesiones
+    sin registrar no pueden insertar Products (change_seq es NOT NULL): falla ruidosa en vez de
+    un hueco silencioso en el feed.
+    """
+    for name, fn in _LISTENERS:
+        if not event.contains(target, name, fn):
+            event.listen(target, name, fn)
+
+
+# =========================
+# Read side
+# =========================
+
+def read_page(db: Session, since: int, limit: int) -> ProductChangePage:
+    products = db.execute(
+        select(Product)
+        .where(Product.change_seq > since)
+        .order_by(Product.change_seq)
+        .limit(limit + 1)
+    ).scalars().all()
+    tombstones = db.execute(
+        select(ProductTombstone)
+        .where(ProductTombstone.change_seq > since)
+        .order_by(ProductTombstone.change_seq)
+        .limit(limit + 1)
+    ).scalars().all()
+    upserts = (
+        ProductChange(
+            seq=p.change_seq,
+            op="upsert",
+            id=p.id,
+            sku=p.sku,
+            product=ProductRead.model_validate(p, from_attributes=True),
+        )
+        for p in products
+    )
+    deletes = (
+        ProductChange(seq=t.change_seq, op="delete", id=t.product_id, sku=t.sku)
+        for t in tombstones
+    )
+    # Ambas listas ya vienen ordenadas por change_seq (índice): merge sin reordenar
+    changes = list(itertools.islice(heapq.merge(upserts, deletes, key=lambda c: c.seq), limit + 1))
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    return ProductChangePage(
+        changes=changes,
+        next_cursor=str(changes[-1].seq if changes else since),
+        has_more=has_more,
+    )
+
+
+def _latest_seq() -> int:
+    with session_scope() as db:
+        return db.execute(
+            select(ProductChangeCounter.last_seq).where(ProductChangeCounter.id == 1)
+        ).scalar() or 0
+
+
+class ChangeNotifier:
+    """
+    Espera de los long-polls de este worker. Un solo sondeo del contador para todas las esperas
+    (no uno por request) y despertar inmediato con los commits locales (thread-safe).
+    """
+
+    def __init__(self, probe: Callable[[], int], *, poll_interval: float = 1.0) -> None:
+        self._probe = probe
+        self._poll_interval = poll_interval
+        self.latest = 0
+        self.waiters = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._poller: Optional[asyncio.Task] = None
+
+    def notify(self, seq: int) -> None:
+        """Desde cualquier thread (after_commit corre en el threadpool de los endpoints sync)."""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._advance, seq)
+        except RuntimeError:
+            pass  # loop cerrado (shutdown)
+
+    def _advance(self, seq: int) -> None:
+        if seq > self.latest:
+            self.latest = seq
+            changed, self._changed = self._changed, asyncio.Event()
+            if changed is not None:
+                changed.set()
+
+    async def wait(self, since: int, timeout: float) -> bool:
+        """True si hay cambios posteriores a `since` antes de `timeout` segundos."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._changed, self._poller = loop, asyncio.Event(), None
+        deadline_at = time.monotonic() + timeout
+        self.waiters += 1
+        try:
+            if self._poller is None:
+                self._poller = asyncio.create_task(self._poll(), name="catalog-changes-poll")
+            while True:
+                changed = self._changed  # capturado ANTES de comparar: no se pierde un aviso
+                if self.latest > since:
+                    return True
+                left = deadline_at - time.monotonic()
+                if left <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=left)
+                except asyncio.TimeoutError:
+                    return False
+        finally:
+            self.waiters -= 1
+
+    async def _poll(self) -> None:
+        try:
+            while self.waiters > 0:
+                try:
+                    self._advance(await run_in_threadpool(self._probe))
+                except Exception as e:  # noqa: BLE001 - DB caída: las esperas acaban por timeout
+                    logger.warning("Change feed poll failed", extra={"error": str(e)})
+                await asyncio.sleep(self._poll_interval)
+        finally:
+            self._poller = None
+
+
+@lru_cache(maxsize=1)
+def get_change_notifier() -> ChangeNotifier:
+    return ChangeNotifier(_latest_seq, poll_interval=settings.changes_poll_seconds)
+
+
+def wait_budget(requested: float, deadline_left: Optional[float]) -> float:
+    """
+    Espera efectiva: acotada por CHANGES_MAX_WAIT_SECONDS y por el deadline del request (con
+    margen).
+    """
+    budget = min(requested, settings.changes_max_wait_seconds)
+    if deadline_left is not None:
+        budget = min(budget, deadline_left - 0.25)
+    return max(0.0, budget)
+
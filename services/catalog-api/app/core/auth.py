@@ -1,19 +1,25 @@
 # services/catalog-api/app/core/auth.py
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Dict, Iterable, Optional
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from jwt.exceptions import (
     ExpiredSignatureError,
     InvalidAudienceError,
     InvalidIssuerError,
+    InvalidTokenError,
     PyJWTError,
 )
 
+from app.core import ratelimit
 from app.core.config import settings
+from app.core.introspection import TokenIntrospector
 from app.core.logging import get_logger
+from app.core.revocation import get_revocation_list
 from app.core.security import OIDCJWKSVerifier
+from app.core.shared_auth import build_shared_auth_cache
 
 logger = get_logger(__name__)
 
@@ -26,10 +32,36 @@ def _normalize_discovery_url(raw: str) -> str:
 
 
 # [FIX] Verificador PyJWT unificado con Orders, soporta OIDC_JWKS_URL (interno)
-_verifier = OIDCJWKSVerifier(
-    _normalize_discovery_url(settings.oidc_discovery_url),
-    jwks_url_override=getattr(settings, "oidc_jwks_url", None),
-)
+# [PERF] Lazy: no se construye al importar app.main; el warm-up (lifespan) lo precarga.
+@lru_cache(maxsize=1)
+def get_verifier() -> OIDCJWKSVerifier:
+    return OIDCJWKSVerifier(
+        _normalize_discovery_url(settings.oidc_discovery_url),
+        jwks_url_override=getattr(settings, "oidc_jwks_url", None),
+        introspector=_build_introspector(),
+        introspection_url_override=settings.oidc_introspection_url,
+        shared_cache=build_shared_auth_cache(
+            settings.oidc_shared_cache_enabled,
+            settings.oidc_shared_cache_dir,
+            slots=settings.oidc_shared_cache_slots,
+            slot_bytes=settings.oidc_shared_cache_slot_bytes,
+            max_ttl_seconds=settings.oidc_shared_cache_max_ttl_seconds,
+        ),
+    )
+
+
+def _build_introspector() -> Optional[TokenIntrospector]:
+    # Tokens opacos (integraciones): RFC 7662 contra Keycloak, solo si se habilita
+    if not settings.oidc_introspection_enabled:
+        return None
+    return TokenIntrospector(
+        client_id=settings.oidc_introspection_client_id or settings.oidc_audience,
+        client_secret=settings.oidc_introspection_client_secret,
+        max_entries=settings.oidc_introspection_cache_max_entries,
+        max_ttl=settings.oidc_introspection_cache_seconds,
+        negative_ttl=settings.oidc_introspection_negative_cache_seconds,
+        timeout_seconds=getattr(settings, "oidc_http_timeout_seconds", 3.0),
+    )
 
 
 def _parse_bearer(auth_header: Optional[str]) -> Optional[str]:
@@ -57,13 +89,17 @@ async def get_bearer_token(request: Request) -> str:
 
 async def get_current_claims(token: str = Depends(get_bearer_token)) -> Dict[str, Any]:
     try:
-        return await _verifier.decode_and_verify(
+        claims = await get_verifier().decode_and_verify(
             token,
             audience_expected=settings.oidc_audience,
             issuer_expected=settings.oidc_issuer_expected,
             leeway_seconds=settings.oidc_leeway_seconds,
             algorithms=settings.oidc_algorithms_list,
         )
+        # Logout / revocación admin: lookup local O(1), sin llamar a Keycloak
+        if get_revocation_list().is_revoked(claims):
+            raise InvalidTokenError("Token has been revoked")
+        return claims
     except (ExpiredSignatureError, InvalidIssuerError, InvalidAudienceError, PyJWTError) as e:
         logger.info("Token validation failed: %s", e)
         raise HTTPException(
@@ -92,13 +128,20 @@ def get_client_roles(claims: Dict[str, Any], client_id: str) -> set[str]:
 def require_roles(required: Iterable[str]):
     required_set = {str(r) for r in required}
 
-    async def _dependency(claims: Dict[str, Any] = Depends(get_current_claims)) -> Dict[str, Any]:
+    async def _dependency(
+        request: Request,
+        response: Response,
+        claims: Dict[str, Any] = Depends(get_current_claims),
+    ) -> Dict[str, Any]:
         roles = get_client_roles(claims, settings.oidc_audience)
         if not required_set.issubset(roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions",
             )
+        # [PERF] Rate limit por cliente (azp/sub verificados) tras el RBAC: 429 + RateLimit-*
+        if settings.rate_limit_enabled:
+            await ratelimit.enforce(request, response, claims, roles)
         return claims
 
     return _dependency
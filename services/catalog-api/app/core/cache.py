@@ -0,0 +1,458 @@
+# services/catalog-api/app/core/cache.py
+"""
+Caché de dos niveles con invalidación por pub/sub entre réplicas.
+
+    L1: LRU en proceso (por worker, TTL corto)
+      ->  L2: store compartido (Redis-compatible)
+      ->  loader (DB)
+
+- Claves versionadas: `<ns>:v<schema>:g<generación>:<id>`. `schema` cambia cuando cambia el formato
+  serializado (un deploy nuevo no lee entradas viejas); la generación vive en el store compartido y
+  `invalidate_all()` la incrementa (invalida todo el namespace sin SCAN/DEL masivo; lo viejo caduca
+  por TTL).
+- Escrituras: `invalidate(ids)` borra L1 local, DEL en L2 y publica los ids en el canal; cada
+  réplica suscrita borra su L1 al recibirlo (milisegundos). El L1 tiene TTL corto como red de
+  seguridad si se pierde un mensaje; al reconectar la suscripción se vacía el L1 entero.
+- Relleno tras un miss: si hubo una invalidación mientras se cargaba, el resultado se devuelve pero
+  no se guarda (evita reinstalar un valor viejo leído antes del commit).
+- Si el store compartido falla, se degrada a L1 + loader (nunca un error de caché tumba un request).
+
+Backends del L2 (protocolo SharedCache): InMemorySharedCache (en proceso; tests / una sola réplica)
+y RedisSharedCache (app.core.resp).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+)
+
+from app.core.logging import get_logger
+from app.core.resp import RespPool
+
+logger = get_logger(__name__)
+
+Loader = Callable[[List[str]], Awaitable[Dict[str, str]]]
+
+
+class LocalLRU:
+    """
+    LRU acotada con TTL, indexada por id (la generación va en la entrada: una entrada de otra
+    generación es un miss). Con lock: la invalidación llega también desde threads (after_commit).
+    """
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, item_id: str, generation: int) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(item_id)
+            if entry is None:
+                return None
+            expires, entry_generation, value = entry
+            if entry_generation != generation or time.monotonic() >= expires:
+                del self._entries[item_id]
+                return None
+            self._entries.move_to_end(item_id)
+            return value
+
+    def put(self, item_id: str, generation: int, value: str) -> None:
+        with self._lock:
+            self._entries[item_id] = (time.monotonic() + self._ttl, generation, value)
+            self._entries.move_to_end(item_id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def pop_many(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for item_id in ids:
+                self._entries.pop(item_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedCache(Protocol):
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[str]]: ...
+
+    async def set_many(self, items: Mapping[str, str], ttl_seconds: float) -> None: ...
+
+    async def delete(self, keys: Sequence[str]) -> None: ...
+
+    async def get(self, key: str) -> Optional[str]: ...
+
+    async def incr(self, key: str) -> int: ...
+
+    async def publish(self, channel: str, message: str) -> None: ...
+
+    # 1er elemento None = suscripción confirmada; después, los mensajes del canal
+    def listen(self, channel: str) -> AsyncIterator[Optional[str]]: ...
+
+    async def aclose(self) -> None: ...
+
+
+class InMemorySharedCache:
+    """
+    L2 en proceso con la semántica del store compartido (TTL, INCR, pub/sub). Varias TwoTierCache
+    sobre la misma instancia se comportan como réplicas detrás de un mismo Redis.
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[Optional[float], str]] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self.fail = False  # tests: simula caída del store
+
+    def _check(self) -> None:
+        if self.fail:
+            raise ConnectionError("shared cache unavailable")
+
+    def _live(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires is not None and time.monotonic() >= expires:
+            del self._data[key]
+            return None
+        return value
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        self._check()
+        return [self._live(k) for k in keys]
+
+    async def set_many(self, items: Mapping[str, str], ttl_seconds: float) -> None:
+        self._check()
+        expires = time.monotonic() + ttl_seconds
+        for key, value in items.items():
+            self._data[key] = (expires, value)
+
+    async def delete(self, keys: Sequence[str]) -> None:
+        self._check()
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def get(self, key: str) -> Optional[str]:
+        self._check()
+        return self._live(key)
+
+    async def incr(self, key: str) -> int:
+        self._check()
+        value = int(self._live(key) or 0) + 1
+        self._data[key] = (None, str(value))
+        return value
+
+    async def publish(self, channel: str, message: str) -> None:
+        self._check()
+        for queue in self._subscribers.get(channel, []):
+            queue.put_nowait(message)
+
+    async def listen(self, channel: str) -> AsyncIterator[Optional[str]]:
+        self._check()
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, []).append(queue)
+        try:
+            yield None
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].remove(queue)
+
+    async def aclose(self) -> None:
+        return None
+
+
+class RedisSharedCache:
+    """L2 Redis-compatible: MGET / SET PX en pipeline / DEL / INCR / PUBLISH, SUBSCRIBE dedicado."""
+
+    def __init__(self, url: str, *, timeout_seconds: float = 0.05, pool_size: int = 8) -> None:
+        self._pool = RespPool(url, timeout_seconds=timeout_seconds, pool_size=pool_size)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+        return await self._pool.execute("MGET", *keys)
+
+    async def set_many(self, items: Mapping[str, str], ttl_seconds: float) -> None:
+        if items:
+            ttl_ms = max(1, int(ttl_seconds * 1000))
+            await self._pool.pipeline([("SET", k, v, "PX", ttl_ms) for k, v in items.items()])
+
+    async def delete(self, keys: Sequence[str]) -> None:
+        if keys:
+            await self._pool.execute("DEL", *keys)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._pool.execute("GET", key)
+
+    async def incr(self, key: str) -> int:
+        return int(await self._pool.execute("INCR", key))
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._pool.execute("PUBLISH", channel, message)
+
+    def listen(self, channel: str) -> AsyncIterator[Optional[str]]:
+        return self._pool.subscribe(channel)
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+class TwoTierCache:
+    def __init__(
+        self,
+        shared: Optional[SharedCache],
+        *,
+        namespace: str,
+        schema_version: int = 1,
+        local_max_entries: int = 50_000,
+        local_ttl_seconds: float = 30.0,
+        shared_ttl_seconds: float = 300.0,
+        channel: Optional[str] = None,
+    ) -> None:
+        self._shared = shared
+        self._namespace = namespace
+        self._schema = schema_version
+        self._local = LocalLRU(max_entries=local_max_entries, ttl_seconds=local_ttl_seconds)
+        self._shared_ttl = shared_ttl_seconds
+        self._channel = channel or f"{namespace}:invalidate"
+        self._generation = 0
+        self._epoch = 0  # nº de invalidaciones vistas (local o remota)
+        self._node_id = uuid.uuid4().hex
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed: Optional[asyncio.Event] = None
+        self._last_error_log = 0.0
+        self.hits_local = 0
+        self.hits_shared = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def key(self, item_id: str) -> str:
+        return f"{self._namespace}:v{self._schema}:g{self._generation}:{item_id}"
+
+    def _generation_key(self) -> str:
+        return f"{self._namespace}:v{self._schema}:generation"
+
+    def _shared_failed(self, op: str, exc: BaseException) -> None:
+        now = time.monotonic()
+        if now - self._last_error_log >= 10.0:
+            self._last_error_log = now
+            logger.warning("shared cache %s failed (%s): degrading to local tier", op, exc)
+
+    # -------------------------
+    # Lecturas
+    # -------------------------
+    async def get_many(self, ids: Sequence[str], loader: Loader) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        missing: List[str] = []
+        for item_id in ids:
+            value = self._local.get(item_id, self._generation)
+            if value is None:
+                missing.append(item_id)
+            else:
+                found[item_id] = value
+        self.hits_local += len(found)
+        if not missing:
+            return found
+
+        epoch = self._epoch
+        if self._shared is not None:
+            try:
+                values = await self._shared.get_many([self.key(i) for i in missing])
+            except Exception as e:  # noqa: BLE001 - fail-open a DB
+                self._shared_failed("read", e)
+                values = [None] * len(missing)
+            still_missing: List[str] = []
+            for item_id, value in zip(missing, values):
+                if value is None:
+                    still_missing.append(item_id)
+                else:
+                    found[item_id] = value
+                    self.hits_shared += 1
+                    if epoch == self._epoch:
+                        self._local.put(item_id, self._generation, value)
+            missing = still_missing
+        if not missing:
+            return found
+
+        self.misses += len(missing)
+        loaded = await loader(missing)
+        found.update(loaded)
+        if loaded and epoch == self._epoch:
+            for item_id, value in loaded.items():
+                self._local.put(item_id, self._generation, value)
+            if self._shared is not None:
+                try:
+                    entries = {self.key(i): v for i, v in loaded.items()}
+                    await self._shared.set_many(entries, self._shared_ttl)
+                except Exception as e:  # noqa: BLE001
+                    self._shared_failed("write", e)
+        return found
+
+    # -------------------------
+    # Invalidación
+    # -------------------------
+    def _evict_local(self, ids: Iterable[str]) -> None:
+        self._epoch += 1
+        self._local.pop_many(ids)
+
+    async def invalidate(self, ids: Sequence[str]) -> None:
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return
+        self._evict_local(ids)
+        if self._shared is None:
+            return
+        try:
+            await self._shared.delete([self.key(i) for i in ids])
+            message = json.dumps({"origin": self._node_id, "ids": ids})
+            await self._shared.publish(self._channel, message)
+        except Exception as e:  # noqa: BLE001 - las otras réplicas caducan por TTL del L1
+            self._shared_failed("invalidate", e)
+
+    async def invalidate_all(self) -> None:
+        self._epoch += 1
+        self._local.clear()
+        if self._shared is None:
+            return
+        self._generation = await self._shared.incr(self._generation_key())
+        message = json.dumps({"origin": self._node_id, "generation": self._generation})
+        await self._shared.publish(self._channel, message)
+
+    def invalidate_nowait(self, ids: Sequence[str]) -> None:
+        """
+        Thread-safe (p. ej. after_commit en un endpoint sync): el L1 de este worker se limpia ya; el
+        DEL en L2 y el PUBLISH se programan en el event loop de la app.
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return
+        self._evict_local(ids)
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        coro = self.invalidate(ids)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.create_task(coro)
+        else:
+            asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def _on_message(self, raw: str) -> None:
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        if message.get("origin") == self._node_id:
+            return
+        if "generation" in message:
+            self._generation = max(self._generation, int(message["generation"]))
+            self._epoch += 1
+            self._local.clear()
+        elif message.get("ids"):
+            self._evict_local(str(i) for i in message["ids"])
+
+    # -------------------------
+    # Ciclo de vida
+    # -------------------------
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        if self._shared is None or self._listener is not None:
+            return
+        self._subscribed = asyncio.Event()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def wait_subscribed(self, timeout: float = 1.0) -> bool:
+        if self._subscribed is None:
+            return False
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _listen(self) -> None:
+        backoff = 0.5
+        while True:
+            try:
+                async for raw in self._shared.listen(self._channel):
+                    if raw is not None:
+                        self._on_message(raw)
+                        continue
+                    # Suscritos: la generación se lee después, así no se pierde ningún INCR
+                    # intermedio
+                    self._generation = int(await self._shared.get(self._generation_key()) or 0)
+                    self._subscribed.set()
+                    backoff = 0.5
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # noqa: BLE001
+                self._shared_failed("subscribe", e)
+            # Sin suscripción se pudieron perder invalidaciones: el L1 no es fiable
+            self._subscribed.clear()
+            self._epoch += 1
+            self._local.clear()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 10.0)
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except BaseException:  # noqa: BLE001
+                pass
+            self._listener = None
+        if self._shared is not None:
+            await self._shared.aclose()
+        self._loop = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "local_entries": len(self._local),
+            "hits_local": self.hits_local,
+            "hits_shared": self.hits_shared,
+            "misses": self.misses,
+            "generation": self._generation,
+        }
+
+
+def build_shared_cache(
+    backend: str, url: Optional[str], *, timeout_seconds: float
+) -> Optional[SharedCache]:
+    backend = (backend or "memory").strip().lower()
+    if backend == "redis":
+        if not url:
+            raise RuntimeError("PRODUCT_CACHE_BACKEND=redis requires PRODUCT_CACHE_REDIS_URL")
+        return RedisSharedCache(url, timeout_seconds=timeout_seconds)
+    if backend in ("memory", "local", "none"):
+        return None
+    raise RuntimeError(f"Unknown cache backend: {backend!r}")
@@ -27,6 +27,8 @@ class Settings(BaseSettings):
     # --- Service ---
     app_name: str = Field(default="catalog-api", validation_alias="APP_NAME")
     app_version: str = Field(default="0.1.0", validation_alias="APP_VERSION")  # --- FIX: requerido por app/main.py ---
+    # leído por app/core/logging.py
+    log_level: str = Field(default="INFO", validation_alias="LOG_LEVEL")
 
     # --- OIDC (OpenID Connect) / Keycloak ---
     oidc_realm: str = Field(
@@ -74,7 +76,37 @@ class Settings(BaseSettings):
     oidc_leeway_seconds: int = Field(default=10, validation_alias="OIDC_LEEWAY_SECONDS")
 
     # Algorithms accepted for JWT (JSON Web Token) signature verification
-    oidc_algorithms: str = Field(default="RS256", validation_alias="OIDC_ALGORITHMS")
+    # JWKS con algoritmos mixtos: la clave se elige por kid + alg (HS*/none nunca se aceptan)
+    oidc_algorithms: str = Field(default="RS256,ES256,EdDSA", validation_alias="OIDC_ALGORITHMS")
+
+    # RFC 7662 introspection para tokens opacos (off por defecto). Credenciales de un cliente
+    # confidencial de Keycloak; el endpoint sale de discovery salvo override.
+    oidc_introspection_enabled: bool = Field(
+        default=False,
+        validation_alias="OIDC_INTROSPECTION_ENABLED",
+    )
+    oidc_introspection_url: Optional[str] = Field(
+        default=None,
+        validation_alias="OIDC_INTROSPECTION_URL",
+    )
+    oidc_introspection_client_id: Optional[str] = Field(
+        default=None,
+        validation_alias="OIDC_INTROSPECTION_CLIENT_ID",
+    )
+    oidc_introspection_client_secret: Optional[str] = Field(
+        default=None, validation_alias="OIDC_INTROSPECTION_CLIENT_SECRET"
+    )
+    # [PERF] Cache: positivo hasta min(exp, N s), negativo N s, LRU acotada
+    oidc_introspection_cache_seconds: float = Field(
+        default=300.0,
+        validation_alias="OIDC_INTROSPECTION_CACHE_SECONDS",
+    )
+    oidc_introspection_negative_cache_seconds: float = Field(
+        default=30.0, validation_alias="OIDC_INTROSPECTION_NEGATIVE_CACHE_SECONDS"
+    )
+    oidc_introspection_cache_max_entries: int = Field(
+        default=10_000, validation_alias="OIDC_INTROSPECTION_CACHE_MAX_ENTRIES"
+    )
 
     @property
     def oidc_discovery_url(self) -> str:
@@ -144,6 +176,233 @@ class Settings(BaseSettings):
         """
         return self.database_url_resolved
 
+    # [PERF] Pool de conexiones (se pre-calienta en el arranque; ver app/core/warmup.py)
+    db_pool_size: int = Field(default=5, validation_alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, validation_alias="DB_MAX_OVERFLOW")
+    db_pool_warm_connections: int = Field(default=2, validation_alias="DB_POOL_WARM_CONNECTIONS")
+
+    # -------------------------
+    # Transactional outbox + relay
+    # -------------------------
+    # Sin relay por defecto: con él activo, OUTBOX_SINK (file|http) es obligatorio
+    outbox_relay_enabled: bool = Field(default=False, validation_alias="OUTBOX_RELAY_ENABLED")
+    outbox_sink: str = Field(default="", validation_alias="OUTBOX_SINK")  # file|http
+    outbox_file_path: str = Field(
+        default="/tmp/catalog-api-outbox.jsonl",
+        validation_alias="OUTBOX_FILE_PATH",
+    )
+    outbox_http_url: Optional[str] = Field(default=None, validation_alias="OUTBOX_HTTP_URL")
+    outbox_batch_size: int = Field(default=100, validation_alias="OUTBOX_BATCH_SIZE")
+    outbox_poll_interval_seconds: float = Field(
+        default=1.0,
+        validation_alias="OUTBOX_POLL_INTERVAL_SECONDS",
+    )
+
+    # -------------------------
+    # Stock reservations (holds con caducidad + sweeper)
+    # -------------------------
+    stock_reservation_ttl_seconds: int = Field(
+        default=900,
+        validation_alias="STOCK_RESERVATION_TTL_SECONDS",
+    )
+    stock_sweeper_enabled: bool = Field(default=True, validation_alias="STOCK_SWEEPER_ENABLED")
+    stock_sweeper_interval_seconds: float = Field(
+        default=30.0,
+        validation_alias="STOCK_SWEEPER_INTERVAL_SECONDS",
+    )
+    stock_sweeper_batch_size: int = Field(default=500, validation_alias="STOCK_SWEEPER_BATCH_SIZE")
+
+    # -------------------------
+    # Caché OIDC compartida por los workers del pod (PERF): JWKS + tokens ya verificados
+    # -------------------------
+    oidc_shared_cache_enabled: bool = Field(
+        default=False,
+        validation_alias="OIDC_SHARED_CACHE_ENABLED",
+    )
+    # Mismo directorio para todos los workers del pod; mejor en tmpfs (/dev/shm, emptyDir
+    # medium=Memory)
+    oidc_shared_cache_dir: str = Field(
+        default="/tmp/catalog-api/oidc",
+        validation_alias="OIDC_SHARED_CACHE_DIR",
+    )
+    # Tamaño fijo: slots x bytes (un token cuyos claims no caben en un slot simplemente no se
+    # comparte)
+    oidc_shared_cache_slots: int = Field(default=4096, validation_alias="OIDC_SHARED_CACHE_SLOTS")
+    oidc_shared_cache_slot_bytes: int = Field(
+        default=2048,
+        validation_alias="OIDC_SHARED_CACHE_SLOT_BYTES",
+    )
+    # Máximo que se reutiliza una verificación (acotado además por el exp del token)
+    oidc_shared_cache_max_ttl_seconds: float = Field(
+        default=300.0,
+        validation_alias="OIDC_SHARED_CACHE_MAX_TTL_SECONDS",
+    )
+
+    # -------------------------
+    # Revocaciones (jti / sid)
+    # -------------------------
+    # Feed incremental opcional (GET ?since=<cursor> -> {"cursor", "revocations": [...]})
+    revocation_feed_url: Optional[str] = Field(default=None, validation_alias="REVOCATION_FEED_URL")
+    revocation_poll_interval_seconds: float = Field(
+        default=5.0,
+        validation_alias="REVOCATION_POLL_INTERVAL_SECONDS",
+    )
+    # Sin expires_at en el evento: se guarda esto (>= vida máxima de un access token)
+    revocation_retention_seconds: float = Field(
+        default=3600.0,
+        validation_alias="REVOCATION_RETENTION_SECONDS",
+    )
+    # Rol de cliente exigido por el webhook POST /v1/internal/revocations
+    revocation_webhook_role: str = Field(
+        default="revocations_write",
+        validation_alias="REVOCATION_WEBHOOK_ROLE",
+    )
+
+    # -------------------------
+    # Admission control / load shedding (PERF)
+    # -------------------------
+    admission_enabled: bool = Field(default=True, validation_alias="ADMISSION_ENABLED")
+    # Límite in-flight por grupo de rutas ("prefijo=límite,..."); el resto usa el default
+    admission_default_limit: int = Field(default=64, validation_alias="ADMISSION_DEFAULT_LIMIT")
+    admission_route_limits: str = Field(
+        default="/v1/products=48",
+        validation_alias="ADMISSION_ROUTE_LIMITS",
+    )
+    admission_min_limit: int = Field(default=4, validation_alias="ADMISSION_MIN_LIMIT")
+    admission_max_queue: int = Field(default=64, validation_alias="ADMISSION_MAX_QUEUE")
+    admission_queue_timeout_seconds: float = Field(
+        default=1.0,
+        validation_alias="ADMISSION_QUEUE_TIMEOUT_SECONDS",
+    )
+    # AIMD: por encima de esta latencia el límite baja; 0 => límite fijo
+    admission_latency_target_ms: float = Field(
+        default=500.0,
+        validation_alias="ADMISSION_LATENCY_TARGET_MS",
+    )
+    admission_retry_after_seconds: int = Field(
+        default=1,
+        validation_alias="ADMISSION_RETRY_AFTER_SECONDS",
+    )
+
+    # -------------------------
+    # Rate limiting por cliente (azp/sub del token verificado; IP si no hay claims)
+    # -------------------------
+    rate_limit_enabled: bool = Field(default=True, validation_alias="RATE_LIMIT_ENABLED")
+    # "N/s|m|h"; precedencia: rol > prefijo de ruta > default
+    rate_limit_default: str = Field(default="600/m", validation_alias="RATE_LIMIT_DEFAULT")
+    rate_limit_routes: str = Field(
+        default="/v1/products/lookup=3000/m",
+        validation_alias="RATE_LIMIT_ROUTES",
+    )
+    rate_limit_roles: str = Field(default="", validation_alias="RATE_LIMIT_ROLES")
+    # memory|redis
+    rate_limit_backend: str = Field(default="memory", validation_alias="RATE_LIMIT_BACKEND")
+    rate_limit_redis_url: Optional[str] = Field(
+        default=None,
+        validation_alias="RATE_LIMIT_REDIS_URL",
+    )
+    rate_limit_redis_timeout_ms: float = Field(
+        default=50.0,
+        validation_alias="RATE_LIMIT_REDIS_TIMEOUT_MS",
+    )
+    rate_limit_max_keys: int = Field(default=100_000, validation_alias="RATE_LIMIT_MAX_KEYS")
+    # Solo detrás del gateway: la IP real viene en X-Forwarded-For
+    rate_limit_trust_forwarded: bool = Field(
+        default=False,
+        validation_alias="RATE_LIMIT_TRUST_FORWARDED",
+    )
+
+    # -------------------------
+    # Single-flight (PERF): GETs idénticos concurrentes comparten query + cuerpo serializado
+    # -------------------------
+    coalesce_enabled: bool = Field(default=True, validation_alias="COALESCE_ENABLED")
+
+    # -------------------------
+    # Caché de productos (PERF): L1 LRU por worker + L2 compartido con invalidación pub/sub
+    # -------------------------
+    product_cache_enabled: bool = Field(default=True, validation_alias="PRODUCT_CACHE_ENABLED")
+    # memory => solo L1 (una réplica); redis => L2 compartido + canal de invalidación
+    product_cache_backend: str = Field(default="memory", validation_alias="PRODUCT_CACHE_BACKEND")
+    product_cache_redis_url: Optional[str] = Field(
+        default=None,
+        validation_alias="PRODUCT_CACHE_REDIS_URL",
+    )
+    product_cache_timeout_ms: float = Field(
+        default=50.0,
+        validation_alias="PRODUCT_CACHE_TIMEOUT_MS",
+    )
+    product_cache_namespace: str = Field(
+        default="catalog:products",
+        validation_alias="PRODUCT_CACHE_NAMESPACE",
+    )
+    product_cache_local_max_entries: int = Field(
+        default=50_000,
+        validation_alias="PRODUCT_CACHE_LOCAL_MAX_ENTRIES",
+    )
+    # TTL corto del L1: red de seguridad si se pierde un mensaje de invalidación
+    product_cache_local_ttl_seconds: float = Field(
+        default=30.0,
+        validation_alias="PRODUCT_CACHE_LOCAL_TTL_SECONDS",
+    )
+    product_cache_shared_ttl_seconds: float = Field(
+        default=300.0,
+        validation_alias="PRODUCT_CACHE_SHARED_TTL_SECONDS",
+    )
+
+    # -------------------------
+    # Snapshot del catálogo (PERF): fichero inmutable mmap compartido por todos los workers
+    # -------------------------
+    snapshot_enabled: bool = Field(default=False, validation_alias="SNAPSHOT_ENABLED")
+    # Mismo path para todos los workers del pod (volumen local; no hace falta que sea compartido
+    # entre pods)
+    snapshot_path: str = Field(
+        default="/tmp/catalog-api/products.snapshot",
+        validation_alias="SNAPSHOT_PATH",
+    )
+    # Un worker (flock) lo regenera al superar esta edad si hubo cambios en el outbox
+    snapshot_max_age_seconds: float = Field(
+        default=300.0,
+        validation_alias="SNAPSHOT_MAX_AGE_SECONDS",
+    )
+    # Cada cuánto se remapea si cambió y se consultan los productos más nuevos que el snapshot
+    snapshot_poll_seconds: float = Field(default=2.0, validation_alias="SNAPSHOT_POLL_SECONDS")
+
+    # -------------------------
+    # Feed de cambios de productos (GET /v1/products/changes, long-poll)
+    # -------------------------
+    # Espera máxima de un long-poll (?wait=); por debajo del timeout del gateway
+    changes_max_wait_seconds: float = Field(
+        default=25.0,
+        validation_alias="CHANGES_MAX_WAIT_SECONDS",
+    )
+    # Cada cuánto un worker con long-polls abiertos consulta el contador (cambios de otras réplicas)
+    changes_poll_seconds: float = Field(default=1.0, validation_alias="CHANGES_POLL_SECONDS")
+    # Long-polls simultáneos por worker; por encima => 503 + Retry-After (no cuentan en admission)
+    changes_max_waiters: int = Field(default=1000, validation_alias="CHANGES_MAX_WAITERS")
+
+    # -------------------------
+    # Request deadline (PERF): X-Request-Timeout-Ms del gateway -> statement_timeout / cancelación
+    # -------------------------
+    request_deadline_enabled: bool = Field(
+        default=True,
+        validation_alias="REQUEST_DEADLINE_ENABLED",
+    )
+    # Sin cabecera: 0 => sin deadline. El máximo acota lo que pida el llamante.
+    request_default_timeout_ms: int = Field(
+        default=0,
+        validation_alias="REQUEST_DEFAULT_TIMEOUT_MS",
+    )
+    request_max_timeout_ms: int = Field(default=60000, validation_alias="REQUEST_MAX_TIMEOUT_MS")
+
+    # -------------------------
+    # Startup / warm-up (PERF)
+    # -------------------------
+    # Discovery OIDC + JWKS + pool DB se precargan en background durante el lifespan.
+    warmup_enabled: bool = Field(default=True, validation_alias="WARMUP_ENABLED")
+    warmup_timeout_seconds: float = Field(default=15.0, validation_alias="WARMUP_TIMEOUT_SECONDS")
+    # /ready cachea su resultado: los probes de Kubernetes no golpean Keycloak/PostgreSQL
+    readiness_cache_seconds: float = Field(default=2.0, validation_alias="READINESS_CACHE_SECONDS")
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
@@ -2,12 +2,15 @@
 from __future__ import annotations
 
 import os
+from contextlib import contextmanager
 from functools import lru_cache
 from typing import Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
+from app.core import deadline
 from app.core.config import get_settings
 
 
@@ -28,18 +31,57 @@ def _database_url() -> str:
 @lru_cache(maxsize=1)
 def get_engine():
     # pool_pre_ping evita conexiones rotas en dev
-    return create_engine(_database_url(), pool_pre_ping=True)
+    url = _database_url()
+    if url.startswith("sqlite"):
+        # SQLite (tests/bench offline) no usa QueuePool dimensionado
+        return create_engine(url, pool_pre_ping=True)
+
+    # [PERF] Engine lazy: se crea en el warm-up (lifespan) o en la primera sesión, nunca al importar
+    settings = get_settings()
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+    )
 
 
 @lru_cache(maxsize=1)
 def get_sessionmaker():
     # Esto es lo que te está importando app/core/deps.py
-    return sessionmaker(
+    factory = sessionmaker(
         bind=get_engine(),
         autocommit=False,
         autoflush=False,
         class_=Session,
     )
+    # [PERF] Deadline del request -> statement_timeout / lock_timeout de cada transacción
+    event.listen(factory, "after_begin", _apply_request_deadline)
+    # Feed de cambios: change_seq / tombstones solo en las sesiones de la app
+    # (import diferido: app.changes importa core.db)
+    from app import changes
+
+    changes.register(factory)
+    return factory
+
+
+def _apply_request_deadline(session: Session, transaction, connection) -> None:
+    left = deadline.remaining()
+    if left is None:
+        return
+    if left <= 0:
+        raise deadline.DeadlineExceeded("Request deadline exceeded before DB work")
+    if connection.dialect.name != "postgresql":
+        return
+    budget = f"{max(1, int(left * 1000))}ms"
+    # SET LOCAL vía set_config(..., true): muere con la transacción, no contamina el pool
+    connection.execute(
+        text(
+            "SELECT set_config('statement_timeout', :budget, true),"
+            " set_config('lock_timeout', :budget, true)"
+        ),
+        {"budget": budget},
+    )
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -50,5 +92,30 @@ def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
         yield db
+    except DBAPIError as e:
+        # Query cortada por el statement_timeout del deadline => 504, no 500
+        if deadline.current() is not None and deadline.is_timeout_error(e):
+            raise deadline.DeadlineExceeded("Request deadline exceeded in DB") from e
+        raise
     finally:
         db.close()
+
+
+# Mismo ciclo de vida que get_db, para código que abre su propia sesión (p. ej. single-flight)
+session_scope = contextmanager(get_db)
+
+
+def pool_has_connection() -> bool:
+    """
+    [PERF] Readiness sin I/O: el pool tiene al menos una conexión abierta (idle o en uso).
+    No crea el engine ni abre conexiones; eso lo hace el warm-up.
+    """
+    if get_engine.cache_info().currsize == 0:
+        return False
+    pool = get_engine().pool
+    checkedin = getattr(pool, "checkedin", None)
+    checkedout = getattr(pool, "checkedout", None)
+    if checkedin is None or checkedout is None:
+        # Pools sin contadores (SQLite/StaticPool): basta con que el engine exista
+        return True
+    return (checkedin() + checkedout()) > 0
@@ -0,0 +1,141 @@
+# services/catalog-api/app/core/introspection.py
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+from jwt.exceptions import PyJWTError
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class IntrospectionError(PyJWTError):
+    """
+    El endpoint de introspección no respondió (red / 5xx / credenciales): 401 igual que un JWT
+    inválido.
+    """
+
+
+def cache_key(token: str) -> str:
+    # El token en claro nunca se guarda como clave (logs/heap dumps)
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class IntrospectionCache:
+    """
+    Cache LRU acotada de respuestas RFC 7662 (positivas y negativas).
+
+    - active=true: hasta min(exp del token, max_ttl). Nunca más allá de la vida del token.
+    - active=false: negative_ttl (evita que un token basura/revocado golpee Keycloak en bucle).
+    """
+
+    def __init__(self, *, max_entries: int, max_ttl: float, negative_ttl: float) -> None:
+        self._max_entries = max(1, max_entries)
+        self._max_ttl = max_ttl
+        self._negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def expires_at(self, response: Dict[str, Any], now: float) -> float:
+        if not response.get("active"):
+            return now + self._negative_ttl
+        expires = now + self._max_ttl
+        exp = response.get("exp")
+        if isinstance(exp, (int, float)):
+            expires = min(expires, float(exp))
+        return expires
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, response = entry
+        if time.time() >= expires:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        now = time.time()
+        expires = self.expires_at(response, now)
+        if expires <= now:
+            return
+        self._entries[key] = (expires, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+class TokenIntrospector:
+    """
+    [PERF] Introspección RFC 7662 (tokens opacos) con cache + single-flight.
+
+    N requests concurrentes con el mismo token comparten UNA llamada en vuelo; las siguientes
+    salen de la cache hasta que el token caduca => ~1 llamada por token y vida del token.
+    """
+
+    def __init__(
+        self,
+        *,
+        client_id: str,
+        client_secret: Optional[str],
+        max_entries: int = 10_000,
+        max_ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        timeout_seconds: float = 3.0,
+    ) -> None:
+        self._auth = (client_id, client_secret or "")
+        self._timeout = timeout_seconds
+        self._cache = IntrospectionCache(
+            max_entries=max_entries, max_ttl=max_ttl, negative_ttl=negative_ttl
+        )
+        self._inflight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+
+    async def introspect(
+        self, token: str, endpoint: Callable[[], Awaitable[str]]
+    ) -> Dict[str, Any]:
+        key = cache_key(token)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._introspect(key, token, endpoint))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        # shield: si un cliente corta su request, la llamada compartida sigue para los demás
+        return await asyncio.shield(task)
+
+    async def _introspect(
+        self, key: str, token: str, endpoint: Callable[[], Awaitable[str]]
+    ) -> Dict[str, Any]:
+        try:
+            response = await self._post(await endpoint(), token)
+        except (httpx.HTTPError, ValueError) as e:
+            # Errores de transporte NO se cachean: el siguiente request reintenta
+            logger.warning("Token introspection failed", extra={"error": str(e)})
+            raise IntrospectionError(f"Token introspection failed: {e}") from e
+        if not isinstance(response, dict):
+            raise IntrospectionError("Invalid introspection response")
+        self._cache.put(key, response)
+        return response
+
+    async def _post(self, url: str, token: str) -> Dict[str, Any]:
+        async with httpx.AsyncClient(timeout=self._timeout) as client:
+            r = await client.post(
+                url,
+                data={"token": token, "token_type_hint": "access_token"},
+                auth=self._auth,
+            )
+            r.raise_for_status()
+            return r.json()
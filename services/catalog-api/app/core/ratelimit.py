@@ -0,0 +1,317 @@
+# services/catalog-api/app/core/ratelimit.py
+"""
+Rate limiting por cliente (claims verificados), con token bucket.
+
+- Clave: `azp:sub` del token ya verificado (un cliente de integración = un bucket), o la IP
+  si el request no trae claims. Un bucket por (clave, regla).
+- Regla efectiva: rol (la más permisiva de los roles del llamante) > prefijo de ruta > default.
+  Formato "N/s|m|h" (capacidad N, se repone a N por ventana): RATE_LIMIT_DEFAULT=600/m,
+  RATE_LIMIT_ROUTES=/v1/products/lookup=3000/m, RATE_LIMIT_ROLES=catalog_service=20000/m.
+- Backends (RATE_LIMIT_BACKEND):
+  - memory: bucket en proceso, por worker. Sin locks: la dependency corre en el event loop y
+    no hay await entre leer y escribir el bucket.
+  - redis: límite global del cluster (script Lua atómico, reloj de Redis) con el cliente RESP
+    mínimo de app.core.resp. Si el store falla => fail-open al bucket local.
+- Cabeceras RateLimit-Limit / -Remaining / -Reset / -Policy; 429 con Retry-After.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Protocol, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.resp import RedisError, RespPool
+
+logger = get_logger(__name__)
+
+_UNITS = {"s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    name: str
+    limit: int
+    window_seconds: float
+
+    @property
+    def rate(self) -> float:
+        """Tokens repuestos por segundo."""
+        return self.limit / self.window_seconds
+
+    @property
+    def policy(self) -> str:
+        return f"{self.limit};w={int(self.window_seconds)}"
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_seconds: int  # hasta tener el bucket lleno otra vez
+    retry_after: int  # hasta tener 1 token (solo si no allowed)
+    policy: str = ""
+
+
+def parse_rate(name: str, raw: str) -> RateLimitRule:
+    """'600/m' -> RateLimitRule(name, 600, 60.0)."""
+    count, _, unit = raw.strip().partition("/")
+    unit = unit.strip().lower() or "s"
+    if unit[:1] not in _UNITS or int(count) <= 0:
+        raise ValueError(f"Invalid rate limit: {raw!r}")
+    return RateLimitRule(name=name, limit=int(count), window_seconds=_UNITS[unit[:1]])
+
+
+def parse_rules(raw: str, prefix: str = "") -> List[Tuple[str, RateLimitRule]]:
+    """'a=10/s,b=5/m' -> [(a, rule), (b, rule)]."""
+    out: List[Tuple[str, RateLimitRule]] = []
+    for item in (raw or "").split(","):
+        if "=" not in item:
+            continue
+        key, rate = item.split("=", 1)
+        key = key.strip()
+        if key:
+            out.append((key, parse_rate(f"{prefix}{key}", rate)))
+    return out
+
+
+# =========================
+# Token bucket (backends)
+# =========================
+
+def _decision(rule: RateLimitRule, allowed: bool, tokens: float) -> Decision:
+    rate = rule.rate
+    return Decision(
+        allowed=allowed,
+        limit=rule.limit,
+        remaining=max(0, int(tokens)),
+        reset_seconds=max(0, math.ceil((rule.limit - tokens) / rate)),
+        retry_after=0 if allowed else max(1, math.ceil((1.0 - tokens) / rate)),
+        policy=rule.policy,
+    )
+
+
+class BucketStore(Protocol):
+    async def take(self, key: str, rule: RateLimitRule) -> Decision: ...
+
+
+class LocalBucketStore:
+    """Token bucket en memoria del worker. key -> [tokens, último refill (monotonic)]."""
+
+    def __init__(self, *, max_keys: int = 100_000) -> None:
+        self._buckets: Dict[str, List[float]] = {}
+        self._max_keys = max(1, max_keys)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take_now(self, key: str, rule: RateLimitRule, now: Optional[float] = None) -> Decision:
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self._max_keys:
+                self._evict(now, rule)
+            bucket = self._buckets[key] = [float(rule.limit), now]
+        tokens = min(float(rule.limit), bucket[0] + (now - bucket[1]) * rule.rate)
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+        bucket[0], bucket[1] = tokens, now
+        return _decision(rule, allowed, tokens)
+
+    async def take(self, key: str, rule: RateLimitRule) -> Decision:
+        return self.take_now(key, rule)
+
+    def _evict(self, now: float, rule: RateLimitRule) -> None:
+        # Un bucket que ya estaría lleno equivale a no tenerlo: se quitan primero esos
+        idle = rule.window_seconds
+        stale = [k for k, (_, ts) in self._buckets.items() if now - ts >= idle]
+        for k in stale:
+            del self._buckets[k]
+        # Aún lleno (muchos clientes activos): se descarta la mitad más antigua
+        if len(self._buckets) >= self._max_keys:
+            for k in list(self._buckets)[: len(self._buckets) // 2 or 1]:
+                del self._buckets[k]
+
+
+# Token bucket atómico en Redis. Reloj de Redis (TIME) => sin skew entre workers/pods.
+TOKEN_BUCKET_LUA = """
+local limit = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or limit
+local ts = tonumber(data[2]) or now
+tokens = math.min(limit, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((limit - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+TOKEN_BUCKET_SHA = hashlib.sha1(TOKEN_BUCKET_LUA.encode()).hexdigest()
+
+
+class RedisBucketStore:
+    """
+    Límite global (cluster). Pool pequeño de conexiones RESP; una llamada = 1 round trip
+    (EVALSHA; EVAL solo la primera vez o tras un SCRIPT FLUSH).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        timeout_seconds: float = 0.05,
+        pool_size: int = 8,
+        key_prefix: str = "rl:catalog:",
+    ) -> None:
+        self._pool = RespPool(url, timeout_seconds=timeout_seconds, pool_size=pool_size)
+        self._prefix = key_prefix
+
+    async def take(self, key: str, rule: RateLimitRule) -> Decision:
+        args = (1, self._prefix + key, rule.limit, repr(rule.rate))
+        try:
+            allowed, tokens = await self._pool.execute("EVALSHA", TOKEN_BUCKET_SHA, *args)
+        except RedisError as e:
+            if not str(e).startswith("NOSCRIPT"):
+                raise
+            allowed, tokens = await self._pool.execute("EVAL", TOKEN_BUCKET_LUA, *args)
+        return _decision(rule, bool(int(allowed)), float(tokens))
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+# =========================
+# Limiter
+# =========================
+
+class RateLimiter:
+    def __init__(
+        self,
+        *,
+        default: RateLimitRule,
+        routes: Sequence[Tuple[str, RateLimitRule]] = (),
+        roles: Sequence[Tuple[str, RateLimitRule]] = (),
+        store: Optional[BucketStore] = None,
+        max_keys: int = 100_000,
+    ) -> None:
+        self._default = default
+        self._routes = sorted(routes, key=lambda x: len(x[0]), reverse=True)
+        self._roles = dict(roles)
+        self._local = LocalBucketStore(max_keys=max_keys)
+        self._store: BucketStore = store or self._local
+        self._last_store_error = 0.0
+
+    async def aclose(self) -> None:
+        close = getattr(self._store, "aclose", None)
+        if close is not None:
+            await close()
+
+    def rule_for(self, route_path: str, roles: Iterable[str]) -> RateLimitRule:
+        role_rules = [self._roles[r] for r in roles if r in self._roles]
+        if role_rules:
+            return max(role_rules, key=lambda r: r.rate)
+        for prefix, rule in self._routes:
+            if route_path.startswith(prefix):
+                return rule
+        return self._default
+
+    async def hit(self, client_key: str, route_path: str, roles: Iterable[str] = ()) -> Decision:
+        rule = self.rule_for(route_path, roles)
+        key = f"{rule.name}|{client_key}"
+        if self._store is self._local:
+            return self._local.take_now(key, rule)
+        try:
+            return await self._store.take(key, rule)
+        except Exception as e:  # noqa: BLE001
+            # Fail-open al bucket local: el store compartido caído no tumba la API
+            now = time.monotonic()
+            if now - self._last_store_error > 10.0:
+                logger.warning("rate limit store unavailable, using local buckets: %s", e)
+                self._last_store_error = now
+            return self._local.take_now(key, rule)
+
+
+def client_key(claims: Optional[Mapping[str, Any]], client_ip: Optional[str]) -> str:
+    if claims:
+        azp, sub = claims.get("azp"), claims.get("sub")
+        if azp or sub:
+            return f"c:{azp or '-'}:{sub or '-'}"
+    return f"ip:{client_ip or 'unknown'}"
+
+
+def headers_for(decision: Decision) -> Dict[str, str]:
+    headers = {
+        "RateLimit-Limit": str(decision.limit),
+        "RateLimit-Remaining": str(decision.remaining),
+        "RateLimit-Reset": str(decision.reset_seconds),
+        "RateLimit-Policy": decision.policy,
+    }
+    if not decision.allowed:
+        headers["Retry-After"] = str(decision.retry_after)
+    return headers
+
+
+def build_store() -> Optional[BucketStore]:
+    kind = (settings.rate_limit_backend or "memory").strip().lower()
+    if kind == "redis":
+        if not settings.rate_limit_redis_url:
+            raise ValueError("RATE_LIMIT_BACKEND=redis requires RATE_LIMIT_REDIS_URL")
+        return RedisBucketStore(
+            settings.rate_limit_redis_url,
+            timeout_seconds=settings.rate_limit_redis_timeout_ms / 1000.0,
+        )
+    return None
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> RateLimiter:
+    return RateLimiter(
+        default=parse_rate("default", settings.rate_limit_default),
+        routes=parse_rules(settings.rate_limit_routes, prefix="route:"),
+        roles=parse_rules(settings.rate_limit_roles, prefix="role:"),
+        store=build_store(),
+        max_keys=settings.rate_limit_max_keys,
+    )
+
+
+def _client_ip(request: Request) -> Optional[str]:
+    if settings.rate_limit_trust_forwarded:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+
+async def enforce(
+    request: Request,
+    response: Response,
+    claims: Optional[Mapping[str, Any]],
+    roles: Iterable[str],
+) -> None:
+    """Consume 1 token del cliente para la ruta; 429 + Retry-After si no quedan."""
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", None) or request.url.path
+    key = client_key(claims, _client_ip(request))
+    decision = await get_rate_limiter().hit(key, route_path, roles)
+    headers = headers_for(decision)
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers=headers,
+        )
+    response.headers.update(headers)
@@ -0,0 +1,68 @@
+# services/catalog-api/app/core/readiness.py
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.db import pool_has_connection
+from app.core.warmup import WarmupState, default_steps
+
+
+class ReadinessProbe:
+    """
+    [PERF] Readiness (/ready) cacheado para Kubernetes.
+
+    - Ready = warm-up terminado (o desactivado) + JWKS en memoria + pool DB con conexión abierta.
+    - Las comprobaciones son locales (sin I/O) y el resultado se cachea `ttl_seconds`.
+    - Si algo falta o el JWKS expiró, se relanza el paso de warm-up en background
+      (como mucho uno en vuelo): el probe nunca espera a Keycloak/PostgreSQL.
+    """
+
+    # check -> paso de warm-up que lo repara
+    _REPAIR_STEP = {"jwks": "oidc", "db": "db"}
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self._ttl = ttl_seconds
+        self._cached: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+
+    def invalidate(self) -> None:
+        self._cached = None
+
+    def check(self, warmup: Optional[WarmupState]) -> Dict[str, Any]:
+        now = time.monotonic()
+        if self._cached is not None and (now - self._checked_at) < self._ttl:
+            return self._cached
+
+        # Import diferido: get_verifier es lazy y no debe construirse al importar este módulo
+        from app.core.auth import get_verifier
+
+        jwks_loaded, jwks_stale = get_verifier().jwks_status()
+        checks = {
+            "warmup": _warmup_satisfied(warmup),
+            "jwks": jwks_loaded,
+            "db": pool_has_connection(),
+        }
+
+        # [FIX] Reparación también con WARMUP_ENABLED=false
+        # (solo se espera al warm-up inicial mientras está en curso)
+        if warmup is not None and checks["warmup"]:
+            repair = {n for c, n in self._REPAIR_STEP.items() if not checks[c]}
+            if jwks_stale:
+                repair.add("oidc")
+            steps = default_steps()
+            warmup.refresh({n: steps[n] for n in repair})
+
+        result = {"ready": all(checks.values()), "checks": checks}
+        self._cached = result
+        self._checked_at = now
+        return result
+
+
+def _warmup_satisfied(warmup: Optional[WarmupState]) -> bool:
+    # [FIX] WARMUP_ENABLED=false: nunca arranca => no hay nada que esperar
+    # (si no, /ready respondería 503 para siempre)
+    if not settings.warmup_enabled:
+        return warmup is not None
+    return warmup is not None and warmup.done
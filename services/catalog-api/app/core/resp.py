@@ -0,0 +1,173 @@
+# services/catalog-api/app/core/resp.py
+"""
+Cliente RESP2 mínimo sobre asyncio (Redis / Valkey / KeyDB...), sin dependencia nueva.
+
+Lo comparten el rate limiting (script Lua del token bucket) y la caché compartida de productos
+(MGET/SET/DEL/PUBLISH + SUBSCRIBE en una conexión dedicada).
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, List, Optional, Sequence
+from urllib.parse import urlparse
+
+
+class RedisError(Exception):
+    """Respuesta de error (-ERR ...) del servidor RESP."""
+
+
+class RespConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def open(cls, url: str, timeout: float) -> "RespConnection":
+        u = urlparse(url)
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(u.hostname or "localhost", u.port or 6379), timeout=timeout
+        )
+        conn = cls(reader, writer)
+        if u.password:
+            await conn.execute("AUTH", *([u.username] if u.username else []), u.password)
+        db = (u.path or "/").lstrip("/")
+        if db and db != "0":
+            await conn.execute("SELECT", db)
+        return conn
+
+    @staticmethod
+    def encode(*args: Any) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for a in args:
+            data = a if isinstance(a, bytes) else str(a).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    async def read(self) -> Any:
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            size = int(payload)
+            if size < 0:
+                return None
+            data = await self._reader.readexactly(size + 2)
+            return data[:-2].decode()
+        if kind == b"*":
+            size = int(payload)
+            return None if size < 0 else [await self.read() for _ in range(size)]
+        raise RedisError(f"Unexpected RESP reply: {line!r}")
+
+    async def execute(self, *args: Any) -> Any:
+        self._writer.write(self.encode(*args))
+        await self._writer.drain()
+        return await self.read()
+
+    async def pipeline(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        """N comandos en 1 round trip. Lee todas las respuestas antes de propagar el 1er error."""
+        self._writer.write(b"".join(self.encode(*cmd) for cmd in commands))
+        await self._writer.drain()
+        replies: List[Any] = []
+        error: Optional[RedisError] = None
+        for _ in commands:
+            try:
+                replies.append(await self.read())
+            except RedisError as e:
+                error = error or e
+                replies.append(None)
+        if error is not None:
+            raise error
+        return replies
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class RespPool:
+    """
+    Pool pequeño de conexiones con timeout por operación. Un timeout o una respuesta a medias
+    descartan la conexión; un -ERR la devuelve al pool (el protocolo sigue sincronizado).
+    """
+
+    def __init__(self, url: str, *, timeout_seconds: float = 0.05, pool_size: int = 8) -> None:
+        self.url = url
+        self.timeout = timeout_seconds
+        self._pool_size = max(1, pool_size)
+        self._idle: List[RespConnection] = []
+        self._open = 0
+        self._available: Optional[asyncio.Condition] = None
+
+    async def _acquire(self) -> RespConnection:
+        if self._available is None:
+            self._available = asyncio.Condition()
+        async with self._available:
+            while not self._idle and self._open >= self._pool_size:
+                await self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+        try:
+            return await RespConnection.open(self.url, self.timeout)
+        except BaseException:
+            await self._discard(None)
+            raise
+
+    async def _release(self, conn: RespConnection) -> None:
+        async with self._available:
+            self._idle.append(conn)
+            self._available.notify()
+
+    async def _discard(self, conn: Optional[RespConnection]) -> None:
+        if conn is not None:
+            conn.close()
+        async with self._available:
+            self._open -= 1
+            self._available.notify()
+
+    async def _run(self, op) -> Any:
+        conn = await asyncio.wait_for(self._acquire(), timeout=self.timeout)
+        try:
+            result = await asyncio.wait_for(op(conn), timeout=self.timeout)
+        except RedisError:
+            await self._release(conn)
+            raise
+        except BaseException:
+            await self._discard(conn)
+            raise
+        await self._release(conn)
+        return result
+
+    async def execute(self, *args: Any) -> Any:
+        return await self._run(lambda conn: conn.execute(*args))
+
+    async def pipeline(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        return await self._run(lambda conn: conn.pipeline(commands))
+
+    async def subscribe(self, channel: str) -> AsyncIterator[Optional[str]]:
+        """
+        Conexión dedicada (fuera del pool) en modo SUBSCRIBE. Emite None al confirmarse la
+        suscripción y luego el payload de cada mensaje; termina con ConnectionError.
+        """
+        conn = await RespConnection.open(self.url, self.timeout)
+        try:
+            await asyncio.wait_for(conn.execute("SUBSCRIBE", channel), timeout=self.timeout)
+            yield None
+            while True:
+                reply = await conn.read()
+                if isinstance(reply, list) and len(reply) == 3 and reply[0] == "message":
+                    yield reply[2]
+        finally:
+            conn.close()
+
+    async def aclose(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+        self._open -= len(idle)
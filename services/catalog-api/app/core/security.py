@@ -1,17 +1,25 @@
 # services/catalog-api/app/core/security.py
 from __future__ import annotations
 
+import asyncio
 import os
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
-import jwt
-from jwt import PyJWKClient
-from jwt.exceptions import PyJWTError
+from jwt.exceptions import (
+    DecodeError,
+    InvalidAlgorithmError,
+    InvalidTokenError,
+    PyJWKClientError,
+    PyJWTError,
+)
 
 from app.core.config import settings
+from app.core.introspection import TokenIntrospector
+from app.core.jwks import KeyEntry, KeyIndex, ParsedToken, allowed_algorithms, validate_claims
 from app.core.logging import get_logger
+from app.core.shared_auth import SharedAuthCache
 
 logger = get_logger(__name__)
 
@@ -21,18 +29,39 @@ class OIDCJWKSVerifier:
     Verifies JWT (JSON Web Token) access tokens signed by Keycloak using the realm JWKS (JSON Web Key Set).
 
     A1 (PyJWT):
-    - Use PyJWT + PyJWKClient to unify behavior with orders-api.
+    - PyJWT key/algorithm primitives; the verifier owns the JWKS fetch and a pre-parsed key
+      index (kid -> public key + allowed algs), swapped atomically on refresh.
     - Prefer OIDC_JWKS_URL (internal, e.g. http://keycloak:8080/...) to avoid DNS issues inside Docker/K8s.
     - Validate issuer (iss) strictly against settings.oidc_issuer_expected.
     - Validate audience (aud) against settings.oidc_audience.
+    - Optional RFC 7662 introspection for opaque (non-JWT) tokens, cached per token.
+    - Optional pod-local shared tier (app.core.shared_auth): JWKS fetched once per pod and
+      signature checks reused across uvicorn workers.
     """
 
-    def __init__(self, discovery_url: str, *, jwks_url_override: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        discovery_url: str,
+        *,
+        jwks_url_override: Optional[str] = None,
+        introspector: Optional[TokenIntrospector] = None,
+        introspection_url_override: Optional[str] = None,
+        shared_cache: Optional[SharedAuthCache] = None,
+    ) -> None:
         self._discovery_url = (discovery_url or "").strip()
         self._jwks_url_override = (jwks_url_override or "").strip() or None
+        self._introspector = introspector
+        self._introspection_url_override = (introspection_url_override or "").strip() or None
 
         self._oidc_cache: Dict[str, Any] = {"config": None, "fetched_at": 0.0}
-        self._jwk_cache: Dict[str, Any] = {"client": None, "jwks_url": None, "fetched_at": 0.0}
+        # [PERF] Índice de claves propio (sin PyJWKClient): se sustituye entero en cada descarga
+        self._key_index: Optional[KeyIndex] = None
+        self._refresh_lock = asyncio.Lock()
+        self._retry_at = 0.0
+        self._shared = shared_cache
+        # Instante (pared) de la descarga del JWKS del índice actual: compara con el publicado por
+        # otros workers
+        self._index_fetched_wall = 0.0
 
     async def _fetch_oidc_config(self) -> Dict[str, Any]:
         # [FIX] discovery cacheado
@@ -65,24 +94,125 @@ class OIDCJWKSVerifier:
         # Fallback razonable
         return f"{settings.oidc_issuer_expected.rstrip('/')}/protocol/openid-connect/certs"
 
-    async def _get_jwk_client(self) -> PyJWKClient:
-        # [FIX] cache PyJWKClient por jwks_url + TTL
-        now = time.time()
+    async def _get_introspection_url(self) -> str:
+        if self._introspection_url_override:
+            return self._introspection_url_override.rstrip("/")
+
+        cfg = await self._fetch_oidc_config()
+        endpoint = cfg.get("introspection_endpoint")
+        if isinstance(endpoint, str) and endpoint.strip():
+            return endpoint.strip().rstrip("/")
+
+        # Fallback razonable (Keycloak)
+        issuer = settings.oidc_issuer_expected.rstrip("/")
+        return f"{issuer}/protocol/openid-connect/token/introspect"
+
+    async def _fetch_jwks(self, jwks_url: str) -> Dict[str, Any]:
+        timeout = getattr(settings, "oidc_http_timeout_seconds", 3.0)
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            r = await client.get(jwks_url)
+            r.raise_for_status()
+            return r.json()
+
+    async def _refresh_key_index(self, seen: Optional[KeyIndex]) -> KeyIndex:
+        """
+        Descarga el JWKS, parsea las claves UNA vez y publica el índice nuevo con una sola
+        asignación (swap atómico: las requests en curso siguen con el índice anterior).
+
+        Single-flight: si otra corrutina ya lo sustituyó mientras esperábamos el lock
+        (`seen` ya no es el actual), se reutiliza su resultado sin volver a descargar.
+        """
+        async with self._refresh_lock:
+            current = self._key_index
+            if current is not None and current is not seen:
+                return current
+
+            jwks_url = await self._get_jwks_url()
+            if self._shared is None:
+                return await self._download_key_index(jwks_url, current)
+
+            # Otro worker del pod puede haberlo descargado ya (rotación, arranque, TTL)
+            index = self._shared_key_index(jwks_url, current)
+            if index is not None:
+                return index
+            with self._shared.jwks_fetch_lock() as leader:
+                if not leader:
+                    # Hay un worker descargando: esperamos su resultado en vez de ir también a
+                    # Keycloak
+                    timeout = getattr(settings, "oidc_http_timeout_seconds", 3.0)
+                    deadline = time.monotonic() + timeout
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(0.05)
+                        index = self._shared_key_index(jwks_url, current)
+                        if index is not None:
+                            return index
+                return await self._download_key_index(jwks_url, current)
+
+    async def _download_key_index(self, jwks_url: str, current: Optional[KeyIndex]) -> KeyIndex:
+        try:
+            jwks = await self._fetch_jwks(jwks_url)
+        except (httpx.HTTPError, ValueError) as e:
+            # Keycloak caído: seguimos con el índice anterior (si lo hay) y no reintentamos
+            # en cada request hasta que pase el cooldown
+            cooldown = getattr(settings, "oidc_jwks_refresh_cooldown_seconds", 10.0)
+            self._retry_at = time.monotonic() + cooldown
+            if current is None:
+                raise PyJWKClientError(f"Failed to fetch JWKS: {e}") from e
+            logger.warning("JWKS refresh failed, keeping previous keys", extra={"error": str(e)})
+            return current
+
+        fetched_wall = time.time()
+        index = KeyIndex(jwks, jwks_url=jwks_url)
+        self._key_index, self._index_fetched_wall = index, fetched_wall
+        if self._shared is not None:
+            self._shared.store_jwks(jwks_url, jwks, fetched_wall)
+        return index
+
+    def _shared_key_index(self, jwks_url: str, current: Optional[KeyIndex]) -> Optional[KeyIndex]:
+        """
+        Índice a partir del JWKS publicado por otro worker, si es más nuevo que el actual y no
+        caducó.
+        """
+        published = self._shared.load_jwks(jwks_url)
+        if published is None:
+            return None
+        jwks, fetched_wall = published
+        age = time.time() - fetched_wall
+        if age >= getattr(settings, "oidc_jwks_cache_seconds", 300):
+            return None
+        if current is not None and fetched_wall <= self._index_fetched_wall:
+            return None
+        index = KeyIndex(jwks, jwks_url=jwks_url)
+        # la edad (TTL/cooldown) cuenta desde la descarga
+        index.fetched_at = time.monotonic() - max(0.0, age)
+        self._key_index, self._index_fetched_wall = index, fetched_wall
+        return index
+
+    async def _get_key_index(self) -> KeyIndex:
+        index = self._key_index
         ttl = getattr(settings, "oidc_jwks_cache_seconds", 300)
-        jwks_url = await self._get_jwks_url()
+        if index is not None and (index.age() < ttl or time.monotonic() < self._retry_at):
+            return index
+        return await self._refresh_key_index(index)
 
-        if (
-            self._jwk_cache["client"] is not None
-            and self._jwk_cache["jwks_url"] == jwks_url
-            and (now - self._jwk_cache["fetched_at"]) < ttl
-        ):
-            return self._jwk_cache["client"]
+    async def warm_up(self) -> None:
+        """
+        [PERF] Precarga discovery + JWKS en el arranque (lifespan) para que la primera
+        request no pague la latencia de red de Keycloak. Readiness lo reutiliza para
+        refrescar en background un JWKS caducado.
+        """
+        await self._refresh_key_index(self._key_index)
 
-        client = PyJWKClient(jwks_url)
-        self._jwk_cache["client"] = client
-        self._jwk_cache["jwks_url"] = jwks_url
-        self._jwk_cache["fetched_at"] = now
-        return client
+    def jwks_status(self) -> Tuple[bool, bool]:
+        """
+        (loaded, stale) sin I/O: readiness lo consulta en cada probe.
+        - loaded: hay un JWKS en memoria (al menos una descarga correcta).
+        - stale: el JWKS cacheado expiró; conviene refrescarlo en background.
+        """
+        index = self._key_index
+        if index is None:
+            return False, True
+        return True, index.age() >= getattr(settings, "oidc_jwks_cache_seconds", 300)
 
     async def decode_and_verify(
         self,
@@ -97,20 +227,59 @@ class OIDCJWKSVerifier:
         if not token:
             raise PyJWTError("Empty token")
 
-        algorithms = algorithms or settings.oidc_algorithms_list
+        allowed = allowed_algorithms(algorithms or settings.oidc_algorithms_list)
         issuer_expected = (issuer_expected or "").rstrip("/")
 
-        jwk_client = await self._get_jwk_client()
-        signing_key = jwk_client.get_signing_key_from_jwt(token).key
-
-        # PyJWT valida aud/iss/exp con leeway nativo (enterprise-friendly)
-        claims = jwt.decode(
-            token,
-            signing_key,
-            algorithms=algorithms,
-            audience=audience_expected,
-            issuer=issuer_expected,
-            leeway=leeway_seconds,
-            options={"verify_signature": True, "verify_aud": True, "verify_iss": True, "verify_exp": True},
+        # [PERF] Header decodificado una sola vez: lo usan la selección de clave y la verificación
+        try:
+            parsed = ParsedToken(token)
+        except DecodeError:
+            # No es un JWS => token opaco: introspección (si está habilitada)
+            if self._introspector is None:
+                raise
+            return await self._introspect(token, audience_expected, issuer_expected, leeway_seconds)
+        alg = parsed.alg
+        if alg not in allowed:
+            raise InvalidAlgorithmError(f"Algorithm not allowed: {alg}")
+
+        key = await self._signing_key(parsed.kid, alg)
+        # [PERF] Firma ya verificada por algún worker del pod (la clave sigue publicada: comprobado
+        # arriba)
+        cached = self._shared.get_claims(token) if self._shared is not None else None
+        # Solo el alg publicado para esa clave (sin algorithm confusion)
+        claims = cached if cached is not None else key.verify(parsed, alg)
+        # aud/iss/exp con leeway: siempre, también con claims de la caché compartida
+        validate_claims(
+            claims, issuer=issuer_expected, audience=audience_expected, leeway=leeway_seconds
         )
+        if cached is None and self._shared is not None:
+            self._shared.put_claims(token, claims)
         return claims
+
+    async def _introspect(
+        self, token: str, audience_expected: str, issuer_expected: str, leeway_seconds: int
+    ) -> Dict[str, Any]:
+        response = await self._introspector.introspect(token, self._get_introspection_url)
+        if not response.get("active"):
+            raise InvalidTokenError("Token is not active")
+        # Mismas reglas que un JWT: iss/aud/exp (la respuesta de Keycloak trae los claims del token)
+        validate_claims(
+            response, issuer=issuer_expected, audience=audience_expected, leeway=leeway_seconds
+        )
+        return response
+
+    async def _signing_key(self, kid: Optional[str], alg: str) -> KeyEntry:
+        """
+        Clave por kid + alg del header (JWKS con algoritmos mixtos: RSA/EC/OKP).
+        kid desconocido => posible rotación: un refresh (single-flight, con cooldown) y reintento.
+        """
+        index = await self._get_key_index()
+        key = index.get(kid, alg)
+        if key is None:
+            cooldown = getattr(settings, "oidc_jwks_refresh_cooldown_seconds", 10.0)
+            if index.age() >= cooldown and time.monotonic() >= self._retry_at:
+                index = await self._refresh_key_index(index)
+                key = index.get(kid, alg)
+            if key is None:
+                raise PyJWKClientError(f'No signing key for kid="{kid}" alg="{alg}"')
+        return key
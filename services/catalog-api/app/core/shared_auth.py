@@ -0,0 +1,261 @@
+# services/catalog-api/app/core/shared_auth.py
+"""
+Caché de autenticación compartida por los workers de un mismo pod (opcional, OIDC_SHARED_CACHE_*).
+
+Sin ella, cada worker uvicorn descarga el JWKS por su cuenta (N descargas por rotación) y verifica
+la firma de cada token nuevo hasta N veces. Con ella, todos consultan antes un directorio local
+(idealmente tmpfs: /dev/shm o un emptyDir medium=Memory):
+
+- `jwks.json`: último JWKS descargado + URL + instante de descarga (tiempo de pared). Se publica con
+  fichero temporal + os.replace (atómico); un flock no bloqueante elige qué worker descarga y el
+  resto espera su resultado en vez de ir a Keycloak.
+- `tokens-<slots>x<bytes>.cache`: tabla mmap de tamaño FIJO (slots x bytes; acotada por
+  construcción), direct-mapped por sha256(token). Cada slot guarda los claims ya verificados y su
+  caducidad (min(exp, ahora + max_ttl)). Escrituras serializadas con flock; lecturas sin lock tipo
+  seqlock (contador impar = escritura en curso) + crc32: una lectura a medias cuenta como miss.
+
+Solo ahorra la verificación de firma: iss/aud/exp se revalidan en cada request y la revocación
+(jti/sid) se sigue consultando aparte. El directorio se crea 0700 y se rechaza si es de otro uid o
+escribible por grupo/otros (nadie más puede plantar un jwks.json); los ficheros se crean 0600:
+confía en los procesos del mismo usuario igual que en la memoria del propio worker.
+"""
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import stat
+import struct
+import time
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b"ASRPTOK1"
+_FILE_HEADER = struct.Struct("<8sII")  # magic, slots, slot_bytes
+_FILE_HEADER_SIZE = 64
+_SEQ = struct.Struct("<Q")
+# seq, sha256(token), expires_at (epoch), longitud del payload, crc32(digest + payload)
+_SLOT = struct.Struct("<Q32sdII")
+
+
+class SharedAuthCache:
+    def __init__(
+        self,
+        directory: str,
+        *,
+        slots: int = 4096,
+        slot_bytes: int = 2048,
+        max_ttl_seconds: float = 300.0,
+    ) -> None:
+        self.directory = directory
+        self.slots = max(1, slots)
+        self.slot_bytes = max(_SLOT.size + 64, slot_bytes)
+        self.max_ttl = max_ttl_seconds
+        self.jwks_path = os.path.join(directory, "jwks.json")
+        self.tokens_path = os.path.join(directory, f"tokens-{self.slots}x{self.slot_bytes}.cache")
+        self._jwks_stamp: Optional[Tuple[int, int]] = None
+        self._jwks_doc: Optional[Dict[str, Any]] = None
+        self._fd: Optional[int] = None
+        self._mm: Optional[mmap.mmap] = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _ensure_directory(self) -> None:
+        """
+        [SECURITY] Crea el directorio 0700 y lo rechaza (PermissionError) si no es un directorio
+        propio o es escribible por grupo/otros: otro usuario local podría crearlo antes (p. ej.
+        bajo /tmp) y plantar un JWKS en el que el verificador confiaría.
+        """
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        st = os.lstat(self.directory)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o022:
+            raise PermissionError(f"insecure shared auth cache directory: {self.directory}")
+
+    # =========================
+    # JWKS
+    # =========================
+
+    def load_jwks(self, jwks_url: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """(jwks, fetched_at) publicado por cualquier worker para esa URL; None si no hay."""
+        try:
+            self._ensure_directory()
+            st = os.stat(self.jwks_path)
+        except PermissionError as e:
+            logger.warning("Shared JWKS ignored", extra={"error": str(e)})
+            return None
+        except OSError:
+            return None
+        stamp = (st.st_ino, st.st_mtime_ns)
+        if stamp != self._jwks_stamp:
+            try:
+                with open(self.jwks_path, "rb") as f:
+                    doc = json.loads(f.read())
+            except (OSError, ValueError):
+                return None
+            self._jwks_stamp, self._jwks_doc = stamp, doc if isinstance(doc, dict) else None
+        doc = self._jwks_doc
+        if not doc or doc.get("url") != jwks_url or not isinstance(doc.get("jwks"), dict):
+            return None
+        return doc["jwks"], float(doc.get("fetched_at") or 0.0)
+
+    def store_jwks(self, jwks_url: str, jwks: Dict[str, Any], fetched_at: float) -> None:
+        tmp = f"{self.jwks_path}.tmp.{os.getpid()}"
+        try:
+            self._ensure_directory()
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                doc = {"url": jwks_url, "fetched_at": fetched_at, "jwks": jwks}
+                f.write(json.dumps(doc).encode())
+            os.replace(tmp, self.jwks_path)
+        except OSError as e:
+            logger.warning("Shared JWKS publish failed", extra={"error": str(e)})
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+
+    @contextlib.contextmanager
+    def jwks_fetch_lock(self) -> Iterator[bool]:
+        """flock no bloqueante: True => este worker descarga; False => otro ya lo está haciendo."""
+        try:
+            self._ensure_directory()
+            fd = os.open(f"{self.jwks_path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            yield True
+            return
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+        finally:
+            os.close(fd)  # cerrar libera el flock
+
+    # =========================
+    # Tokens verificados
+    # =========================
+
+    def _map(self) -> Optional[mmap.mmap]:
+        if self._mm is not None:
+            return self._mm
+        size = _FILE_HEADER_SIZE + self.slots * self.slot_bytes
+        try:
+            self._ensure_directory()
+            fd = os.open(self.tokens_path, os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError as e:
+            logger.warning("Shared token cache unavailable", extra={"error": str(e)})
+            return None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                # La geometría va en el nombre: el fichero solo crece (nunca se trunca con otro
+                # worker mapeándolo => sin SIGBUS). Slots a cero = vacíos.
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, _FILE_HEADER.pack(MAGIC, self.slots, self.slot_bytes), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            mm = mmap.mmap(fd, size)
+        except (OSError, ValueError) as e:
+            os.close(fd)
+            logger.warning("Shared token cache unavailable", extra={"error": str(e)})
+            return None
+        self._fd, self._mm = fd, mm
+        return mm
+
+    def _offset(self, digest: bytes) -> int:
+        slot = int.from_bytes(digest[:8], "little") % self.slots
+        return _FILE_HEADER_SIZE + slot * self.slot_bytes
+
+    def get_claims(self, token: str) -> Optional[Dict[str, Any]]:
+        mm = self._map()
+        if mm is None:
+            return None
+        digest = hashlib.sha256(token.encode()).digest()
+        off = self._offset(digest)
+        seq, slot_digest, expires_at, length, crc = _SLOT.unpack_from(mm, off)
+        if (
+            seq & 1
+            or slot_digest != digest
+            or not 0 < length <= self.slot_bytes - _SLOT.size
+            or expires_at <= time.time()
+        ):
+            self.misses += 1
+            return None
+        payload = mm[off + _SLOT.size: off + _SLOT.size + length]
+        if _SEQ.unpack_from(mm, off)[0] != seq or zlib.crc32(digest + payload) != crc:
+            self.misses += 1  # otro worker reescribió el slot mientras leíamos
+            return None
+        try:
+            claims = json.loads(payload)
+        except ValueError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return claims
+
+    def put_claims(self, token: str, claims: Dict[str, Any]) -> bool:
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            return False  # sin exp no se reutiliza
+        expires_at = min(float(exp), time.time() + self.max_ttl)
+        payload = json.dumps(claims, separators=(",", ":")).encode()
+        if len(payload) > self.slot_bytes - _SLOT.size or expires_at <= time.time():
+            return False
+        mm = self._map()
+        if mm is None:
+            return False
+        digest = hashlib.sha256(token.encode()).digest()
+        off = self._offset(digest)
+        # Sección crítica de microsegundos (memcpy en el mapping): el flock bloqueante no penaliza
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            seq = _SEQ.unpack_from(mm, off)[0]
+            # impar: escritura en curso (también si un worker murió a medias)
+            seq = seq if seq & 1 else seq + 1
+            _SEQ.pack_into(mm, off, seq)
+            mm[off + _SLOT.size: off + _SLOT.size + len(payload)] = payload
+            crc = zlib.crc32(digest + payload)
+            _SLOT.pack_into(mm, off, seq, digest, expires_at, len(payload), crc)
+            _SEQ.pack_into(mm, off, seq + 1)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.stores += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "slots": self.slots,
+        }
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            os.close(self._fd)
+            self._mm = self._fd = None
+
+
+def build_shared_auth_cache(
+    enabled: bool,
+    directory: str,
+    *,
+    slots: int,
+    slot_bytes: int,
+    max_ttl_seconds: float,
+) -> Optional[SharedAuthCache]:
+    if not enabled:
+        return None
+    return SharedAuthCache(
+        directory, slots=slots, slot_bytes=slot_bytes, max_ttl_seconds=max_ttl_seconds
+    )
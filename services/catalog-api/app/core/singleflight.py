@@ -0,0 +1,137 @@
+# services/catalog-api/app/core/singleflight.py
+"""
+Single-flight (coalescing) para GETs idempotentes y calientes.
+
+En picos sincronizados (todas las pestañas refrescan a la vez) N requests idénticas ejecutaban N
+veces la misma query + serialización. Con `respond()` la primera (líder) calcula el cuerpo JSON una
+vez y las concurrentes con la misma clave esperan ese mismo `bytes`:
+
+    clave = método + path + query (ordenada) + scope de autorización (roles del llamante)
+
+- Opt-in por ruta: solo para endpoints cuya respuesta depende únicamente de esa clave.
+- Sin caché: la entrada desaparece al terminar el cálculo; la siguiente request recalcula.
+- Auth / RBAC / rate limit se siguen evaluando por request (van en dependencias, antes de esto).
+- El cálculo va en un task aparte: si el líder se cancela (cliente se va / su deadline) los
+  followers siguen esperando el resultado; cada uno acota su espera con su propio deadline.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import quote, urlencode
+
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.core import deadline
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        self.leaders_total = 0
+        self.shared_total = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # marcado como recuperado aunque nadie lo esperase (líder cancelado)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders_total += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            return await asyncio.shield(task)
+
+        self.shared_total += 1
+        left = deadline.remaining()
+        if left is not None and left <= 0:
+            raise deadline.DeadlineExceeded("Request deadline exceeded")
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=left)
+        except asyncio.TimeoutError:
+            raise deadline.DeadlineExceeded("Request deadline exceeded waiting for shared response")
+        except deadline.DeadlineExceeded:
+            # Se agotó el presupuesto del líder, no el nuestro: lo intentamos como líder
+            left = deadline.remaining()
+            if left is not None and left <= 0:
+                raise
+            return await self.do(key, fn)
+
+
+def request_key(request: Request, scope: str) -> str:
+    # [FIX] Se re-codifica (path y query ya llegan decodificados): `?sku=a&sku=b` y
+    # `?sku=a%26sku%3Db` no pueden compartir clave (ni la respuesta de otro llamante)
+    query: List[Tuple[str, str]] = sorted(request.query_params.multi_items())
+    return f"{request.method} {quote(request.url.path)}?{urlencode(query)}#{quote(scope)}"
+
+
+def roles_scope(roles: Iterable[str]) -> str:
+    return ",".join(sorted(set(roles)))
+
+
+@lru_cache(maxsize=1)
+def get_single_flight() -> SingleFlight:
+    return SingleFlight()
+
+
+async def respond(
+    request: Request,
+    response: Response,
+    scope: str,
+    render: Callable[[], Union[bytes, Awaitable[bytes]]],
+    *,
+    enabled: bool = True,
+    media_type: str = "application/json",
+) -> Response:
+    """
+    Ejecuta `render` (sync => en threadpool; o async) una sola vez por clave en vuelo y
+    devuelve el mismo cuerpo a todas las requests que coincidan. `response` es la sub-respuesta de
+    FastAPI: sus cabeceras (p. ej. RateLimit-* de require_roles) se copian a la respuesta final.
+    """
+    compute = render if inspect.iscoroutinefunction(render) else (lambda: run_in_threadpool(render))
+    if not enabled:
+        body = await compute()
+    else:
+        body = await get_single_flight().do(request_key(request, scope), compute)
+    out = Response(content=body, media_type=media_type)
+    for name, value in response.headers.items():
+        if name != "content-length":
+            out.headers[name] = value
+    return out
+
+
+def render_metrics(service: str) -> str:
+    flight: Optional[SingleFlight] = (
+        get_single_flight() if get_single_flight.cache_info().currsize else None
+    )
+    series = (
+        ("asrp_singleflight_in_flight", "gauge", "Cálculos compartidos en curso", lambda f: len(f)),
+        (
+            "asrp_singleflight_leaders_total",
+            "counter",
+            "Requests que calcularon la respuesta",
+            lambda f: f.leaders_total,
+        ),
+        (
+            "asrp_singleflight_shared_total",
+            "counter",
+            "Requests servidas con una respuesta en vuelo",
+            lambda f: f.shared_total,
+        ),
+    )
+    lines: List[str] = []
+    for name, kind, help_text, value in series:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f'{name}{{service="{service}"}} {value(flight) if flight is not None else 0}')
+    return "\n".join(lines) + "\n"
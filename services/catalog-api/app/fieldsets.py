@@ -0,0 +1,56 @@
+# services/catalog-api/app/fieldsets.py
+"""
+Sparse fieldsets (`?fields=sku,name`) para los endpoints de lectura de productos.
+
+- Allowlist = campos del schema de respuesta (ProductRead): nada fuera del contrato llega al SELECT.
+- Los campos se normalizan al orden del schema => pocas combinaciones, modelos parciales cacheados.
+- DB: el repositorio selecciona solo esas columnas (filas Row, sin hidratar entidades ORM).
+- Caché / snapshot: el JSON ya serializado se recorta a esos campos (sin ir a la DB).
+"""
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Any, Optional
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+
+class InvalidFields(ValueError):
+    def __init__(self, unknown: tuple[str, ...], allowed: tuple[str, ...]) -> None:
+        super().__init__(f"Unknown fields: {', '.join(unknown)}")
+        self.unknown = unknown
+        self.allowed = allowed
+
+
+def parse_fields(raw: Optional[str], schema: type[BaseModel]) -> Optional[tuple[str, ...]]:
+    """None => respuesta completa. Lista vacía o campos fuera del schema => InvalidFields."""
+    if raw is None:
+        return None
+    allowed = tuple(schema.model_fields)
+    requested = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = tuple(sorted(requested.difference(allowed)))
+    if unknown or not requested:
+        raise InvalidFields(unknown, allowed)
+    return tuple(f for f in allowed if f in requested)
+
+
+@lru_cache(maxsize=64)
+def partial_list_adapter(schema: type[BaseModel], fields: tuple[str, ...]) -> TypeAdapter:
+    """list[<schema con solo `fields`>] (mismas anotaciones/serializadores por campo)."""
+    definitions: dict[str, Any] = {
+        name: (info.annotation, info)
+        for name, info in schema.model_fields.items()
+        if name in fields
+    }
+    model = create_model(
+        f"{schema.__name__}Fields", __config__=ConfigDict(from_attributes=True), **definitions
+    )
+    return TypeAdapter(list[model])  # type: ignore[valid-type]
+
+
+def project_json(doc: str, fields: tuple[str, ...]) -> str:
+    """Recorta un objeto JSON ya serializado (caché/snapshot) a `fields`."""
+    data = json.loads(doc)
+    projected = {f: data[f] for f in fields if f in data}
+    return json.dumps(projected, separators=(",", ":"), ensure_ascii=False)
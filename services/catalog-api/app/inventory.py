@@ -0,0 +1,277 @@
+# services/catalog-api/app/inventory.py
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models import StockLevel, StockReservation
+
+logger = get_logger(__name__)
+
+_stock = StockLevel.__table__
+_reservations = StockReservation.__table__
+
+
+class InsufficientStock(Exception):
+    """No hay `available` suficiente para una línea (=> 409). Se revierte la reserva completa."""
+
+    def __init__(self, sku: str) -> None:
+        super().__init__(f"Insufficient stock for {sku}")
+        self.sku = sku
+
+
+class ReservationExists(Exception):
+    """Ya hay una reserva con esa reference (=> 409)."""
+
+
+class ReservationNotFound(Exception):
+    """No hay reservas activas con esa reference (no existe, ya confirmada/liberada o expirada)."""
+
+
+@dataclass(frozen=True)
+class Reservation:
+    reference: str
+    expires_at: datetime
+    lines: Dict[str, int]  # sku -> cantidad reservada
+    available: Dict[str, int]  # sku -> available tras la reserva
+
+
+def _dialect_insert(db: Session):
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+
+def _merge_lines(lines: Iterable[Tuple[str, int]]) -> List[Tuple[str, int]]:
+    """
+    Agrupa SKUs repetidos y ordena por SKU.
+    [PERF] Orden de bloqueo determinista: dos pedidos con los mismos SKUs bloquean las filas
+    de stock_levels en el mismo orden => sin deadlocks bajo contención.
+    """
+    merged: Dict[str, int] = defaultdict(int)
+    for sku, qty in lines:
+        if qty <= 0:
+            raise ValueError("quantity must be > 0")
+        merged[sku] += qty
+    return sorted(merged.items())
+
+
+def _return_to_available(db: Session, returned: Iterable[Tuple[str, int]], now: datetime) -> None:
+    for sku, qty in _merge_lines(returned):
+        db.execute(
+            update(_stock)
+            .where(_stock.c.sku == sku)
+            .values(available=_stock.c.available + qty, updated_at=now)
+        )
+
+
+# =========================
+# Stock
+# =========================
+
+def receive_stock(db: Session, sku: str, quantity: int) -> int:
+    """Entrada de mercancía: suma a on_hand y available (upsert). Devuelve el nuevo available."""
+    now = datetime.now(timezone.utc)
+    ins = _dialect_insert(db)(_stock).values(
+        sku=sku, on_hand=quantity, available=quantity, updated_at=now
+    )
+    stmt = ins.on_conflict_do_update(
+        index_elements=[_stock.c.sku],
+        set_={
+            "on_hand": _stock.c.on_hand + ins.excluded.on_hand,
+            "available": _stock.c.available + ins.excluded.available,
+            "updated_at": ins.excluded.updated_at,
+        },
+    ).returning(_stock.c.available)
+    try:
+        available = db.execute(stmt).scalar_one()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return available
+
+
+def get_stock(db: Session, sku: str) -> Optional[StockLevel]:
+    return db.get(StockLevel, sku)
+
+
+# =========================
+# Reservations
+# =========================
+
+def reserve(
+    db: Session,
+    reference: str,
+    lines: Iterable[Tuple[str, int]],
+    *,
+    ttl_seconds: Optional[int] = None,
+) -> Reservation:
+    """
+    Reserva todas las líneas de un pedido en UNA transacción (todo o nada).
+
+    [PERF] Por línea, un único UPDATE condicional:
+        UPDATE stock_levels SET available = available - :qty
+        WHERE sku = :sku AND available >= :qty RETURNING available
+    El lock de fila dura solo lo que tarda esa sentencia + el commit: en un SKU caliente
+    no hay SELECT previo ni round trip entre leer y escribir. 0 filas => sin stock.
+    Las reservas se insertan con un INSERT multi-row al final.
+    """
+    merged = _merge_lines(lines)
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=ttl_seconds or settings.stock_reservation_ttl_seconds)
+
+    available: Dict[str, int] = {}
+    try:
+        for sku, qty in merged:
+            remaining = db.execute(
+                update(_stock)
+                .where(_stock.c.sku == sku, _stock.c.available >= qty)
+                .values(available=_stock.c.available - qty, updated_at=now)
+                .returning(_stock.c.available)
+            ).scalar_one_or_none()
+            if remaining is None:
+                raise InsufficientStock(sku)
+            available[sku] = remaining
+
+        db.execute(
+            _reservations.insert().values(
+                [
+                    {
+                        "reference": reference,
+                        "sku": sku,
+                        "quantity": qty,
+                        "status": "active",
+                        "created_at": now,
+                        "expires_at": expires_at,
+                    }
+                    for sku, qty in merged
+                ]
+            )
+        )
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise ReservationExists(reference) from e
+    except Exception:
+        db.rollback()
+        raise
+
+    return Reservation(
+        reference=reference, expires_at=expires_at, lines=dict(merged), available=available
+    )
+
+
+def _close_active(db: Session, reference: str, status: str) -> List[Tuple[str, int]]:
+    """Pasa las reservas activas de `reference` a `status` (claim atómico). Devuelve (sku, qty)."""
+    rows = db.execute(
+        update(_reservations)
+        .where(_reservations.c.reference == reference, _reservations.c.status == "active")
+        .values(status=status)
+        .returning(_reservations.c.sku, _reservations.c.quantity)
+    ).all()
+    if not rows:
+        raise ReservationNotFound(reference)
+    return [(r.sku, r.quantity) for r in rows]
+
+
+def release(db: Session, reference: str) -> Dict[str, int]:
+    """Cancela la reserva: devuelve las cantidades a `available`."""
+    now = datetime.now(timezone.utc)
+    try:
+        returned = _close_active(db, reference, "released")
+        _return_to_available(db, returned, now)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return dict(_merge_lines(returned))
+
+
+def confirm(db: Session, reference: str) -> Dict[str, int]:
+    """Confirma la reserva (pedido pagado/servido): el stock sale de on_hand."""
+    now = datetime.now(timezone.utc)
+    try:
+        consumed = _close_active(db, reference, "confirmed")
+        for sku, qty in _merge_lines(consumed):
+            db.execute(
+                update(_stock)
+                .where(_stock.c.sku == sku)
+                .values(on_hand=_stock.c.on_hand - qty, updated_at=now)
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return dict(_merge_lines(consumed))
+
+
+# =========================
+# Sweeper (reservas caducadas)
+# =========================
+
+def sweep_expired(db: Session, *, batch_size: Optional[int] = None) -> int:
+    """
+    Reclama un lote de reservas caducadas y devuelve su stock. Devuelve reservas expiradas.
+
+    [PERF] `FOR UPDATE SKIP LOCKED` en la subconsulta: varias réplicas barren en paralelo
+    sin bloquearse entre sí ni con release/confirm de la misma reserva.
+    """
+    batch_size = batch_size or settings.stock_sweeper_batch_size
+    now = datetime.now(timezone.utc)
+    ids = (
+        select(_reservations.c.id)
+        .where(_reservations.c.status == "active", _reservations.c.expires_at < now)
+        .order_by(_reservations.c.expires_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    try:
+        rows = db.execute(
+            update(_reservations)
+            .where(_reservations.c.id.in_(ids), _reservations.c.status == "active")
+            .values(status="expired")
+            .returning(_reservations.c.sku, _reservations.c.quantity)
+        ).all()
+        _return_to_available(db, [(r.sku, r.quantity) for r in rows], now)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
+
+
+def _sweep_all_expired() -> int:
+    from app.core.db import get_sessionmaker
+
+    total = 0
+    db = get_sessionmaker()()
+    try:
+        while True:
+            n = sweep_expired(db)
+            total += n
+            if n < settings.stock_sweeper_batch_size:
+                return total
+    finally:
+        db.close()
+
+
+async def sweeper_loop() -> None:
+    """Tarea de fondo (lifespan): devuelve a `available` las reservas caducadas cada N segundos."""
+    while True:
+        await asyncio.sleep(settings.stock_sweeper_interval_seconds)
+        try:
+            expired = await asyncio.to_thread(_sweep_all_expired)
+            if expired:
+                logger.info("stock reservations expired: %s", expired)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("stock sweeper failed: %s", e)
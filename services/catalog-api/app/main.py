@@ -1,26 +1,113 @@
 from __future__ import annotations
 
+import asyncio
 import os
-import time
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from app import inventory, outbox, product_cache, snapshot
 from app.api.v1.routes import router as v1_router
+from app.core import ratelimit, revocation, singleflight
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded
 
 # CHANGE (Observability): logging + request id middleware (nuevos módulos)
 from app.core.logging import configure_logging, logger  # CHANGE
+from app.core.readiness import ReadinessProbe
+from app.core.warmup import WarmupState, default_steps
+from app.middlewares import admission
+from app.middlewares.deadline import DeadlineMiddleware
 from app.middlewares.request_id import RequestIdMiddleware  # CHANGE
 
 # --- FIX (robustez): evitar crash si faltan atributos opcionales en Settings ---
 _app_name = getattr(settings, "app_name", "catalog-api")
 _app_version = getattr(settings, "app_version", "0.1.0")
 
-# CHANGE: configurar logging estructurado lo antes posible
-configure_logging()  # CHANGE
 
-app = FastAPI(title=_app_name, version=_app_version)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # CHANGE: configurar logging estructurado lo antes posible
+    # [PERF] En el lifespan (no al importar) para que `import app.main` sea barato
+    configure_logging()  # CHANGE
+
+    # [PERF] Warm-up en background (discovery OIDC + JWKS + pool DB en paralelo)
+    app.state.warmup = WarmupState()
+    app.state.readiness = ReadinessProbe(settings.readiness_cache_seconds)
+    if settings.warmup_enabled:
+        app.state.warmup.start(default_steps())
+
+    # Transactional outbox: relay en background (lotes FOR UPDATE SKIP LOCKED -> sink)
+    relay_task = None
+    if settings.outbox_relay_enabled:
+        app.state.outbox_relay = outbox.build_relay()
+        relay_task = asyncio.create_task(app.state.outbox_relay.run(), name="outbox-relay")
+
+    # Reservas de stock caducadas -> vuelven a `available` (sweeper por lotes)
+    sweeper_task = None
+    if settings.stock_sweeper_enabled:
+        sweeper_task = asyncio.create_task(inventory.sweeper_loop(), name="stock-sweeper")
+
+    # Revocaciones (jti/sid): poll incremental del feed si está configurado
+    revocation_task = None
+    if settings.revocation_feed_url:
+        revocation_task = asyncio.create_task(revocation.poll_loop(), name="revocation-poll")
+
+    # Snapshot mmap del catálogo: generación (un worker) + remapeo + seguimiento del outbox
+    snapshot_task = None
+    if settings.snapshot_enabled:
+        snapshot_task = asyncio.create_task(snapshot.refresh_loop(), name="catalog-snapshot")
+
+    # Caché de productos: generación del namespace + suscripción al canal de invalidación
+    if settings.product_cache_enabled:
+        await product_cache.get_product_cache().start()
+    try:
+        yield
+    finally:
+        tasks = [
+            t for t in (relay_task, sweeper_task, revocation_task, snapshot_task) if t is not None
+        ]
+        for task in tasks:
+            task.cancel()
+        # Esperar a que terminen: el pool de DB / clientes HTTP no se cierran bajo sus pies
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if ratelimit.get_rate_limiter.cache_info().currsize:
+            await ratelimit.get_rate_limiter().aclose()
+        if product_cache.get_product_cache.cache_info().currsize:
+            await product_cache.get_product_cache().stop()
+        await app.state.warmup.stop()
+
+
+app = FastAPI(title=_app_name, version=_app_version, lifespan=lifespan)
+
+# [PERF] Admission control: 503 + Retry-After rápido cuando el servicio está saturado.
+# Se añade antes que RequestId/CORS => queda por dentro (los 503 llevan X-Request-Id y CORS).
+if settings.admission_enabled:
+    app.add_middleware(
+        admission.AdmissionControlMiddleware,
+        service=_app_name,
+        default_limit=settings.admission_default_limit,
+        route_limits=admission.parse_route_limits(settings.admission_route_limits),
+        min_limit=settings.admission_min_limit,
+        max_queue=settings.admission_max_queue,
+        queue_timeout_seconds=settings.admission_queue_timeout_seconds,
+        latency_target_ms=settings.admission_latency_target_ms,
+        retry_after_seconds=settings.admission_retry_after_seconds,
+        # Long-poll del feed: pasa casi todo el tiempo esperando (sin DB); su tope es
+        # CHANGES_MAX_WAITERS
+        exempt_paths=("/health", "/ready", "/metrics", "/v1/products/changes"),
+    )
+
+# [PERF] Deadline del gateway (X-Request-Timeout-Ms): por fuera de admission => la espera en cola
+# también consume presupuesto; agotado => se cancela el trabajo y 504.
+if settings.request_deadline_enabled:
+    app.add_middleware(
+        DeadlineMiddleware,
+        default_ms=settings.request_default_timeout_ms,
+        max_ms=settings.request_max_timeout_ms,
+    )
 
 # CHANGE (Observability): correlation id + logs request start/end
 app.add_middleware(RequestIdMiddleware)  # CHANGE
@@ -37,6 +124,19 @@ app.add_middleware(
     allow_headers=["Authorization", "Content-Type", "Accept", "X-Request-Id"],  # CHANGE: permitir request id
 )
 
+# Presupuesto del request agotado (DB / llamadas salientes) => 504 con requestId
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(
+        status_code=504,
+        content={
+            "error": "deadline_exceeded",
+            "message": "Request deadline exceeded",
+            "requestId": getattr(request.state, "request_id", None),
+        },
+    )
+
+
 @app.get("/health")
 def health():
     env = getattr(settings, "environment", None)
@@ -50,5 +150,31 @@ def health():
         "version": _app_version,
     }
 
+
+# [PERF] Readiness: /health = liveness (estático); /ready = caches calientes + pool DB
+@app.get("/ready")
+async def ready(request: Request):
+    probe = getattr(request.app.state, "readiness", None)
+    if probe is None:
+        result = {"ready": False, "checks": {"warmup": False}}
+    else:
+        result = probe.check(getattr(request.app.state, "warmup", None))
+
+    return JSONResponse(
+        status_code=200 if result["ready"] else 503,
+        content={
+            "status": "ready" if result["ready"] else "not_ready",
+            "service": _app_name,
+            "checks": result["checks"],
+        },
+    )
+
+# Métricas (texto Prometheus): gauges de admission control
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body = admission.render_metrics() + singleflight.render_metrics(_app_name)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
 # API v1
 app.include_router(v1_router)
@@ -0,0 +1,274 @@
+"""
+Admission control / load shedding (ASGI puro, sin BaseHTTPMiddleware).
+
+Si Keycloak o PostgreSQL se ralentizan, aceptar más requests solo apila corrutinas y trabajo en
+el threadpool hasta que todo hace timeout. Aquí cada grupo de rutas (prefijo) tiene:
+
+- un límite de concurrencia (in-flight),
+- una cola de espera acotada (ADMISSION_MAX_QUEUE) con timeout (ADMISSION_QUEUE_TIMEOUT_SECONDS),
+- límite adaptativo AIMD: +1/limit por request rápida que usa el límite; x0.9 cuando la latencia
+  supera ADMISSION_LATENCY_TARGET_MS (como mucho una bajada por ventana de latencia objetivo).
+
+Saturado => 503 inmediato con Retry-After (sin tocar routing, auth ni DB).
+/health, /ready y /metrics quedan exentos. Métricas: GET /metrics (formato Prometheus).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+Scope = Dict[str, Any]
+ASGIApp = Callable[..., Any]
+
+
+class AdaptiveLimit:
+    """AIMD sobre la latencia observada. Con latency_target_ms <= 0 el límite es fijo."""
+
+    def __init__(
+        self,
+        initial: int,
+        *,
+        min_limit: int = 1,
+        max_limit: Optional[int] = None,
+        latency_target_ms: float = 0.0,
+        backoff: float = 0.9,
+    ) -> None:
+        self.max_limit = max(1, max_limit or initial)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self._target = latency_target_ms / 1000.0
+        self._backoff = backoff
+        self._last_decrease = 0.0
+
+    @property
+    def value(self) -> int:
+        return int(self._limit)
+
+    def on_sample(self, latency: float, in_flight: int, now: Optional[float] = None) -> None:
+        if self._target <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        if latency > self._target:
+            # Una sola bajada por ventana: una ráfaga de requests lentas no hunde el límite a min
+            if now - self._last_decrease >= self._target:
+                self._limit = max(float(self.min_limit), self._limit * self._backoff)
+                self._last_decrease = now
+        elif in_flight + 1 >= self._limit * 0.5:
+            # Solo crece si el límite se está usando (si no, no hay evidencia de que aguante más)
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+
+class AdmissionLimiter:
+    """Semáforo con cola FIFO acotada y timeout. Todo ocurre en el event loop: sin locks."""
+
+    def __init__(
+        self, name: str, limit: AdaptiveLimit, *, max_queue: int, queue_timeout: float
+    ) -> None:
+        self.name = name
+        self.limit = limit
+        self._max_queue = max(0, max_queue)
+        self._queue_timeout = queue_timeout
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.in_flight = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        if self.in_flight < self.limit.value and not self._waiters:
+            self.in_flight += 1
+            self.admitted_total += 1
+            return True
+        if len(self._waiters) >= self._max_queue:
+            self.rejected_total += 1
+            return False
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=self._queue_timeout)
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.cancelled():
+                # release() nos cedió el hueco justo al expirar: se usa
+                self.admitted_total += 1
+                return True
+            fut.cancel()
+            self._remove(fut)
+            self.rejected_total += 1
+            return False
+        except asyncio.CancelledError:
+            # El cliente se fue mientras esperaba: si ya teníamos hueco, se devuelve
+            if fut.done() and not fut.cancelled():
+                self.release(None)
+            else:
+                fut.cancel()
+                self._remove(fut)
+            raise
+        self.admitted_total += 1
+        return True
+
+    def _remove(self, fut: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(fut)
+        except ValueError:
+            pass
+
+    def release(self, latency: Optional[float]) -> None:
+        if latency is not None:
+            self.limit.on_sample(latency, self.in_flight)
+        self.in_flight -= 1
+        # Hand-off directo: el hueco pasa al siguiente de la cola sin competir con recién llegados
+        while self._waiters and self.in_flight < self.limit.value:
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self.in_flight += 1
+            fut.set_result(None)
+
+
+def parse_route_limits(raw: str) -> List[Tuple[str, int]]:
+    """'/v1/products=64,/v1/orders=32' -> [(prefijo, límite)] ordenado por prefijo más largo."""
+    out: List[Tuple[str, int]] = []
+    for item in (raw or "").split(","):
+        if "=" not in item:
+            continue
+        prefix, limit = item.split("=", 1)
+        if prefix.strip():
+            out.append((prefix.strip(), int(limit)))
+    return sorted(out, key=lambda x: len(x[0]), reverse=True)
+
+
+class AdmissionControlMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        service: str,
+        default_limit: int,
+        route_limits: Sequence[Tuple[str, int]] = (),
+        min_limit: int = 1,
+        max_queue: int = 64,
+        queue_timeout_seconds: float = 1.0,
+        latency_target_ms: float = 0.0,
+        retry_after_seconds: int = 1,
+        exempt_paths: Sequence[str] = ("/health", "/ready", "/metrics"),
+    ) -> None:
+        self.app = app
+        self.service = service
+        self._exempt = frozenset(exempt_paths)
+        self._retry_after = str(max(1, int(retry_after_seconds)))
+
+        def _limiter(name: str, limit: int) -> AdmissionLimiter:
+            return AdmissionLimiter(
+                name,
+                AdaptiveLimit(limit, min_limit=min_limit, latency_target_ms=latency_target_ms),
+                max_queue=max_queue,
+                queue_timeout=queue_timeout_seconds,
+            )
+
+        self._routes = [(prefix, _limiter(prefix, limit)) for prefix, limit in route_limits]
+        self._default = _limiter("default", default_limit)
+        self.limiters = [lim for _, lim in self._routes] + [self._default]
+        register(self)
+
+    def limiter_for(self, path: str) -> AdmissionLimiter:
+        for prefix, limiter in self._routes:
+            if path.startswith(prefix):
+                return limiter
+        return self._default
+
+    async def __call__(self, scope: Scope, receive: Callable, send: Callable) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"] in self._exempt
+            or scope.get("method") == "OPTIONS"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiter_for(scope["path"])
+        if not await limiter.acquire():
+            await self._reject(limiter, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # [FIX] También con excepción/cancelación (deadline, cliente que se va): son justo las
+            # requests lentas de una sobrecarga y sin su muestra el AIMD nunca bajaría el límite
+            limiter.release(time.perf_counter() - start)
+
+    async def _reject(self, limiter: AdmissionLimiter, send: Callable) -> None:
+        body = json.dumps(
+            {
+                "error": "overloaded",
+                "message": "Service is saturated, retry later",
+                "route": limiter.name,
+            }
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", self._retry_after.encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+# =========================
+# Métricas (gauges / counters)
+# =========================
+
+_registered: List[AdmissionControlMiddleware] = []
+
+
+def register(middleware: AdmissionControlMiddleware) -> None:
+    # Starlette reconstruye la pila de middlewares por app: se guarda solo la última instancia
+    _registered[:] = [m for m in _registered if m.service != middleware.service] + [middleware]
+
+
+def render_metrics() -> str:
+    """Exposición en texto Prometheus (sin dependencia de prometheus_client)."""
+    series = (
+        ("asrp_admission_in_flight", "gauge", "Requests en curso", lambda lim: lim.in_flight),
+        ("asrp_admission_queued", "gauge", "Requests esperando hueco", lambda lim: lim.queued),
+        (
+            "asrp_admission_limit",
+            "gauge",
+            "Límite de concurrencia actual (adaptativo)",
+            lambda lim: lim.limit.value,
+        ),
+        (
+            "asrp_admission_admitted_total",
+            "counter",
+            "Requests admitidas",
+            lambda lim: lim.admitted_total,
+        ),
+        (
+            "asrp_admission_rejected_total",
+            "counter",
+            "Requests rechazadas con 503",
+            lambda lim: lim.rejected_total,
+        ),
+    )
+    lines: List[str] = []
+    for name, kind, help_text, value in series:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for m in _registered:
+            for limiter in m.limiters:
+                labels = f'service="{m.service}",route="{limiter.name}"'
+                lines.append(f"{name}{{{labels}}} {value(limiter)}")
+    return "\n".join(lines) + "\n"
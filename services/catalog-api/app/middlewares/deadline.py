@@ -0,0 +1,91 @@
+"""
+Deadline propagation (ASGI puro): lee X-Request-Timeout-Ms, fija el deadline del request
+(app.core.deadline) y cancela el trabajo en cuanto se agota => 504 si aún no se respondió.
+
+Los endpoints sync siguen en su thread hasta que PostgreSQL corta la query (statement_timeout
+fijado con el mismo presupuesto), pero el cliente ya no espera y el slot de admisión se libera.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, Sequence
+
+from app.core import deadline
+
+Scope = Dict[str, Any]
+ASGIApp = Callable[..., Any]
+
+
+class DeadlineMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        header: str = deadline.TIMEOUT_HEADER,
+        default_ms: int = 0,
+        max_ms: int = 0,
+        exempt_paths: Sequence[str] = ("/health", "/ready", "/metrics"),
+    ) -> None:
+        self.app = app
+        self._header = header.lower().encode("latin-1")
+        self._default_ms = default_ms
+        self._max_ms = max_ms
+        self._exempt = frozenset(exempt_paths)
+
+    def _budget_ms(self, scope: Scope):
+        raw = None
+        for name, value in scope.get("headers") or ():
+            if name == self._header:
+                raw = value.decode("latin-1")
+                break
+        return deadline.parse_timeout_ms(raw, default_ms=self._default_ms, max_ms=self._max_ms)
+
+    async def __call__(self, scope: Scope, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope["path"] in self._exempt:
+            await self.app(scope, receive, send)
+            return
+        budget_ms = self._budget_ms(scope)
+        if budget_ms is None:
+            await self.app(scope, receive, send)
+            return
+        if budget_ms <= 0:
+            await deadline_exceeded_response(send)
+            return
+
+        started = False
+
+        async def _send(message: Dict[str, Any]) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        token = deadline.start(budget_ms)
+        try:
+            async with asyncio.timeout(budget_ms / 1000.0) as cm:
+                await self.app(scope, receive, _send)
+        except TimeoutError:
+            if not cm.expired():
+                raise  # un TimeoutError de otra cosa no es nuestro deadline
+            if not started:
+                await deadline_exceeded_response(send)
+        finally:
+            deadline.reset(token)
+
+
+async def deadline_exceeded_response(send: Callable) -> None:
+    body = json.dumps(
+        {"error": "deadline_exceeded", "message": "Request deadline exceeded"}
+    ).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 504,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -1,4 +1,18 @@
-from sqlalchemy import Integer, String
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    CheckConstraint,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.db import Base
@@ -10,3 +24,109 @@ class Product(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     sku: Mapped[str] = mapped_column(String(64), unique=True, nullable=False, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Feed de cambios (/v1/products/changes): lo asigna app.changes en cada alta/modificación
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False, unique=True, index=True)
+
+
+class ProductChangeCounter(Base):
+    """
+    Fila única (id=1) con la última secuencia asignada. El UPDATE que la incrementa bloquea la fila
+    hasta el commit: las escrituras de productos se serializan y change_seq crece en orden de commit
+    (un lector con cursor nunca se salta un cambio que confirme más tarde con un número menor).
+    """
+
+    __tablename__ = "product_change_counter"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    last_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class ProductTombstone(Base):
+    """Borrado de un producto, para que los clientes del feed lo eliminen de su copia."""
+
+    __tablename__ = "product_tombstones"
+
+    change_seq: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    product_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    sku: Mapped[str] = mapped_column(String(64), nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class OutboxEvent(Base):
+    """
+    Transactional outbox: se escribe en la MISMA transacción que el cambio de negocio.
+    Los consumidores deduplican por `eventId` (entrega at-least-once). `id` NO es un offset
+    seguro: la secuencia se asigna antes del commit, así que un id más bajo puede confirmarse
+    después de uno más alto (o no confirmarse nunca). Quien lea por id debe seguir los huecos.
+    """
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # [PERF] El relay solo lee pendientes: índice parcial (PostgreSQL) sobre id
+        Index(
+            "ix_outbox_events_unpublished",
+            "id",
+            postgresql_where=text("published_at IS NULL"),
+            sqlite_where=text("published_at IS NULL"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True
+    )
+    aggregate_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    aggregate_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    event_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    published_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class StockLevel(Base):
+    """
+    Stock por SKU. `available` = on_hand - reservas activas.
+    [PERF] Se decrementa con UN UPDATE condicional (sin read-modify-write en Python);
+    el CHECK es la red de seguridad: nunca puede quedar negativo.
+    """
+
+    __tablename__ = "stock_levels"
+    __table_args__ = (
+        CheckConstraint("available >= 0", name="ck_stock_levels_available_non_negative"),
+        CheckConstraint("available <= on_hand", name="ck_stock_levels_available_le_on_hand"),
+    )
+
+    sku: Mapped[str] = mapped_column(
+        String(64), ForeignKey("products.sku", ondelete="CASCADE"), primary_key=True
+    )
+    on_hand: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    available: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class StockReservation(Base):
+    """
+    Reserva (hold) de stock con caducidad. 1 fila por (reference, sku).
+    status: active -> confirmed | released | expired
+    """
+
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        UniqueConstraint("reference", "sku", name="uq_stock_reservations_reference_sku"),
+        # [PERF] El sweeper solo mira reservas activas por caducidad: índice parcial
+        Index(
+            "ix_stock_reservations_active_expires_at",
+            "expires_at",
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True
+    )
+    reference: Mapped[str] = mapped_column(String(64), nullable=False)
+    sku: Mapped[str] = mapped_column(String(64), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="active")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,242 @@
+# services/catalog-api/app/outbox.py
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Protocol, Set
+
+import httpx
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models import OutboxEvent
+
+logger = get_logger(__name__)
+
+Message = Dict[str, Any]
+
+
+# =========================
+# Write side (misma transacción que el cambio de negocio)
+# =========================
+
+def enqueue(
+    db: Session,
+    *,
+    aggregate_type: str,
+    aggregate_id: Any,
+    event_type: str,
+    payload: Dict[str, Any],
+) -> None:
+    """Añade el evento a la sesión. NO hace commit: lo hace el write path junto al cambio."""
+    db.add(
+        OutboxEvent(
+            aggregate_type=aggregate_type,
+            aggregate_id=str(aggregate_id),
+            event_type=event_type,
+            payload=payload,
+            created_at=datetime.now(timezone.utc),
+        )
+    )
+
+
+def to_message(event: OutboxEvent) -> Message:
+    # [FIX] `eventId` (id del outbox) es la clave de deduplicación, NO un offset: los ids se
+    # asignan en el INSERT y un id menor puede confirmar después de uno mayor ya publicado.
+    # El orden de lectura (`offset`) lo asigna el sink al publicar.
+    return {
+        "eventId": event.id,
+        "type": event.event_type,
+        "aggregateType": event.aggregate_type,
+        "aggregateId": event.aggregate_id,
+        "occurredAt": event.created_at.isoformat() if event.created_at else None,
+        "service": "catalog-api",
+        "payload": event.payload,
+    }
+
+
+# =========================
+# Sinks (pluggable)
+# =========================
+
+class OutboxSink(Protocol):
+    def publish(self, messages: List[Message]) -> None: ...
+
+
+class InMemorySink:
+    """
+    Stub en memoria SOLO para tests (build_sink no lo construye: lo publicado se perdería al
+    reiniciar y crece sin límite), con semántica de log: cada mensaje recibe un `offset`
+    (1, 2, ...) en orden de publicación y los consumidores leen con read(after_offset).
+    """
+
+    def __init__(self) -> None:
+        self._event_ids: Set[int] = set()
+        self._messages: List[Message] = []
+        self._lock = threading.Lock()
+
+    def publish(self, messages: List[Message]) -> None:
+        with self._lock:
+            for m in messages:
+                # at-least-once: un reenvío del mismo evento no se duplica (conjunto de ids, no
+                # marca de agua: un id menor que confirma tarde sigue entrando)
+                if m["eventId"] in self._event_ids:
+                    continue
+                self._event_ids.add(m["eventId"])
+                self._messages.append({**m, "offset": len(self._messages) + 1})
+
+    def read(self, after_offset: int = 0, limit: int = 100) -> List[Message]:
+        with self._lock:
+            start = max(0, after_offset)
+            return self._messages[start : start + limit]
+
+
+class FileSink:
+    """
+    JSON Lines append-only. El `offset` de un mensaje es su número de línea (orden de
+    publicación); el consumidor guarda el último leído. Un reenvío (at-least-once) añade otra
+    línea con el mismo `eventId`: los consumidores deduplican por `eventId`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+
+    def publish(self, messages: List[Message]) -> None:
+        data = "".join(json.dumps(m, separators=(",", ":"), default=str) + "\n" for m in messages)
+        with self._lock, open(self._path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self, after_offset: int = 0, limit: int = 100) -> List[Message]:
+        out: List[Message] = []
+        if not os.path.exists(self._path):
+            return out
+        with open(self._path, encoding="utf-8") as f:
+            for offset, line in enumerate(f, start=1):
+                if offset <= after_offset:
+                    continue
+                out.append({**json.loads(line), "offset": offset})
+                if len(out) >= limit:
+                    break
+        return out
+
+
+class HttpSink:
+    """Puente a broker/webhook vía HTTP: POST del lote completo (1 request por lote)."""
+
+    def __init__(self, url: str, *, timeout_seconds: float = 5.0) -> None:
+        self._url = url
+        self._client = httpx.Client(timeout=timeout_seconds)
+
+    def publish(self, messages: List[Message]) -> None:
+        resp = self._client.post(self._url, json={"events": messages})
+        resp.raise_for_status()
+
+
+def build_sink() -> OutboxSink:
+    # [FIX] Sin sink por defecto: el relay marca published_at al publicar, así que un sink en
+    # memoria perdería los eventos (nadie aguas abajo los ve) => el relay no arranca
+    kind = (settings.outbox_sink or "").strip().lower()
+    if kind == "file":
+        return FileSink(settings.outbox_file_path)
+    if kind == "http":
+        if not settings.outbox_http_url:
+            raise ValueError("OUTBOX_SINK=http requires OUTBOX_HTTP_URL")
+        return HttpSink(settings.outbox_http_url)
+    raise ValueError("OUTBOX_RELAY_ENABLED requires OUTBOX_SINK=file|http")
+
+
+# =========================
+# Relay
+# =========================
+
+class OutboxRelay:
+    """
+    [PERF] Drena el outbox por lotes y lo publica en el sink (entrega at-least-once).
+
+    - 1 SELECT indexado por lote: `... WHERE published_at IS NULL ORDER BY id LIMIT n
+      FOR UPDATE SKIP LOCKED` => varias réplicas drenan en paralelo sin pisarse.
+    - Se marca published_at solo después de publicar: si el proceso cae entre medias,
+      el lote se reenvía (los consumidores deduplican por `eventId`).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        sink: OutboxSink,
+        *,
+        batch_size: int = 100,
+        poll_interval_seconds: float = 1.0,
+    ) -> None:
+        self._session_factory = session_factory
+        self.sink = sink
+        self._batch_size = max(1, batch_size)
+        self._poll_interval = poll_interval_seconds
+
+    def drain_once(self) -> int:
+        db = self._session_factory()
+        try:
+            rows = (
+                db.execute(
+                    select(OutboxEvent)
+                    .where(OutboxEvent.published_at.is_(None))
+                    .order_by(OutboxEvent.id)
+                    .limit(self._batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                .scalars()
+                .all()
+            )
+            if not rows:
+                db.rollback()
+                return 0
+
+            self.sink.publish([to_message(r) for r in rows])
+            db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_([r.id for r in rows]))
+                .values(published_at=datetime.now(timezone.utc))
+            )
+            db.commit()
+            return len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def run(self) -> None:
+        backoff = self._poll_interval
+        while True:
+            try:
+                n = await asyncio.to_thread(self.drain_once)
+                backoff = self._poll_interval
+            except Exception as e:  # noqa: BLE001
+                logger.warning("outbox relay failed: %s", e)
+                n = 0
+                backoff = min(backoff * 2, 30.0)
+            # Lote lleno => probablemente hay más: seguimos sin esperar
+            if n < self._batch_size:
+                await asyncio.sleep(backoff)
+
+
+def build_relay(session_factory: Optional[Callable[[], Session]] = None) -> OutboxRelay:
+    if session_factory is None:
+        from app.core.db import get_sessionmaker
+
+        # Lazy: el engine se crea en el thread del relay (o en el warm-up), no en el lifespan
+        def session_factory() -> Session:
+            return get_sessionmaker()()
+    return OutboxRelay(
+        session_factory,
+        build_sink(),
+        batch_size=settings.outbox_batch_size,
+        poll_interval_seconds=settings.outbox_poll_interval_seconds,
+    )
@@ -0,0 +1,129 @@
+# services/catalog-api/app/product_cache.py
+"""
+Caché de productos por SKU (app.core.cache.TwoTierCache) para /v1/products/lookup.
+
+- Valor: el JSON de ProductRead ya serializado (un hit no vuelve a pasar por pydantic).
+- Con SNAPSHOT_ENABLED, el snapshot mmap compartido (app.snapshot) va delante de la caché.
+- Invalidación automática: cualquier Session que haga commit con Products
+  nuevos/modificados/borrados invalida esos SKUs (L1 de este worker al momento; L2 + pub/sub al
+  resto de réplicas). Escrituras fuera de la app (scripts, SQL a mano) solo se ven al caducar el TTL
+  o con `invalidate_all()`.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import fieldsets, repositories, snapshot
+from app.core.cache import TwoTierCache, build_shared_cache
+from app.core.config import settings
+from app.core.db import session_scope
+from app.models import Product
+from app.schemas import ProductRead
+
+# Subir si cambia el formato serializado de ProductRead (las entradas viejas dejan de leerse)
+SCHEMA_VERSION = 1
+
+_PENDING_KEY = "product_cache_skus"
+_PENDING_IDS_KEY = "product_cache_ids"
+
+
+@lru_cache(maxsize=1)
+def get_product_cache() -> TwoTierCache:
+    shared = build_shared_cache(
+        settings.product_cache_backend,
+        settings.product_cache_redis_url,
+        timeout_seconds=settings.product_cache_timeout_ms / 1000.0,
+    )
+    return TwoTierCache(
+        shared,
+        namespace=settings.product_cache_namespace,
+        schema_version=SCHEMA_VERSION,
+        local_max_entries=settings.product_cache_local_max_entries,
+        local_ttl_seconds=settings.product_cache_local_ttl_seconds,
+        shared_ttl_seconds=settings.product_cache_shared_ttl_seconds,
+    )
+
+
+def _load(skus: List[str]) -> Dict[str, str]:
+    with session_scope() as db:
+        rows = repositories.get_products_by_skus(db, skus)
+        return {
+            p.sku: ProductRead.model_validate(p, from_attributes=True).model_dump_json()
+            for p in rows
+        }
+
+
+async def _loader(skus: List[str]) -> Dict[str, str]:
+    return await run_in_threadpool(_load, skus)
+
+
+async def lookup_json(skus: Sequence[str], fields: Optional[Tuple[str, ...]] = None) -> bytes:
+    """
+    Array JSON con los productos encontrados, en el orden pedido (los SKUs inexistentes se omiten).
+    Orden: snapshot mmap (si está activo) -> caché L1/L2 -> PostgreSQL.
+    `fields` (sparse fieldset): cada objeto se recorta a esos campos; la caché guarda siempre el
+    objeto completo (una sola entrada por SKU sirve a cualquier fieldset).
+    """
+    found: Dict[str, str] = {}
+    pending: List[str] = list(skus)
+    if settings.snapshot_enabled:
+        found, pending = snapshot.get_snapshot_manager().lookup_json(pending)
+    if pending:
+        if settings.product_cache_enabled:
+            found.update(await get_product_cache().get_many(pending, _loader))
+        else:
+            found.update(await _loader(pending))
+    docs = (found[s] for s in skus if s in found)
+    if fields is not None:
+        docs = (fieldsets.project_json(doc, fields) for doc in docs)
+    return ("[" + ",".join(docs) + "]").encode()
+
+
+# =========================
+# Invalidación en commit (ORM)
+# =========================
+
+def _changed(session: Session) -> Tuple[Set[str], Set[int]]:
+    skus: Set[str] = set()
+    ids: Set[int] = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Product):
+            if obj.sku:
+                skus.add(obj.sku)
+            if obj.id is not None:
+                ids.add(obj.id)
+            # Cambio de SKU: la clave vieja también
+            skus.update(s for s in inspect(obj).attrs.sku.history.deleted if s)
+    return skus, ids
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session: Session, flush_context) -> None:
+    skus, ids = _changed(session)
+    if skus:
+        session.info.setdefault(_PENDING_KEY, set()).update(skus)
+        session.info.setdefault(_PENDING_IDS_KEY, set()).update(ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate(session: Session) -> None:
+    skus = session.info.pop(_PENDING_KEY, None)
+    ids = session.info.pop(_PENDING_IDS_KEY, None) or set()
+    if not skus:
+        return
+    if settings.snapshot_enabled:
+        # Este worker deja de servir esos productos desde el snapshot hasta el siguiente
+        snapshot.get_snapshot_manager().mark_stale(skus, ids)
+    if settings.product_cache_enabled:
+        get_product_cache().invalidate_nowait(sorted(skus))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_PENDING_IDS_KEY, None)
@@ -1,6 +1,9 @@
+from typing import Any, Sequence
+
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app import outbox
 from app.models import Product
 from app.schemas import ProductCreate
 
@@ -8,6 +11,15 @@ from app.schemas import ProductCreate
 def create_product(db: Session, payload: ProductCreate) -> Product:
     product = Product(sku=payload.sku, name=payload.name)
     db.add(product)
+    db.flush()  # asigna id para el evento
+    # Transactional outbox: el evento se confirma (o no) junto con el producto
+    outbox.enqueue(
+        db,
+        aggregate_type="product",
+        aggregate_id=product.id,
+        event_type="product.created",
+        payload={"id": product.id, "sku": product.sku, "name": product.name},
+    )
     db.commit()
     db.refresh(product)
     return product
@@ -23,3 +35,16 @@ def get_product(db: Session, product_id: int) -> Product | None:
 
 def get_product_by_sku(db: Session, sku: str) -> Product | None:
     return db.execute(select(Product).where(Product.sku == sku)).scalars().first()
+
+
+def get_products_by_skus(
+    db: Session, skus: list[str], columns: Sequence[str] | None = None
+) -> list[Any]:
+    # [PERF] Lookup por lotes (1 query con IN + índice unique de sku), usado por orders-api
+    if not skus:
+        return []
+    if columns is None:
+        return db.execute(select(Product).where(Product.sku.in_(skus))).scalars().all()
+    # [PERF] Sparse fieldset: SELECT solo de esas columnas, filas Row en vez de entidades ORM
+    stmt = select(*(getattr(Product, c) for c in columns)).where(Product.sku.in_(skus))
+    return db.execute(stmt).all()
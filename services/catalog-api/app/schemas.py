@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -10,3 +13,60 @@ class ProductRead(BaseModel):
     id: int
     sku: str
     name: str
+
+
+class ProductChange(BaseModel):
+    seq: int
+    op: Literal["upsert", "delete"]
+    id: int
+    sku: str
+    product: ProductRead | None = None  # solo en upsert; en delete es un tombstone
+
+
+class ProductChangePage(BaseModel):
+    changes: list[ProductChange]
+    next_cursor: str  # se pasa tal cual en ?since= (también sin cambios: no retrocede)
+    has_more: bool
+
+
+class StockRead(BaseModel):
+    sku: str
+    on_hand: int
+    available: int
+
+
+class ReservationLine(BaseModel):
+    sku: str = Field(min_length=1, max_length=64)
+    quantity: int = Field(gt=0, le=100_000)
+
+
+class ReservationCreate(BaseModel):
+    reference: str = Field(min_length=1, max_length=64)  # p.ej. id de pedido en orders-api
+    lines: list[ReservationLine] = Field(min_length=1, max_length=500)
+    ttl_seconds: int | None = Field(default=None, gt=0, le=86_400)
+
+
+class ReservationRead(BaseModel):
+    reference: str
+    expires_at: datetime
+    lines: dict[str, int]
+    available: dict[str, int]
+
+
+# =========================
+# Revocaciones (webhook / feed)
+# =========================
+
+class RevocationEntry(BaseModel):
+    type: Literal["jti", "sid"]
+    value: str = Field(min_length=1, max_length=255)
+    expires_at: int | None = None  # epoch s; por defecto REVOCATION_RETENTION_SECONDS
+
+
+class RevocationBatch(BaseModel):
+    revocations: list[RevocationEntry] = Field(min_length=1, max_length=10_000)
+
+
+class RevocationResult(BaseModel):
+    applied: int
+    size: int
@@ -0,0 +1,441 @@
+# services/catalog-api/app/snapshot.py
+"""
+Snapshot inmutable del catálogo, compartido entre workers vía mmap.
+
+Con N workers uvicorn, cada L1 por proceso multiplica memoria y se recalienta contra PostgreSQL.
+Un solo worker (flock) genera periódicamente un fichero compacto de solo lectura; todos lo mapean
+en memoria: las páginas viven una vez en el page cache del kernel y un lookup es una búsqueda
+binaria sobre bytes, sin deserializar nada (el valor ya es el JSON de ProductRead).
+
+Formato (little-endian):
+
+    cabecera (64 B): magic, formato, nº registros, ancho SKU, version, built_at_ms, offsets
+    índice SKU:      N x (sku rellenado con \\0 hasta `ancho SKU`, nº de registro u32),
+                     ordenado por sku
+    registros:       N x (id u64, offset u32, longitud u32), ordenado por id
+    heap:            JSON de cada producto, concatenados
+
+Frescura: `version` = marca de agua del outbox tomada ANTES de escanear products: el último id sin
+huecos recientes por debajo. Los ids se asignan en el INSERT, así que un id menor puede confirmar
+después de uno mayor; un hueco se espera `gap_timeout` (transacción abierta) antes de darlo por
+rollback. Cada worker sigue `outbox_events` desde `version` con el mismo criterio (el cursor no pasa
+de un hueco pendiente y se relee por debajo) y esos productos van a la DB; los SKUs que no están en
+el snapshot (altas posteriores) también. Los commits de este mismo proceso se marcan al momento
+(after_commit). Publicación atómica: fichero temporal + fsync + os.replace.
+"""
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models import OutboxEvent, Product
+from app.schemas import ProductRead
+
+logger = get_logger(__name__)
+
+MAGIC = b"ASRPSNP1"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIIIIQQQQQ")
+_RECORD = struct.Struct("<QII")
+_INDEX_REF = struct.Struct("<I")
+_ID = struct.Struct("<Q")
+
+
+class SnapshotFormatError(Exception):
+    """Fichero truncado / de otro formato: se ignora y se sigue con la DB."""
+
+
+# =========================
+# Escritura
+# =========================
+
+def write_snapshot(
+    path: str, products: Iterable[Tuple[int, str, str]], *, version: int, built_at_ms: int
+) -> int:
+    """
+    Escribe el snapshot de forma atómica. `products` = (id, sku, name). Devuelve nº de registros.
+    """
+    rows = sorted(products, key=lambda p: p[0])
+    skus = [p[1].encode("utf-8") for p in rows]
+    sku_width = max((len(s) for s in skus), default=1)
+
+    heap = bytearray()
+    records = bytearray()
+    for (product_id, sku, name) in rows:
+        body = ProductRead(id=product_id, sku=sku, name=name).model_dump_json().encode()
+        records += _RECORD.pack(product_id, len(heap), len(body))
+        heap += body
+
+    entry = struct.Struct(f"<{sku_width}sI")
+    index = bytearray()
+    for sku, record in sorted((s.ljust(sku_width, b"\0"), i) for i, s in enumerate(skus)):
+        index += entry.pack(sku, record)
+
+    index_off = _HEADER.size
+    records_off = index_off + len(index)
+    heap_off = records_off + len(records)
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        len(rows),
+        sku_width,
+        0,
+        version,
+        built_at_ms,
+        index_off,
+        records_off,
+        heap_off,
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(index)
+        f.write(records)
+        f.write(heap)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(rows)
+
+
+def outbox_watermark(session: Session, gap_timeout: float) -> int:
+    """
+    Último id del outbox sin huecos recientes por debajo. Un id que falta puede ser una
+    transacción aún abierta (confirmará más tarde con ese id menor): solo se salta si la fila
+    siguiente tiene más de `gap_timeout` segundos (rollback).
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=gap_timeout)
+    cursor = session.execute(
+        select(func.max(OutboxEvent.id)).where(OutboxEvent.created_at < cutoff)
+    ).scalar() or 0
+    recent = session.execute(
+        select(OutboxEvent.id).where(OutboxEvent.id > cursor).order_by(OutboxEvent.id)
+    ).scalars()
+    for event_id in recent:
+        if event_id != cursor + 1:
+            break
+        cursor = event_id
+    return cursor
+
+
+def build_from_db(session: Session, path: str, *, gap_timeout: float = 5.0) -> int:
+    # El instante y la versión se toman ANTES del escaneo: todo lo posterior queda "más nuevo"
+    built_at_ms = int(time.time() * 1000)
+    version = outbox_watermark(session, gap_timeout)
+    products = session.execute(select(Product.id, Product.sku, Product.name)).all()
+    return write_snapshot(path, products, version=version, built_at_ms=built_at_ms)
+
+
+# =========================
+# Lectura (mmap)
+# =========================
+
+class CatalogSnapshot:
+    def __init__(self, mm: mmap.mmap, identity: Tuple[int, int, int]) -> None:
+        self._mm = mm
+        self.identity = identity
+        (
+            magic, fmt, self.count, self._sku_width, _, self.version, self.built_at_ms,
+            self._index_off, self._records_off, self._heap_off,
+        ) = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise SnapshotFormatError(f"unsupported snapshot (magic={magic!r}, format={fmt})")
+        self._entry_size = self._sku_width + _INDEX_REF.size
+        expected_heap_off = self._records_off + self.count * _RECORD.size
+        if self._heap_off != expected_heap_off or self._heap_off > len(mm):
+            raise SnapshotFormatError("truncated snapshot")
+
+    @classmethod
+    def open(cls, path: str) -> "CatalogSnapshot":
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if st.st_size < _HEADER.size:
+                raise SnapshotFormatError("truncated snapshot")
+            # El mapping sobrevive al cierre del fd; os.replace no lo invalida (sigue apuntando al
+            # inodo viejo)
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mm, (st.st_ino, st.st_mtime_ns, st.st_size))
+
+    def _record(self, n: int) -> Tuple[int, bytes]:
+        product_id, off, size = _RECORD.unpack_from(self._mm, self._records_off + n * _RECORD.size)
+        start = self._heap_off + off
+        return product_id, self._mm[start:start + size]
+
+    def find_sku(self, sku: str) -> Optional[Tuple[int, bytes]]:
+        """(id, JSON) del SKU o None. Búsqueda binaria sobre el índice mapeado."""
+        key = sku.encode("utf-8")
+        if not key or len(key) > self._sku_width:
+            return None
+        key = key.ljust(self._sku_width, b"\0")
+        mm, base, size, width = self._mm, self._index_off, self._entry_size, self._sku_width
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            off = base + mid * size
+            if mm[off:off + width] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.count:
+            return None
+        off = base + lo * size
+        if mm[off:off + width] != key:
+            return None
+        return self._record(_INDEX_REF.unpack_from(mm, off + width)[0])
+
+    def find_id(self, product_id: int) -> Optional[bytes]:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _ID.unpack_from(self._mm, self._records_off + mid * _RECORD.size)[0] < product_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.count:
+            return None
+        found_id, body = self._record(lo)
+        return body if found_id == product_id else None
+
+
+# =========================
+# Worker: snapshot vigente + qué es más nuevo que él
+# =========================
+
+class SnapshotManager:
+    def __init__(
+        self,
+        path: str,
+        session_factory: Callable[[], Session],
+        *,
+        max_age_seconds: float = 300.0,
+        gap_timeout: float = 5.0,
+    ) -> None:
+        self.path = path
+        self._session_factory = session_factory
+        self._max_age = max_age_seconds
+        self._gap_timeout = gap_timeout
+        self.current: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self._stale_ids: Set[int] = set()
+        # Commits de este proceso (sku / id -> instante en ms), antes de que el poll del outbox
+        # los vea
+        self._stale_skus: Dict[str, float] = {}
+        self._local_ids: Dict[int, float] = {}
+        self._changes_after = 0
+        # Huecos del outbox por debajo de los ids ya leídos (id -> primera vez visto, monotonic)
+        self._gaps: Dict[int, float] = {}
+        self.hits = 0
+        self.fallbacks = 0
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+    def _is_stale(self, product_id: int) -> bool:
+        return product_id in self._stale_ids or product_id in self._local_ids
+
+    def _fresh(self, snap: CatalogSnapshot, sku: str) -> Optional[Tuple[int, bytes]]:
+        found = snap.find_sku(sku)
+        if found is None or sku in self._stale_skus or self._is_stale(found[0]):
+            return None
+        return found
+
+    def get_product_by_sku(self, sku: str) -> Optional[bytes]:
+        """JSON del producto si el snapshot lo tiene y nada más nuevo lo ha tocado; None => DB."""
+        snap = self.current
+        found = self._fresh(snap, sku) if snap is not None else None
+        return found[1] if found is not None else None
+
+    def get_product(self, product_id: int) -> Optional[bytes]:
+        snap = self.current
+        if snap is None or self._is_stale(product_id):
+            return None
+        return snap.find_id(product_id)
+
+    def lookup_json(self, skus: Sequence[str]) -> Tuple[Dict[str, str], List[str]]:
+        """Reparte SKUs: (encontrados en el snapshot -> JSON, pendientes de DB)."""
+        snap = self.current
+        if snap is None:
+            return {}, list(skus)
+        found: Dict[str, str] = {}
+        missing: List[str] = []
+        for sku in skus:
+            hit = self._fresh(snap, sku)
+            if hit is None:
+                missing.append(sku)
+            else:
+                found[sku] = hit[1].decode("utf-8")
+        self.hits += len(found)
+        self.fallbacks += len(missing)
+        return found, missing
+
+    def mark_stale(self, skus: Iterable[str], ids: Iterable[int] = ()) -> None:
+        now_ms = time.time() * 1000
+        with self._lock:
+            for sku in skus:
+                self._stale_skus[sku] = now_ms
+            for product_id in ids:
+                self._local_ids[product_id] = now_ms
+
+    # -------------------------
+    # Mantenimiento (thread: to_thread)
+    # -------------------------
+    def _file_age(self) -> Optional[float]:
+        try:
+            return time.time() - os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def build_if_due(self) -> bool:
+        age = self._file_age()
+        if age is not None and age < self._max_age:
+            return False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", "a+") as lock:
+            try:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False  # otro worker lo está generando
+            try:
+                age = self._file_age()
+                if age is not None and age < self._max_age:
+                    return False
+                started = time.perf_counter()
+                db = self._session_factory()
+                try:
+                    if age is not None and self._unchanged_since_file(db):
+                        os.utime(self.path)  # sin cambios: no se reescribe, solo se renueva la edad
+                        return False
+                    count = build_from_db(db, self.path, gap_timeout=self._gap_timeout)
+                finally:
+                    db.close()
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                logger.info("catalog snapshot built: %s products in %.0f ms", count, elapsed_ms)
+                return True
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _unchanged_since_file(self, db: Session) -> bool:
+        # [FIX] Reutilizable solo si no hay NADA por encima de su versión (marca de agua): "mismo
+        # max(id)" no basta, un id menor pendiente al generarlo puede haber confirmado después
+        try:
+            version = CatalogSnapshot.open(self.path).version
+        except (OSError, ValueError, struct.error, SnapshotFormatError):
+            return False
+        newer = db.execute(select(OutboxEvent.id).where(OutboxEvent.id > version).limit(1))
+        return newer.first() is None
+
+    def reload_if_changed(self) -> bool:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        current = self.current
+        if current is not None and current.identity == (st.st_ino, st.st_mtime_ns, st.st_size):
+            return False
+        try:
+            snap = CatalogSnapshot.open(self.path)
+        except (OSError, ValueError, struct.error, SnapshotFormatError) as e:
+            logger.warning("catalog snapshot ignored (%s): %s", self.path, e)
+            return False
+        with self._lock:
+            # Lo posterior al nuevo snapshot se vuelve a descubrir desde su versión
+            self._stale_ids = set()
+            self._changes_after = snap.version
+            self._gaps = {}
+            self._stale_skus = {s: t for s, t in self._stale_skus.items() if t >= snap.built_at_ms}
+            self._local_ids = {i: t for i, t in self._local_ids.items() if t >= snap.built_at_ms}
+            self.current = snap  # el mapping anterior se libera cuando ningún lookup lo referencia
+        return True
+
+    def poll_changes(self, limit: int = 10_000) -> int:
+        if self.current is None:
+            return 0
+        db = self._session_factory()
+        try:
+            # Todos los tipos: el seguimiento de huecos necesita los ids consecutivos
+            rows = db.execute(
+                select(OutboxEvent.id, OutboxEvent.aggregate_type, OutboxEvent.aggregate_id)
+                .where(OutboxEvent.id > self._changes_after)
+                .order_by(OutboxEvent.id)
+                .limit(limit)
+            ).all()
+        finally:
+            db.close()
+        if rows:
+            with self._lock:
+                self._stale_ids.update(
+                    int(aggregate_id)
+                    for _, kind, aggregate_id in rows
+                    if kind == "product" and str(aggregate_id).isdigit()
+                )
+                self._advance_cursor([event_id for event_id, _, _ in rows], time.monotonic())
+        return len(rows)
+
+    def _advance_cursor(self, ids: List[int], now: float) -> None:
+        # [FIX] Mismo criterio que OrderEventHub (orders-api): el cursor no pasa de un hueco
+        # hasta gap_timeout; lo posterior se relee en cada poll (ya marcado, es idempotente)
+        cursor = self._changes_after
+        for event_id in ids:
+            if event_id != cursor + 1:
+                # Hueco: transacción aún abierta (o rollback). Se espera gap_timeout antes de
+                # saltarlo
+                first_seen = self._gaps.setdefault(cursor + 1, now)
+                if now - first_seen < self._gap_timeout:
+                    break
+            cursor = event_id
+        self._changes_after = cursor
+        self._gaps = {k: v for k, v in self._gaps.items() if k > cursor}
+
+    def refresh(self) -> None:
+        self.build_if_due()
+        self.reload_if_changed()
+        self.poll_changes()
+
+    def stats(self) -> Dict[str, int]:
+        snap = self.current
+        return {
+            "version": snap.version if snap else 0,
+            "products": snap.count if snap else 0,
+            "stale": len(self._stale_ids) + len(self._local_ids),
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_snapshot_manager() -> SnapshotManager:
+    from app.core.db import get_sessionmaker
+
+    def session_factory() -> Session:
+        return get_sessionmaker()()
+
+    return SnapshotManager(
+        settings.snapshot_path, session_factory, max_age_seconds=settings.snapshot_max_age_seconds
+    )
+
+
+async def refresh_loop() -> None:
+    """Tarea de fondo (lifespan): genera si toca (1 worker), remapea si cambió y sigue el outbox."""
+    manager = get_snapshot_manager()
+    while True:
+        try:
+            await asyncio.to_thread(manager.refresh)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("catalog snapshot refresh failed: %s", e)
+        await asyncio.sleep(settings.snapshot_poll_seconds)
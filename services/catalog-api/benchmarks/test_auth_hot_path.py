@@ -0,0 +1,231 @@
+# services/catalog-api/benchmarks/test_auth_hot_path.py
+"""
+Micro-benchmarks del hot path de auth (coste por request, en µs).
+
+Fuera de tests/ a propósito: no usa el conftest HTTP y no ralentiza la suite normal.
+
+    poetry install --with dev   # pytest-benchmark va en el grupo dev
+    python -m pytest benchmarks -p no:cacheprovider --benchmark-json=bench-auth.json
+
+El JSON (--benchmark-json) es el formato a guardar para seguir la tendencia entre commits;
+`--benchmark-compare` / `--benchmark-autosave` de pytest-benchmark funcionan igual.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from fastapi import Response
+from jwt import PyJWKClient
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm, RSAAlgorithm
+from starlette.requests import Request
+
+from app.core import auth, ratelimit
+from app.core.logging import _SafeJsonFormatter
+
+AUDIENCE = "asrp-catalog"
+ISSUER = "http://keycloak.bench/realms/asrp"
+
+
+def _claims() -> Dict[str, Any]:
+    now = int(time.time())
+    return {
+        "iss": ISSUER,
+        "aud": AUDIENCE,
+        "sub": "bench-user",
+        "azp": "asrp-frontend",
+        "iat": now,
+        "exp": now + 3600,
+        "resource_access": {AUDIENCE: {"roles": ["catalog_read", "catalog_write"]}},
+        "realm_access": {"roles": ["offline_access", "uma_authorization"]},
+        "scope": "openid profile email",
+    }
+
+
+@pytest.fixture(scope="module")
+def rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture(scope="module")
+def ec_key():
+    return ec.generate_private_key(ec.SECP256R1())
+
+
+def _run_coro(coro):
+    """Ejecuta una corrutina que no suspende (sin coste de event loop en la medida)."""
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    raise RuntimeError("coroutine suspended")
+
+
+# =========================
+# Parsing / roles
+# =========================
+
+def test_parse_bearer(benchmark):
+    header = "Bearer " + "x" * 900  # tamaño típico de un access token de Keycloak
+    assert benchmark(auth._parse_bearer, header) == "x" * 900
+
+
+def test_get_client_roles(benchmark):
+    claims = _claims()
+    assert benchmark(auth.get_client_roles, claims, AUDIENCE) == {"catalog_read", "catalog_write"}
+
+
+def test_require_roles_dependency(benchmark, monkeypatch):
+    # Incluye el rate limit (token bucket local) que se aplica tras el RBAC; límite alto para
+    # medir el coste del bucket sin llegar al 429
+    limiter = ratelimit.RateLimiter(default=ratelimit.parse_rate("default", "1000000000/s"))
+    monkeypatch.setattr(ratelimit, "get_rate_limiter", lambda: limiter)
+    dep = auth.require_roles(["catalog_read"])
+    claims = _claims()
+    request = Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/v1/products",
+            "headers": [],
+            "client": ("10.0.0.1", 1),
+        }
+    )
+
+    def _call():
+        return _run_coro(dep(request=request, response=Response(), claims=claims))
+
+    assert benchmark(_call) is claims
+
+
+# =========================
+# Firma: RS256 vs ES256
+# =========================
+
+def test_jwt_decode_rs256(benchmark, rsa_key):
+    token = jwt.encode(_claims(), rsa_key, algorithm="RS256")
+    public = rsa_key.public_key()
+    benchmark(jwt.decode, token, public, algorithms=["RS256"], audience=AUDIENCE, issuer=ISSUER)
+
+
+def test_jwt_decode_es256(benchmark, ec_key):
+    token = jwt.encode(_claims(), ec_key, algorithm="ES256")
+    public = ec_key.public_key()
+    benchmark(jwt.decode, token, public, algorithms=["ES256"], audience=AUDIENCE, issuer=ISSUER)
+
+
+# =========================
+# JWKS: lookup de clave con cache caliente
+# =========================
+
+def _jwk_client(jwks: Dict[str, Any]) -> PyJWKClient:
+    client = PyJWKClient("http://keycloak.bench/realms/asrp/protocol/openid-connect/certs")
+    client.fetch_data = lambda: jwks  # sin red: el primer get llena la cache
+    client.get_jwk_set()
+    return client
+
+
+@pytest.mark.parametrize("alg", ["RS256", "ES256"])
+def test_pyjwkclient_get_signing_key_cache_hit(benchmark, alg, rsa_key, ec_key):
+    key = rsa_key if alg == "RS256" else ec_key
+    to_jwk = RSAAlgorithm.to_jwk if alg == "RS256" else ECAlgorithm.to_jwk
+    jwk = json.loads(to_jwk(key.public_key()))
+    jwk.update({"kid": f"kid-{alg}", "use": "sig", "alg": alg})
+    client = _jwk_client({"keys": [jwk]})
+    token = jwt.encode(_claims(), key, algorithm=alg, headers={"kid": f"kid-{alg}"})
+
+    signing_key = benchmark(client.get_signing_key_from_jwt, token)
+    assert signing_key.key_id == f"kid-{alg}"
+
+
+@pytest.mark.parametrize("alg", ["RS256", "ES256"])
+def test_key_index_lookup(benchmark, alg, rsa_key, ec_key):
+    # Mismo trabajo que el test anterior con el índice del verificador (header parseado una vez)
+    from app.core.jwks import KeyIndex, ParsedToken
+
+    key = rsa_key if alg == "RS256" else ec_key
+    to_jwk = RSAAlgorithm.to_jwk if alg == "RS256" else ECAlgorithm.to_jwk
+    jwk = json.loads(to_jwk(key.public_key()))
+    jwk.update({"kid": f"kid-{alg}", "use": "sig", "alg": alg})
+    index = KeyIndex({"keys": [jwk]})
+    token = jwt.encode(_claims(), key, algorithm=alg, headers={"kid": f"kid-{alg}"})
+
+    def _lookup():
+        parsed = ParsedToken(token)
+        return index.get(parsed.kid, parsed.alg)
+
+    assert benchmark(_lookup).kid == f"kid-{alg}"
+
+
+# =========================
+# Logging por request
+# =========================
+
+def test_safe_json_formatter_format(benchmark):
+    formatter = _SafeJsonFormatter(
+        "%(asctime)s %(levelname)s %(name)s %(message)s "
+        "%(requestId)s %(method)s %(path)s %(status)s %(durationMs)s %(service)s %(env)s"
+    )
+    record = logging.LogRecord(
+        "catalog-api.request", logging.INFO, __file__, 1, "request end", None, None
+    )
+    record.requestId = "5b8f0f0e-2d0c-4d7e-9a53-1e2f0a7c9b11"
+    record.method = "GET"
+    record.path = "/v1/products"
+    record.status = 200
+    record.durationMs = 3
+    out = benchmark(formatter.format, record)
+    assert json.loads(out)["requestId"] == record.requestId
+
+
+# =========================
+# Verificación completa por algoritmo (elegir el tipo de clave del realm con datos)
+# =========================
+
+def _rsa(key_size: int):
+    return lambda: rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+
+
+_VERIFY_CASES = {
+    "RS256-2048": ("RS256", _rsa(2048), RSAAlgorithm),
+    "RS256-4096": ("RS256", _rsa(4096), RSAAlgorithm),
+    "PS256-2048": ("PS256", _rsa(2048), RSAAlgorithm),
+    "ES256": ("ES256", lambda: ec.generate_private_key(ec.SECP256R1()), ECAlgorithm),
+    "EdDSA-Ed25519": ("EdDSA", ed25519.Ed25519PrivateKey.generate, OKPAlgorithm),
+}
+
+
+@pytest.mark.parametrize("case", list(_VERIFY_CASES))
+def test_verifier_decode_and_verify(benchmark, monkeypatch, case):
+    from app.core import security
+
+    alg, make_key, algorithm = _VERIFY_CASES[case]
+    key = make_key()
+    jwk = json.loads(algorithm.to_jwk(key.public_key()))
+    jwk.update({"kid": case, "use": "sig", "alg": alg})
+
+    verifier = security.OIDCJWKSVerifier("http://keycloak.bench", jwks_url_override="http://keycloak.bench/certs")
+
+    async def _offline_fetch(jwks_url):
+        return {"keys": [jwk]}
+
+    monkeypatch.setattr(verifier, "_fetch_jwks", _offline_fetch)
+    asyncio.run(verifier.warm_up())
+    token = jwt.encode(_claims(), key, algorithm=alg, headers={"kid": case})
+
+    def _verify():
+        return _run_coro(
+            verifier.decode_and_verify(
+                token, audience_expected=AUDIENCE, issuer_expected=ISSUER, algorithms=[alg]
+            )
+        )
+
+    claims = benchmark(_verify)
+    assert claims["sub"] == "bench-user"
+    benchmark.extra_info["token_bytes"] = len(token)
@@ -0,0 +1,150 @@
+# services/catalog-api/tests/test_changes.py
+# Unit tests: feed incremental de productos (change_seq + tombstones, paginación, long-poll).
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import changes, models, repositories
+from app.changes import ChangeNotifier, read_page
+from app.core import auth, db, ratelimit
+from app.core.config import settings
+from app.main import app
+from app.schemas import ProductCreate
+
+
+@pytest.fixture
+def factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    models.Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    changes.register(factory)
+    yield factory
+    engine.dispose()
+
+
+def _seed(factory, n):
+    with factory() as session:
+        for i in range(n):
+            repositories.create_product(session, ProductCreate(sku=f"SKU-{i}", name=f"Product {i}"))
+
+
+def _page(factory, since, limit=100):
+    with factory() as session:
+        return read_page(session, since, limit)
+
+
+def test_feed_pages_upserts_and_tombstones_in_commit_order(factory):
+    _seed(factory, 3)
+    with factory() as session:
+        session.get(models.Product, 1).name = "Renamed"  # vuelve a aparecer, con secuencia nueva
+        session.delete(session.get(models.Product, 2))
+        session.commit()
+
+    first = _page(factory, 0, limit=2)
+    assert [(c.seq, c.op, c.sku) for c in first.changes] == [
+        (3, "upsert", "SKU-2"),
+        (4, "upsert", "SKU-0"),
+    ]
+    assert first.has_more and first.changes[1].product.name == "Renamed"
+
+    second = _page(factory, int(first.next_cursor), limit=2)
+    assert [(c.seq, c.op, c.id, c.product) for c in second.changes] == [(5, "delete", 2, None)]
+    assert not second.has_more and second.next_cursor == "5"
+
+    empty = _page(factory, 5)
+    assert empty.changes == [] and empty.next_cursor == "5"
+
+
+def test_rolled_back_writes_do_not_enter_the_feed(factory):
+    _seed(factory, 1)
+    with factory() as session:
+        session.add(models.Product(sku="SKU-X", name="X"))
+        session.flush()
+        session.rollback()
+    assert [c.sku for c in _page(factory, 0).changes] == ["SKU-0"]
+    with factory() as session:
+        repositories.create_product(session, ProductCreate(sku="SKU-Y", name="Y"))
+    assert [c.seq for c in _page(factory, 1).changes] == [2]  # el contador también se deshizo
+
+
+def test_parse_cursor():
+    assert changes.parse_cursor(None) == 0 and changes.parse_cursor("42") == 42
+    for bad in ("-1", "abc", "1.5"):
+        with pytest.raises(changes.InvalidCursor):
+            changes.parse_cursor(bad)
+
+
+def test_notifier_wakes_on_local_commit_and_on_poll():
+    latest = {"seq": 0}
+    notifier = ChangeNotifier(lambda: latest["seq"], poll_interval=0.02)
+
+    async def run():
+        assert await notifier.wait(0, 0.05) is False
+        # Commit local (threadpool): despierta sin esperar al sondeo
+        threading.Timer(0.01, notifier.notify, args=(1,)).start()
+        started = time.monotonic()
+        assert await notifier.wait(0, 5) is True
+        local = time.monotonic() - started
+        # Commit de otra réplica: lo ve el sondeo del contador
+        latest["seq"] = 2
+        assert await notifier.wait(1, 5) is True
+        await asyncio.sleep(0.05)
+        return local, notifier.waiters
+
+    local, waiters = asyncio.run(run())
+    assert local < 1 and waiters == 0
+
+
+@pytest.fixture
+def client_db(factory, monkeypatch):
+    _seed(factory, 2)
+    monkeypatch.setattr(db, "get_sessionmaker", lambda: factory)
+
+    class _FakeVerifier:
+        async def decode_and_verify(self, token, **kwargs):
+            roles = {settings.oidc_audience: {"roles": ["catalog_read"]}}
+            return {"sub": "u1", "azp": "web", "resource_access": roles}
+
+    monkeypatch.setattr(auth, "get_verifier", lambda: _FakeVerifier())
+    limiter = ratelimit.RateLimiter(default=ratelimit.parse_rate("default", "1000/s"))
+    monkeypatch.setattr(ratelimit, "get_rate_limiter", lambda: limiter)
+    changes.get_change_notifier.cache_clear()
+    yield factory
+    changes.get_change_notifier.cache_clear()
+
+
+def test_long_poll_returns_as_soon_as_a_product_is_committed(client_db):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://catalog") as client:
+            headers = {"Authorization": "Bearer t"}
+            snapshot = (await client.get("/v1/products/changes", headers=headers)).json()
+            assert [c["sku"] for c in snapshot["changes"]] == ["SKU-0", "SKU-1"]
+
+            def write():
+                with client_db() as session:
+                    repositories.create_product(session, ProductCreate(sku="SKU-NEW", name="New"))
+
+            params = {"since": snapshot["next_cursor"], "wait": 10}
+            started = time.monotonic()
+            poll = asyncio.create_task(
+                client.get("/v1/products/changes", params=params, headers=headers)
+            )
+            await asyncio.sleep(0.1)
+            await asyncio.to_thread(write)
+            response = await poll
+            bad = await client.get("/v1/products/changes", params={"since": "x"}, headers=headers)
+            return response, time.monotonic() - started, bad.status_code
+
+    response, elapsed, bad_status = asyncio.run(run())
+    assert response.status_code == 200 and elapsed < 5
+    assert [c["sku"] for c in response.json()["changes"]] == ["SKU-NEW"]
+    assert bad_status == 400
@@ -0,0 +1,108 @@
+# services/catalog-api/tests/test_deadline.py
+# Unit tests: deadline del request (cabecera -> contextvar -> DB / cancelación con 504).
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core import db, deadline
+from app.main import deadline_exceeded_handler
+from app.middlewares.deadline import DeadlineMiddleware
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_exception_handler(deadline.DeadlineExceeded, deadline_exceeded_handler)
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(1.0)
+        return {"ok": True}
+
+    @app.get("/budget")
+    def budget():
+        # endpoint sync: el contextvar llega al threadpool
+        return {"remaining": deadline.remaining()}
+
+    @app.get("/exhausted")
+    def exhausted():
+        time.sleep(0.15)
+        deadline.check()
+        return {"ok": True}
+
+    app.add_middleware(DeadlineMiddleware, max_ms=5000)
+    return app
+
+
+def test_parse_timeout_header():
+    assert deadline.parse_timeout_ms("250") == 250
+    assert deadline.parse_timeout_ms(None) is None
+    assert deadline.parse_timeout_ms("garbage", default_ms=100) == 100
+    assert deadline.parse_timeout_ms("90000", max_ms=60000) == 60000
+
+
+def test_budget_is_visible_in_threadpool_and_absent_without_header():
+    client = TestClient(_app())
+    left = client.get("/budget", headers={"X-Request-Timeout-Ms": "2000"}).json()["remaining"]
+    assert 0 < left <= 2.0
+    assert client.get("/budget").json()["remaining"] is None
+
+
+def test_work_is_cancelled_with_504_when_budget_runs_out():
+    client = TestClient(_app())
+    started = time.perf_counter()
+    r = client.get("/slow", headers={"X-Request-Timeout-Ms": "50"})
+    assert r.status_code == 504
+    assert r.json()["error"] == "deadline_exceeded"
+    assert time.perf_counter() - started < 0.5
+
+    r = client.get("/exhausted", headers={"X-Request-Timeout-Ms": "100"})
+    assert r.status_code == 504
+    assert client.get("/slow", headers={"X-Request-Timeout-Ms": "0"}).status_code == 504
+
+
+def test_expired_budget_blocks_new_transactions():
+    factory = sessionmaker(bind=create_engine("sqlite://"))
+    event.listen(factory, "after_begin", db._apply_request_deadline)
+    session = factory()
+    token = deadline.start(-1)
+    try:
+        with pytest.raises(deadline.DeadlineExceeded):
+            session.execute(text("SELECT 1"))
+    finally:
+        deadline.reset(token)
+        session.close()
+
+    session = factory()
+    assert session.execute(text("SELECT 1")).scalar() == 1  # sin deadline: sin coste extra
+    session.close()
+
+
+def test_statement_timeout_maps_to_deadline_exceeded(monkeypatch):
+    class _QueryCanceled(Exception):
+        sqlstate = "57014"
+
+    exc = OperationalError("SELECT pg_sleep(10)", {}, _QueryCanceled())
+    assert deadline.is_timeout_error(exc) is True
+    assert deadline.is_timeout_error(OperationalError("SELECT 1", {}, Exception())) is False
+
+    monkeypatch.setattr(db, "get_sessionmaker", lambda: sessionmaker(bind=create_engine("sqlite://")))
+    token = deadline.start(1000)
+    try:
+        gen = db.get_db()
+        next(gen)
+        with pytest.raises(deadline.DeadlineExceeded):
+            gen.throw(exc)
+    finally:
+        deadline.reset(token)
+
+    # Sin deadline el error de DB se propaga tal cual
+    gen = db.get_db()
+    next(gen)
+    with pytest.raises(OperationalError):
+        gen.throw(exc)
@@ -0,0 +1,110 @@
+# services/catalog-api/tests/test_fieldsets.py
+# Unit tests: sparse fieldsets (?fields=) en /v1/products/lookup (allowlist, SELECT parcial, caché).
+import asyncio
+import json
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import changes, fieldsets, models, product_cache, repositories
+from app.core import auth, db, ratelimit, singleflight
+from app.core.config import settings
+from app.main import app
+from app.schemas import ProductCreate, ProductRead
+
+
+@pytest.fixture
+def factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    models.Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    changes.register(factory)
+    with factory() as session:
+        for i in range(3):
+            repositories.create_product(session, ProductCreate(sku=f"SKU-{i}", name=f"Product {i}"))
+    statements = []
+    event.listen(
+        engine, "before_cursor_execute", lambda conn, cur, stmt, *a: statements.append(stmt)
+    )
+    yield factory, statements
+    engine.dispose()
+
+
+def test_parse_fields_uses_the_schema_as_allowlist():
+    assert fieldsets.parse_fields(None, ProductRead) is None
+    assert fieldsets.parse_fields(" name,sku,name ", ProductRead) == ("sku", "name")
+    with pytest.raises(fieldsets.InvalidFields) as exc:
+        fieldsets.parse_fields("sku,change_seq", ProductRead)
+    assert exc.value.unknown == ("change_seq",) and exc.value.allowed == ("id", "sku", "name")
+    with pytest.raises(fieldsets.InvalidFields):
+        fieldsets.parse_fields(",", ProductRead)
+
+
+def test_repository_selects_only_requested_columns(factory):
+    factory, statements = factory
+    with factory() as session:
+        rows = repositories.get_products_by_skus(session, ["SKU-1"], columns=("sku", "name"))
+    assert [(r.sku, r.name) for r in rows] == [("SKU-1", "Product 1")]
+    select_list = statements[-1].split("FROM")[0]
+    assert "products.name" in select_list and "products.id" not in select_list
+    assert "change_seq" not in select_list
+
+
+def test_cached_documents_are_trimmed_without_touching_the_db(monkeypatch):
+    monkeypatch.setattr(settings, "snapshot_enabled", False)
+    monkeypatch.setattr(settings, "product_cache_enabled", False)
+
+    def _load(skus):
+        return {s: f'{{"id":1,"sku":"{s}","name":"Ñu"}}' for s in skus}
+
+    monkeypatch.setattr(product_cache, "_load", _load)
+    body = asyncio.run(product_cache.lookup_json(["SKU-0"], ("name",)))
+    assert body == '[{"name":"Ñu"}]'.encode()
+
+
+@pytest.fixture
+def client_db(factory, monkeypatch):
+    factory, statements = factory
+    monkeypatch.setattr(db, "get_sessionmaker", lambda: factory)
+    monkeypatch.setattr(settings, "product_cache_enabled", False)
+    monkeypatch.setattr(settings, "snapshot_enabled", False)
+
+    class _FakeVerifier:
+        async def decode_and_verify(self, token, **kwargs):
+            roles = {settings.oidc_audience: {"roles": ["catalog_read"]}}
+            return {"sub": "u1", "azp": "web", "resource_access": roles}
+
+    monkeypatch.setattr(auth, "get_verifier", lambda: _FakeVerifier())
+    limiter = ratelimit.RateLimiter(default=ratelimit.parse_rate("default", "1000/s"))
+    monkeypatch.setattr(ratelimit, "get_rate_limiter", lambda: limiter)
+    singleflight.get_single_flight.cache_clear()
+    yield statements
+    singleflight.get_single_flight.cache_clear()
+
+
+def test_lookup_endpoint_pushes_fields_into_select_and_payload(client_db):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://catalog") as client:
+            headers = {"Authorization": "Bearer t"}
+            sparse = await client.get(
+                "/v1/products/lookup?sku=SKU-0&sku=SKU-2&fields=sku", headers=headers
+            )
+            full = await client.get("/v1/products/lookup?sku=SKU-0", headers=headers)
+            bad = await client.get(
+                "/v1/products/lookup?sku=SKU-0&fields=sku,secret", headers=headers
+            )
+            return sparse, full, bad
+
+    sparse, full, bad = asyncio.run(run())
+    assert sparse.status_code == 200
+    assert sorted(sparse.json(), key=lambda p: p["sku"]) == [{"sku": "SKU-0"}, {"sku": "SKU-2"}]
+    assert any(s.split("FROM")[0].strip() == "SELECT products.sku" for s in client_db)
+    assert full.json() == [{"id": 1, "sku": "SKU-0", "name": "Product 0"}]
+    assert bad.status_code == 400
+    assert json.loads(bad.content)["detail"]["fields"] == ["secret"]
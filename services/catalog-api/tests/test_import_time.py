@@ -0,0 +1,65 @@
+# services/catalog-api/tests/test_import_time.py
+# [PERF] Presupuesto de cold start: `python -X importtime -c "import app.main"`.
+# No requiere contenedor: importar app.main no debe hacer I/O (verifier/engine son lazy).
+# Un solo sitio para los tres servicios: cada uno se importa desde su directorio.
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+_SERVICE_ROOT = Path(__file__).resolve().parents[1]
+_SERVICES = _SERVICE_ROOT.parent
+_ROOTS = {name: _SERVICES / name for name in ("catalog-api", "orders-api", "identity-api")}
+_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)\s*$")
+
+
+def _cumulative_import_ms(module: str, root: Path = _SERVICE_ROOT) -> float:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    if root != _SERVICE_ROOT and "ModuleNotFoundError" in proc.stderr:
+        pytest.skip(f"dependencias de {root.name} no instaladas en este entorno")
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m and m.group(3) == module:
+            return int(m.group(2)) / 1000.0
+    raise AssertionError(f"{module} no aparece en la salida de -X importtime")
+
+
+@pytest.mark.parametrize("service", list(_ROOTS))
+def test_import_app_main_within_budget(service):
+    root = _ROOTS[service]
+    if not root.is_dir():
+        pytest.skip(f"{service} no está en el checkout")
+    ms = _cumulative_import_ms("app.main", root)
+    assert ms < _BUDGET_MS, (
+        f"{service}: import app.main tardó {ms:.0f} ms (presupuesto {_BUDGET_MS:.0f} ms)"
+    )
+
+
+def test_import_app_main_does_not_build_verifier_or_engine():
+    code = (
+        "import app.main\n"
+        "from app.core.auth import get_verifier\n"
+        "from app.core.db import get_engine\n"
+        "assert get_verifier.cache_info().currsize == 0\n"
+        "assert get_engine.cache_info().currsize == 0\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=_SERVICE_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
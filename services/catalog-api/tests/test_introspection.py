@@ -0,0 +1,134 @@
+# services/catalog-api/tests/test_introspection.py
+# Unit tests (sin Keycloak): introspección RFC 7662 para tokens opacos, cache + single-flight.
+import asyncio
+import time
+
+import pytest
+from jwt.exceptions import InvalidAudienceError, PyJWTError
+
+from app.core.introspection import IntrospectionCache, IntrospectionError, TokenIntrospector
+from app.core.security import OIDCJWKSVerifier
+
+ISSUER = "http://keycloak.test/realms/asrp"
+AUDIENCE = "asrp-catalog"
+OPAQUE = "opaque-3f9c2a7d1e"
+
+
+class _FakeIntrospectionEndpoint:
+    def __init__(self):
+        self.calls = 0
+        self.responses = {}
+
+    async def __call__(self, url, token):
+        self.calls += 1
+        await asyncio.sleep(0.01)  # los requests concurrentes se solapan con la llamada en vuelo
+        return self.responses.get(token, {"active": False})
+
+
+def _active(**overrides):
+    now = int(time.time())
+    return {
+        "active": True,
+        "iss": ISSUER,
+        "aud": AUDIENCE,
+        "sub": "integration-1",
+        "exp": now + 300,
+        **overrides,
+    }
+
+
+@pytest.fixture
+def endpoint():
+    return _FakeIntrospectionEndpoint()
+
+
+@pytest.fixture
+def verifier(monkeypatch, endpoint):
+    introspector = TokenIntrospector(client_id=AUDIENCE, client_secret="s3cret")
+    monkeypatch.setattr(introspector, "_post", endpoint)
+    return OIDCJWKSVerifier(
+        "http://keycloak.test",
+        jwks_url_override="http://keycloak.test/certs",
+        introspector=introspector,
+        introspection_url_override="http://keycloak.test/introspect",
+    )
+
+
+async def _verify(verifier, token):
+    return await verifier.decode_and_verify(
+        token, audience_expected=AUDIENCE, issuer_expected=ISSUER
+    )
+
+
+def test_opaque_token_is_introspected_once_then_cached(verifier, endpoint):
+    endpoint.responses[OPAQUE] = _active()
+
+    async def _run():
+        return [await _verify(verifier, OPAQUE) for _ in range(5)]
+
+    assert all(c["sub"] == "integration-1" for c in asyncio.run(_run()))
+    assert endpoint.calls == 1
+
+
+def test_concurrent_requests_share_one_inflight_call(verifier, endpoint):
+    endpoint.responses[OPAQUE] = _active()
+
+    async def _burst():
+        return await asyncio.gather(*(_verify(verifier, OPAQUE) for _ in range(50)))
+
+    assert len(asyncio.run(_burst())) == 50
+    assert endpoint.calls == 1
+
+
+def test_inactive_token_is_rejected_and_negatively_cached(verifier, endpoint):
+    async def _run():
+        for _ in range(3):
+            with pytest.raises(PyJWTError):
+                await _verify(verifier, "revoked-token")
+
+    asyncio.run(_run())
+    assert endpoint.calls == 1
+
+
+def test_introspected_claims_are_validated(verifier, endpoint):
+    endpoint.responses[OPAQUE] = _active(aud="asrp-orders")
+    with pytest.raises(InvalidAudienceError):
+        asyncio.run(_verify(verifier, OPAQUE))
+
+
+def test_transport_errors_are_not_cached(verifier, endpoint, monkeypatch):
+    import httpx
+
+    introspector = verifier._introspector
+
+    async def _down(url, token):
+        raise httpx.ConnectError("keycloak down")
+
+    monkeypatch.setattr(introspector, "_post", _down)
+    with pytest.raises(IntrospectionError):
+        asyncio.run(_verify(verifier, OPAQUE))
+
+    endpoint.responses[OPAQUE] = _active()
+    monkeypatch.setattr(introspector, "_post", endpoint)
+    assert asyncio.run(_verify(verifier, OPAQUE))["sub"] == "integration-1"
+
+
+def test_opaque_token_rejected_without_call_when_disabled(endpoint):
+    verifier = OIDCJWKSVerifier("http://keycloak.test", jwks_url_override="http://keycloak.test/certs")
+    with pytest.raises(PyJWTError):
+        asyncio.run(_verify(verifier, OPAQUE))
+    assert endpoint.calls == 0
+
+
+def test_cache_ttl_is_bounded_by_token_expiry_and_size():
+    cache = IntrospectionCache(max_entries=2, max_ttl=300, negative_ttl=30)
+    now = time.time()
+    assert cache.expires_at({"active": True, "exp": now + 5}, now) == now + 5
+    assert cache.expires_at({"active": True, "exp": now + 3600}, now) == now + 300
+    assert cache.expires_at({"active": False}, now) == now + 30
+
+    cache.put("expired", {"active": True, "exp": now - 1})
+    assert cache.get("expired") is None
+    for key in ("a", "b", "c"):
+        cache.put(key, {"active": True, "exp": now + 60})
+    assert len(cache) == 2 and cache.get("a") is None
@@ -0,0 +1,93 @@
+# services/catalog-api/tests/test_inventory.py
+# Unit tests (sin contenedor): reservas de stock sobre SQLite en memoria.
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import (
+    inventory,
+    models,  # noqa: F401
+)
+from app.core.db import Base
+from app.models import StockReservation
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    inventory.receive_stock(session, "SKU-A", 10)
+    inventory.receive_stock(session, "SKU-B", 3)
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _stock(db, sku):
+    db.expire_all()
+    level = inventory.get_stock(db, sku)
+    return level.on_hand, level.available
+
+
+def test_reserve_decrements_available_for_all_lines(db):
+    r = inventory.reserve(db, "order-1", [("SKU-B", 1), ("SKU-A", 4), ("SKU-B", 1)])
+
+    assert r.lines == {"SKU-A": 4, "SKU-B": 2}
+    assert r.available == {"SKU-A": 6, "SKU-B": 1}
+    assert _stock(db, "SKU-A") == (10, 6)
+    assert _stock(db, "SKU-B") == (3, 1)
+
+
+def test_insufficient_stock_rolls_back_every_line(db):
+    with pytest.raises(inventory.InsufficientStock) as exc:
+        inventory.reserve(db, "order-1", [("SKU-A", 5), ("SKU-B", 4)])
+
+    assert exc.value.sku == "SKU-B"
+    assert _stock(db, "SKU-A") == (10, 10)
+    assert db.query(StockReservation).count() == 0
+
+
+def test_duplicate_reference_is_rejected_without_double_hold(db):
+    inventory.reserve(db, "order-1", [("SKU-A", 2)])
+    with pytest.raises(inventory.ReservationExists):
+        inventory.reserve(db, "order-1", [("SKU-A", 2)])
+
+    assert _stock(db, "SKU-A") == (10, 8)
+
+
+def test_release_and_confirm(db):
+    inventory.reserve(db, "order-1", [("SKU-A", 2)])
+    inventory.reserve(db, "order-2", [("SKU-A", 3)])
+
+    assert inventory.release(db, "order-1") == {"SKU-A": 2}
+    assert inventory.confirm(db, "order-2") == {"SKU-A": 3}
+    assert _stock(db, "SKU-A") == (7, 7)
+
+    with pytest.raises(inventory.ReservationNotFound):
+        inventory.release(db, "order-1")
+
+
+def test_sweeper_reclaims_only_expired_holds(db):
+    inventory.reserve(db, "order-old", [("SKU-A", 4), ("SKU-B", 3)])
+    inventory.reserve(db, "order-new", [("SKU-A", 1)])
+    db.execute(
+        update(StockReservation)
+        .where(StockReservation.reference == "order-old")
+        .values(expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+    )
+    db.commit()
+
+    assert inventory.sweep_expired(db, batch_size=1) == 1
+    assert inventory.sweep_expired(db, batch_size=10) == 1
+    assert inventory.sweep_expired(db) == 0
+
+    assert _stock(db, "SKU-A") == (10, 9)
+    assert _stock(db, "SKU-B") == (3, 3)
+    with pytest.raises(inventory.ReservationNotFound):
+        inventory.confirm(db, "order-old")
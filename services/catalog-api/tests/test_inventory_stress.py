@@ -0,0 +1,84 @@
+# services/catalog-api/tests/test_inventory_stress.py
+# Stress test: N threads reservando el MISMO SKU (flash sale). Sin contenedor usa SQLite en
+# fichero; con STRESS_DATABASE_URL=postgresql+psycopg://... mide contra PostgreSQL real.
+import os
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+from app import (
+    changes,
+    inventory,
+    models,  # noqa: F401
+)
+from app.core.db import Base
+from app.models import Product, StockLevel, StockReservation
+
+HOT_SKU = "STRESS-HOT-SKU"
+THREADS = int(os.getenv("STRESS_THREADS", "8"))
+ATTEMPTS_PER_THREAD = int(os.getenv("STRESS_ATTEMPTS", "40"))
+INITIAL_STOCK = THREADS * ATTEMPTS_PER_THREAD // 2  # la mitad de los intentos se quedan sin stock
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    url = os.getenv("STRESS_DATABASE_URL") or f"sqlite:///{tmp_path / 'stress.db'}"
+    connect_args = {"check_same_thread": False, "timeout": 30} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args, pool_size=THREADS, max_overflow=0)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    changes.register(factory)
+
+    with factory() as db:
+        db.execute(delete(StockReservation).where(StockReservation.sku == HOT_SKU))
+        db.execute(delete(StockLevel).where(StockLevel.sku == HOT_SKU))
+        db.execute(delete(Product).where(Product.sku == HOT_SKU))
+        db.add(Product(sku=HOT_SKU, name="Hot SKU"))
+        db.commit()
+        inventory.receive_stock(db, HOT_SKU, INITIAL_STOCK)
+
+    yield factory
+    engine.dispose()
+
+
+def test_hot_sku_concurrent_reservations_never_oversell(session_factory):
+    ok = [0] * THREADS
+    rejected = [0] * THREADS
+    start = threading.Barrier(THREADS)
+
+    def worker(i: int) -> None:
+        db = session_factory()
+        try:
+            start.wait()
+            for n in range(ATTEMPTS_PER_THREAD):
+                try:
+                    inventory.reserve(db, f"t{i}-{n}", [(HOT_SKU, 1)])
+                    ok[i] += 1
+                except inventory.InsufficientStock:
+                    rejected[i] += 1
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    attempts = THREADS * ATTEMPTS_PER_THREAD
+    print(
+        f"\nhot-SKU reservations: {attempts} attempts / {THREADS} threads in {elapsed:.3f}s "
+        f"=> {attempts / elapsed:.0f} ops/s (ok={sum(ok)}, rejected={sum(rejected)})"
+    )
+
+    assert sum(ok) == INITIAL_STOCK
+    assert sum(rejected) == attempts - INITIAL_STOCK
+    with session_factory() as db:
+        level = inventory.get_stock(db, HOT_SKU)
+        assert level.available == 0
+        assert db.query(StockReservation).filter_by(sku=HOT_SKU).count() == INITIAL_STOCK
@@ -0,0 +1,114 @@
+# services/catalog-api/tests/test_outbox.py
+# Unit tests (sin contenedor): outbox transaccional + relay sobre SQLite en memoria.
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import (
+    changes,
+    models,  # noqa: F401
+    outbox,
+    repositories,
+)
+from app.core.db import Base
+from app.models import OutboxEvent
+from app.schemas import ProductCreate
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    changes.register(factory)
+    yield factory
+    engine.dispose()
+
+
+def test_create_product_writes_outbox_event_in_same_transaction(session_factory):
+    db = session_factory()
+    product = repositories.create_product(db, ProductCreate(sku="SKU-1", name="P1"))
+
+    events = db.query(OutboxEvent).all()
+    assert len(events) == 1
+    assert events[0].event_type == "product.created"
+    assert events[0].aggregate_id == str(product.id)
+    assert events[0].published_at is None
+
+
+def test_relay_drains_in_batches_and_consumers_read_by_offset(session_factory):
+    db = session_factory()
+    for i in range(5):
+        repositories.create_product(db, ProductCreate(sku=f"SKU-{i}", name=f"P{i}"))
+
+    sink = outbox.InMemorySink()
+    relay = outbox.OutboxRelay(session_factory, sink, batch_size=2)
+    assert [relay.drain_once() for _ in range(4)] == [2, 2, 1, 0]
+
+    first = sink.read(after_offset=0, limit=3)
+    assert [m["payload"]["sku"] for m in first] == ["SKU-0", "SKU-1", "SKU-2"]
+    rest = sink.read(after_offset=first[-1]["offset"])
+    assert [m["payload"]["sku"] for m in rest] == ["SKU-3", "SKU-4"]
+
+
+def test_failed_publish_keeps_events_pending(session_factory):
+    db = session_factory()
+    repositories.create_product(db, ProductCreate(sku="SKU-X", name="PX"))
+
+    class _BrokenSink:
+        def publish(self, messages):
+            raise RuntimeError("broker down")
+
+    with pytest.raises(RuntimeError):
+        outbox.OutboxRelay(session_factory, _BrokenSink()).drain_once()
+
+    sink = outbox.InMemorySink()
+    assert outbox.OutboxRelay(session_factory, sink).drain_once() == 1
+    assert len(sink.read()) == 1
+
+
+def test_lower_id_committed_after_higher_id_was_relayed_is_not_lost(session_factory):
+    # Los ids se asignan en el INSERT: una transacción con id 1 puede confirmar
+    # después de que el 2 ya se haya publicado
+    from datetime import datetime, timezone
+
+    def _event(event_id):
+        return OutboxEvent(
+            id=event_id,
+            aggregate_type="product",
+            aggregate_id=str(event_id),
+            event_type="product.created",
+            payload={},
+            created_at=datetime.now(timezone.utc),
+        )
+
+    db = session_factory()
+    db.add(_event(2))
+    db.commit()
+    sink = outbox.InMemorySink()
+    relay = outbox.OutboxRelay(session_factory, sink)
+    assert relay.drain_once() == 1
+    seen = sink.read()
+
+    db.add(_event(1))  # confirma tarde
+    db.commit()
+    assert relay.drain_once() == 1
+
+    late = sink.read(after_offset=seen[-1]["offset"])
+    assert [m["eventId"] for m in late] == [1]
+    # Reenvío at-least-once: deduplicado por eventId
+    sink.publish([outbox.to_message(_event(1))])
+    assert [m["eventId"] for m in sink.read()] == [2, 1]
+
+
+def test_relay_requires_an_explicit_durable_sink(monkeypatch):
+    # Sin OUTBOX_SINK el relay no arranca (un sink en memoria perdería los eventos publicados)
+    monkeypatch.setattr(outbox.settings, "outbox_sink", "")
+    with pytest.raises(ValueError, match="OUTBOX_SINK"):
+        outbox.build_sink()
+    monkeypatch.setattr(outbox.settings, "outbox_sink", "memory")
+    with pytest.raises(ValueError, match="OUTBOX_SINK"):
+        outbox.build_sink()
@@ -0,0 +1,192 @@
+# services/catalog-api/tests/test_product_cache.py
+# Unit tests: caché de productos de dos niveles (L1 por réplica + L2 compartido en proceso,
+# pub/sub).
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import changes, models, product_cache, repositories
+from app.core.cache import InMemorySharedCache, TwoTierCache
+from app.schemas import ProductCreate
+
+
+class CountingLoader:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def __call__(self, ids):
+        self.calls.append(list(ids))
+        return {i: self.rows[i] for i in ids if i in self.rows}
+
+
+def _replica(shared, **kwargs):
+    return TwoTierCache(shared, namespace="test:products", **kwargs)
+
+
+async def _started(*caches):
+    for cache in caches:
+        await cache.start()
+        assert await cache.wait_subscribed()
+
+
+async def _stop(*caches):
+    for cache in caches:
+        await cache.stop()
+
+
+def test_second_replica_is_served_from_shared_tier():
+    async def run():
+        shared = InMemorySharedCache()
+        a, b = _replica(shared), _replica(shared)
+        await _started(a, b)
+        loader = CountingLoader({"SKU-1": '{"sku":"SKU-1"}'})
+        try:
+            first = await a.get_many(["SKU-1", "SKU-404"], loader)
+            second = await b.get_many(["SKU-1"], loader)
+            third = await b.get_many(["SKU-1"], loader)
+        finally:
+            await _stop(a, b)
+        return loader.calls, first, second, third, b.stats()
+
+    calls, first, second, third, stats = asyncio.run(run())
+    assert calls == [["SKU-1", "SKU-404"]]
+    assert first == second == third == {"SKU-1": '{"sku":"SKU-1"}'}
+    assert (stats["hits_shared"], stats["hits_local"]) == (1, 1)
+
+
+def test_write_on_one_replica_evicts_all_replicas():
+    async def run():
+        shared = InMemorySharedCache()
+        a, b = _replica(shared), _replica(shared)
+        await _started(a, b)
+        loader = CountingLoader({"SKU-1": "v1"})
+        try:
+            await a.get_many(["SKU-1"], loader)
+            await b.get_many(["SKU-1"], loader)  # ahora también en el L1 de b
+
+            loader.rows["SKU-1"] = "v2"
+            await a.invalidate(["SKU-1"])
+            await asyncio.sleep(0.01)  # entrega del mensaje pub/sub
+            return await b.get_many(["SKU-1"], loader), len(loader.calls)
+        finally:
+            await _stop(a, b)
+
+    assert asyncio.run(run()) == ({"SKU-1": "v2"}, 2)
+
+
+def test_invalidate_all_bumps_generation_on_every_replica():
+    async def run():
+        shared = InMemorySharedCache()
+        a, b = _replica(shared), _replica(shared)
+        await _started(a, b)
+        loader = CountingLoader({"SKU-1": "v1"})
+        try:
+            await b.get_many(["SKU-1"], loader)
+            await a.invalidate_all()
+            await asyncio.sleep(0.01)
+            assert b.generation == a.generation == 1
+            assert b.key("SKU-1") == "test:products:v1:g1:SKU-1"
+            await b.get_many(["SKU-1"], loader)
+            late = _replica(shared)  # réplica que arranca después: lee la generación del L2
+            await _started(late)
+            generation = late.generation
+            await _stop(late)
+        finally:
+            await _stop(a, b)
+        return len(loader.calls), generation
+
+    assert asyncio.run(run()) == (2, 1)
+
+
+def test_shared_tier_outage_degrades_to_loader():
+    async def run():
+        shared = InMemorySharedCache()
+        cache = _replica(shared)
+        shared.fail = True
+        loader = CountingLoader({"SKU-1": "v1"})
+        found = await cache.get_many(["SKU-1"], loader)
+        await cache.invalidate(["SKU-1"])  # tampoco rompe
+        return found, await cache.get_many(["SKU-1"], loader), len(loader.calls)
+
+    assert asyncio.run(run()) == ({"SKU-1": "v1"}, {"SKU-1": "v1"}, 2)
+
+
+def test_invalidation_during_load_is_not_overwritten_by_stale_fill():
+    async def run():
+        shared = InMemorySharedCache()
+        cache = _replica(shared)
+        rows = {"SKU-1": "old"}
+
+        async def slow_loader(ids):
+            value = rows["SKU-1"]
+            await asyncio.sleep(0.02)
+            return {"SKU-1": value}
+
+        pending = asyncio.create_task(cache.get_many(["SKU-1"], slow_loader))
+        await asyncio.sleep(0.005)
+        rows["SKU-1"] = "new"
+        await cache.invalidate(["SKU-1"])
+        stale = await pending
+        return stale, await cache.get_many(["SKU-1"], slow_loader)
+
+    assert asyncio.run(run()) == ({"SKU-1": "old"}, {"SKU-1": "new"})
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    models.Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    changes.register(factory)
+    yield factory
+    engine.dispose()
+
+
+def test_orm_commit_invalidates_changed_skus_across_replicas(session_factory, monkeypatch):
+    shared = InMemorySharedCache()
+    writer, reader = _replica(shared), _replica(shared)
+    monkeypatch.setattr(product_cache, "get_product_cache", lambda: writer)
+
+    async def run():
+        await _started(writer, reader)
+        loader = CountingLoader({"SKU-1": "v1"})
+        try:
+            await reader.get_many(["SKU-1"], loader)
+
+            def write():
+                # Endpoint sync en el threadpool: el commit dispara la invalidación
+                with session_factory() as db:
+                    product = repositories.create_product(db, ProductCreate(sku="SKU-1", name="P1"))
+                    product.name = "P1 renamed"
+                    db.commit()
+
+            await asyncio.to_thread(write)
+            await asyncio.sleep(0.02)
+            await reader.get_many(["SKU-1"], loader)
+            return len(loader.calls)
+        finally:
+            await _stop(writer, reader)
+
+    assert asyncio.run(run()) == 2
+
+
+def test_rolled_back_changes_do_not_invalidate(session_factory, monkeypatch):
+    invalidated = []
+
+    class _Recorder:
+        def invalidate_nowait(self, ids):
+            invalidated.append(list(ids))
+
+    monkeypatch.setattr(product_cache, "get_product_cache", lambda: _Recorder())
+    with session_factory() as db:
+        db.add(models.Product(sku="SKU-9", name="P9"))
+        db.flush()
+        db.rollback()
+        repositories.create_product(db, ProductCreate(sku="SKU-10", name="P10"))
+    assert invalidated == [["SKU-10"]]
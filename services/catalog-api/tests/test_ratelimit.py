@@ -0,0 +1,180 @@
+# services/catalog-api/tests/test_ratelimit.py
+# Unit tests: rate limiting por cliente (token bucket local y store RESP compartido con un
+# stand-in).
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import auth, ratelimit
+from app.core.config import settings
+from app.core.ratelimit import (
+    LocalBucketStore,
+    RateLimiter,
+    RedisBucketStore,
+    parse_rate,
+    parse_rules,
+)
+from app.main import app
+
+CLAIMS = {
+    "sub": "svc-1",
+    "azp": "integration-a",
+    "resource_access": {settings.oidc_audience: {"roles": ["catalog_read"]}},
+}
+
+
+class FakeRedis:
+    """
+    Stand-in RESP (Redis-compatible) en proceso: AUTH/SELECT/EVAL/EVALSHA. El script del token
+    bucket se emula en Python con la misma semántica; EVALSHA devuelve NOSCRIPT hasta el 1er EVAL.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.scripts = set()
+        self.commands = []
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return f"redis://127.0.0.1:{self.server.sockets[0].getsockname()[1]}/0"
+
+    async def _read_command(self, reader):
+        header = await reader.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:-2])):
+            size = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(size + 2))[:-2].decode())
+        return args
+
+    def _bucket(self, key, limit, rate):
+        now = time.time()
+        tokens, ts = self.data.get(key, (limit, now))
+        tokens = min(limit, tokens + max(0.0, now - ts) * rate)
+        allowed = 0
+        if tokens >= 1:
+            tokens -= 1
+            allowed = 1
+        self.data[key] = (tokens, now)
+        return allowed, tokens
+
+    async def _handle(self, reader, writer):
+        while True:
+            args = await self._read_command(reader)
+            if args is None:
+                break
+            cmd = args[0].upper()
+            self.commands.append(cmd)
+            if cmd in ("AUTH", "SELECT"):
+                writer.write(b"+OK\r\n")
+            elif cmd == "EVALSHA" and args[1] not in self.scripts:
+                writer.write(b"-NOSCRIPT No matching script\r\n")
+            elif cmd in ("EVAL", "EVALSHA"):
+                if cmd == "EVAL":
+                    self.scripts.add(ratelimit.TOKEN_BUCKET_SHA)
+                key, limit, rate = args[3], float(args[4]), float(args[5])
+                allowed, tokens = self._bucket(key, limit, rate)
+                payload = str(tokens).encode()
+                writer.write(b"*2\r\n:%d\r\n$%d\r\n%s\r\n" % (allowed, len(payload), payload))
+            else:
+                writer.write(b"-ERR unknown command\r\n")
+            await writer.drain()
+        writer.close()
+
+
+def test_token_bucket_refills_at_configured_rate():
+    store = LocalBucketStore()
+    rule = parse_rate("default", "2/s")
+    assert store.take_now("k", rule, now=0.0).allowed is True
+    second = store.take_now("k", rule, now=0.0)
+    assert (second.allowed, second.remaining) == (True, 0)
+    denied = store.take_now("k", rule, now=0.1)
+    assert denied.allowed is False and denied.retry_after == 1
+    assert store.take_now("k", rule, now=0.6).allowed is True  # 0.5s => 1 token
+
+
+def test_rule_precedence_role_then_route_then_default():
+    limiter = RateLimiter(
+        default=parse_rate("default", "10/m"),
+        routes=parse_rules("/v1/products=100/m,/v1/products/lookup=1000/m", prefix="route:"),
+        roles=parse_rules("catalog_service=5000/m,catalog_bulk=20000/m", prefix="role:"),
+    )
+    assert limiter.rule_for("/v1/stock/{sku}", []).name == "default"
+    assert limiter.rule_for("/v1/products/lookup", []).name == "route:/v1/products/lookup"
+    assert limiter.rule_for("/v1/products", ["catalog_read"]).name == "route:/v1/products"
+    rule = limiter.rule_for("/v1/products", ["catalog_service", "catalog_bulk"])
+    assert rule.name == "role:catalog_bulk"
+
+
+def test_local_store_evicts_idle_buckets_when_full():
+    store = LocalBucketStore(max_keys=2)
+    rule = parse_rate("default", "1/s")
+    store.take_now("a", rule, now=0.0)
+    store.take_now("b", rule, now=0.0)
+    store.take_now("c", rule, now=5.0)  # a y b llevan > 1 ventana inactivos
+    assert len(store) == 1
+
+
+@pytest.fixture
+def api(monkeypatch):
+    class _FakeVerifier:
+        async def decode_and_verify(self, token, **kwargs):
+            return {**CLAIMS, "sub": token}
+
+    monkeypatch.setattr(auth, "get_verifier", lambda: _FakeVerifier())
+    limiter = RateLimiter(default=parse_rate("default", "3/m"))
+    monkeypatch.setattr(ratelimit, "get_rate_limiter", lambda: limiter)
+    return TestClient(app)
+
+
+def test_clients_are_throttled_independently_with_ratelimit_headers(api):
+    headers = {"Authorization": "Bearer noisy"}
+    responses = [api.get("/v1/products", headers=headers) for _ in range(4)]
+    assert [r.status_code for r in responses] == [200, 200, 200, 429]
+    assert responses[0].headers["RateLimit-Limit"] == "3"
+    assert responses[0].headers["RateLimit-Remaining"] == "2"
+    assert responses[0].headers["RateLimit-Policy"] == "3;w=60"
+    assert int(responses[3].headers["Retry-After"]) >= 1
+
+    # Otro cliente (otro sub) tiene su propio bucket
+    assert api.get("/v1/products", headers={"Authorization": "Bearer quiet"}).status_code == 200
+
+
+def test_shared_store_enforces_cluster_wide_limit():
+    async def _run():
+        fake = FakeRedis()
+        url = await fake.start()
+        rule = parse_rate("default", "3/m")
+        # Dos "workers" con su propio limiter comparten el mismo store
+        workers = [
+            RateLimiter(default=rule, store=RedisBucketStore(url, timeout_seconds=1.0))
+            for _ in range(2)
+        ]
+        decisions = [
+            await workers[i % 2].hit("c:integration-a:svc-1", "/v1/products") for i in range(4)
+        ]
+        for worker in workers:
+            await worker.aclose()
+        fake.server.close()
+        await fake.server.wait_closed()
+        return fake, decisions
+
+    fake, decisions = asyncio.run(_run())
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    # NOSCRIPT => un único EVAL (el script queda cargado en el servidor); después solo EVALSHA
+    assert fake.commands == ["EVALSHA", "EVAL", "EVALSHA", "EVALSHA", "EVALSHA"]
+
+
+def test_shared_store_failure_falls_back_to_local_bucket():
+    async def _run():
+        limiter = RateLimiter(
+            default=parse_rate("default", "1/m"),
+            store=RedisBucketStore("redis://127.0.0.1:1/0", timeout_seconds=0.2),
+        )
+        return [await limiter.hit("c:x:y", "/v1/products") for _ in range(2)]
+
+    assert [d.allowed for d in asyncio.run(_run())] == [True, False]
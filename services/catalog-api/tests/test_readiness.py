@@ -0,0 +1,105 @@
+# services/catalog-api/tests/test_readiness.py
+# Unit tests (sin contenedor): /ready se calcula con estado local y se cachea.
+import asyncio
+
+import pytest
+
+from app.core import readiness as readiness_mod
+from app.core.readiness import ReadinessProbe
+from app.core.warmup import WarmupState
+
+
+class _FakeVerifier:
+    def __init__(self, loaded: bool, stale: bool = False) -> None:
+        self.loaded = loaded
+        self.stale = stale
+        self.calls = 0
+
+    def jwks_status(self):
+        self.calls += 1
+        return self.loaded, self.stale
+
+
+@pytest.fixture
+def fake_verifier(monkeypatch):
+    import app.core.auth as auth
+
+    verifier = _FakeVerifier(loaded=True)
+    monkeypatch.setattr(auth, "get_verifier", lambda: verifier)
+    monkeypatch.setattr(readiness_mod, "pool_has_connection", lambda: True)
+    return verifier
+
+
+def _finished_warmup() -> WarmupState:
+    async def _run() -> WarmupState:
+        w = WarmupState()
+        w.start({})
+        await w.wait(timeout=1.0)
+        return w
+
+    return asyncio.run(_run())
+
+
+def test_not_ready_until_warmup_done(fake_verifier):
+    probe = ReadinessProbe(ttl_seconds=0.0)
+    result = probe.check(WarmupState())
+    assert result["ready"] is False
+    assert result["checks"]["warmup"] is False
+
+
+def test_ready_when_all_checks_pass(fake_verifier):
+    probe = ReadinessProbe(ttl_seconds=0.0)
+    result = probe.check(_finished_warmup())
+    assert result == {"ready": True, "checks": {"warmup": True, "jwks": True, "db": True}}
+
+
+def test_result_is_cached_between_probes(fake_verifier):
+    probe = ReadinessProbe(ttl_seconds=60.0)
+    warmup = _finished_warmup()
+    for _ in range(50):
+        probe.check(warmup)
+    assert fake_verifier.calls == 1
+
+
+def test_ready_with_warmup_disabled_repairs_and_reports_200(monkeypatch):
+    # WARMUP_ENABLED=false: el warm-up no bloquea /ready; lo que falta lo relanza el probe
+    import time
+
+    from fastapi.testclient import TestClient
+
+    import app.core.auth as auth
+    from app.core.config import settings
+    from app.main import app as catalog_app
+
+    verifier = _FakeVerifier(loaded=False)
+    pool = {"open": False}
+
+    async def _warm_oidc():
+        verifier.loaded = True
+
+    async def _warm_db():
+        pool["open"] = True
+
+    for name, value in {
+        "warmup_enabled": False,
+        "readiness_cache_seconds": 0.0,
+        "outbox_relay_enabled": False,
+        "stock_sweeper_enabled": False,
+        "product_cache_enabled": False,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    monkeypatch.setattr(auth, "get_verifier", lambda: verifier)
+    monkeypatch.setattr(readiness_mod, "pool_has_connection", lambda: pool["open"])
+    steps = {"oidc": _warm_oidc, "db": _warm_db}
+    monkeypatch.setattr(readiness_mod, "default_steps", lambda: steps)
+
+    with TestClient(catalog_app) as client:
+        first = client.get("/ready")
+        deadline = time.monotonic() + 2
+        r = client.get("/ready")
+        while r.status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            r = client.get("/ready")
+
+    assert first.json()["checks"]["warmup"] is True
+    assert r.status_code == 200, r.text
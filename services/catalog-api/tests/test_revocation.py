@@ -0,0 +1,112 @@
+# services/catalog-api/tests/test_revocation.py
+# Unit tests (sin Keycloak): lista de revocaciones jti/sid, poll incremental y webhook RBAC.
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+from app.api.v1 import routes
+from app.core import auth, revocation
+from app.core.config import settings
+from app.core.revocation import RevocationList
+from app.schemas import RevocationBatch
+
+CLAIMS = {"sub": "u1", "jti": "8f0c2c5e-jti", "sid": "session-42", "resource_access": {}}
+
+
+@pytest.fixture
+def revocations(monkeypatch):
+    rl = RevocationList(retention_seconds=60)
+    monkeypatch.setattr(auth, "get_revocation_list", lambda: rl)
+    monkeypatch.setattr(routes, "get_revocation_list", lambda: rl)
+    return rl
+
+
+@pytest.fixture
+def verifier(monkeypatch):
+    class _FakeVerifier:
+        async def decode_and_verify(self, token, **kwargs):
+            return dict(CLAIMS)
+
+    monkeypatch.setattr(auth, "get_verifier", lambda: _FakeVerifier())
+
+
+def test_revoked_jti_and_sid_are_detected():
+    rl = RevocationList(retention_seconds=60)
+    assert rl.is_revoked(CLAIMS) is False
+    rl.revoke("jti", "8f0c2c5e-jti")
+    assert rl.is_revoked(CLAIMS) is True
+    assert rl.is_revoked({"jti": "other", "sid": "session-42"}) is False
+
+    rl.revoke("sid", "session-42")
+    assert rl.is_revoked({"jti": "other", "sid": "session-42"}) is True
+    with pytest.raises(ValueError):
+        rl.revoke("sub", "u1")
+
+
+def test_entries_expire_with_the_tokens_they_cover():
+    rl = RevocationList(retention_seconds=60)
+    now = int(time.time())
+    rl.apply([
+        {"type": "jti", "value": "old", "expires_at": now - 1},
+        {"type": "sid", "value": "s", "expires_at": now + 60},
+    ])
+    assert len(rl) == 1  # apply() poda lo caducado
+    assert rl.prune(now=now + 61) == 1
+    assert len(rl) == 0
+
+
+def test_poll_applies_deltas_incrementally(monkeypatch):
+    rl = RevocationList(retention_seconds=60)
+    seen_cursors = []
+    pages = [
+        {"cursor": "c1", "revocations": [{"type": "jti", "value": "a"}]},
+        {
+            "cursor": "c2",
+            "revocations": [{"type": "sid", "value": "s1"}, {"type": "jti", "value": "b"}],
+        },
+        {"cursor": None, "revocations": []},
+    ]
+
+    async def _fake_feed(url, cursor):
+        seen_cursors.append(cursor)
+        return pages[len(seen_cursors) - 1]
+
+    monkeypatch.setattr(revocation, "_fetch_feed", _fake_feed)
+
+    async def _run():
+        url = "http://identity.test/v1/revocations"
+        return [await revocation.poll_once(rl, url) for _ in pages]
+
+    assert asyncio.run(_run()) == [1, 2, 0]
+    assert seen_cursors == [None, "c1", "c2"]
+    assert rl.cursor == "c2" and len(rl) == 3
+
+
+def test_revoked_token_is_rejected_by_auth_dependency(revocations, verifier):
+    assert asyncio.run(auth.get_current_claims(token="t"))["sub"] == "u1"
+
+    revocations.revoke("sid", "session-42")
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth.get_current_claims(token="t"))
+    assert exc.value.status_code == 401
+
+
+def test_webhook_requires_role_and_applies_batch(revocations):
+    dependency = auth.require_roles([settings.revocation_webhook_role])
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(
+            dependency(
+                request=Request({"type": "http", "headers": []}),
+                response=Response(),
+                claims={"resource_access": {settings.oidc_audience: {"roles": ["catalog_write"]}}},
+            )
+        )
+    assert exc.value.status_code == 403
+
+    batch = RevocationBatch(revocations=[{"type": "jti", "value": "8f0c2c5e-jti"}])
+    result = asyncio.run(routes.push_revocations(batch))
+    assert (result.applied, result.size) == (1, 1)
+    assert revocations.is_revoked(CLAIMS) is True
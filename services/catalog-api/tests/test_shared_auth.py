@@ -0,0 +1,191 @@
+# services/catalog-api/tests/test_shared_auth.py
+# Unit tests: caché OIDC compartida entre workers del pod (JWKS publicado + tabla mmap de tokens
+# verificados).
+import asyncio
+import hashlib
+import json
+import os
+import stat
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jwt.algorithms import ECAlgorithm, RSAAlgorithm
+from jwt.exceptions import InvalidAudienceError
+
+from app.core import jwks as jwks_mod
+from app.core.security import OIDCJWKSVerifier
+from app.core.shared_auth import _SLOT, SharedAuthCache
+
+ISSUER = "http://keycloak.test/realms/asrp"
+AUDIENCE = "asrp-catalog"
+JWKS_URL = "http://keycloak.test/certs"
+
+_KEYS = {
+    "RS256": (
+        "rsa-1", rsa.generate_private_key(public_exponent=65537, key_size=2048), RSAAlgorithm
+    ),
+    "ES256": ("ec-1", ec.generate_private_key(ec.SECP256R1()), ECAlgorithm),
+}
+
+
+def _jwks(keys_by_alg=None):
+    keys = []
+    for alg, (kid, key, algorithm) in (keys_by_alg or _KEYS).items():
+        jwk = json.loads(algorithm.to_jwk(key.public_key()))
+        jwk.update({"kid": kid, "alg": alg, "use": "sig"})
+        keys.append(jwk)
+    return {"keys": keys}
+
+
+def _token(alg, *, kid=None, key=None, **overrides):
+    default_kid, default_key, _ = _KEYS[alg]
+    now = int(time.time())
+    claims = {"iss": ISSUER, "aud": AUDIENCE, "sub": "u1", "iat": now, "exp": now + 60, **overrides}
+    headers = {"kid": kid or default_kid}
+    return jwt.encode(claims, key or default_key, algorithm=alg, headers=headers)
+
+
+class _FakeJWKSEndpoint:
+    def __init__(self):
+        self.jwks = _jwks()
+        self.fetches = 0
+
+    async def __call__(self, jwks_url):
+        self.fetches += 1
+        await asyncio.sleep(0)
+        return self.jwks
+
+
+def _claims(sub="u1", ttl=60, **extra):
+    return {"sub": sub, "exp": int(time.time()) + ttl, **extra}
+
+
+def test_claims_are_shared_between_instances(tmp_path):
+    a, b = SharedAuthCache(str(tmp_path)), SharedAuthCache(str(tmp_path))
+    assert b.get_claims("tok-1") is None
+    assert a.put_claims("tok-1", _claims(roles=["x"]))
+    assert b.get_claims("tok-1")["roles"] == ["x"]
+    assert b.get_claims("tok-2") is None
+    assert (b.hits, b.misses) == (1, 2)
+
+
+def test_size_is_bounded_and_expired_or_oversized_entries_are_skipped(tmp_path):
+    cache = SharedAuthCache(str(tmp_path), slots=4, slot_bytes=256, max_ttl_seconds=60)
+    for i in range(100):
+        cache.put_claims(f"tok-{i}", _claims(sub=str(i)))
+    assert os.path.getsize(cache.tokens_path) == 64 + 4 * 256
+    assert sum(cache.get_claims(f"tok-{i}") is not None for i in range(100)) <= 4
+
+    assert not cache.put_claims("big", _claims(blob="x" * 500))
+    assert not cache.put_claims("no-exp", {"sub": "u1"})
+    cache.max_ttl = -1  # max_ttl acota la caducidad aunque exp sea mayor
+    assert not cache.put_claims("expired", _claims(ttl=60))
+
+
+def test_slot_being_written_reads_as_miss(tmp_path):
+    cache = SharedAuthCache(str(tmp_path))
+    cache.put_claims("tok-1", _claims())
+    mm, off = cache._map(), cache._offset(hashlib.sha256(b"tok-1").digest())
+    seq = _SLOT.unpack_from(mm, off)[0]
+    # worker a mitad de escritura
+    _SLOT.pack_into(mm, off, *((seq + 1,) + _SLOT.unpack_from(mm, off)[1:]))
+    assert cache.get_claims("tok-1") is None
+    cache.put_claims("tok-1", _claims(sub="u2"))  # un writer posterior recupera el slot
+    assert cache.get_claims("tok-1")["sub"] == "u2"
+
+
+def _worker(tmp_path, monkeypatch, endpoint):
+    v = OIDCJWKSVerifier(
+        "http://keycloak.test",
+        jwks_url_override=JWKS_URL,
+        shared_cache=SharedAuthCache(str(tmp_path)),
+    )
+    monkeypatch.setattr(v, "_fetch_jwks", endpoint)
+    return v
+
+
+def _verify(verifier, token, audience=AUDIENCE):
+    return asyncio.run(
+        verifier.decode_and_verify(
+            token, audience_expected=audience, issuer_expected=ISSUER, algorithms=list(_KEYS)
+        )
+    )
+
+
+@pytest.fixture
+def endpoint():
+    return _FakeJWKSEndpoint()
+
+
+def test_second_worker_reuses_jwks_and_verified_token(tmp_path, monkeypatch, endpoint):
+    a, b = _worker(tmp_path, monkeypatch, endpoint), _worker(tmp_path, monkeypatch, endpoint)
+    token = _token("RS256")
+    assert _verify(a, token)["sub"] == "u1"
+
+    verifies = []
+    original = jwks_mod.KeyEntry.verify
+
+    def _counting(self, *a):
+        verifies.append(1)
+        return original(self, *a)
+
+    monkeypatch.setattr(jwks_mod.KeyEntry, "verify", _counting)
+    assert _verify(b, token)["sub"] == "u1"
+    assert endpoint.fetches == 1 and verifies == []
+
+    # Los claims compartidos se revalidan: otra audiencia sigue fallando
+    with pytest.raises(InvalidAudienceError):
+        _verify(b, token, audience="other-client")
+    _verify(b, _token("ES256"))
+    assert verifies == [1]
+
+
+def test_key_rotation_is_fetched_once_per_pod(tmp_path, monkeypatch, endpoint):
+    a, b = _worker(tmp_path, monkeypatch, endpoint), _worker(tmp_path, monkeypatch, endpoint)
+    _verify(a, _token("RS256"))
+    _verify(b, _token("ES256"))
+    for w in (a, b):
+        w._key_index.fetched_at -= 60  # fuera del cooldown de refresh
+
+    new_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    endpoint.jwks = _jwks({**_KEYS, "RS256": ("rsa-2", new_key, RSAAlgorithm)})
+    assert _verify(a, _token("RS256", kid="rsa-2", key=new_key))["sub"] == "u1"
+    assert _verify(b, _token("RS256", kid="rsa-2", key=new_key, sub="u2"))["sub"] == "u2"
+    assert endpoint.fetches == 2
+
+
+def test_waits_for_the_worker_that_is_fetching(tmp_path, monkeypatch, endpoint):
+    shared = SharedAuthCache(str(tmp_path))
+    b = _worker(tmp_path, monkeypatch, endpoint)
+
+    async def run():
+        with shared.jwks_fetch_lock() as leader:
+            assert leader
+            pending = asyncio.create_task(
+                b.decode_and_verify(
+                    _token("RS256"), audience_expected=AUDIENCE, issuer_expected=ISSUER
+                )
+            )
+            await asyncio.sleep(0.02)
+            shared.store_jwks(JWKS_URL, _jwks(), time.time())  # lo publica el "otro worker"
+        return await pending
+
+    assert asyncio.run(run())["sub"] == "u1"
+    assert endpoint.fetches == 0
+
+
+def test_directory_is_private_and_an_insecure_one_is_rejected(tmp_path):
+    url = "http://keycloak.test/certs"
+    cache = SharedAuthCache(str(tmp_path / "oidc"))
+    cache.store_jwks(url, {"keys": []}, 1.0)
+    assert stat.S_IMODE(os.stat(cache.directory).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(cache.jwks_path).st_mode) == 0o600
+    assert cache.load_jwks(url) == ({"keys": []}, 1.0)
+
+    # Escribible por otros (p. ej. creado antes por otro usuario bajo /tmp): no se confía en él
+    os.chmod(cache.directory, 0o777)
+    other = SharedAuthCache(cache.directory)
+    assert other.load_jwks(url) is None
+    assert other.get_claims("token") is None
@@ -0,0 +1,47 @@
+# services/catalog-api/tests/test_shared_modules.py
+# Guardarraíl: módulos copiados entre catalog-api y orders-api (cada servicio se construye con su
+# propio contexto Docker, así que no hay paquete común). Si una copia cambia y la otra no, falla.
+import re
+from pathlib import Path
+
+import pytest
+
+SERVICES = Path(__file__).resolve().parents[2]
+CATALOG = SERVICES / "catalog-api"
+ORDERS = SERVICES / "orders-api"
+
+# (ruta en catalog-api, ruta en orders-api)
+COPIES = [
+    ("app/core/jwks.py", "app/security/jwks.py"),
+    ("app/core/shared_auth.py", "app/security/shared_auth.py"),
+    ("app/middlewares/admission.py", "app/middlewares/admission.py"),
+    ("app/core/deadline.py", "app/core/deadline.py"),
+    ("app/middlewares/deadline.py", "app/middlewares/deadline.py"),
+    ("app/outbox.py", "app/outbox.py"),
+]
+
+# Diferencias admitidas: logger de cada servicio (get_logger + extra vs logger global + %s)
+_EXTRA_ERROR = re.compile(r'logger\.(\w+)\("([^"]*)", extra=\{"error": str\((\w+)\)\}\)')
+
+
+def _normalize(path: Path, service: str) -> list:
+    text = path.read_text(encoding="utf-8")
+    text = text.replace(service, "<service>")
+    text = text.replace("import get_logger", "import logger")
+    text = text.replace("logger = get_logger(__name__)", "")
+    text = _EXTRA_ERROR.sub(r'logger.\1("\2: %s", \3)', text)
+    lines = [ln for ln in text.splitlines() if ln.strip()]
+    if lines and lines[0].startswith("# services/"):
+        lines = lines[1:]  # cabecera con la ruta del fichero
+    return lines
+
+
+@pytest.mark.skipif(not ORDERS.is_dir(), reason="orders-api no está en el checkout")
+@pytest.mark.parametrize("catalog_path, orders_path", COPIES, ids=[c for c, _ in COPIES])
+def test_copies_have_not_diverged(catalog_path, orders_path):
+    catalog = _normalize(CATALOG / catalog_path, "catalog-api")
+    orders = _normalize(ORDERS / orders_path, "orders-api")
+    assert catalog == orders, (
+        f"{catalog_path} (catalog-api) y {orders_path} (orders-api) han divergido: "
+        "aplica el cambio en ambas copias"
+    )
@@ -0,0 +1,174 @@
+# services/catalog-api/tests/test_singleflight.py
+# Unit tests: single-flight de GETs idénticos (una query + un cuerpo para N requests concurrentes).
+import asyncio
+import time
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import changes, models, product_cache, repositories
+from app.core import auth, db, ratelimit, singleflight
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.main import app
+from app.schemas import ProductCreate
+
+
+def test_concurrent_calls_share_one_computation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return b"body"
+
+    async def run():
+        flight = SingleFlight()
+        first = await asyncio.gather(
+            *(flight.do("k", compute) for _ in range(10)), flight.do("other", compute)
+        )
+        again = await flight.do("k", compute)  # terminado => sin caché, recalcula
+        return flight, first, again
+
+    flight, first, again = asyncio.run(run())
+    assert first[:10] == [b"body"] * 10 and all(b is first[0] for b in first[:10])
+    assert len(calls) == 3 and again == b"body"
+    assert (flight.leaders_total, flight.shared_total, len(flight)) == (3, 9, 0)
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def compute():
+        await asyncio.sleep(0.05)
+        return b"ok"
+
+    async def run():
+        flight = SingleFlight()
+        leader = asyncio.create_task(flight.do("k", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == b"ok"
+
+
+def test_errors_are_shared_and_not_remembered():
+    attempts = []
+
+    async def compute():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("db down")
+        return b"ok"
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(
+            flight.do("k", compute), flight.do("k", compute), return_exceptions=True
+        )
+        return results, await flight.do("k", compute)
+
+    results, retry = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert retry == b"ok"
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    models.Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    changes.register(factory)
+    with factory() as session:
+        for i in range(3):
+            repositories.create_product(session, ProductCreate(sku=f"SKU-{i}", name=f"Product {i}"))
+    monkeypatch.setattr(db, "get_sessionmaker", lambda: factory)
+
+    class _FakeVerifier:
+        async def decode_and_verify(self, token, **kwargs):
+            roles = token.split("+")
+            access = {settings.oidc_audience: {"roles": roles}}
+            return {"sub": token, "azp": "web", "resource_access": access}
+
+    monkeypatch.setattr(auth, "get_verifier", lambda: _FakeVerifier())
+    limiter = ratelimit.RateLimiter(default=ratelimit.parse_rate("default", "1000/s"))
+    monkeypatch.setattr(ratelimit, "get_rate_limiter", lambda: limiter)
+
+    queries = []
+    original = repositories.get_products_by_skus
+
+    def slow_lookup(session, skus):
+        queries.append(tuple(skus))
+        time.sleep(0.1)
+        return original(session, skus)
+
+    monkeypatch.setattr(repositories, "get_products_by_skus", slow_lookup)
+    singleflight.get_single_flight.cache_clear()
+    product_cache.get_product_cache.cache_clear()
+    yield queries
+    singleflight.get_single_flight.cache_clear()
+    product_cache.get_product_cache.cache_clear()
+    engine.dispose()
+
+
+def _burst(requests):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://catalog") as client:
+            return await asyncio.gather(
+                *(
+                    client.get(path, headers={"Authorization": f"Bearer {token}"})
+                    for path, token in requests
+                )
+            )
+
+    return asyncio.run(run())
+
+
+def test_thundering_herd_collapses_to_one_query(catalog):
+    path = "/v1/products/lookup?sku=SKU-0&sku=SKU-2"
+    reordered = "/v1/products/lookup?sku=SKU-2&sku=SKU-0"
+    responses = _burst([(path, "catalog_read")] * 8 + [(reordered, "catalog_read")])
+
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.content for r in responses}) == 1
+    # cabeceras de require_roles se conservan
+    assert responses[0].headers["RateLimit-Limit"] == "1000"
+    assert sorted(p["sku"] for p in responses[0].json()) == ["SKU-0", "SKU-2"]
+    assert len(catalog) == 1
+
+
+def test_coalescing_is_keyed_by_query_and_authorization_scope(catalog):
+    responses = _burst(
+        [
+            ("/v1/products/lookup?sku=SKU-0", "catalog_read"),
+            ("/v1/products/lookup?sku=SKU-0", "catalog_read+catalog_write"),
+            ("/v1/products/lookup?sku=SKU-1", "catalog_read"),
+        ]
+    )
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert len(catalog) == 3
+
+
+def test_request_key_does_not_collide_on_encoded_separators():
+    from starlette.requests import Request
+
+    def key(query_string: bytes) -> str:
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/v1/products/lookup",
+            "query_string": query_string,
+            "headers": [],
+        }
+        return singleflight.request_key(Request(scope), "catalog_read")
+
+    assert key(b"sku=a&sku=b") != key(b"sku=a%26sku%3Db")
+    assert key(b"sku=b&sku=a") == key(b"sku=a&sku=b")
@@ -0,0 +1,197 @@
+# services/catalog-api/tests/test_snapshot.py
+# Unit tests: snapshot mmap del catálogo (formato, publicación atómica, frescura vía outbox).
+import asyncio
+import fcntl
+import json
+import os
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import changes, models, outbox, product_cache, repositories, snapshot
+from app.core.config import settings
+from app.schemas import ProductCreate
+from app.snapshot import CatalogSnapshot, SnapshotManager, write_snapshot
+
+
+def test_lookups_by_sku_and_id(tmp_path):
+    path = str(tmp_path / "products.snapshot")
+    products = [(i, f"SKU-{i:03d}", f"Product {i}") for i in range(1, 200)]
+    products.append((500, "ÑANDÚ-1", "Pájaro"))
+    assert write_snapshot(path, reversed(products), version=42, built_at_ms=1) == 200
+
+    snap = CatalogSnapshot.open(path)
+    assert (snap.version, snap.count) == (42, 200)
+    product_id, body = snap.find_sku("SKU-150")
+    assert product_id == 150
+    assert json.loads(body) == {"id": 150, "sku": "SKU-150", "name": "Product 150"}
+    assert json.loads(snap.find_sku("ÑANDÚ-1")[1])["name"] == "Pájaro"
+    assert json.loads(snap.find_id(500))["sku"] == "ÑANDÚ-1"
+    for missing in ("SKU-000", "SKU-9999", "SKU-0", "", "X" * 80):
+        assert snap.find_sku(missing) is None
+    assert snap.find_id(0) is None and snap.find_id(200) is None and snap.find_id(10_000) is None
+
+
+def test_empty_and_corrupt_files(tmp_path):
+    path = str(tmp_path / "empty.snapshot")
+    write_snapshot(path, [], version=0, built_at_ms=1)
+    assert CatalogSnapshot.open(path).find_sku("SKU-1") is None
+
+    bad = tmp_path / "bad.snapshot"
+    bad.write_bytes(b"not a snapshot" * 10)
+    with pytest.raises(snapshot.SnapshotFormatError):
+        CatalogSnapshot.open(str(bad))
+
+
+def test_atomic_replace_keeps_old_mapping_readable(tmp_path):
+    path = str(tmp_path / "products.snapshot")
+    write_snapshot(path, [(1, "SKU-1", "v1")], version=1, built_at_ms=1)
+    old = CatalogSnapshot.open(path)
+    write_snapshot(path, [(1, "SKU-1", "v2"), (2, "SKU-2", "new")], version=2, built_at_ms=2)
+
+    assert json.loads(old.find_sku("SKU-1")[1])["name"] == "v1"  # lookups en curso no se rompen
+    assert json.loads(CatalogSnapshot.open(path).find_sku("SKU-1")[1])["name"] == "v2"
+    assert not [f for f in os.listdir(tmp_path) if ".tmp." in f]
+
+
+@pytest.fixture
+def catalog_db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    models.Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    changes.register(factory)
+    with factory() as db:
+        for i in range(3):
+            repositories.create_product(db, ProductCreate(sku=f"SKU-{i}", name=f"Product {i}"))
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *a: queries.append(a[2]))
+    yield factory, queries
+    engine.dispose()
+
+
+def test_manager_serves_snapshot_and_defers_newer_entries_to_db(tmp_path, catalog_db):
+    factory, queries = catalog_db
+    manager = SnapshotManager(str(tmp_path / "products.snapshot"), factory, max_age_seconds=60)
+    manager.refresh()
+    assert manager.current is not None and manager.current.count == 3
+
+    queries.clear()
+    found, missing = manager.lookup_json(["SKU-0", "SKU-2", "SKU-404"])
+    assert sorted(found) == ["SKU-0", "SKU-2"] and missing == ["SKU-404"]
+    assert queries == []  # cero I/O: solo el mapping
+
+    # Cambios posteriores al snapshot (otro worker/pod): llegan por el outbox
+    with factory() as db:
+        repositories.create_product(db, ProductCreate(sku="SKU-NEW", name="New"))
+        outbox.enqueue(
+            db,
+            aggregate_type="product",
+            aggregate_id=2,
+            event_type="product.updated",
+            payload={"id": 2},
+        )
+        db.commit()
+    assert manager.poll_changes() == 2
+    found, missing = manager.lookup_json(["SKU-0", "SKU-1", "SKU-NEW"])
+    assert sorted(found) == ["SKU-0"] and missing == ["SKU-1", "SKU-NEW"]
+    assert manager.get_product(2) is None and json.loads(manager.get_product(1))["sku"] == "SKU-0"
+
+    # Snapshot nuevo: vuelve a incluirlo todo y el seguimiento arranca desde su versión
+    os.utime(manager.path, (0, 0))
+    manager.refresh()
+    found, missing = manager.lookup_json(["SKU-1", "SKU-NEW"])
+    assert sorted(found) == ["SKU-1", "SKU-NEW"] and missing == []
+
+
+def test_only_one_worker_builds_and_unchanged_catalog_is_not_rewritten(tmp_path, catalog_db):
+    factory, _ = catalog_db
+    path = str(tmp_path / "products.snapshot")
+    a = SnapshotManager(path, factory, max_age_seconds=60)
+    b = SnapshotManager(path, factory, max_age_seconds=60)
+
+    with open(f"{path}.lock", "a+") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        assert a.build_if_due() is False  # otro worker tiene el lock
+        fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+    assert a.build_if_due() is True
+    assert b.build_if_due() is False  # reciente
+
+    inode = os.stat(path).st_ino
+    os.utime(path, (0, 0))
+    assert b.build_if_due() is False  # outbox sin cambios: solo renueva la edad
+    assert os.stat(path).st_ino == inode and os.stat(path).st_mtime > 0
+
+
+def _outbox_event(event_id: int, product_id: int) -> models.OutboxEvent:
+    return models.OutboxEvent(
+        id=event_id,
+        aggregate_type="product",
+        aggregate_id=str(product_id),
+        event_type="product.updated",
+        payload={"id": product_id},
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def test_lower_outbox_id_committed_late_is_not_lost(tmp_path, catalog_db):
+    # ids 1..3 = altas del fixture; el 4 está en una transacción abierta cuando confirma el 5
+    factory, _ = catalog_db
+    manager = SnapshotManager(str(tmp_path / "products.snapshot"), factory, max_age_seconds=60)
+    with factory() as db:
+        db.add(_outbox_event(5, 1))
+        db.commit()
+    manager.refresh()
+    assert manager.current.version == 3  # marca de agua: no salta el hueco pendiente
+    assert manager.get_product(1) is None and manager.get_product(2) is not None
+
+    with factory() as db:
+        db.add(_outbox_event(4, 2))  # confirma tarde, con un id menor que el ya leído
+        db.commit()
+    manager.poll_changes()
+    assert manager.get_product(2) is None
+
+    # El fichero ya no es reutilizable aunque max(id) no haya cambiado
+    os.utime(manager.path, (0, 0))
+    assert manager.build_if_due() is True
+
+
+def test_outbox_gap_is_skipped_after_gap_timeout(tmp_path, catalog_db):
+    factory, _ = catalog_db
+    manager = SnapshotManager(
+        str(tmp_path / "products.snapshot"), factory, max_age_seconds=60, gap_timeout=0.0
+    )
+    manager.refresh()
+    with factory() as db:
+        db.add(_outbox_event(5, 1))  # el 4 nunca llega (rollback)
+        db.commit()
+    manager.poll_changes()
+    assert manager._changes_after == 5 and manager.get_product(1) is None
+
+
+def test_local_commit_marks_products_stale_immediately(tmp_path, catalog_db, monkeypatch):
+    factory, queries = catalog_db
+    manager = SnapshotManager(str(tmp_path / "products.snapshot"), factory, max_age_seconds=60)
+    manager.refresh()
+    monkeypatch.setattr(settings, "snapshot_enabled", True)
+    monkeypatch.setattr(settings, "product_cache_enabled", False)
+    monkeypatch.setattr(snapshot, "get_snapshot_manager", lambda: manager)
+
+    def _load(skus):
+        return {s: f'{{"sku":"{s}","db":true}}' for s in skus}
+
+    monkeypatch.setattr(product_cache, "_load", _load)
+
+    with factory() as db:
+        product = db.get(models.Product, 2)
+        product.name = "Renamed"
+        db.commit()  # sin outbox: lo marca el after_commit de este proceso
+
+    body = json.loads(asyncio.run(product_cache.lookup_json(["SKU-0", "SKU-1"])))
+    assert body[0]["sku"] == "SKU-0" and "db" not in body[0]
+    assert body[1] == {"sku": "SKU-1", "db": True}
+    assert manager.get_product(2) is None
@@ -1,9 +1,28 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, status
 
 from app.core.config import settings
+from app.core.security import require_internal_token
+from app.principals import get_directory
+from app.schemas import ResolveRequest, ResolveResponse
 
 router = APIRouter(prefix="/v1")
 
 @router.get("/ping")
 def ping():
     return {"message": "pong", "service": "identity-api", "env": settings.environment}
+
+
+# Enriquecimiento de claims: N user ids -> roles/grupos/atributos en una sola llamada
+@router.post(
+    "/principals/resolve",
+    response_model=ResolveResponse,
+    dependencies=[Depends(require_internal_token)],
+)
+async def resolve_principals(payload: ResolveRequest):
+    if len(payload.ids) > settings.principal_resolve_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"At most {settings.principal_resolve_max_ids} ids per request",
+        )
+    principals, missing = await get_directory().resolve(payload.ids)
+    return ResolveResponse(principals=principals, missing=missing)
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,6 +11,43 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = "INFO"
 
+    # Llamadas internas (catalog/orders -> identity): cabecera X-Internal-Token.
+    # Sin valor => abierto SOLO con ENVIRONMENT=local; fuera de local el arranque falla.
+    internal_api_token: Optional[str] = None
+
+    # Directorio de principals (cache local de usuarios -> roles/grupos/atributos)
+    principal_source: str = "stub"  # stub|keycloak
+    principal_stub_file: Optional[str] = None  # JSON {"users": [...]}; vacío => usuarios demo
+    principal_refresh_interval_seconds: float = 30.0  # incremental (admin events)
+    principal_full_resync_seconds: float = 3600.0  # red de seguridad: recarga completa
+    principal_warmup_timeout_seconds: float = 15.0
+    principal_negative_cache_seconds: float = 60.0  # ids desconocidos: no repetir el lookup
+    principal_negative_cache_max_entries: int = 10_000  # LRU: los más antiguos salen primero
+    principal_resolve_max_ids: int = 500
+    # Misses consultados a la fuente por request (cada uno = varias llamadas a la Admin API)
+    principal_resolve_max_misses: int = 50
+    # Qué clientes aportan roles y qué atributos de usuario se exponen (allow-list)
+    principal_role_clients: str = "asrp-catalog,asrp-orders"
+    principal_attributes: str = "tenant,department"
+
+    # Keycloak Admin API (cuenta de servicio con realm-management: view-users, view-events)
+    keycloak_internal_base_url: str = "http://keycloak:8080"
+    keycloak_realm: str = "asrp"
+    keycloak_admin_client_id: Optional[str] = None
+    keycloak_admin_client_secret: Optional[str] = None
+    keycloak_http_timeout_seconds: float = 5.0
+    keycloak_page_size: int = 200
+
+    @staticmethod
+    def _csv(value: str) -> List[str]:
+        return [x.strip() for x in (value or "").split(",") if x.strip()]
+
+    def principal_role_clients_list(self) -> List[str]:
+        return self._csv(self.principal_role_clients)
+
+    def principal_attributes_list(self) -> List[str]:
+        return self._csv(self.principal_attributes)
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -10,3 +10,7 @@ def configure_logging() -> None:
         stream=sys.stdout,
         format="%(asctime)s %(levelname)s %(name)s %(message)s",
     )
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
@@ -0,0 +1,36 @@
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+from app.core.config import settings
+
+
+def _is_local() -> bool:
+    return (settings.environment or "").strip().lower() == "local"
+
+
+def check_internal_token_configured() -> None:
+    """
+    Arranque (lifespan): fuera de ENVIRONMENT=local, INTERNAL_API_TOKEN es obligatorio; sin él
+    los endpoints internos (directorio de principals) quedarían abiertos a cualquiera.
+    """
+    if not settings.internal_api_token and not _is_local():
+        raise RuntimeError("INTERNAL_API_TOKEN is required when ENVIRONMENT is not 'local'")
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(default=None)) -> None:
+    """Endpoints internos (service-to-service): X-Internal-Token == INTERNAL_API_TOKEN."""
+    expected = settings.internal_api_token
+    if not expected:
+        # [SECURITY] Sin token solo en local (fuera de local el arranque ya falla)
+        if _is_local():
+            return
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid internal token"
+        )
+    # [SECURITY] comparación en tiempo constante
+    if not x_internal_token or not hmac.compare_digest(x_internal_token, expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid internal token"
+        )
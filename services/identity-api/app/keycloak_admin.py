@@ -0,0 +1,282 @@
+"""
+Fuente de principals sobre la Keycloak Admin REST API (cuenta de servicio client_credentials
+con realm-management: view-users, view-clients, view-events).
+
+[PERF] Carga completa "invertida": en lugar de 2-3 llamadas por usuario (role-mappings, groups)
+se recorren roles y grupos (GET /roles/{r}/users, /groups/{g}/members) => O(usuarios/página +
+roles + grupos) llamadas, independiente de cuántos roles tenga cada usuario.
+
+Incremental: admin events (USER, *_ROLE_MAPPING, GROUP_MEMBERSHIP) desde el último cursor; solo
+se vuelven a pedir los usuarios afectados. Requiere "Save admin events" activado en el realm.
+Cambios sobre grupos/roles (no usuarios) => recarga completa.
+
+Roles = mapeos directos + heredados de grupos (incluidos grupos padre). Los roles compuestos
+no se expanden: el token sigue siendo la fuente de verdad para autorizar.
+
+Solo stdlib (urllib): identity-api no tiene httpx como dependencia de runtime.
+"""
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from app.core.logging import get_logger
+from app.schemas import Principal
+
+logger = get_logger(__name__)
+
+EVENT_RESOURCE_TYPES = ("USER", "REALM_ROLE_MAPPING", "CLIENT_ROLE_MAPPING", "GROUP_MEMBERSHIP")
+_USER_PATH = re.compile(r"^users/([^/]+)")
+_BRIEF = {"briefRepresentation": "true"}
+
+
+def _seg(value: Any) -> str:
+    """
+    [SECURITY] Un segmento de path de la Admin API: `/` también escapado y sin `.`/`..`, para que
+    un id ajeno no pueda recorrer otras rutas con el token privilegiado de la cuenta de servicio.
+    """
+    value = str(value)
+    if value in ("", ".", ".."):
+        raise ValueError(f"invalid admin API path segment: {value!r}")
+    return urllib.parse.quote(value, safe="")
+
+Roles = Tuple[Set[str], Dict[str, Set[str]]]  # (realm_roles, clientId -> roles)
+
+
+class KeycloakAdminClient:
+    """GET JSON contra /admin/realms/{realm} con token de servicio cacheado hasta su expiración."""
+
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        realm: str,
+        client_id: str,
+        client_secret: str,
+        timeout_seconds: float = 5.0,
+        page_size: int = 200,
+    ) -> None:
+        self._base = base_url.rstrip("/")
+        self._realm = realm
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._timeout = timeout_seconds
+        self.page_size = max(1, page_size)
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._lock = threading.Lock()
+
+    def _access_token(self, force: bool = False) -> str:
+        with self._lock:
+            if not force and self._token and time.monotonic() < self._token_expires:
+                return self._token
+            body = urllib.parse.urlencode(
+                {
+                    "grant_type": "client_credentials",
+                    "client_id": self._client_id,
+                    "client_secret": self._client_secret,
+                }
+            ).encode()
+            url = f"{self._base}/realms/{self._realm}/protocol/openid-connect/token"
+            req = urllib.request.Request(url, data=body)
+            with urllib.request.urlopen(req, timeout=self._timeout) as r:
+                payload = json.loads(r.read())
+            self._token = payload["access_token"]
+            # margen de 30s para no usar un token a punto de caducar
+            ttl = max(0.0, float(payload.get("expires_in", 60)) - 30.0)
+            self._token_expires = time.monotonic() + ttl
+            return self._token
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET /admin/realms/{realm}/{path}. 404 => None. 401 => renueva el token una vez."""
+        url = f"{self._base}/admin/realms/{self._realm}/{path.lstrip('/')}"
+        if params:
+            url += "?" + urllib.parse.urlencode(params, doseq=True)
+        for attempt in range(2):
+            req = urllib.request.Request(
+                url,
+                headers={
+                    "Authorization": f"Bearer {self._access_token(force=attempt > 0)}",
+                    "Accept": "application/json",
+                },
+            )
+            try:
+                with urllib.request.urlopen(req, timeout=self._timeout) as r:
+                    return json.loads(r.read())
+            except urllib.error.HTTPError as e:
+                if e.code == 404:
+                    return None
+                if e.code == 401 and attempt == 0:
+                    continue
+                raise
+        return None
+
+    def paged(self, path: str, params: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        first = 0
+        while True:
+            page = self.get(path, {**(params or {}), "first": first, "max": self.page_size}) or []
+            yield from page
+            if len(page) < self.page_size:
+                return
+            first += self.page_size
+
+
+class KeycloakAdminSource:
+    def __init__(
+        self,
+        client: KeycloakAdminClient,
+        *,
+        role_clients: Sequence[str],
+        attributes: Sequence[str],
+    ) -> None:
+        self._client = client
+        self._role_clients = list(role_clients)
+        self._attributes = list(attributes)
+        self._client_uuids: Dict[str, str] = {}  # clientId -> uuid interno
+        self._group_roles: Dict[str, Roles] = {}  # path -> roles efectivos del grupo (con padres)
+
+    # ---- mapeo -------------------------------------------------------
+
+    def _principal(
+        self,
+        user: Dict[str, Any],
+        realm_roles: Set[str],
+        client_roles: Dict[str, Set[str]],
+        groups: Set[str],
+    ) -> Principal:
+        display = " ".join(p for p in (user.get("firstName"), user.get("lastName")) if p) or None
+        raw_attrs = user.get("attributes") or {}
+        return Principal(
+            id=user["id"],
+            username=user.get("username") or user["id"],
+            email=user.get("email"),
+            display_name=display,
+            enabled=bool(user.get("enabled", True)),
+            realm_roles=sorted(realm_roles),
+            client_roles={c: sorted(r) for c, r in client_roles.items() if r},
+            groups=sorted(groups),
+            attributes={k: list(raw_attrs[k]) for k in self._attributes if k in raw_attrs},
+        )
+
+    @staticmethod
+    def _roles_from_mappings(mappings: Optional[Dict[str, Any]]) -> Roles:
+        mappings = mappings or {}
+        realm = {r["name"] for r in mappings.get("realmMappings") or []}
+        clients = {
+            client_id: {r["name"] for r in (entry or {}).get("mappings") or []}
+            for client_id, entry in (mappings.get("clientMappings") or {}).items()
+        }
+        return realm, clients
+
+    def _merge_roles(self, into: Roles, roles: Roles) -> None:
+        into[0].update(roles[0])
+        for client_id, names in roles[1].items():
+            if client_id in self._role_clients:
+                into[1].setdefault(client_id, set()).update(names)
+
+    def _client_uuid(self, client_id: str) -> Optional[str]:
+        if client_id not in self._client_uuids:
+            found = self._client.get("clients", {"clientId": client_id}) or []
+            if not found:
+                return None
+            self._client_uuids[client_id] = found[0]["id"]
+        return self._client_uuids[client_id]
+
+    def _walk_groups(self) -> Iterator[Tuple[Dict[str, Any], Roles]]:
+        """Recorre el árbol de grupos (DFS) acumulando los roles heredados de los padres."""
+        stack: List[Tuple[Dict[str, Any], Roles]] = [
+            (g, (set(), {})) for g in self._client.get("groups", _BRIEF) or []
+        ]
+        while stack:
+            group, inherited = stack.pop()
+            roles: Roles = (set(inherited[0]), {c: set(r) for c, r in inherited[1].items()})
+            mappings = self._client.get(f"groups/{_seg(group['id'])}/role-mappings")
+            self._merge_roles(roles, self._roles_from_mappings(mappings))
+            yield group, roles
+            children = group.get("subGroups")
+            if not children and group.get("subGroupCount"):
+                # Keycloak >= 23 ya no incluye los subgrupos en el listado
+                children = list(self._client.paged(f"groups/{_seg(group['id'])}/children", _BRIEF))
+            stack.extend((child, roles) for child in children or [])
+
+    # ---- PrincipalSource ----------------------------------------------
+
+    def load_all(self) -> List[Principal]:
+        users = {u["id"]: u for u in self._client.paged("users", {"briefRepresentation": "false"})}
+        realm_roles: Dict[str, Set[str]] = {uid: set() for uid in users}
+        client_roles: Dict[str, Dict[str, Set[str]]] = {uid: {} for uid in users}
+        groups: Dict[str, Set[str]] = {uid: set() for uid in users}
+
+        for role in self._client.get("roles") or []:
+            path = f"roles/{_seg(role['name'])}/users"
+            for member in self._client.paged(path, _BRIEF):
+                if member["id"] in realm_roles:
+                    realm_roles[member["id"]].add(role["name"])
+
+        for client_id in self._role_clients:
+            uuid = self._client_uuid(client_id)
+            if uuid is None:
+                logger.warning("principal source: client %s not found in realm", client_id)
+                continue
+            for role in self._client.get(f"clients/{_seg(uuid)}/roles") or []:
+                path = f"clients/{_seg(uuid)}/roles/{_seg(role['name'])}/users"
+                for member in self._client.paged(path, _BRIEF):
+                    if member["id"] in client_roles:
+                        client_roles[member["id"]].setdefault(client_id, set()).add(role["name"])
+
+        group_roles: Dict[str, Roles] = {}
+        for group, roles in self._walk_groups():
+            group_roles[group["path"]] = roles
+            for member in self._client.paged(f"groups/{_seg(group['id'])}/members", _BRIEF):
+                uid = member["id"]
+                if uid not in users:
+                    continue
+                groups[uid].add(group["path"])
+                combined: Roles = (realm_roles[uid], client_roles[uid])
+                self._merge_roles(combined, roles)
+        self._group_roles = group_roles
+
+        return [
+            self._principal(u, realm_roles[uid], client_roles[uid], groups[uid])
+            for uid, u in users.items()
+        ]
+
+    def changed_ids(self, since_ms: int) -> Optional[Set[str]]:
+        """Usuarios afectados por admin events posteriores a since_ms; None => recarga completa."""
+        date_from = datetime.fromtimestamp(since_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+        changed: Set[str] = set()
+        params = {"dateFrom": date_from, "resourceTypes": list(EVENT_RESOURCE_TYPES)}
+        # Keycloak devuelve los eventos del más reciente al más antiguo
+        for event in self._client.paged("admin-events", params):
+            if int(event.get("time") or 0) <= since_ms:
+                break
+            m = _USER_PATH.match(event.get("resourcePath") or "")
+            if m is None:
+                # mapeo de roles/miembros sobre un grupo: afecta a N usuarios
+                return None
+            changed.add(m.group(1))
+        return changed
+
+    def fetch(self, ids: Sequence[str]) -> List[Principal]:
+        out: List[Principal] = []
+        for uid in ids:
+            user_path = f"users/{_seg(uid)}"
+            user = self._client.get(user_path)
+            if user is None:
+                continue
+            roles: Roles = (set(), {})
+            mappings = self._client.get(f"{user_path}/role-mappings")
+            self._merge_roles(roles, self._roles_from_mappings(mappings))
+            user_groups = {g["path"] for g in self._client.get(f"{user_path}/groups", _BRIEF) or []}
+            for path in user_groups:
+                if path in self._group_roles:
+                    self._merge_roles(roles, self._group_roles[path])
+            out.append(self._principal(user, roles[0], roles[1], user_groups))
+        return out
@@ -1,12 +1,49 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 
 from app.api.v1.routes import router as v1_router
 from app.core.config import settings
-from app.core.logging import configure_logging
+from app.core.logging import configure_logging, get_logger
+from app.core.security import check_internal_token_configured
+from app.principals import get_directory, refresh_loop
+
+logger = get_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # [PERF] Logging en el lifespan (no al importar) para que `import app.main` sea barato
+    configure_logging()
+    check_internal_token_configured()
+
 
-configure_logging()
+    # Carga inicial del directorio de principals acotada en tiempo: si Keycloak no responde
+    # se arranca igual (/ready = 503 en "principals") y el loop reintenta.
+    directory = get_directory()
+    app.state.principals = directory
+    try:
+        count = await asyncio.wait_for(
+            directory.full_sync(), timeout=settings.principal_warmup_timeout_seconds
+        )
+        logger.info("principals loaded: %s", count)
+    except Exception as e:  # noqa: BLE001
+        logger.warning("principal warm-up failed: %s", e)
+    refresh_task = asyncio.create_task(refresh_loop(directory))
 
-app = FastAPI(title=settings.app_name, version=settings.app_version)
+    app.state.started = True
+    try:
+        yield
+    finally:
+        app.state.started = False
+        refresh_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await refresh_task
+
+
+app = FastAPI(title=settings.app_name, version=settings.app_version, lifespan=lifespan)
 
 @app.get("/health")
 def health():
@@ -17,4 +54,21 @@ def health():
         "env": settings.environment,
     }
 
+# Readiness: /health = liveness (estático); /ready = arranque (lifespan) completado
+@app.get("/ready")
+def ready(request: Request):
+    started = bool(getattr(request.app.state, "started", False))
+    directory = getattr(request.app.state, "principals", None)
+    principals = bool(directory is not None and directory.loaded)
+    ok = started and principals
+    return JSONResponse(
+        status_code=200 if ok else 503,
+        content={
+            "status": "ready" if ok else "not_ready",
+            "service": "identity-api",
+            "checks": {"startup": started, "principals": principals},
+        },
+    )
+
+
 app.include_router(v1_router)
@@ -0,0 +1,268 @@
+"""
+Directorio de principals: user id -> roles, grupos y atributos de presentación.
+
+[PERF] Los servicios resuelven N usuarios en UNA llamada (POST /v1/principals/resolve) contra
+una cache local en memoria; Keycloak Admin API solo se toca en:
+- la carga completa (arranque + cada PRINCIPAL_FULL_RESYNC_SECONDS),
+- el refresco incremental (cada PRINCIPAL_REFRESH_INTERVAL_SECONDS, solo usuarios cambiados),
+- misses puntuales (un lote acotado por request; los ids inexistentes se cachean en negativo,
+  con tamaño máximo).
+
+Fuentes pluggables (PRINCIPAL_SOURCE): stub (JSON local / usuarios demo) | keycloak.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Protocol, Sequence, Set, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.schemas import Principal
+
+logger = get_logger(__name__)
+
+# Eventos con reloj del servidor de Keycloak: se relee un pequeño solape para no perder ninguno
+_CURSOR_SKEW_MS = 5_000
+
+
+# =========================
+# Fuentes (pluggable)
+# =========================
+
+class PrincipalSource(Protocol):
+    def load_all(self) -> List[Principal]: ...
+
+    def changed_ids(self, since_ms: int) -> Optional[Set[str]]: ...  # None => recarga completa
+
+    def fetch(self, ids: Sequence[str]) -> List[Principal]: ...
+
+
+_DEMO_USERS: List[Dict] = [
+    {
+        "id": "demo-admin",
+        "username": "admin",
+        "display_name": "Demo Admin",
+        "realm_roles": ["offline_access"],
+        "client_roles": {
+            "asrp-catalog": ["catalog_read", "catalog_write"],
+            "asrp-orders": ["orders_read", "orders_write"],
+        },
+        "groups": ["/staff"],
+    },
+    {
+        "id": "demo-customer",
+        "username": "customer",
+        "display_name": "Demo Customer",
+        "client_roles": {
+            "asrp-catalog": ["catalog_read"],
+            "asrp-orders": ["orders_read", "orders_write"],
+        },
+        "groups": ["/customers"],
+    },
+]
+
+
+class StubSource:
+    """
+    JSON local ({"users": [...]} con el shape de Principal) o usuarios demo. Recarga si cambia el
+    mtime.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self._path = path
+        self._mtime: Optional[float] = None
+
+    def _current_mtime(self) -> Optional[float]:
+        if not self._path:
+            return None
+        try:
+            return os.stat(self._path).st_mtime
+        except OSError:
+            return None
+
+    def load_all(self) -> List[Principal]:
+        self._mtime = self._current_mtime()
+        if not self._path:
+            return [Principal(**u) for u in _DEMO_USERS]
+        with open(self._path, encoding="utf-8") as f:
+            data = json.load(f)
+        return [Principal(**u) for u in data.get("users", [])]
+
+    def changed_ids(self, since_ms: int) -> Optional[Set[str]]:
+        return None if self._current_mtime() != self._mtime else set()
+
+    def fetch(self, ids: Sequence[str]) -> List[Principal]:
+        # El stub ya está entero en memoria: un miss es un id inexistente
+        return []
+
+
+def build_source() -> PrincipalSource:
+    kind = (settings.principal_source or "stub").strip().lower()
+    if kind == "keycloak":
+        if not (settings.keycloak_admin_client_id and settings.keycloak_admin_client_secret):
+            raise ValueError("PRINCIPAL_SOURCE=keycloak requires KEYCLOAK_ADMIN_CLIENT_ID/SECRET")
+        # Import diferido: urllib/json del cliente admin no pesan en el cold start del stub
+        from app.keycloak_admin import KeycloakAdminClient, KeycloakAdminSource
+
+        client = KeycloakAdminClient(
+            base_url=settings.keycloak_internal_base_url,
+            realm=settings.keycloak_realm,
+            client_id=settings.keycloak_admin_client_id,
+            client_secret=settings.keycloak_admin_client_secret,
+            timeout_seconds=settings.keycloak_http_timeout_seconds,
+            page_size=settings.keycloak_page_size,
+        )
+        return KeycloakAdminSource(
+            client,
+            role_clients=settings.principal_role_clients_list(),
+            attributes=settings.principal_attributes_list(),
+        )
+    return StubSource(settings.principal_stub_file)
+
+
+# =========================
+# Directorio (cache)
+# =========================
+
+class PrincipalDirectory:
+    """
+    Cache en memoria. Todas las mutaciones ocurren en el event loop (la fuente corre en
+    to_thread y el resultado se aplica después), así que las lecturas no necesitan lock.
+
+    - Carga completa: se construye un dict nuevo y se sustituye (swap atómico).
+    - Incremental / misses: upsert por id; un id que la fuente ya no devuelve se elimina.
+    """
+
+    def __init__(
+        self,
+        source: PrincipalSource,
+        *,
+        negative_ttl: float = 60.0,
+        negative_max_entries: int = 10_000,
+        max_misses_per_request: int = 50,
+        full_resync_seconds: float = 3600.0,
+    ) -> None:
+        self._source = source
+        self._negative_ttl = negative_ttl
+        self._negative_max = max(0, negative_max_entries)
+        self._max_misses = max(0, max_misses_per_request)
+        self._full_resync = full_resync_seconds
+        self._principals: Dict[str, Principal] = {}
+        # id -> expira (monotonic); LRU acotado: ids aleatorios de los callers no lo hacen crecer
+        self._unknown: "OrderedDict[str, float]" = OrderedDict()
+        self._sync_lock = asyncio.Lock()
+        self._cursor_ms = 0
+        self.loaded = False
+        self.synced_at: Optional[float] = None  # monotonic de la última carga completa
+
+    def __len__(self) -> int:
+        return len(self._principals)
+
+    async def full_sync(self) -> int:
+        async with self._sync_lock:
+            started_ms = int(time.time() * 1000)
+            principals = await asyncio.to_thread(self._source.load_all)
+            self._principals = {p.id: p for p in principals}
+            self._unknown = OrderedDict()
+            self._cursor_ms = started_ms - _CURSOR_SKEW_MS
+            self.synced_at = time.monotonic()
+            self.loaded = True
+            return len(self._principals)
+
+    async def refresh(self) -> int:
+        """Un ciclo del loop: incremental si se puede, completa si toca o si la fuente lo pide."""
+        if not self.loaded or time.monotonic() - (self.synced_at or 0.0) >= self._full_resync:
+            return await self.full_sync()
+        async with self._sync_lock:
+            started_ms = int(time.time() * 1000)
+            changed = await asyncio.to_thread(self._source.changed_ids, self._cursor_ms)
+            if changed is not None:
+                if changed:
+                    await self._refetch(sorted(changed))
+                self._cursor_ms = started_ms - _CURSOR_SKEW_MS
+                return len(changed)
+        return await self.full_sync()
+
+    async def _refetch(self, ids: List[str]) -> Set[str]:
+        found = await asyncio.to_thread(self._source.fetch, ids)
+        found_ids = set()
+        for p in found:
+            self._principals[p.id] = p
+            self._unknown.pop(p.id, None)
+            found_ids.add(p.id)
+        for uid in ids:
+            if uid not in found_ids:
+                self._principals.pop(uid, None)
+        return found_ids
+
+    async def resolve(self, ids: Sequence[str]) -> Tuple[List[Principal], List[str]]:
+        """(principals en el orden pedido, ids que no existen). Duplicados se ignoran."""
+        wanted = list(dict.fromkeys(ids))
+        now = time.monotonic()
+        misses = [
+            uid for uid in wanted
+            if uid not in self._principals and not self._known_missing(uid, now)
+        ]
+        # [FIX] Cada miss son varias llamadas a la Admin API: tope por request (el resto se
+        # devuelve como missing sin consultar y sin cachear en negativo)
+        misses = misses[: self._max_misses]
+        if misses:
+            try:
+                found = await self._refetch(misses)
+            except Exception as e:  # noqa: BLE001
+                # Fuente caída: se sirve lo que hay en cache; los misses no se cachean en negativo
+                logger.warning("principal lookup failed for %s ids: %s", len(misses), e)
+            else:
+                expires = time.monotonic() + self._negative_ttl
+                for uid in misses:
+                    if uid not in found:
+                        self._remember_missing(uid, expires)
+
+        principals = [self._principals[uid] for uid in wanted if uid in self._principals]
+        missing = [uid for uid in wanted if uid not in self._principals]
+        return principals, missing
+
+    def _known_missing(self, uid: str, now: float) -> bool:
+        expires = self._unknown.get(uid)
+        if expires is None:
+            return False
+        if expires <= now:
+            del self._unknown[uid]
+            return False
+        return True
+
+    def _remember_missing(self, uid: str, expires: float) -> None:
+        if self._negative_max <= 0:
+            return
+        self._unknown[uid] = expires
+        self._unknown.move_to_end(uid)
+        while len(self._unknown) > self._negative_max:
+            self._unknown.popitem(last=False)
+
+
+@lru_cache(maxsize=1)
+def get_directory() -> PrincipalDirectory:
+    return PrincipalDirectory(
+        build_source(),
+        negative_ttl=settings.principal_negative_cache_seconds,
+        negative_max_entries=settings.principal_negative_cache_max_entries,
+        max_misses_per_request=settings.principal_resolve_max_misses,
+        full_resync_seconds=settings.principal_full_resync_seconds,
+    )
+
+
+async def refresh_loop(directory: PrincipalDirectory) -> None:
+    """Tarea de fondo (lifespan): refresco incremental cada N segundos."""
+    while True:
+        await asyncio.sleep(settings.principal_refresh_interval_seconds)
+        try:
+            changed = await directory.refresh()
+            if changed:
+                logger.info("principals refreshed: %s", changed)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("principal refresh failed: %s", e)
@@ -0,0 +1,29 @@
+from typing import Annotated, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class Principal(BaseModel):
+    id: str
+    username: str
+    email: Optional[str] = None
+    display_name: Optional[str] = None
+    enabled: bool = True
+    realm_roles: List[str] = Field(default_factory=list)
+    client_roles: Dict[str, List[str]] = Field(default_factory=dict)  # clientId -> roles
+    groups: List[str] = Field(default_factory=list)  # paths: /tenants/acme
+    attributes: Dict[str, List[str]] = Field(default_factory=dict)  # solo la allow-list
+
+
+# Id de usuario de Keycloak (UUID) o de la fuente stub: acotado y sin `/` ni `.` (va en paths de la
+# Admin API)
+PrincipalId = Annotated[str, Field(min_length=1, max_length=64, pattern=r"^[A-Za-z0-9_-]+$")]
+
+
+class ResolveRequest(BaseModel):
+    ids: List[PrincipalId] = Field(min_length=1)
+
+
+class ResolveResponse(BaseModel):
+    principals: List[Principal]
+    missing: List[str] = Field(default_factory=list)
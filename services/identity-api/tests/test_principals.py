@@ -0,0 +1,236 @@
+# Unit tests (sin Keycloak): directorio de principals, fuentes stub/admin API y endpoint batch.
+import asyncio
+import json
+import os
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.security import require_internal_token
+from app.keycloak_admin import KeycloakAdminSource
+from app.main import app
+from app.principals import PrincipalDirectory, StubSource, get_directory
+
+
+class _FakeAdminClient:
+    """Router de rutas de la Admin API -> JSON; cuenta las llamadas."""
+
+    page_size = 100
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+
+    def get(self, path, params=None):
+        self.calls.append(path)
+        return self.routes.get(path)
+
+    def paged(self, path, params=None):
+        yield from self.get(path, params) or []
+
+
+def _realm():
+    return {
+        "users": [
+            {
+                "id": "u1",
+                "username": "ana",
+                "firstName": "Ana",
+                "lastName": "Ruiz",
+                "email": "ana@x.test",
+                "attributes": {"tenant": ["acme"], "secret": ["no"]},
+            },
+            {"id": "u2", "username": "bob"},
+        ],
+        "roles": [{"name": "offline_access"}],
+        "roles/offline_access/users": [{"id": "u1"}],
+        "clients": [{"id": "cat-uuid", "clientId": "asrp-catalog"}],
+        "clients/cat-uuid/roles": [{"name": "catalog_read"}],
+        "clients/cat-uuid/roles/catalog_read/users": [{"id": "u2"}],
+        "groups": [
+            {"id": "g1", "path": "/staff", "subGroups": [{"id": "g2", "path": "/staff/ops"}]},
+        ],
+        "groups/g1/role-mappings": {
+            "clientMappings": {"asrp-catalog": {"mappings": [{"name": "catalog_write"}]}},
+        },
+        "groups/g2/role-mappings": {},
+        "groups/g1/members": [],
+        "groups/g2/members": [{"id": "u1"}],
+    }
+
+
+def _source(routes):
+    client = _FakeAdminClient(routes)
+    return client, KeycloakAdminSource(client, role_clients=["asrp-catalog"], attributes=["tenant"])
+
+
+def test_keycloak_full_load_maps_roles_groups_and_attribute_allowlist():
+    client, source = _source(_realm())
+    principals = {p.id: p for p in source.load_all()}
+
+    ana = principals["u1"]
+    assert ana.display_name == "Ana Ruiz"
+    assert ana.realm_roles == ["offline_access"]
+    # heredado de /staff vía /staff/ops
+    assert ana.client_roles == {"asrp-catalog": ["catalog_write"]}
+    assert ana.groups == ["/staff/ops"]
+    assert ana.attributes == {"tenant": ["acme"]}
+    assert principals["u2"].client_roles == {"asrp-catalog": ["catalog_read"]}
+    # invertido: nada de llamadas por usuario
+    assert not any(path.startswith("users/") for path in client.calls)
+
+
+def test_keycloak_admin_events_yield_changed_users_or_full_resync():
+    routes = _realm()
+    routes["admin-events"] = [
+        {"time": 3000, "resourcePath": "users/u2/role-mappings/clients/cat-uuid"},
+        {"time": 2500, "resourcePath": "users/u1"},
+        {"time": 1000, "resourcePath": "users/old"},
+    ]
+    _, source = _source(routes)
+    assert source.changed_ids(2000) == {"u1", "u2"}
+
+    group_event = {"time": 4000, "resourcePath": "groups/g1/role-mappings/realm"}
+    routes["admin-events"].insert(0, group_event)
+    assert source.changed_ids(2000) is None
+
+
+def test_directory_refreshes_only_changed_users():
+    routes = _realm()
+    routes["admin-events"] = []
+    client, source = _source(routes)
+    directory = PrincipalDirectory(source)
+
+    async def _run():
+        await directory.full_sync()
+        routes["admin-events"] = [{"time": 10**15, "resourcePath": "users/u2"}]
+        routes["users/u2"] = {"id": "u2", "username": "bobby"}
+        routes["users/u2/role-mappings"] = {"realmMappings": [{"name": "offline_access"}]}
+        routes["users/u2/groups"] = [{"path": "/staff"}]
+        client.calls.clear()
+        assert await directory.refresh() == 1
+        return await directory.resolve(["u2", "u1"])
+
+    principals, missing = asyncio.run(_run())
+    assert [p.username for p in principals] == ["bobby", "ana"] and missing == []
+    bob = principals[0]
+    assert bob.realm_roles == ["offline_access"]
+    assert bob.client_roles == {"asrp-catalog": ["catalog_write"]}
+    assert not any(path.startswith("users/u1") for path in client.calls)
+
+
+def test_unknown_ids_are_fetched_once_then_negatively_cached():
+    routes = _realm()
+    client, source = _source(routes)
+    directory = PrincipalDirectory(source, negative_ttl=60)
+
+    async def _run():
+        await directory.full_sync()
+        client.calls.clear()
+        for _ in range(3):
+            principals, missing = await directory.resolve(["u1", "ghost", "u1"])
+        return principals, missing
+
+    principals, missing = asyncio.run(_run())
+    assert [p.id for p in principals] == ["u1"] and missing == ["ghost"]
+    assert client.calls == ["users/ghost"]
+
+
+def test_stub_source_reloads_when_file_changes(tmp_path):
+    path = tmp_path / "principals.json"
+    path.write_text(json.dumps({"users": [{"id": "s1", "username": "one"}]}))
+    directory = PrincipalDirectory(StubSource(str(path)))
+
+    async def _run():
+        await directory.full_sync()
+        assert await directory.refresh() == 0
+        path.write_text(json.dumps({"users": [{"id": "s2", "username": "two"}]}))
+        os.utime(path, (1, 1))
+        await directory.refresh()
+        return await directory.resolve(["s1", "s2"])
+
+    principals, missing = asyncio.run(_run())
+    assert [p.id for p in principals] == ["s2"] and missing == ["s1"]
+
+
+@pytest.fixture
+def api_client(monkeypatch):
+    get_directory.cache_clear()
+    monkeypatch.setattr(settings, "principal_source", "stub")
+    monkeypatch.setattr(settings, "principal_stub_file", None)
+    with TestClient(app) as client:
+        yield client
+    get_directory.cache_clear()
+
+
+def test_resolve_endpoint_batches_and_reports_missing(api_client):
+    r = api_client.post(
+        "/v1/principals/resolve", json={"ids": ["demo-customer", "nope", "demo-admin"]}
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert [p["id"] for p in data["principals"]] == ["demo-customer", "demo-admin"]
+    assert data["missing"] == ["nope"]
+    assert data["principals"][1]["client_roles"]["asrp-orders"] == ["orders_read", "orders_write"]
+
+
+def test_resolve_endpoint_limits_and_internal_token(api_client, monkeypatch):
+    monkeypatch.setattr(settings, "principal_resolve_max_ids", 2)
+    r = api_client.post("/v1/principals/resolve", json={"ids": ["a", "b", "c"]})
+    assert r.status_code == 422
+
+    monkeypatch.setattr(settings, "internal_api_token", "s3cret")
+    assert api_client.post("/v1/principals/resolve", json={"ids": ["a"]}).status_code == 401
+    r = api_client.post(
+        "/v1/principals/resolve", json={"ids": ["a"]}, headers={"X-Internal-Token": "s3cret"}
+    )
+    assert r.status_code == 200
+
+
+def test_internal_token_is_mandatory_outside_local(monkeypatch):
+    monkeypatch.setattr(settings, "internal_api_token", None)
+    monkeypatch.setattr(settings, "environment", "prod")
+    with pytest.raises(RuntimeError, match="INTERNAL_API_TOKEN"):
+        with TestClient(app):
+            pass
+    with pytest.raises(HTTPException) as e:
+        require_internal_token(None)
+    assert e.value.status_code == 401
+
+    monkeypatch.setattr(settings, "environment", "local")
+    assert require_internal_token(None) is None
+
+
+def test_resolve_rejects_ids_that_are_not_a_single_path_segment(api_client):
+    for bad in ["../clients", "a/b", "..", "x" * 65]:
+        r = api_client.post("/v1/principals/resolve", json={"ids": [bad]})
+        assert r.status_code == 422, bad
+
+
+def test_keycloak_fetch_escapes_ids_in_admin_paths():
+    client = _FakeAdminClient({})
+    source = KeycloakAdminSource(client, role_clients=["asrp-catalog"], attributes=["tenant"])
+    assert source.fetch(["a b", "c/d"]) == []
+    assert client.calls == ["users/a%20b", "users/c%2Fd"]
+    with pytest.raises(ValueError):
+        source.fetch([".."])
+
+
+def test_negative_cache_and_misses_per_request_are_bounded():
+    client, source = _source(_realm())
+    directory = PrincipalDirectory(source, negative_max_entries=3, max_misses_per_request=2)
+
+    async def _run():
+        await directory.full_sync()
+        client.calls.clear()
+        first = await directory.resolve(["g1", "g2", "g3", "u1"])
+        await directory.resolve(["g3", "g4"])
+        return first
+
+    principals, missing = asyncio.run(_run())
+    assert [p.id for p in principals] == ["u1"] and missing == ["g1", "g2", "g3"]
+    # 2 misses consultados por request; g3 no se cacheó en negativo => se consulta después
+    assert client.calls == ["users/g1", "users/g2", "users/g3", "users/g4"]
+    assert list(directory._unknown) == ["g2", "g3", "g4"]  # LRU: g1 fuera
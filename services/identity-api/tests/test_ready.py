@@ -0,0 +1,18 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_ready_ok_after_startup():
+    with TestClient(app) as client:
+        r = client.get("/ready")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["status"] == "ready"
+    assert data["service"] == "identity-api"
+
+
+def test_ready_503_without_startup():
+    r = TestClient(app).get("/ready")
+    assert r.status_code == 503
+    assert r.json()["status"] == "not_ready"
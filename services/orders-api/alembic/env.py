@@ -0,0 +1,76 @@
+import os
+from logging.config import fileConfig
+
+from sqlalchemy import engine_from_config, pool
+
+from alembic import context
+
+# this is the Alembic Config object, which provides
+# access to the values within the .ini file in use.
+config = context.config
+
+# Interpret the config file for Python logging.
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# Default; we'll set it dynamically inside run_migrations_*.
+target_metadata = None
+
+# If DATABASE_URL is provided (recommended), use it as sqlalchemy.url;
+# otherwise build it from DB_* (same contract as app/core/config.py)
+db_url = os.getenv("DATABASE_URL")
+if not db_url:
+    from app.core.config import settings
+
+    db_url = settings.sqlalchemy_url()
+config.set_main_option("sqlalchemy.url", db_url.replace("%", "%%"))
+
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode."""
+    url = config.get_main_option("sqlalchemy.url")
+
+    # Import local app models here to avoid import-order issues (ruff E402)
+    from app import models  # noqa: F401
+    from app.core.db import Base
+
+    global target_metadata
+    target_metadata = Base.metadata
+
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode."""
+    # Import local app models here to avoid import-order issues (ruff E402)
+    from app import models  # noqa: F401
+    from app.core.db import Base
+
+    global target_metadata
+    target_metadata = Base.metadata
+
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
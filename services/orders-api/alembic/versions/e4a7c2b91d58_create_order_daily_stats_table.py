@@ -0,0 +1,46 @@
+"""create order daily stats table
+
+Revision ID: e4a7c2b91d58
+Revises: 3b9e5d7f2a16
+Create Date: 2026-10-19 12:48:17.402215
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c2b91d58'
+down_revision: Union[str, Sequence[str], None] = '3b9e5d7f2a16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('order_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=32), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('shard', sa.SmallInteger(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status', 'currency', 'shard')
+    )
+    # Backfill de los pedidos existentes (shard 0)
+    op.execute(
+        """
+        INSERT INTO order_daily_stats (day, status, currency, shard, order_count, total_amount)
+        SELECT (created_at AT TIME ZONE 'UTC')::date, status, currency, 0,
+               count(*), sum(total_amount)
+        FROM orders
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('order_daily_stats')
@@ -1,7 +1,27 @@
-from fastapi import APIRouter, Depends
+import json
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
+import anyio
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.orm import Session
+
+from app import fieldsets, idempotency, order_events, reporting, repositories
+from app.clients.catalog import CatalogAuthError, CatalogRequestError, CatalogUnavailable
 from app.core.config import settings  # CHANGE: usamos config.py (no settings.py)
+from app.core.db import get_db
+from app.schemas import (
+    DailyOrderReport,
+    OrderCreate,
+    OrderDetail,
+    OrderPage,
+    OrderRead,
+    RevocationBatch,
+    RevocationResult,
+)
 from app.security.deps import require_role
+from app.security.revocation import get_revocation_list
 
 router = APIRouter()
 
@@ -17,9 +37,252 @@ def health():
     }
 
 
-@router.get("/v1/orders", dependencies=[Depends(require_role("orders_read"))])
-def list_orders():
-    return [
-        {"id": "ord_001", "status": "created"},
-        {"id": "ord_002", "status": "paid"},
-    ]
+# [PERF] Readiness: /health = liveness (estático); /ready = caches calientes
+@router.get("/ready")
+async def ready(request: Request):
+    probe = getattr(request.app.state, "readiness", None)
+    if probe is None:
+        result = {"ready": False, "checks": {"warmup": False}}
+    else:
+        result = probe.check(getattr(request.app.state, "warmup", None))
+
+    return JSONResponse(
+        status_code=200 if result["ready"] else 503,
+        content={
+            "status": "ready" if result["ready"] else "not_ready",
+            "service": settings.app_name,
+            "checks": result["checks"],
+        },
+    )
+
+
+def _parse_fields(raw: Optional[str], schema: type) -> Optional[Tuple[str, ...]]:
+    try:
+        return fieldsets.parse_fields(raw, schema)
+    except fieldsets.InvalidFields as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "invalid_fields",
+                "fields": list(e.unknown),
+                "allowed": list(e.allowed),
+            },
+        )
+
+
+@router.get(
+    "/v1/orders",
+    response_model=OrderPage,
+    dependencies=[Depends(require_role("orders_read"))],
+)
+def list_orders(
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = Query(default=None, max_length=200),
+    fields: Optional[str] = Query(default=None, max_length=200),
+    db: Session = Depends(get_db),
+):
+    columns = _parse_fields(fields, OrderRead)
+    # [PERF] Keyset pagination (created_at, id): latencia plana aunque crezca la tabla
+    try:
+        rows, next_cursor = repositories.list_orders(
+            db, limit=limit, cursor=cursor, columns=columns
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if columns is not None:
+        # [PERF] Sparse fieldset: SELECT y serialización solo de los campos pedidos
+        adapter = fieldsets.partial_list_adapter(OrderRead, columns)
+        items = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+        body = b'{"items":' + items + b',"next_cursor":' + json.dumps(next_cursor).encode() + b"}"
+        return Response(content=body, media_type="application/json")
+    return OrderPage(
+        items=[OrderRead.model_validate(o) for o in rows],
+        next_cursor=next_cursor,
+    )
+
+
+def _validate_skus(request: Request, payload: OrderCreate) -> None:
+    """
+    [PERF] Valida todos los SKUs del pedido contra catalog-api con el cliente async compartido
+    (1 round trip batched + cache). La ruta es sync (threadpool): se ejecuta en el event loop.
+    """
+    client = getattr(request.app.state, "catalog_client", None)
+    if client is None:
+        return
+    try:
+        missing = anyio.from_thread.run(client.missing_skus, [ln.sku for ln in payload.lines])
+    except (CatalogUnavailable, CatalogRequestError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Catalog unavailable",
+            headers={"Retry-After": "5"},
+        )
+    except CatalogAuthError:
+        # Token de servicio no disponible: catalog-api puede estar sano (su breaker no se toca)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Catalog credentials unavailable",
+            headers={"Retry-After": "5"},
+        )
+    if missing:
+        raise HTTPException(status_code=422, detail={"error": "unknown_sku", "skus": missing})
+
+
+@router.post(
+    "/v1/orders",
+    response_model=OrderDetail,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_order(
+    request: Request,
+    payload: OrderCreate,
+    idempotency_key: Optional[str] = Header(
+        default=None, alias="Idempotency-Key", min_length=1, max_length=128
+    ),
+    claims: Dict[str, Any] = Depends(require_role("orders_write")),
+    db: Session = Depends(get_db),
+):
+    if not idempotency_key:
+        # Fuera de la transacción: no retenemos conexión/locks mientras llamamos a catalog-api
+        if settings.catalog_validation_enabled:
+            _validate_skus(request, payload)
+        return repositories.create_order(db, payload)
+
+    # [PERF] Idempotency-Key: el replay devuelve la respuesta almacenada sin re-ejecutar el write
+    scope = str(claims.get("sub") or claims.get("azp") or "anonymous")
+    fingerprint = idempotency.request_hash(payload.model_dump_json())
+
+    def _write():
+        order = repositories.create_order(db, payload, commit=False)
+        return status.HTTP_201_CREATED, order.model_dump_json()
+
+    try:
+        # [FIX] Replay antes de validar contra catalog-api: un reintento no vuelve a llamarlo
+        # (ni recibe 503 si está caído) cuando ya hay respuesta almacenada
+        stored = idempotency.lookup(
+            db, scope=scope, key=idempotency_key, body_fingerprint=fingerprint
+        )
+        replayed = stored is not None
+        if stored is None:
+            if settings.catalog_validation_enabled:
+                _validate_skus(request, payload)
+            stored, replayed = idempotency.execute_once(
+                db,
+                scope=scope,
+                key=idempotency_key,
+                body_fingerprint=fingerprint,
+                handler=_write,
+            )
+    except idempotency.IdempotencyConflict:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key reused with a different payload",
+        )
+    except idempotency.IdempotencyInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is in progress",
+        )
+
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={"Idempotency-Replayed": "true" if replayed else "false"},
+    )
+
+
+# Declarada antes de /v1/orders/{order_id}: "events" no es un id
+@router.get("/v1/orders/events", response_class=StreamingResponse)
+async def order_events_stream(
+    order_id: Optional[List[int]] = Query(default=None, max_length=50),
+    last_event_id: Optional[str] = Header(default=None, alias="Last-Event-ID", max_length=32),
+    claims: Dict[str, Any] = Depends(require_role("orders_read")),
+):
+    """
+    [PERF] SSE con los cambios de estado (`order_id` repetible; sin él, todos los pedidos).
+    Push desde el hub del worker en vez de polling de GET /v1/orders/{id}; reconexión con
+    Last-Event-ID => reenvío desde el outbox.
+    """
+    try:
+        after = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Last-Event-ID")
+
+    hub = order_events.get_order_event_hub()
+    if hub.full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event streams",
+            headers={"Retry-After": "5"},
+        )
+    return StreamingResponse(
+        order_events.stream(
+            hub,
+            order_id,
+            last_event_id=after,
+            heartbeat_seconds=settings.order_events_heartbeat_seconds,
+            # Token caducado => fin del stream; el cliente reconecta con uno nuevo
+            expires_at=float(claims["exp"]) if claims.get("exp") else None,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/v1/orders/{order_id}",
+    response_model=OrderDetail,
+    dependencies=[Depends(require_role("orders_read"))],
+)
+def get_order(
+    order_id: int,
+    fields: Optional[str] = Query(default=None, max_length=200),
+    db: Session = Depends(get_db),
+):
+    columns = _parse_fields(fields, OrderDetail)
+    order = repositories.get_order(db, order_id, columns=columns)
+    if order is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    if columns is not None:
+        partial = fieldsets.partial_model(OrderDetail, columns).model_validate(order)
+        return Response(content=partial.model_dump_json(), media_type="application/json")
+    return OrderDetail.model_validate(order)
+
+
+@router.get(
+    "/v1/reports/orders/daily",
+    response_model=DailyOrderReport,
+    dependencies=[Depends(require_role("orders_read"))],
+)
+def daily_orders_report(
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    order_status: Optional[str] = Query(default=None, alias="status", max_length=32),
+    currency: Optional[str] = Query(default=None, min_length=3, max_length=3),
+    db: Session = Depends(get_db),
+):
+    # [PERF] Pedidos por status por día desde agregados precalculados: O(días), no O(pedidos)
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from > date_to")
+    if (date_to - date_from).days >= settings.reporting_max_range_days:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Date range too large")
+
+    items = reporting.daily_stats(
+        db, date_from=date_from, date_to=date_to, status=order_status, currency=currency
+    )
+    return DailyOrderReport(date_from=date_from, date_to=date_to, items=items)
+
+
+# [SECURITY] Revocaciones (push desde el IdP / identity): solo memoria local, aplica al instante
+@router.post(
+    "/v1/internal/revocations",
+    response_model=RevocationResult,
+    dependencies=[Depends(require_role(settings.revocation_webhook_role))],
+)
+def push_revocations(payload: RevocationBatch):
+    revocations = get_revocation_list()
+    applied = revocations.apply(item.model_dump() for item in payload.revocations)
+    return RevocationResult(applied=applied, size=len(revocations))
@@ -0,0 +1,406 @@
+# services/orders-api/app/clients/catalog.py
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import httpx
+
+from app.core import deadline
+from app.core.config import settings
+from app.core.logging import logger
+
+Product = Dict[str, Any]
+TokenProvider = Callable[[], Awaitable[Optional[str]]]
+
+
+class CatalogUnavailable(Exception):
+    """catalog-api no responde / error 5xx / circuito abierto (=> 503 en orders-api)."""
+
+
+class CatalogRequestError(Exception):
+    """catalog-api rechaza la llamada (4xx, p.ej. token/rol de servicio mal configurado)."""
+
+
+class CatalogAuthError(Exception):
+    """
+    No se pudo obtener el token de servicio (IdP caído, credenciales inválidas). No dice nada de
+    catalog-api: no cuenta para su circuit breaker.
+    """
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker mínimo (closed -> open -> half-open).
+
+    - `failure_threshold` fallos seguidos abren el circuito: las llamadas fallan rápido.
+    - Tras `reset_seconds` se deja pasar UNA sonda (half-open); si va bien, se cierra.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self._reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    @property
+    def probing(self) -> bool:
+        return self._probe_in_flight
+
+    def release_probe(self) -> None:
+        """
+        [FIX] La sonda terminó sin veredicto (deadline del llamante, cancelación, error propio):
+        se libera sin contar como fallo; la siguiente llamada vuelve a sondear.
+        """
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+class _TTLCache:
+    """LRU + TTL por SKU. Cachea también los SKUs inexistentes (None) para no repetir lookups."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Optional[Product]]]" = OrderedDict()
+
+    def get(self, sku: str) -> Tuple[bool, Optional[Product]]:
+        entry = self._data.get(sku)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[sku]
+            return False, None
+        self._data.move_to_end(sku)
+        return True, value
+
+    def put(self, sku: str, value: Optional[Product]) -> None:
+        if self._ttl <= 0 or self._max_entries <= 0:
+            return
+        self._data[sku] = (time.monotonic() + self._ttl, value)
+        self._data.move_to_end(sku)
+        while len(self._data) > self._max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class ClientCredentialsTokenProvider:
+    """Token de servicio (OAuth2 client_credentials) cacheado hasta poco antes de expirar."""
+
+    def __init__(
+        self, http: httpx.AsyncClient, token_url: str, client_id: str, client_secret: str
+    ) -> None:
+        self._http = http
+        self._token_url = token_url
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __call__(self) -> Optional[str]:
+        if self._token and time.monotonic() < self._expires_at:
+            return self._token
+        async with self._lock:
+            # single-flight: solo una renovación aunque haya N llamadas concurrentes
+            if self._token and time.monotonic() < self._expires_at:
+                return self._token
+            resp = await self._http.post(
+                self._token_url,
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": self._client_id,
+                    "client_secret": self._client_secret,
+                },
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            self._token = data["access_token"]
+            self._expires_at = time.monotonic() + max(0, int(data.get("expires_in", 60)) - 30)
+            return self._token
+
+
+class CatalogClient:
+    """
+    [PERF] Cliente async de catalog-api para validar SKUs.
+
+    - httpx.AsyncClient compartido (pool keep-alive) durante toda la vida del proceso.
+    - Dataloader: los lookups concurrentes dentro de `batch_window` se agrupan en UNA llamada
+      GET /v1/products/lookup?sku=...; un mismo SKU en vuelo se comparte (no se pide dos veces).
+    - Cache TTL por SKU (incluye negativos) delante de la red.
+    - Timeout por llamada + circuit breaker: si catalog-api cae, fallamos rápido (503).
+
+    Un pedido de 100 líneas cuesta como mucho 1 round trip (max_batch_size >= 100).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        timeout_seconds: float = 2.0,
+        max_connections: int = 20,
+        batch_window_seconds: float = 0.005,
+        max_batch_size: int = 200,
+        cache_ttl_seconds: float = 60.0,
+        cache_max_entries: int = 10000,
+        breaker: Optional[CircuitBreaker] = None,
+        token_provider: Optional[TokenProvider] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self._timeout = timeout_seconds
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            timeout=httpx.Timeout(timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            transport=transport,
+        )
+        self._batch_window = batch_window_seconds
+        self._max_batch_size = max(1, max_batch_size)
+        self._cache = _TTLCache(cache_ttl_seconds, cache_max_entries)
+        self.breaker = breaker or CircuitBreaker(5, 30.0)
+        self._token_provider = token_provider
+
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Deadline del lote = el más tardío de quienes esperan (None si alguno no tiene)
+        self._pending_deadline: Optional[float] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return self._http
+
+    def set_token_provider(self, provider: Optional[TokenProvider]) -> None:
+        self._token_provider = provider
+
+    async def aclose(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for task in list(self._tasks):
+            task.cancel()
+        await self._http.aclose()
+
+    # -------------------------
+    # API pública
+    # -------------------------
+    async def get_products(self, skus: Iterable[str]) -> Dict[str, Optional[Product]]:
+        """sku -> producto (o None si no existe en catálogo)."""
+        result: Dict[str, Optional[Product]] = {}
+        waiters: Dict[str, asyncio.Future] = {}
+
+        for sku in dict.fromkeys(skus):
+            hit, value = self._cache.get(sku)
+            if hit:
+                result[sku] = value
+            else:
+                waiters[sku] = self._enqueue(sku)
+
+        if waiters:
+            # shield: los futures son compartidos entre requests; cancelar este request
+            # (deadline / desconexión) no debe cancelar el lookup de los demás
+            values = await asyncio.gather(
+                *(asyncio.shield(f) for f in waiters.values()), return_exceptions=True
+            )
+            for sku, value in zip(waiters, values):
+                if isinstance(value, BaseException):
+                    raise value
+                result[sku] = value
+        return result
+
+    async def missing_skus(self, skus: Iterable[str]) -> List[str]:
+        products = await self.get_products(skus)
+        return [sku for sku, product in products.items() if product is None]
+
+    # -------------------------
+    # Dataloader
+    # -------------------------
+    def _enqueue(self, sku: str) -> asyncio.Future:
+        fut = self._pending.get(sku) or self._inflight.get(sku)
+        if fut is not None:
+            return fut
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        request_deadline = deadline.current()
+        if not self._pending:
+            self._pending_deadline = request_deadline
+        elif self._pending_deadline is not None:
+            self._pending_deadline = (
+                None
+                if request_deadline is None
+                else max(self._pending_deadline, request_deadline)
+            )
+        self._pending[sku] = fut
+
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._batch_window, self._flush)
+        return fut
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+        batch_deadline, self._pending_deadline = self._pending_deadline, None
+        self._inflight.update(batch)
+        task = asyncio.get_running_loop().create_task(self._fetch(batch, batch_deadline))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(
+        self, batch: Dict[str, asyncio.Future], deadline_at: Optional[float] = None
+    ) -> None:
+        try:
+            products = await self._request(list(batch), deadline_at)
+            for sku, fut in batch.items():
+                value = products.get(sku)
+                self._cache.put(sku, value)
+                if not fut.done():
+                    fut.set_result(value)
+        except asyncio.CancelledError:
+            self._fail(batch, CatalogUnavailable("catalog lookup cancelled"))
+            raise
+        except Exception as e:  # noqa: BLE001
+            self._fail(batch, e)
+        finally:
+            for sku in batch:
+                self._inflight.pop(sku, None)
+
+    @staticmethod
+    def _fail(batch: Dict[str, asyncio.Future], exc: Exception) -> None:
+        for fut in batch.values():
+            if not fut.done():
+                fut.set_exception(exc)
+
+    async def _request(
+        self, skus: List[str], deadline_at: Optional[float] = None
+    ) -> Dict[str, Product]:
+        # Presupuesto agotado => ni se llama (DeadlineExceeded => 504)
+        timeout = deadline.bounded_timeout(self._timeout, deadline_at)
+        if not self.breaker.allow():
+            raise CatalogUnavailable("catalog-api circuit open")
+        # [FIX] Sonda half-open: se libera en TODA salida (si no, el circuito queda bloqueado)
+        probe = self.breaker.probing
+        try:
+            token = await self._token()
+            return await self._send(skus, deadline_at, timeout, token)
+        finally:
+            if probe and self.breaker.probing:
+                self.breaker.release_probe()
+
+    async def _token(self) -> Optional[str]:
+        if self._token_provider is None:
+            return None
+        try:
+            return await self._token_provider()
+        except Exception as e:  # noqa: BLE001
+            # [FIX] Fallo del IdP, no de catalog-api: sin veredicto para el breaker (la sonda
+            # half-open se libera en _request)
+            logger.warning("catalog service token unavailable: %s", e)
+            raise CatalogAuthError(str(e) or type(e).__name__) from e
+
+    async def _send(
+        self, skus: List[str], deadline_at: Optional[float], timeout: float, token: Optional[str]
+    ) -> Dict[str, Product]:
+        headers: Dict[str, str] = {}
+        budget = deadline.header_value(deadline_at)
+        if budget is not None:
+            headers[deadline.TIMEOUT_HEADER] = budget
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        try:
+            resp = await asyncio.wait_for(
+                self._http.get(
+                    "/v1/products/lookup", params=[("sku", s) for s in skus], headers=headers
+                ),
+                timeout=timeout,
+            )
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            timed_out = isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException))
+            if timeout < self._timeout and timed_out:
+                # Se agotó el presupuesto del llamante, no el de catalog-api: no abre el circuito
+                raise deadline.DeadlineExceeded(
+                    "Request deadline exceeded calling catalog-api"
+                ) from e
+            self.breaker.record_failure()
+            logger.warning("catalog lookup failed: %s", e)
+            raise CatalogUnavailable(str(e) or type(e).__name__) from e
+
+        if resp.status_code >= 500:
+            self.breaker.record_failure()
+            raise CatalogUnavailable(f"catalog-api returned {resp.status_code}")
+
+        # 4xx no indica caída del catálogo: no abre el circuito
+        self.breaker.record_success()
+        if resp.status_code >= 400:
+            raise CatalogRequestError(f"catalog-api returned {resp.status_code}")
+        return {p["sku"]: p for p in resp.json()}
+
+
+def build_catalog_client() -> CatalogClient:
+    client = CatalogClient(
+        settings.catalog_base_url,
+        timeout_seconds=settings.catalog_timeout_seconds,
+        max_connections=settings.catalog_max_connections,
+        batch_window_seconds=settings.catalog_batch_window_ms / 1000.0,
+        max_batch_size=settings.catalog_max_batch_size,
+        cache_ttl_seconds=settings.catalog_cache_ttl_seconds,
+        cache_max_entries=settings.catalog_cache_max_entries,
+        breaker=CircuitBreaker(
+            settings.catalog_breaker_failure_threshold,
+            settings.catalog_breaker_reset_seconds,
+        ),
+    )
+    if settings.catalog_client_id and settings.catalog_client_secret:
+        client.set_token_provider(
+            ClientCredentialsTokenProvider(
+                client.http,
+                settings.oidc_token_url,
+                settings.catalog_client_id,
+                settings.catalog_client_secret,
+            )
+        )
+    return client
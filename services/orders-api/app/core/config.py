@@ -61,13 +61,108 @@ class Settings(BaseSettings):
     db_user: str = Field(default="orders_app", validation_alias=AliasChoices("DB_USER"))
     db_password: str = Field(default="", validation_alias=AliasChoices("DB_PASSWORD"))  # [SECURITY] de secretos
 
+    # Opción A: URL completa (tests, bench offline con SQLite, CI); si no, se construye desde DB_*
+    database_url: Optional[str] = Field(default=None, validation_alias=AliasChoices("DATABASE_URL"))
+
+    # [PERF] Pool de conexiones (se pre-calienta en el arranque; ver app/core/warmup.py)
+    db_pool_size: int = Field(default=5, validation_alias=AliasChoices("DB_POOL_SIZE"))
+    db_max_overflow: int = Field(default=10, validation_alias=AliasChoices("DB_MAX_OVERFLOW"))
+    db_pool_warm_connections: int = Field(
+        default=2,
+        validation_alias=AliasChoices("DB_POOL_WARM_CONNECTIONS"),
+    )
+
     def sqlalchemy_url(self) -> str:
+        if self.database_url and self.database_url.strip():
+            return self.database_url.strip()
+
         # [SECURITY] No loguear password nunca
         return (
             f"postgresql+psycopg://{self.db_user}:{self.db_password}"
             f"@{self.db_host}:{self.db_port}/{self.db_name}"
         )
 
+    # -------------------------------------------------------------------------
+    # Idempotency-Key (POST /v1/orders)
+    # -------------------------------------------------------------------------
+    idempotency_ttl_seconds: int = Field(
+        default=86400,
+        validation_alias=AliasChoices("IDEMPOTENCY_TTL_SECONDS"),
+    )
+    idempotency_cache_size: int = Field(
+        default=10000,
+        validation_alias=AliasChoices("IDEMPOTENCY_CACHE_SIZE"),
+    )
+    idempotency_cleanup_interval_seconds: float = Field(
+        default=300.0,
+        validation_alias=AliasChoices("IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS"),
+    )
+    idempotency_cleanup_batch_size: int = Field(
+        default=1000,
+        validation_alias=AliasChoices("IDEMPOTENCY_CLEANUP_BATCH_SIZE"),
+    )
+
+    # -------------------------------------------------------------------------
+    # Reporting (agregados diarios precalculados)
+    # -------------------------------------------------------------------------
+    # N filas por (día, status, currency): reparte la contención del UPSERT en la fila "de hoy"
+    reporting_stat_shards: int = Field(
+        default=8,
+        validation_alias=AliasChoices("REPORTING_STAT_SHARDS"),
+    )
+    reporting_max_range_days: int = Field(
+        default=366,
+        validation_alias=AliasChoices("REPORTING_MAX_RANGE_DAYS"),
+    )
+
+    # -------------------------------------------------------------------------
+    # Revocaciones (jti / sid)
+    # -------------------------------------------------------------------------
+    # Feed incremental opcional (GET ?since=<cursor> -> {"cursor", "revocations": [...]})
+    revocation_feed_url: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("REVOCATION_FEED_URL"),
+    )
+    revocation_poll_interval_seconds: float = Field(
+        default=5.0, validation_alias=AliasChoices("REVOCATION_POLL_INTERVAL_SECONDS")
+    )
+    # Sin expires_at en el evento: se guarda esto (>= vida máxima de un access token)
+    revocation_retention_seconds: float = Field(
+        default=3600.0, validation_alias=AliasChoices("REVOCATION_RETENTION_SECONDS")
+    )
+    # Rol de cliente exigido por el webhook POST /v1/internal/revocations
+    revocation_webhook_role: str = Field(
+        default="revocations_write", validation_alias=AliasChoices("REVOCATION_WEBHOOK_ROLE")
+    )
+
+    # -------------------------------------------------------------------------
+    # Push de estado de pedidos (SSE: GET /v1/orders/events)
+    # -------------------------------------------------------------------------
+    # Mensajes pendientes por suscriptor; cola llena => consumidor lento expulsado (reconecta)
+    order_events_queue_size: int = Field(
+        default=64, validation_alias=AliasChoices("ORDER_EVENTS_QUEUE_SIZE")
+    )
+    # Conexiones SSE abiertas por worker (más => 503 + Retry-After)
+    order_events_max_subscribers: int = Field(
+        default=10000, validation_alias=AliasChoices("ORDER_EVENTS_MAX_SUBSCRIBERS")
+    )
+    # Comentario ": ping" en streams ociosos; < proxyTimeout del gateway (UPSTREAM_TIMEOUT_MS)
+    order_events_heartbeat_seconds: float = Field(
+        default=5.0, validation_alias=AliasChoices("ORDER_EVENTS_HEARTBEAT_SECONDS")
+    )
+    # Sondeo del outbox (commits de otros workers/réplicas); solo mientras haya suscriptores
+    order_events_poll_seconds: float = Field(
+        default=1.0, validation_alias=AliasChoices("ORDER_EVENTS_POLL_SECONDS")
+    )
+    # Máximo de eventos reenviados al reconectar con Last-Event-ID
+    order_events_replay_max: int = Field(
+        default=500, validation_alias=AliasChoices("ORDER_EVENTS_REPLAY_MAX")
+    )
+    # Campo `retry:` del stream: espera del cliente antes de reconectar
+    order_events_retry_ms: int = Field(
+        default=2000, validation_alias=AliasChoices("ORDER_EVENTS_RETRY_MS")
+    )
+
     # -------------------------------------------------------------------------
     # OIDC (OpenID Connect) / JWT (JSON Web Token)
     # -------------------------------------------------------------------------
@@ -114,7 +209,11 @@ class Settings(BaseSettings):
     oidc_leeway_seconds: int = Field(default=10, validation_alias=AliasChoices("OIDC_LEEWAY_SECONDS"))
 
     # Algorithms accepted for JWT signature verification
-    oidc_algorithms: str = Field(default="RS256", validation_alias=AliasChoices("OIDC_ALGORITHMS"))
+    # JWKS con algoritmos mixtos: la clave se elige por kid + alg (HS*/none nunca se aceptan)
+    oidc_algorithms: str = Field(
+        default="RS256,ES256,EdDSA",
+        validation_alias=AliasChoices("OIDC_ALGORITHMS"),
+    )
 
     def oidc_algorithms_list(self) -> List[str]:
         return [x.strip() for x in self.oidc_algorithms.split(",") if x.strip()]
@@ -122,8 +221,120 @@ class Settings(BaseSettings):
     # Cache/timeout OIDC (enterprise)
     oidc_discovery_cache_seconds: int = Field(default=300, validation_alias=AliasChoices("OIDC_DISCOVERY_CACHE_SECONDS"))
     oidc_jwks_cache_seconds: int = Field(default=300, validation_alias=AliasChoices("OIDC_JWKS_CACHE_SECONDS"))
+    # kid desconocido / Keycloak caído: como mucho un refresh del JWKS por ventana
+    oidc_jwks_refresh_cooldown_seconds: float = Field(
+        default=10.0, validation_alias=AliasChoices("OIDC_JWKS_REFRESH_COOLDOWN_SECONDS")
+    )
     oidc_http_timeout_seconds: float = Field(default=3.0, validation_alias=AliasChoices("OIDC_HTTP_TIMEOUT_SECONDS"))
 
+    # RFC 7662 introspection para tokens opacos (off por defecto). Credenciales de un cliente
+    # confidencial de Keycloak; el endpoint sale de discovery salvo override.
+    oidc_introspection_enabled: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("OIDC_INTROSPECTION_ENABLED"),
+    )
+    oidc_introspection_url: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("OIDC_INTROSPECTION_URL"),
+    )
+    oidc_introspection_client_id: Optional[str] = Field(
+        default=None, validation_alias=AliasChoices("OIDC_INTROSPECTION_CLIENT_ID")
+    )
+    oidc_introspection_client_secret: Optional[str] = Field(
+        default=None, validation_alias=AliasChoices("OIDC_INTROSPECTION_CLIENT_SECRET")
+    )
+    # [PERF] Cache: positivo hasta min(exp, N s), negativo N s, LRU acotada
+    oidc_introspection_cache_seconds: float = Field(
+        default=300.0, validation_alias=AliasChoices("OIDC_INTROSPECTION_CACHE_SECONDS")
+    )
+    oidc_introspection_negative_cache_seconds: float = Field(
+        default=30.0, validation_alias=AliasChoices("OIDC_INTROSPECTION_NEGATIVE_CACHE_SECONDS")
+    )
+    oidc_introspection_cache_max_entries: int = Field(
+        default=10_000, validation_alias=AliasChoices("OIDC_INTROSPECTION_CACHE_MAX_ENTRIES")
+    )
+
+    # [PERF] Caché OIDC compartida por los workers del pod: JWKS descargado una vez + tokens ya
+    # verificados. Mismo directorio para todos los workers (mejor tmpfs: /dev/shm, emptyDir
+    # medium=Memory); tamaño fijo slots x bytes.
+    oidc_shared_cache_enabled: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("OIDC_SHARED_CACHE_ENABLED"),
+    )
+    oidc_shared_cache_dir: str = Field(
+        default="/tmp/orders-api/oidc", validation_alias=AliasChoices("OIDC_SHARED_CACHE_DIR")
+    )
+    oidc_shared_cache_slots: int = Field(
+        default=4096,
+        validation_alias=AliasChoices("OIDC_SHARED_CACHE_SLOTS"),
+    )
+    oidc_shared_cache_slot_bytes: int = Field(
+        default=2048,
+        validation_alias=AliasChoices("OIDC_SHARED_CACHE_SLOT_BYTES"),
+    )
+    oidc_shared_cache_max_ttl_seconds: float = Field(
+        default=300.0, validation_alias=AliasChoices("OIDC_SHARED_CACHE_MAX_TTL_SECONDS")
+    )
+
+    # [PERF] Admission control / load shedding: límite in-flight por prefijo ("prefijo=límite,...")
+    # + cola acotada; AIMD sobre la latencia (0 => límite fijo). Saturado => 503 + Retry-After.
+    admission_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("ADMISSION_ENABLED"),
+    )
+    admission_default_limit: int = Field(
+        default=64,
+        validation_alias=AliasChoices("ADMISSION_DEFAULT_LIMIT"),
+    )
+    admission_route_limits: str = Field(
+        default="/v1/orders=32", validation_alias=AliasChoices("ADMISSION_ROUTE_LIMITS")
+    )
+    admission_min_limit: int = Field(
+        default=4,
+        validation_alias=AliasChoices("ADMISSION_MIN_LIMIT"),
+    )
+    admission_max_queue: int = Field(
+        default=64,
+        validation_alias=AliasChoices("ADMISSION_MAX_QUEUE"),
+    )
+    admission_queue_timeout_seconds: float = Field(
+        default=1.0, validation_alias=AliasChoices("ADMISSION_QUEUE_TIMEOUT_SECONDS")
+    )
+    admission_latency_target_ms: float = Field(
+        default=500.0, validation_alias=AliasChoices("ADMISSION_LATENCY_TARGET_MS")
+    )
+    admission_retry_after_seconds: int = Field(
+        default=1, validation_alias=AliasChoices("ADMISSION_RETRY_AFTER_SECONDS")
+    )
+
+    # [PERF] Request deadline: X-Request-Timeout-Ms del gateway -> statement_timeout de PostgreSQL,
+    # timeouts httpx (y propagación a catalog-api) y cancelación del request (504).
+    # Sin cabecera: REQUEST_DEFAULT_TIMEOUT_MS (0 => sin deadline); REQUEST_MAX_TIMEOUT_MS acota.
+    request_deadline_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("REQUEST_DEADLINE_ENABLED"),
+    )
+    request_default_timeout_ms: int = Field(
+        default=0,
+        validation_alias=AliasChoices("REQUEST_DEFAULT_TIMEOUT_MS"),
+    )
+    request_max_timeout_ms: int = Field(
+        default=60000,
+        validation_alias=AliasChoices("REQUEST_MAX_TIMEOUT_MS"),
+    )
+
+    # [PERF] Warm-up de arranque (discovery + JWKS en background durante el lifespan)
+    warmup_enabled: bool = Field(default=True, validation_alias=AliasChoices("WARMUP_ENABLED"))
+    warmup_timeout_seconds: float = Field(
+        default=15.0,
+        validation_alias=AliasChoices("WARMUP_TIMEOUT_SECONDS"),
+    )
+    # /ready cachea su resultado: los probes de Kubernetes no golpean Keycloak/PostgreSQL
+    readiness_cache_seconds: float = Field(
+        default=2.0,
+        validation_alias=AliasChoices("READINESS_CACHE_SECONDS"),
+    )
+
     @property
     def oidc_discovery_url(self) -> str:
         # [FIX] Allow explicit override (used in prod-like / K8s).
@@ -153,6 +364,88 @@ class Settings(BaseSettings):
             return self.oidc_jwks_url_override.strip().rstrip("/")
         return None
 
+    @property
+    def oidc_token_url(self) -> str:
+        # Token endpoint interno (client_credentials para llamadas service-to-service)
+        base = self.oidc_internal_base_url.rstrip("/")
+        return f"{base}/realms/{self.oidc_realm}/protocol/openid-connect/token"
+
+    # -------------------------------------------------------------------------
+    # Transactional outbox + relay
+    # -------------------------------------------------------------------------
+    # Sin relay por defecto: con él activo, OUTBOX_SINK (file|http) es obligatorio
+    outbox_relay_enabled: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("OUTBOX_RELAY_ENABLED"),
+    )
+    # file|http
+    outbox_sink: str = Field(default="", validation_alias=AliasChoices("OUTBOX_SINK"))
+    outbox_file_path: str = Field(
+        default="/tmp/orders-api-outbox.jsonl",
+        validation_alias=AliasChoices("OUTBOX_FILE_PATH"),
+    )
+    outbox_http_url: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("OUTBOX_HTTP_URL"),
+    )
+    outbox_batch_size: int = Field(default=100, validation_alias=AliasChoices("OUTBOX_BATCH_SIZE"))
+    outbox_poll_interval_seconds: float = Field(
+        default=1.0,
+        validation_alias=AliasChoices("OUTBOX_POLL_INTERVAL_SECONDS"),
+    )
+
+    # -------------------------------------------------------------------------
+    # Catalog client (orders -> catalog-api)
+    # -------------------------------------------------------------------------
+    catalog_base_url: str = Field(
+        default="http://catalog-api:8000",
+        validation_alias=AliasChoices("CATALOG_BASE_URL"),
+    )
+    catalog_validation_enabled: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("CATALOG_VALIDATION_ENABLED"),
+    )  # valida SKUs de POST /v1/orders contra catalog-api
+    catalog_client_id: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("CATALOG_CLIENT_ID"),
+    )
+    catalog_client_secret: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("CATALOG_CLIENT_SECRET"),
+    )  # [SECURITY] de secretos
+    catalog_timeout_seconds: float = Field(
+        default=2.0,
+        validation_alias=AliasChoices("CATALOG_TIMEOUT_SECONDS"),
+    )
+    catalog_max_connections: int = Field(
+        default=20,
+        validation_alias=AliasChoices("CATALOG_MAX_CONNECTIONS"),
+    )
+    catalog_batch_window_ms: float = Field(
+        default=5.0,
+        validation_alias=AliasChoices("CATALOG_BATCH_WINDOW_MS"),
+    )
+    catalog_max_batch_size: int = Field(
+        default=200,
+        validation_alias=AliasChoices("CATALOG_MAX_BATCH_SIZE"),
+    )
+    catalog_cache_ttl_seconds: float = Field(
+        default=60.0,
+        validation_alias=AliasChoices("CATALOG_CACHE_TTL_SECONDS"),
+    )
+    catalog_cache_max_entries: int = Field(
+        default=10000,
+        validation_alias=AliasChoices("CATALOG_CACHE_MAX_ENTRIES"),
+    )
+    catalog_breaker_failure_threshold: int = Field(
+        default=5,
+        validation_alias=AliasChoices("CATALOG_BREAKER_FAILURE_THRESHOLD"),
+    )
+    catalog_breaker_reset_seconds: float = Field(
+        default=30.0,
+        validation_alias=AliasChoices("CATALOG_BREAKER_RESET_SECONDS"),
+    )
+
     # -------------------------------------------------------------------------
     # RBAC (Role-Based Access Control)
     # -------------------------------------------------------------------------
@@ -0,0 +1,99 @@
+# services/orders-api/app/core/db.py
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Generator
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+
+from app.core import deadline
+from app.core.config import settings
+
+
+class Base(DeclarativeBase):
+    """Base declarativa para modelos SQLAlchemy."""
+
+
+@lru_cache(maxsize=1)
+def get_engine():
+    # pool_pre_ping evita conexiones rotas en dev
+    url = settings.sqlalchemy_url()
+    if url.startswith("sqlite"):
+        # SQLite (tests/bench offline) no usa QueuePool dimensionado
+        return create_engine(url, pool_pre_ping=True)
+
+    # [PERF] Engine lazy: se crea en el warm-up (lifespan) o en la primera sesión, nunca al importar
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_sessionmaker():
+    factory = sessionmaker(
+        bind=get_engine(),
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        class_=Session,
+    )
+    # [PERF] Deadline del request -> statement_timeout / lock_timeout de cada transacción
+    event.listen(factory, "after_begin", _apply_request_deadline)
+    return factory
+
+
+def _apply_request_deadline(session: Session, transaction, connection) -> None:
+    left = deadline.remaining()
+    if left is None:
+        return
+    if left <= 0:
+        raise deadline.DeadlineExceeded("Request deadline exceeded before DB work")
+    if connection.dialect.name != "postgresql":
+        return
+    budget = f"{max(1, int(left * 1000))}ms"
+    # SET LOCAL vía set_config(..., true): muere con la transacción, no contamina el pool
+    connection.execute(
+        text(
+            "SELECT set_config('statement_timeout', :budget, true),"
+            " set_config('lock_timeout', :budget, true)"
+        ),
+        {"budget": budget},
+    )
+
+
+def get_db() -> Generator[Session, None, None]:
+    """
+    Dependency/fixture-friendly: genera una sesión y la cierra.
+    """
+    SessionLocal = get_sessionmaker()
+    db = SessionLocal()
+    try:
+        yield db
+    except DBAPIError as e:
+        # Query cortada por el statement_timeout del deadline => 504, no 500
+        if deadline.current() is not None and deadline.is_timeout_error(e):
+            raise deadline.DeadlineExceeded("Request deadline exceeded in DB") from e
+        raise
+    finally:
+        db.close()
+
+
+def pool_has_connection() -> bool:
+    """
+    [PERF] Readiness sin I/O: el pool tiene al menos una conexión abierta (idle o en uso).
+    No crea el engine ni abre conexiones; eso lo hace el warm-up.
+    """
+    if get_engine.cache_info().currsize == 0:
+        return False
+    pool = get_engine().pool
+    checkedin = getattr(pool, "checkedin", None)
+    checkedout = getattr(pool, "checkedout", None)
+    if checkedin is None or checkedout is None:
+        # Pools sin contadores (SQLite/StaticPool): basta con que el engine exista
+        return True
+    return (checkedin() + checkedout()) > 0
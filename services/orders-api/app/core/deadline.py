@@ -0,0 +1,97 @@
+# services/orders-api/app/core/deadline.py
+"""
+Deadline por request (presupuesto que fija el gateway en X-Request-Timeout-Ms).
+
+El middleware (app/middlewares/deadline.py) guarda el instante límite en un contextvar; desde ahí:
+- DB: cada transacción arranca con SET LOCAL statement_timeout / lock_timeout = lo que queda,
+- httpx: timeout = min(timeout configurado, lo que queda) y se propaga la cabecera aguas abajo,
+- el request entero se cancela (504) en cuanto se agota el presupuesto.
+
+El contextvar viaja solo al threadpool (run_in_threadpool / to_thread copian el contexto).
+"""
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+
+# PostgreSQL: query_canceled (statement_timeout) / lock_not_available (lock_timeout)
+_TIMEOUT_SQLSTATES = frozenset({"57014", "55P03"})
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """El presupuesto del request se agotó: 504, no tiene sentido seguir trabajando."""
+
+
+def parse_timeout_ms(raw: Optional[str], *, default_ms: int = 0, max_ms: int = 0) -> Optional[int]:
+    """Valor de la cabecera -> presupuesto en ms (acotado por max_ms). None => sin deadline."""
+    budget: Optional[int] = None
+    if raw:
+        try:
+            budget = int(float(raw.strip()))
+        except ValueError:
+            budget = None
+    if budget is None and default_ms > 0:
+        budget = default_ms
+    if budget is not None and max_ms > 0:
+        budget = min(budget, max_ms)
+    return budget
+
+
+def start(budget_ms: int):
+    """Fija el deadline del contexto actual; devuelve el token para `reset`."""
+    return _deadline.set(time.monotonic() + budget_ms / 1000.0)
+
+
+def reset(token) -> None:
+    _deadline.reset(token)
+
+
+def current() -> Optional[float]:
+    """Deadline absoluto (time.monotonic) del request en curso, o None."""
+    return _deadline.get()
+
+
+def remaining(deadline_at: Optional[float] = None) -> Optional[float]:
+    """Segundos que quedan (puede ser <= 0) o None si no hay deadline."""
+    deadline_at = _deadline.get() if deadline_at is None else deadline_at
+    if deadline_at is None:
+        return None
+    return deadline_at - time.monotonic()
+
+
+def check() -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+def bounded_timeout(default: float, deadline_at: Optional[float] = None) -> float:
+    """
+    Timeout para una llamada saliente: min(default, lo que queda). Agotado => DeadlineExceeded.
+    """
+    left = remaining(deadline_at)
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return min(default, left)
+
+
+def header_value(deadline_at: Optional[float] = None) -> Optional[str]:
+    """Presupuesto restante en ms para propagar en TIMEOUT_HEADER (None si no hay deadline)."""
+    left = remaining(deadline_at)
+    if left is None:
+        return None
+    return str(max(1, int(left * 1000)))
+
+
+def is_timeout_error(exc: BaseException) -> bool:
+    """DBAPIError causado por statement_timeout / lock_timeout."""
+    orig = getattr(exc, "orig", exc)
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    return sqlstate in _TIMEOUT_SQLSTATES
@@ -0,0 +1,68 @@
+# services/orders-api/app/core/readiness.py
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.db import pool_has_connection
+from app.core.warmup import WarmupState, default_steps
+
+
+class ReadinessProbe:
+    """
+    [PERF] Readiness (/ready) cacheado, mismo contrato que catalog-api.
+
+    - Ready = warm-up terminado (o desactivado) + JWKS en memoria + pool DB con conexión abierta.
+    - Comprobaciones locales (sin I/O) cacheadas `ttl_seconds`; lo que falte se
+      repara relanzando el paso de warm-up en background (nunca dentro del probe).
+    """
+
+    # check -> paso de warm-up que lo repara
+    _REPAIR_STEP = {"jwks": "oidc", "db": "db"}
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self._ttl = ttl_seconds
+        self._cached: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+
+    def invalidate(self) -> None:
+        self._cached = None
+
+    def _checks(self, warmup: Optional[WarmupState]) -> tuple[Dict[str, bool], set[str]]:
+        from app.security.deps import jwks_status
+
+        jwks_loaded, jwks_stale = jwks_status()
+        checks = {
+            "warmup": _warmup_satisfied(warmup),
+            "jwks": jwks_loaded,
+            "db": pool_has_connection(),
+        }
+        stale = {"oidc"} if jwks_stale else set()
+        return checks, stale
+
+    def check(self, warmup: Optional[WarmupState]) -> Dict[str, Any]:
+        now = time.monotonic()
+        if self._cached is not None and (now - self._checked_at) < self._ttl:
+            return self._cached
+
+        checks, repair = self._checks(warmup)
+        # [FIX] Reparación también con WARMUP_ENABLED=false
+        # (solo se espera al warm-up inicial mientras está en curso)
+        if warmup is not None and checks["warmup"]:
+            repair |= {n for c, n in self._REPAIR_STEP.items() if not checks[c]}
+            steps = default_steps()
+            warmup.refresh({n: steps[n] for n in repair if n in steps})
+
+        result = {"ready": all(checks.values()), "checks": checks}
+        self._cached = result
+        self._checked_at = now
+        return result
+
+
+def _warmup_satisfied(warmup: Optional[WarmupState]) -> bool:
+    # [FIX] WARMUP_ENABLED=false: nunca arranca => no hay nada que esperar
+    # (si no, /ready respondería 503 para siempre)
+    if not settings.warmup_enabled:
+        return warmup is not None
+    return warmup is not None and warmup.done
@@ -0,0 +1,124 @@
+# services/orders-api/app/core/warmup.py
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import get_engine
+from app.core.logging import logger
+
+WarmupStep = Callable[[], Awaitable[None]]
+
+
+class WarmupState:
+    """
+    [PERF] Warm-up de arranque (cold start), mismo contrato que catalog-api.
+
+    - Las tareas de I/O corren en paralelo y en background (no bloquean el arranque).
+    - Un paso fallido se registra pero no tumba el servicio; se reintenta en la 1a request.
+    """
+
+    def __init__(self) -> None:
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.results: Dict[str, bool] = {}
+        self.errors: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._done = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def start(self, steps: Dict[str, WarmupStep]) -> None:
+        if self._task is not None:
+            return
+        self.started_at = time.perf_counter()
+        self._task = asyncio.create_task(self._run(steps), name="orders-api-warmup")
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def refresh(self, steps: Dict[str, WarmupStep]) -> bool:
+        """
+        Relanza pasos en background (p.ej. JWKS expirado o DB caída al arrancar).
+        Como mucho un refresh en vuelo: lo invoca readiness, nunca bloquea al probe.
+        """
+        if not steps or (self._refresh_task is not None and not self._refresh_task.done()):
+            return False
+        self._refresh_task = asyncio.create_task(self._run_steps(steps))
+        return True
+
+    async def stop(self) -> None:
+        for task in (self._task, self._refresh_task):
+            if task is None or task.done():
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run_step(self, name: str, step: WarmupStep) -> None:
+        try:
+            await asyncio.wait_for(step(), timeout=settings.warmup_timeout_seconds)
+            self.results[name] = True
+            self.errors.pop(name, None)
+        except Exception as e:  # noqa: BLE001
+            self.results[name] = False
+            self.errors[name] = f"{type(e).__name__}: {e}"
+            logger.warning("warm-up step failed: %s (%s)", name, e)
+
+    async def _run_steps(self, steps: Dict[str, WarmupStep]) -> None:
+        await asyncio.gather(*(self._run_step(n, s) for n, s in steps.items()))
+
+    async def _run(self, steps: Dict[str, WarmupStep]) -> None:
+        try:
+            await self._run_steps(steps)
+        finally:
+            self.finished_at = time.perf_counter()
+            self._done.set()
+            logger.info(
+                "warm-up finished",
+                extra={
+                    "durationMs": int((self.finished_at - (self.started_at or 0.0)) * 1000),
+                    "status": "ok" if all(self.results.values()) else "degraded",
+                },
+            )
+
+
+async def _warm_oidc() -> None:
+    from app.security.deps import warm_up_oidc
+
+    await asyncio.to_thread(warm_up_oidc)
+
+
+def _preconnect_db() -> None:
+    # Abre N conexiones a la vez para que el pool quede poblado (no solo 1 conexión reciclada)
+    engine = get_engine()
+    conns = []
+    try:
+        for _ in range(max(1, settings.db_pool_warm_connections)):
+            conn = engine.connect()
+            conns.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+async def _warm_db() -> None:
+    await asyncio.to_thread(_preconnect_db)
+
+
+def default_steps() -> Dict[str, WarmupStep]:
+    return {"oidc": _warm_oidc, "db": _warm_db}
@@ -0,0 +1,54 @@
+# services/orders-api/app/fieldsets.py
+"""
+Sparse fieldsets (`?fields=id,status`) para los endpoints de lectura.
+
+- Allowlist = campos del schema de respuesta: nada fuera del contrato llega al SELECT.
+- Los campos se normalizan al orden del schema => pocas combinaciones, modelos parciales cacheados.
+- El repositorio selecciona solo esas columnas (sin hidratar entidades ORM) y el modelo parcial
+  serializa solo esas claves, con los mismos tipos que la respuesta completa.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Optional, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+
+class InvalidFields(ValueError):
+    def __init__(self, unknown: Tuple[str, ...], allowed: Tuple[str, ...]) -> None:
+        super().__init__(f"Unknown fields: {', '.join(unknown)}")
+        self.unknown = unknown
+        self.allowed = allowed
+
+
+def parse_fields(raw: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """None => respuesta completa. Lista vacía o campos fuera del schema => InvalidFields."""
+    if raw is None:
+        return None
+    allowed = tuple(schema.model_fields)
+    requested = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = tuple(sorted(requested.difference(allowed)))
+    if unknown or not requested:
+        raise InvalidFields(unknown, allowed)
+    return tuple(f for f in allowed if f in requested)
+
+
+@lru_cache(maxsize=256)
+def partial_model(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Copia de `schema` con solo `fields` (mismas anotaciones/serializadores por campo)."""
+    definitions: dict[str, Any] = {
+        name: (info.annotation, info)
+        for name, info in schema.model_fields.items()
+        if name in fields
+    }
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions,
+    )
+
+
+@lru_cache(maxsize=256)
+def partial_list_adapter(schema: Type[BaseModel], fields: Tuple[str, ...]) -> TypeAdapter:
+    return TypeAdapter(list[partial_model(schema, fields)])  # type: ignore[misc]
@@ -0,0 +1,279 @@
+# services/orders-api/app/idempotency.py
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import case, delete, null, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.models import IdempotencyKey
+
+_table = IdempotencyKey.__table__
+
+
+class IdempotencyConflict(Exception):
+    """Misma Idempotency-Key con un payload distinto (=> 422)."""
+
+
+class IdempotencyInProgress(Exception):
+    """La key existe pero aún no tiene respuesta almacenada (=> 409)."""
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    status_code: int
+    body: str
+    request_hash: str
+    expires_at: float  # epoch (para el front cache)
+
+
+class _FrontCache:
+    """
+    [PERF] Cache en proceso (LRU + TTL) delante de la tabla: los replays calientes
+    (reintentos del gateway, doble submit) no tocan PostgreSQL.
+    Thread-safe: las rutas sync corren en el threadpool de Starlette.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._data: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def put(self, key: str, value: StoredResponse) -> None:
+        if self._max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+front_cache = _FrontCache(settings.idempotency_cache_size)
+
+
+def key_hash(scope: str, key: str) -> str:
+    return hashlib.sha256(f"{scope}\x00{key}".encode()).hexdigest()
+
+
+def request_hash(body: str) -> str:
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _dialect_insert(db: Session):
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+
+def _claim(db: Session, kh: str, rh: str, now: datetime) -> Optional[StoredResponse]:
+    """
+    Insert-or-return en UNA sentencia:
+    INSERT ... ON CONFLICT (key_hash) DO UPDATE ... RETURNING
+
+    - Si la fila es nueva (owner_token == el nuestro) => None: este request ejecuta el write.
+    - Si ya existía => devuelve la respuesta almacenada. Un duplicado concurrente espera en el
+      índice unique hasta que la 1a transacción haga commit y entonces recibe su respuesta.
+    - Una fila expirada (TTL) se reclama como nueva.
+    """
+    token = uuid4().hex
+    expires_at = now + timedelta(seconds=settings.idempotency_ttl_seconds)
+    ins = _dialect_insert(db)(_table).values(
+        key_hash=kh,
+        request_hash=rh,
+        owner_token=token,
+        created_at=now,
+        expires_at=expires_at,
+    )
+    expired = _table.c.expires_at < now
+    stmt = ins.on_conflict_do_update(
+        index_elements=[_table.c.key_hash],
+        set_={
+            "owner_token": case((expired, ins.excluded.owner_token), else_=_table.c.owner_token),
+            "request_hash": case((expired, ins.excluded.request_hash), else_=_table.c.request_hash),
+            "response_status": case((expired, null()), else_=_table.c.response_status),
+            "response_body": case((expired, null()), else_=_table.c.response_body),
+            "created_at": case((expired, ins.excluded.created_at), else_=_table.c.created_at),
+            "expires_at": case((expired, ins.excluded.expires_at), else_=_table.c.expires_at),
+        },
+    ).returning(
+        _table.c.owner_token,
+        _table.c.request_hash,
+        _table.c.response_status,
+        _table.c.response_body,
+        _table.c.expires_at,
+    )
+
+    row = db.execute(stmt).one()
+    if row.owner_token == token:
+        return None
+    if row.response_status is None:
+        raise IdempotencyInProgress()
+    return _stored(row)
+
+
+def _stored(row) -> StoredResponse:
+    row_expires = row.expires_at
+    if row_expires.tzinfo is None:
+        row_expires = row_expires.replace(tzinfo=timezone.utc)
+    return StoredResponse(
+        status_code=row.response_status,
+        body=row.response_body,
+        request_hash=row.request_hash,
+        expires_at=row_expires.timestamp(),
+    )
+
+
+def lookup(
+    db: Session, *, scope: str, key: str, body_fingerprint: str
+) -> Optional[StoredResponse]:
+    """
+    Respuesta ya almacenada para (scope, key), sin reclamar la key (solo lectura). Permite
+    contestar un replay antes de trabajo previo al write (p. ej. llamadas a otros servicios).
+    None => no hay respuesta vigente: el write pasa por execute_once (que cubre las carreras).
+    """
+    kh = key_hash(scope, key)
+    stored = front_cache.get(kh)
+    if stored is None:
+        row = db.execute(
+            select(
+                _table.c.request_hash,
+                _table.c.response_status,
+                _table.c.response_body,
+                _table.c.expires_at,
+            ).where(
+                _table.c.key_hash == kh,
+                _table.c.response_status.is_not(None),
+                _table.c.expires_at >= datetime.now(timezone.utc),
+            )
+        ).first()
+        db.rollback()  # no retener la conexión mientras el caller sigue (catalog-api, etc.)
+        if row is None:
+            return None
+        stored = _stored(row)
+        front_cache.put(kh, stored)
+    if stored.request_hash != body_fingerprint:
+        raise IdempotencyConflict()
+    return stored
+
+
+def execute_once(
+    db: Session,
+    *,
+    scope: str,
+    key: str,
+    body_fingerprint: str,
+    handler: Callable[[], Tuple[int, str]],
+) -> Tuple[StoredResponse, bool]:
+    """
+    Ejecuta `handler` como mucho una vez por (scope, key) dentro de la MISMA transacción
+    que registra la key. Devuelve (respuesta, replayed).
+
+    `handler` no debe hacer commit: lo hace esta función junto con la fila de idempotencia.
+    """
+    kh = key_hash(scope, key)
+
+    cached = front_cache.get(kh)
+    if cached is not None:
+        if cached.request_hash != body_fingerprint:
+            raise IdempotencyConflict()
+        return cached, True
+
+    now = datetime.now(timezone.utc)
+    try:
+        stored = _claim(db, kh, body_fingerprint, now)
+        if stored is not None:
+            db.rollback()
+            if stored.request_hash != body_fingerprint:
+                raise IdempotencyConflict()
+            front_cache.put(kh, stored)
+            return stored, True
+
+        status_code, body = handler()
+        db.execute(
+            _table.update()
+            .where(_table.c.key_hash == kh)
+            .values(response_status=status_code, response_body=body)
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    stored = StoredResponse(
+        status_code=status_code,
+        body=body,
+        request_hash=body_fingerprint,
+        expires_at=(now + timedelta(seconds=settings.idempotency_ttl_seconds)).timestamp(),
+    )
+    front_cache.put(kh, stored)
+    return stored, False
+
+
+# =========================
+# TTL cleanup
+# =========================
+
+def purge_expired(db: Session, *, batch_size: Optional[int] = None) -> int:
+    """Borra un lote de keys expiradas (usa el índice de expires_at). Devuelve filas borradas."""
+    batch_size = batch_size or settings.idempotency_cleanup_batch_size
+    now = datetime.now(timezone.utc)
+    ids = select(_table.c.id).where(_table.c.expires_at < now).limit(batch_size).scalar_subquery()
+    try:
+        result = db.execute(delete(_table).where(_table.c.id.in_(ids)))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return int(result.rowcount or 0)
+
+
+def _purge_all_expired() -> int:
+    from app.core.db import get_sessionmaker
+
+    total = 0
+    db = get_sessionmaker()()
+    try:
+        while True:
+            n = purge_expired(db)
+            total += n
+            if n < settings.idempotency_cleanup_batch_size:
+                return total
+    finally:
+        db.close()
+
+
+async def cleanup_loop() -> None:
+    """Tarea de fondo (lifespan): limpia keys expiradas por lotes cada N segundos."""
+    while True:
+        await asyncio.sleep(settings.idempotency_cleanup_interval_seconds)
+        try:
+            deleted = await asyncio.to_thread(_purge_all_expired)
+            if deleted:
+                logger.info("idempotency keys purged: %s", deleted)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("idempotency cleanup failed: %s", e)
@@ -1,16 +1,105 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from app import idempotency, outbox
 from app.api.routes import router
+from app.clients.catalog import build_catalog_client
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded
 from app.core.logging import configure_logging, logger
+from app.core.readiness import ReadinessProbe
+from app.core.warmup import WarmupState, default_steps
+from app.middlewares import admission
+from app.middlewares.deadline import DeadlineMiddleware
 from app.middlewares.request_id import RequestIdMiddleware
+from app.security import revocation
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # CHANGE: logging estructurado (JSON) configurado al arrancar (enterprise observability)
+    # [PERF] En el lifespan (no al importar) para que `import app.main` sea barato
+    configure_logging()
+
+    # CHANGE: Log de arranque con parámetros clave (sin secretos)
+    logger.info(
+        "orders-api started",
+        extra={
+            "env": settings.environment,
+            "issuer": settings.oidc_issuer_expected,
+            "audience": settings.oidc_audience,
+            "rbacClientId": settings.rbac_client_id,
+            "corsOrigins": settings.cors_allowed_origins,  # CHANGE: CSV original (útil para debug)
+            "corsOriginsList": settings.cors_origins_list(),
+        },
+    )
+
+    # [PERF] Warm-up en background (discovery OIDC + JWKS + pool DB en paralelo)
+    app.state.warmup = WarmupState()
+    app.state.readiness = ReadinessProbe(settings.readiness_cache_seconds)
+    if settings.warmup_enabled:
+        app.state.warmup.start(default_steps())
 
-# CHANGE: logging estructurado (JSON) configurado al arrancar (enterprise observability)
-configure_logging()
+    # [PERF] Cliente de catalog-api compartido (pool keep-alive + batching + cache)
+    app.state.catalog_client = build_catalog_client()
 
-app = FastAPI(title="orders-api", version="0.1.0")
+    # Limpieza TTL de Idempotency-Key por lotes (índice expires_at)
+    cleanup_task = asyncio.create_task(idempotency.cleanup_loop(), name="idempotency-cleanup")
+
+    # Transactional outbox: relay en background (lotes FOR UPDATE SKIP LOCKED -> sink)
+    relay_task = None
+    if settings.outbox_relay_enabled:
+        app.state.outbox_relay = outbox.build_relay()
+        relay_task = asyncio.create_task(app.state.outbox_relay.run(), name="outbox-relay")
+
+    # Revocaciones (jti/sid): poll incremental del feed si está configurado
+    revocation_task = None
+    if settings.revocation_feed_url:
+        revocation_task = asyncio.create_task(revocation.poll_loop(), name="revocation-poll")
+    try:
+        yield
+    finally:
+        tasks = [t for t in (cleanup_task, relay_task, revocation_task) if t is not None]
+        for task in tasks:
+            task.cancel()
+        # Esperar a que terminen: el pool de DB / clientes HTTP no se cierran bajo sus pies
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await app.state.catalog_client.aclose()
+        await app.state.warmup.stop()
+
+
+app = FastAPI(title="orders-api", version="0.1.0", lifespan=lifespan)
+
+# [PERF] Admission control: 503 + Retry-After rápido cuando el servicio está saturado.
+# Se añade antes que RequestId/CORS => queda por dentro (los 503 llevan X-Request-Id y CORS).
+if settings.admission_enabled:
+    app.add_middleware(
+        admission.AdmissionControlMiddleware,
+        service="orders-api",
+        default_limit=settings.admission_default_limit,
+        route_limits=admission.parse_route_limits(settings.admission_route_limits),
+        min_limit=settings.admission_min_limit,
+        max_queue=settings.admission_max_queue,
+        queue_timeout_seconds=settings.admission_queue_timeout_seconds,
+        latency_target_ms=settings.admission_latency_target_ms,
+        retry_after_seconds=settings.admission_retry_after_seconds,
+        # Streams SSE de larga duración: no ocupan slots de concurrencia (tienen su propio tope)
+        exempt_paths=("/health", "/ready", "/metrics", "/v1/orders/events"),
+    )
+
+# [PERF] Deadline del gateway (X-Request-Timeout-Ms): por fuera de admission => la espera en cola
+# también consume presupuesto; agotado => se cancela el trabajo y 504.
+if settings.request_deadline_enabled:
+    app.add_middleware(
+        DeadlineMiddleware,
+        default_ms=settings.request_default_timeout_ms,
+        max_ms=settings.request_max_timeout_ms,
+        exempt_paths=("/health", "/ready", "/metrics", "/v1/orders/events"),
+    )
 
 # CHANGE: Correlation ID middleware (X-Request-Id) para trazabilidad end-to-end
 app.add_middleware(RequestIdMiddleware)
@@ -21,10 +110,23 @@ app.add_middleware(
     allow_origins=settings.cors_origins_list(),  # CHANGE: CORSMiddleware espera lista
     allow_credentials=settings.cors_allow_credentials,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type", "X-Request-Id"],
-    expose_headers=["X-Request-Id"],
+    allow_headers=["Authorization", "Content-Type", "X-Request-Id", "Idempotency-Key"],
+    expose_headers=["X-Request-Id", "Idempotency-Replayed"],
 )
 
+# Presupuesto del request agotado (DB / llamadas salientes) => 504 con requestId
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(
+        status_code=504,
+        content={
+            "error": "deadline_exceeded",
+            "message": "Request deadline exceeded",
+            "requestId": getattr(request.state, "request_id", None),
+        },
+    )
+
+
 # CHANGE: Handler homogéneo para errores no controlados con requestId
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
@@ -41,18 +143,11 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
     )
 
 
+# Métricas (texto Prometheus): gauges de admission control
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(admission.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 # Incluye rutas
 app.include_router(router)
-
-# CHANGE: Log de arranque con parámetros clave (sin secretos)
-logger.info(
-    "orders-api started",
-    extra={
-        "env": settings.environment,
-        "issuer": settings.oidc_issuer_expected,
-        "audience": settings.oidc_audience,
-        "rbacClientId": settings.rbac_client_id,
-        "corsOrigins": settings.cors_allowed_origins,  # CHANGE: CSV original (útil para debug)
-        "corsOriginsList": settings.cors_origins_list(),
-    },
-)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    PrimaryKeyConstraint,
+    SmallInteger,
+    String,
+    Text,
+    func,
+    text,
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.db import Base
+
+
+class Order(Base):
+    __tablename__ = "orders"
+    __table_args__ = (
+        # [PERF] Keyset pagination: ORDER BY created_at DESC, id DESC sin OFFSET
+        Index("ix_orders_created_at_id", "created_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[str] = mapped_column(String(32), nullable=False, default="created")
+    customer_ref: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    currency: Mapped[str] = mapped_column(String(3), nullable=False, default="EUR")
+    total_amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    line_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    lines: Mapped[List["OrderLine"]] = relationship(
+        back_populates="order",
+        order_by="OrderLine.line_no",
+        lazy="raise",  # [PERF] nada de N+1 implícito: las líneas se cargan explícitamente
+    )
+
+
+class OrderLine(Base):
+    __tablename__ = "order_lines"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    order_id: Mapped[int] = mapped_column(
+        ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    line_no: Mapped[int] = mapped_column(Integer, nullable=False)
+    sku: Mapped[str] = mapped_column(String(64), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    unit_price: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+
+    order: Mapped[Order] = relationship(back_populates="lines")
+
+
+class IdempotencyKey(Base):
+    """
+    [PERF] Tabla compacta de idempotencia: 1 fila por (principal, Idempotency-Key).
+    key_hash = sha256(scope + key) => ancho fijo y un único índice unique.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    key_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    owner_token: Mapped[str] = mapped_column(String(32), nullable=False)
+    response_status: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    response_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+
+class OutboxEvent(Base):
+    """
+    Transactional outbox: se escribe en la MISMA transacción que el pedido.
+    Los consumidores deduplican por `eventId` (entrega at-least-once). `id` NO es un offset
+    seguro: la secuencia se asigna antes del commit, así que un id más bajo puede confirmarse
+    después de uno más alto (o no confirmarse nunca). Quien lea por id debe seguir los huecos.
+    """
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # [PERF] El relay solo lee pendientes: índice parcial (PostgreSQL) sobre id
+        Index(
+            "ix_outbox_events_unpublished",
+            "id",
+            postgresql_where=text("published_at IS NULL"),
+            sqlite_where=text("published_at IS NULL"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True
+    )
+    aggregate_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    aggregate_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    event_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    published_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class OrderDailyStat(Base):
+    """
+    [PERF] Agregado diario mantenido incrementalmente en el write path (UPSERT).
+    Los dashboards leen O(días) filas en vez de escanear `orders`.
+    `shard` reparte la fila caliente del día actual en N filas (se suman al leer).
+    """
+
+    __tablename__ = "order_daily_stats"
+    __table_args__ = (PrimaryKeyConstraint("day", "status", "currency", "shard"),)
+
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    status: Mapped[str] = mapped_column(String(32), nullable=False)
+    currency: Mapped[str] = mapped_column(String(3), nullable=False)
+    shard: Mapped[int] = mapped_column(SmallInteger, nullable=False, default=0)
+    order_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_amount: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=0)
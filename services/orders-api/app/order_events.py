@@ -0,0 +1,331 @@
+# services/orders-api/app/order_events.py
+"""
+Push de cambios de estado de pedidos (SSE: GET /v1/orders/events) con fan-out en proceso.
+
+- Fuente: los eventos `order.*` del transactional outbox, escritos en la MISMA transacción que el
+  pedido. Cualquier write path (alta hoy, transiciones de estado mañana) llega solo con encolar su
+  evento: no hay que tocar el hub.
+- Commits de este worker: un listener after_commit los publica al momento (sin I/O).
+- Commits de otros workers/réplicas: mientras haya suscriptores, UN sondeo por worker lee
+  `outbox_events` por id (con seguimiento de huecos: un id más bajo que confirma tarde no se
+  pierde).
+- Hub: cada suscriptor tiene una cola acotada; el mensaje SSE se serializa una vez y se comparte.
+  Cola llena => el suscriptor lento se expulsa (cierra el stream); al reconectar con Last-Event-ID
+  recupera lo perdido desde el outbox.
+- Miles de conexiones ociosas por worker: cada una es una corrutina esperando en su cola (más un
+  heartbeat periódico), sin threads ni polling por conexión.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.db import get_sessionmaker
+from app.core.logging import logger
+from app.models import OutboxEvent
+
+AGGREGATE_TYPE = "order"
+_PENDING_KEY = "order_events_pending"
+
+# (id del outbox, order_id, bytes del mensaje SSE)
+Message = Tuple[int, int, bytes]
+
+
+class HubFull(Exception):
+    """Demasiados suscriptores en este worker (=> 503)."""
+
+
+def encode(event: OutboxEvent) -> Message:
+    payload = event.payload or {}
+    data = {
+        "orderId": int(event.aggregate_id),
+        "status": payload.get("status"),
+        "type": event.event_type,
+        "occurredAt": event.created_at.isoformat() if event.created_at else None,
+    }
+    payload = json.dumps(data, separators=(",", ":"))
+    body = f"id: {event.id}\nevent: {event.event_type}\ndata: {payload}\n\n"
+    return event.id, int(event.aggregate_id), body.encode()
+
+
+class Subscriber:
+    __slots__ = ("queue", "order_ids", "evicted")
+
+    def __init__(self, order_ids: Optional[Set[int]], queue_size: int) -> None:
+        self.order_ids = order_ids  # None => todos los pedidos
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.evicted = False
+
+
+class OrderEventHub:
+    """
+    Fan-out en el event loop (sin locks). `publish_threadsafe` es la entrada desde otros threads
+    (after_commit de los endpoints sync, que corren en el threadpool).
+    """
+
+    def __init__(
+        self,
+        *,
+        queue_size: int = 64,
+        max_subscribers: int = 10_000,
+        poll_interval: float = 1.0,
+        gap_timeout: float = 5.0,
+        batch_size: int = 500,
+    ) -> None:
+        self.queue_size = max(1, queue_size)
+        self.max_subscribers = max_subscribers
+        self._poll_interval = poll_interval
+        self._gap_timeout = gap_timeout
+        self._batch_size = batch_size
+        self._all: Set[Subscriber] = set()
+        self._by_order: Dict[int, Set[Subscriber]] = {}
+        self.subscribers = 0
+        self.published_total = 0
+        self.evicted_total = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Ids ya entregados (commit local o sondeo): ni el sondeo ni un reintento los duplican
+        self._recent: Set[int] = set()
+        self._recent_order: Deque[int] = deque()
+        self._cursor: Optional[int] = None
+        self._gaps: Dict[int, float] = {}
+        self._poller: Optional[asyncio.Task] = None
+
+    # ---- suscripción ----
+
+    def full(self) -> bool:
+        return self.subscribers >= self.max_subscribers
+
+    def subscribe(self, order_ids: Optional[Iterable[int]] = None) -> Subscriber:
+        if self.full():
+            raise HubFull()
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._poller = loop, None
+        sub = Subscriber(set(order_ids) if order_ids else None, self.queue_size)
+        if sub.order_ids is None:
+            self._all.add(sub)
+        else:
+            for order_id in sub.order_ids:
+                self._by_order.setdefault(order_id, set()).add(sub)
+        self.subscribers += 1
+        if self._poller is None and self._poll_interval > 0:
+            self._poller = asyncio.create_task(self._poll(), name="order-events-poll")
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        if sub.order_ids is None:
+            if sub not in self._all:
+                return
+            self._all.discard(sub)
+        else:
+            found = False
+            for order_id in sub.order_ids:
+                subs = self._by_order.get(order_id)
+                if subs is not None and sub in subs:
+                    found = True
+                    subs.discard(sub)
+                    if not subs:
+                        del self._by_order[order_id]
+            if not found:
+                return
+        self.subscribers -= 1
+
+    # ---- publicación ----
+
+    def publish(self, messages: Iterable[Message]) -> None:
+        for message in messages:
+            event_id, order_id, _ = message
+            if event_id in self._recent:
+                continue
+            self._remember(event_id)
+            self.published_total += 1
+            for sub in (*self._all, *self._by_order.get(order_id, ())):
+                try:
+                    sub.queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    # Consumidor lento: fuera (no frena al resto ni crece la memoria)
+                    sub.evicted = True
+                    self.evicted_total += 1
+                    self.unsubscribe(sub)
+
+    def publish_threadsafe(self, messages: List[Message]) -> None:
+        loop = self._loop
+        if loop is None or not messages:
+            return  # nadie suscrito todavía en este worker
+        try:
+            loop.call_soon_threadsafe(self.publish, messages)
+        except RuntimeError:
+            pass  # loop cerrado (shutdown)
+
+    def _remember(self, event_id: int) -> None:
+        self._recent.add(event_id)
+        self._recent_order.append(event_id)
+        while len(self._recent_order) > 10 * self._batch_size:
+            self._recent.discard(self._recent_order.popleft())
+
+    # ---- otros workers / réplicas: sondeo del outbox ----
+
+    def _read_after(self, cursor: Optional[int]) -> Tuple[List[Message], List[int], int]:
+        with _session() as db:
+            if cursor is None:
+                return [], [], db.execute(select(func.max(OutboxEvent.id))).scalar() or 0
+            rows = db.execute(
+                select(OutboxEvent)
+                .where(OutboxEvent.id > cursor)
+                .order_by(OutboxEvent.id)
+                .limit(self._batch_size)
+            ).scalars().all()
+            messages = [encode(r) for r in rows if r.aggregate_type == AGGREGATE_TYPE]
+            return messages, [r.id for r in rows], cursor
+
+    def _advance_cursor(self, ids: List[int], now: float) -> None:
+        cursor = self._cursor
+        for event_id in ids:
+            if event_id != cursor + 1:
+                # Hueco: transacción aún abierta (o rollback). Se espera gap_timeout antes de
+                # saltarlo
+                first_seen = self._gaps.setdefault(cursor + 1, now)
+                if now - first_seen < self._gap_timeout:
+                    break
+            cursor = event_id
+        self._cursor = cursor
+        self._gaps = {k: v for k, v in self._gaps.items() if k > cursor}
+
+    async def poll_once(self) -> None:
+        messages, ids, start = await run_in_threadpool(self._read_after, self._cursor)
+        if self._cursor is None:
+            self._cursor = start  # arranque: solo lo nuevo (lo anterior se pide con Last-Event-ID)
+            return
+        self.publish(messages)
+        self._advance_cursor(ids, time.monotonic())
+
+    async def _poll(self) -> None:
+        try:
+            while self.subscribers > 0:
+                try:
+                    await self.poll_once()
+                except Exception as e:  # noqa: BLE001 - DB caída: se reintenta en el siguiente ciclo
+                    logger.warning("order events poll failed: %s", e)
+                await asyncio.sleep(self._poll_interval)
+        finally:
+            self._poller = None
+            self._cursor = None  # sin suscriptores no se sigue el outbox; al volver, desde el final
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": self.subscribers,
+            "published_total": self.published_total,
+            "evicted_total": self.evicted_total,
+        }
+
+
+def _session() -> Session:
+    return get_sessionmaker()()
+
+
+def replay(after_id: int, order_ids: Optional[Set[int]], limit: int) -> List[Message]:
+    """Eventos posteriores a Last-Event-ID (reconexión / expulsión), acotados a `limit`."""
+    with _session() as db:
+        stmt = (
+            select(OutboxEvent)
+            .where(OutboxEvent.id > after_id, OutboxEvent.aggregate_type == AGGREGATE_TYPE)
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+        )
+        if order_ids:
+            stmt = stmt.where(OutboxEvent.aggregate_id.in_([str(i) for i in order_ids]))
+        return [encode(r) for r in db.execute(stmt).scalars().all()]
+
+
+async def stream(
+    hub: OrderEventHub,
+    order_ids: Optional[Iterable[int]],
+    *,
+    last_event_id: Optional[int],
+    heartbeat_seconds: float,
+    expires_at: Optional[float],
+) -> AsyncIterator[bytes]:
+    """
+    Cuerpo SSE. Termina al expulsar al suscriptor o al caducar el token (el cliente reconecta con
+    un token nuevo y Last-Event-ID). La desconexión del cliente cancela el generador.
+
+    La suscripción se hace aquí (no en el endpoint): si el cliente se va antes de empezar el
+    stream, el generador nunca arranca y no queda un suscriptor huérfano.
+    """
+    try:
+        sub = hub.subscribe(order_ids)
+    except HubFull:
+        return
+    try:
+        yield f"retry: {int(settings.order_events_retry_ms)}\n\n".encode()
+        sent: Set[int] = set()
+        if last_event_id is not None:
+            for event_id, _, body in await run_in_threadpool(
+                replay, last_event_id, sub.order_ids, settings.order_events_replay_max
+            ):
+                sent.add(event_id)
+                yield body
+        while not sub.evicted:
+            timeout = heartbeat_seconds
+            if expires_at is not None:
+                timeout = min(timeout, expires_at - time.time())
+                if timeout <= 0:
+                    return
+            try:
+                event_id, _, body = await asyncio.wait_for(sub.queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"  # mantiene vivos proxies / gateway (proxyTimeout)
+                continue
+            if event_id not in sent:
+                yield body
+    finally:
+        hub.unsubscribe(sub)
+
+
+@lru_cache(maxsize=1)
+def get_order_event_hub() -> OrderEventHub:
+    return OrderEventHub(
+        queue_size=settings.order_events_queue_size,
+        max_subscribers=settings.order_events_max_subscribers,
+        poll_interval=settings.order_events_poll_seconds,
+    )
+
+
+# =========================
+# Alimentación desde el write path (ORM)
+# =========================
+
+@event.listens_for(Session, "after_flush")
+def _collect(session: Session, flush_context) -> None:
+    events = [
+        o
+        for o in session.new
+        if isinstance(o, OutboxEvent) and o.aggregate_type == AGGREGATE_TYPE
+    ]
+    if events:
+        session.info.setdefault(_PENDING_KEY, []).extend(encode(e) for e in events)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(session: Session) -> None:
+    messages = session.info.pop(_PENDING_KEY, None)
+    if not messages or not get_order_event_hub.cache_info().currsize:
+        return  # sin streams abiertos en este worker: nada que empujar
+    try:
+        get_order_event_hub().publish_threadsafe(messages)
+    except Exception as e:  # noqa: BLE001 - el pedido ya está confirmado: el push nunca lo tumba
+        logger.warning("order events publish failed: %s", e)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
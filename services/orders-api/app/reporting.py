@@ -0,0 +1,184 @@
+# services/orders-api/app/reporting.py
+from __future__ import annotations
+
+import argparse
+import random
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import Date, cast, delete, func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Order, OrderDailyStat
+from app.schemas import DailyOrderStat
+
+_stats = OrderDailyStat.__table__
+
+
+def _dialect_insert(db: Session):
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+
+def _utc_day(ts: datetime) -> date:
+    if ts.tzinfo is None:
+        return ts.date()
+    return ts.astimezone(timezone.utc).date()
+
+
+# =========================
+# Write path (misma transacción que el pedido)
+# =========================
+
+def record_order(
+    db: Session,
+    *,
+    created_at: datetime,
+    status: str,
+    currency: str,
+    total_amount: Decimal,
+    delta: int = 1,
+) -> None:
+    """
+    UPSERT incremental: INSERT ... ON CONFLICT (day, status, currency, shard) DO UPDATE
+    SET order_count = order_count + :delta, total_amount = total_amount + :amount.
+    NO hace commit. Llamarlo al final de la transacción: el lock de la fila dura lo mínimo.
+    """
+    amount = total_amount * delta
+    ins = _dialect_insert(db)(_stats).values(
+        day=_utc_day(created_at),
+        status=status,
+        currency=currency,
+        shard=random.randrange(max(1, settings.reporting_stat_shards)),
+        order_count=delta,
+        total_amount=amount,
+    )
+    db.execute(
+        ins.on_conflict_do_update(
+            index_elements=[_stats.c.day, _stats.c.status, _stats.c.currency, _stats.c.shard],
+            set_={
+                "order_count": _stats.c.order_count + ins.excluded.order_count,
+                "total_amount": _stats.c.total_amount + ins.excluded.total_amount,
+            },
+        )
+    )
+
+
+def record_status_change(
+    db: Session,
+    *,
+    created_at: datetime,
+    currency: str,
+    total_amount: Decimal,
+    old_status: str,
+    new_status: str,
+) -> None:
+    """Mueve un pedido de bucket de status (mismo día de creación). NO hace commit."""
+    if old_status == new_status:
+        return
+    common = {"created_at": created_at, "currency": currency, "total_amount": total_amount}
+    record_order(db, status=old_status, delta=-1, **common)
+    record_order(db, status=new_status, delta=1, **common)
+
+
+# =========================
+# Read path
+# =========================
+
+def daily_stats(
+    db: Session,
+    *,
+    date_from: date,
+    date_to: date,
+    status: Optional[str] = None,
+    currency: Optional[str] = None,
+) -> List[DailyOrderStat]:
+    """[PERF] Lee O(días x status x shards) filas por PK; nunca toca `orders`."""
+    stmt = (
+        select(
+            _stats.c.day,
+            _stats.c.status,
+            _stats.c.currency,
+            func.sum(_stats.c.order_count).label("orders"),
+            func.sum(_stats.c.total_amount).label("total_amount"),
+        )
+        .where(_stats.c.day >= date_from, _stats.c.day <= date_to)
+        .group_by(_stats.c.day, _stats.c.status, _stats.c.currency)
+        .having(func.sum(_stats.c.order_count) != 0)
+        .order_by(_stats.c.day, _stats.c.status, _stats.c.currency)
+    )
+    if status:
+        stmt = stmt.where(_stats.c.status == status)
+    if currency:
+        stmt = stmt.where(_stats.c.currency == currency.upper())
+
+    return [
+        DailyOrderStat(
+            day=r.day,
+            status=r.status,
+            currency=r.currency,
+            orders=int(r.orders),
+            total_amount=Decimal(r.total_amount).quantize(Decimal("0.01")),
+        )
+        for r in db.execute(stmt)
+    ]
+
+
+# =========================
+# Batch job: recálculo (backfill / reparación)
+# =========================
+
+def rebuild(db: Session, *, date_from: date, date_to: date) -> int:
+    """
+    Recalcula los agregados de [date_from, date_to] desde `orders` con UN
+    INSERT ... SELECT ... GROUP BY (en la misma transacción que el DELETE del rango).
+    Devuelve el número de filas de agregado escritas.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        day = cast(func.timezone("UTC", Order.created_at), Date)
+    else:
+        day = func.date(Order.created_at)
+
+    source = (
+        select(
+            day.label("day"),
+            Order.status,
+            Order.currency,
+            literal(0).label("shard"),
+            func.count().label("order_count"),
+            func.sum(Order.total_amount).label("total_amount"),
+        )
+        .where(day >= date_from, day <= date_to)
+        .group_by(day, Order.status, Order.currency)
+    )
+    try:
+        db.execute(delete(_stats).where(_stats.c.day >= date_from, _stats.c.day <= date_to))
+        result = db.execute(
+            _stats.insert().from_select(
+                ["day", "status", "currency", "shard", "order_count", "total_amount"], source
+            )
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return int(result.rowcount or 0)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Recalcula order_daily_stats desde orders")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, required=True)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, required=True)
+    args = parser.parse_args(argv)
+
+    from app.core.db import get_sessionmaker
+
+    with get_sessionmaker()() as db:
+        n = rebuild(db, date_from=args.date_from, date_to=args.date_to)
+    print(f"order_daily_stats rebuilt: {n} rows ({args.date_from} .. {args.date_to})")
+
+
+if __name__ == "__main__":
+    main()
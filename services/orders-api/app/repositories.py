@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.orm import Session, selectinload
+
+from app import outbox, reporting
+from app.models import Order, OrderLine
+from app.schemas import OrderCreate, OrderDetail, OrderLineRead
+
+# =========================
+# Keyset cursor (created_at, id)
+# =========================
+
+def encode_cursor(created_at: datetime, order_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{order_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Lanza ValueError si el cursor no es válido (la ruta lo traduce a 400)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, order_id = base64.urlsafe_b64decode(padded.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(order_id)
+    except Exception as e:  # noqa: BLE001
+        raise ValueError("Invalid cursor") from e
+
+
+# =========================
+# Write path
+# =========================
+
+def create_order(db: Session, payload: OrderCreate, *, commit: bool = True) -> OrderDetail:
+    """
+    [PERF] Inserta cabecera + líneas en UNA transacción y con 2 sentencias:
+    - INSERT ... RETURNING id (cabecera)
+    - INSERT multi-row VALUES (...), (...), ... (todas las líneas)
+    No hay refresh posterior: la respuesta se construye con los valores ya conocidos.
+    El evento "order.created" (outbox) y el agregado diario van en la misma transacción.
+
+    commit=False deja la transacción abierta para componerla (p.ej. idempotencia).
+    """
+    created_at = datetime.now(timezone.utc)
+    header = {
+        "status": "created",
+        "customer_ref": payload.customer_ref,
+        "currency": payload.currency.upper(),
+        "total_amount": sum((ln.unit_price * ln.quantity for ln in payload.lines)),
+        "line_count": len(payload.lines),
+        "created_at": created_at,
+    }
+
+    try:
+        order_id = db.execute(
+            insert(Order.__table__).values(**header).returning(Order.__table__.c.id)
+        ).scalar_one()
+
+        rows = [
+            {
+                "order_id": order_id,
+                "line_no": i,
+                "sku": ln.sku,
+                "quantity": ln.quantity,
+                "unit_price": ln.unit_price,
+            }
+            for i, ln in enumerate(payload.lines, start=1)
+        ]
+        db.execute(insert(OrderLine.__table__).values(rows))
+
+        detail = OrderDetail(id=order_id, lines=[OrderLineRead(**r) for r in rows], **header)
+        # Transactional outbox: el evento se confirma (o no) junto con el pedido
+        outbox.enqueue(
+            db,
+            aggregate_type="order",
+            aggregate_id=order_id,
+            event_type="order.created",
+            payload=detail.model_dump(mode="json"),
+        )
+        # [PERF] Agregado diario incremental: al final => lock de la fila de stats lo más
+        # corto posible
+        reporting.record_order(
+            db,
+            created_at=created_at,
+            status=header["status"],
+            currency=header["currency"],
+            total_amount=header["total_amount"],
+        )
+        if commit:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return detail
+
+
+# =========================
+# Read path
+# =========================
+
+def list_orders(
+    db: Session,
+    *,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    [PERF] Keyset pagination sobre (created_at, id) con índice compuesto:
+    coste constante por página (sin OFFSET) aunque la tabla tenga millones de filas.
+    [PERF] `columns` (sparse fieldset): SELECT solo de esas columnas (+ la clave del cursor) y
+    filas Row en vez de entidades ORM.
+    """
+    if columns is None:
+        stmt = select(Order)
+    else:
+        keys = dict.fromkeys(("id", "created_at", *columns))
+        stmt = select(*(getattr(Order, c) for c in keys))
+    stmt = stmt.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1)
+    if cursor:
+        after_ts, after_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Order.created_at, Order.id) < tuple_(after_ts, after_id))
+
+    result = db.execute(stmt)
+    rows = list(result.scalars().all() if columns is None else result.all())
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
+
+
+def get_order(db: Session, order_id: int, columns: Optional[Sequence[str]] = None) -> Any:
+    if columns is None:
+        stmt = select(Order).where(Order.id == order_id).options(selectinload(Order.lines))
+        return db.execute(stmt).scalars().first()
+
+    # Sparse fieldset: solo las columnas pedidas; las líneas solo si se piden
+    keys = dict.fromkeys(("id", *(c for c in columns if c != "lines")))
+    row = db.execute(select(*(getattr(Order, c) for c in keys)).where(Order.id == order_id)).first()
+    if row is None:
+        return None
+    order: Dict[str, Any] = dict(row._mapping)
+    if "lines" in columns:
+        order["lines"] = db.execute(
+            select(OrderLine).where(OrderLine.order_id == order_id).order_by(OrderLine.line_no)
+        ).scalars().all()
+    return order
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class OrderLineCreate(BaseModel):
+    sku: str = Field(min_length=1, max_length=64)
+    quantity: int = Field(gt=0, le=100_000)
+    unit_price: Decimal = Field(ge=0, max_digits=12, decimal_places=2)
+
+
+class OrderCreate(BaseModel):
+    customer_ref: Optional[str] = Field(default=None, max_length=64)
+    currency: str = Field(default="EUR", min_length=3, max_length=3)
+    lines: List[OrderLineCreate] = Field(min_length=1, max_length=500)
+
+
+class OrderLineRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    line_no: int
+    sku: str
+    quantity: int
+    unit_price: Decimal
+
+
+class OrderRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    status: str
+    customer_ref: Optional[str] = None
+    currency: str
+    total_amount: Decimal
+    line_count: int
+    created_at: datetime
+
+
+class OrderDetail(OrderRead):
+    lines: List[OrderLineRead]
+
+
+class OrderPage(BaseModel):
+    items: List[OrderRead]
+    next_cursor: Optional[str] = None
+
+
+class DailyOrderStat(BaseModel):
+    day: date
+    status: str
+    currency: str
+    orders: int
+    total_amount: Decimal
+
+
+class DailyOrderReport(BaseModel):
+    date_from: date
+    date_to: date
+    items: List[DailyOrderStat]
+
+
+# =========================
+# Revocaciones (webhook / feed)
+# =========================
+
+class RevocationEntry(BaseModel):
+    type: Literal["jti", "sid"]
+    value: str = Field(min_length=1, max_length=255)
+    expires_at: Optional[int] = None  # epoch s; por defecto REVOCATION_RETENTION_SECONDS
+
+
+class RevocationBatch(BaseModel):
+    revocations: List[RevocationEntry] = Field(min_length=1, max_length=10_000)
+
+
+class RevocationResult(BaseModel):
+    applied: int
+    size: int
@@ -1,24 +1,32 @@
 # services/orders-api/app/security/deps.py
 from __future__ import annotations
 
+import threading
 import time
 import os  # [FIX] para leer OIDC_JWKS_URL si settings no lo expone
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
-import jwt
-from jwt import PyJWKClient
 from jwt.exceptions import (
+    DecodeError,
     ExpiredSignatureError,
+    InvalidAlgorithmError,
     InvalidAudienceError,
     InvalidIssuerError,
     InvalidSignatureError,
+    InvalidTokenError,
+    PyJWKClientError,
     PyJWTError,
 )
 from fastapi import HTTPException, Request
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.security.introspection import TokenIntrospector
+from app.security.revocation import get_revocation_list
+from app.security.shared_auth import SharedAuthCache, build_shared_auth_cache
+from app.security.jwks import KeyEntry, KeyIndex, ParsedToken, allowed_algorithms, validate_claims
 
 
 # =========================
@@ -26,7 +34,26 @@ from app.core.logging import logger
 # =========================
 
 _oidc_cache: Dict[str, Any] = {"config": None, "fetched_at": 0.0}
-_jwk_client_cache: Dict[str, Any] = {"client": None, "jwks_url": None, "fetched_at": 0.0}
+# [PERF] Índice de claves propio (sin PyJWKClient): se sustituye entero en cada descarga
+# (swap atómico)
+# fetched_wall: instante (pared) de la descarga del índice actual; se compara con el JWKS de otros
+# workers
+_key_index_cache: Dict[str, Any] = {"index": None, "retry_at": 0.0, "fetched_wall": 0.0}
+_key_index_lock = threading.Lock()  # get_claims corre en el threadpool de FastAPI
+_introspector_cache: Dict[str, Optional[TokenIntrospector]] = {"introspector": None}
+
+
+@lru_cache(maxsize=1)
+def _get_shared_auth() -> Optional[SharedAuthCache]:
+    # [PERF] Caché compartida por los workers del pod (JWKS + tokens verificados); None si está
+    # desactivada
+    return build_shared_auth_cache(
+        settings.oidc_shared_cache_enabled,
+        settings.oidc_shared_cache_dir,
+        slots=settings.oidc_shared_cache_slots,
+        slot_bytes=settings.oidc_shared_cache_slot_bytes,
+        max_ttl_seconds=settings.oidc_shared_cache_max_ttl_seconds,
+    )
 
 
 def _request_id(req: Request) -> Optional[str]:
@@ -85,42 +112,206 @@ def _get_jwks_url() -> str:
     return jwks_uri
 
 
-def _get_jwk_client() -> PyJWKClient:
-    # CHANGE: cachea el PyJWKClient por jwks_url
-    now = time.time()
-    jwks_url = _get_jwks_url()
+def _get_introspection_url() -> str:
+    override = (settings.oidc_introspection_url or "").strip()
+    if override:
+        return override.rstrip("/")
+
+    endpoint = _fetch_oidc_config().get("introspection_endpoint")
+    if endpoint:
+        return endpoint
+    # Fallback razonable en Keycloak
+    return f"{settings.oidc_issuer_expected}/protocol/openid-connect/token/introspect"
+
+
+def _get_introspector() -> Optional[TokenIntrospector]:
+    # Tokens opacos (integraciones): RFC 7662 contra Keycloak, solo si se habilita.
+    # Lazy + singleton.
+    if not settings.oidc_introspection_enabled:
+        return None
+    introspector = _introspector_cache["introspector"]
+    if introspector is None:
+        introspector = TokenIntrospector(
+            client_id=settings.oidc_introspection_client_id or settings.oidc_audience,
+            client_secret=settings.oidc_introspection_client_secret,
+            max_entries=settings.oidc_introspection_cache_max_entries,
+            max_ttl=settings.oidc_introspection_cache_seconds,
+            negative_ttl=settings.oidc_introspection_negative_cache_seconds,
+            timeout_seconds=settings.oidc_http_timeout_seconds,
+        )
+        _introspector_cache["introspector"] = introspector
+    return introspector
+
+
+def _introspect(token: str) -> Dict[str, Any]:
+    introspector = _get_introspector()
+    if introspector is None:
+        raise DecodeError("Not a JWT and token introspection is disabled")
+    response = introspector.introspect(token, _get_introspection_url)
+    if not response.get("active"):
+        raise InvalidTokenError("Token is not active")
+    # Mismas reglas que un JWT (issuer estricto; aud se valida en require_*)
+    validate_claims(
+        response,
+        issuer=settings.oidc_issuer_expected.rstrip("/"),
+        audience=None,
+        leeway=settings.oidc_leeway_seconds,
+    )
+    return response
 
-    if (
-        _jwk_client_cache["client"] is not None
-        and _jwk_client_cache["jwks_url"] == jwks_url
-        and (now - _jwk_client_cache["fetched_at"]) < settings.oidc_jwks_cache_seconds
-    ):
-        return _jwk_client_cache["client"]
 
-    jwk_client = PyJWKClient(jwks_url)
-    _jwk_client_cache["client"] = jwk_client
-    _jwk_client_cache["jwks_url"] = jwks_url
-    _jwk_client_cache["fetched_at"] = now
-    return jwk_client
+def _fetch_jwks(jwks_url: str) -> Dict[str, Any]:
+    with httpx.Client(timeout=settings.oidc_http_timeout_seconds) as client:
+        resp = client.get(jwks_url)
+        resp.raise_for_status()
+        return resp.json()
+
+
+def _refresh_key_index(seen: Optional[KeyIndex]) -> KeyIndex:
+    # Descarga + parseo de claves UNA vez por JWKS; publica el índice con una sola asignación.
+    # Single-flight: si otro thread ya lo sustituyó mientras esperábamos el lock, se reutiliza.
+    with _key_index_lock:
+        current = _key_index_cache["index"]
+        if current is not None and current is not seen:
+            return current
+
+        jwks_url = _get_jwks_url()
+        shared = _get_shared_auth()
+        if shared is None:
+            return _download_key_index(jwks_url, current, None)
+
+        # Otro worker del pod puede haberlo descargado ya (rotación, arranque, TTL)
+        index = _shared_key_index(shared, jwks_url, current)
+        if index is not None:
+            return index
+        with shared.jwks_fetch_lock() as leader:
+            if not leader:
+                # Hay un worker descargando: esperamos su resultado en vez de ir también a Keycloak
+                deadline = time.monotonic() + settings.oidc_http_timeout_seconds
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    index = _shared_key_index(shared, jwks_url, current)
+                    if index is not None:
+                        return index
+            return _download_key_index(jwks_url, current, shared)
+
+
+def _download_key_index(
+    jwks_url: str, current: Optional[KeyIndex], shared: Optional[SharedAuthCache]
+) -> KeyIndex:
+    try:
+        jwks = _fetch_jwks(jwks_url)
+    except (httpx.HTTPError, ValueError) as e:
+        # Keycloak caído: seguimos con las claves anteriores y no reintentamos en cada request
+        cooldown = settings.oidc_jwks_refresh_cooldown_seconds
+        _key_index_cache["retry_at"] = time.monotonic() + cooldown
+        if current is None:
+            raise PyJWKClientError(f"Failed to fetch JWKS: {e}") from e
+        logger.warning("JWKS refresh failed, keeping previous keys: %s", e)
+        return current
+
+    fetched_wall = time.time()
+    index = KeyIndex(jwks, jwks_url=jwks_url)
+    _key_index_cache["fetched_wall"] = fetched_wall
+    _key_index_cache["index"] = index
+    if shared is not None:
+        shared.store_jwks(jwks_url, jwks, fetched_wall)
+    return index
+
+
+def _shared_key_index(
+    shared: SharedAuthCache, jwks_url: str, current: Optional[KeyIndex]
+) -> Optional[KeyIndex]:
+    # JWKS publicado por otro worker: solo si es más nuevo que el nuestro y no ha caducado
+    published = shared.load_jwks(jwks_url)
+    if published is None:
+        return None
+    jwks, fetched_wall = published
+    age = time.time() - fetched_wall
+    if age >= settings.oidc_jwks_cache_seconds:
+        return None
+    if current is not None and fetched_wall <= _key_index_cache["fetched_wall"]:
+        return None
+    index = KeyIndex(jwks, jwks_url=jwks_url)
+    index.fetched_at = time.monotonic() - max(0.0, age)  # TTL/cooldown cuentan desde la descarga
+    _key_index_cache["fetched_wall"] = fetched_wall
+    _key_index_cache["index"] = index
+    return index
+
+
+def _get_key_index() -> KeyIndex:
+    index = _key_index_cache["index"]
+    if index is not None and (
+        index.age() < settings.oidc_jwks_cache_seconds
+        or time.monotonic() < _key_index_cache["retry_at"]
+    ):
+        return index
+    return _refresh_key_index(index)
+
+
+def warm_up_oidc() -> None:
+    # [PERF] Precarga discovery + JWKS (lifespan) para que la primera request no pague la latencia.
+    # Readiness lo reutiliza para refrescar un JWKS caducado. Bloqueante (httpx.Client): desde un
+    # thread.
+    _refresh_key_index(_key_index_cache["index"])
+
+
+def jwks_status() -> Tuple[bool, bool]:
+    # [PERF] (loaded, stale) sin I/O: readiness lo consulta en cada probe.
+    index = _key_index_cache["index"]
+    if index is None:
+        return False, True
+    return True, index.age() >= settings.oidc_jwks_cache_seconds
+
+
+def _signing_key(kid: Optional[str], alg: str) -> KeyEntry:
+    # JWKS con algoritmos mixtos (RSA/EC/OKP): clave por kid + alg del header.
+    # kid desconocido => posible rotación: un refresh (single-flight, con cooldown) y reintento.
+    index = _get_key_index()
+    key = index.get(kid, alg)
+    if key is None:
+        if (
+            index.age() >= settings.oidc_jwks_refresh_cooldown_seconds
+            and time.monotonic() >= _key_index_cache["retry_at"]
+        ):
+            index = _refresh_key_index(index)
+            key = index.get(kid, alg)
+        if key is None:
+            raise PyJWKClientError(f'No signing key for kid="{kid}" alg="{alg}"')
+    return key
 
 
 def _decode_and_verify(token: str) -> Dict[str, Any]:
-    jwk_client = _get_jwk_client()
-    signing_key = jwk_client.get_signing_key_from_jwt(token).key
-
-    algorithms = [a.strip() for a in settings.oidc_algorithms.split(",") if a.strip()]
+    allowed = allowed_algorithms(settings.oidc_algorithms_list())
 
+    # [PERF] Header decodificado una sola vez: lo usan la selección de clave y la verificación
+    try:
+        parsed = ParsedToken(token)
+    except DecodeError:
+        # No es un JWS => token opaco: introspección (si está habilitada)
+        return _introspect(token)
+    alg = parsed.alg
+    if alg not in allowed:
+        raise InvalidAlgorithmError(f"Algorithm not allowed: {alg}")
+
+    key = _signing_key(parsed.kid, alg)
+    # [PERF] Firma ya verificada por algún worker del pod (la clave sigue publicada: comprobado
+    # arriba)
+    shared = _get_shared_auth()
+    cached = shared.get_claims(token) if shared is not None else None
+    # Solo el alg publicado para esa clave (sin algorithm confusion)
+    claims = cached if cached is not None else key.verify(parsed, alg)
     # CHANGE: validación estricta de issuer; audiencia se valida fuera (según endpoint/servicio)
-    return jwt.decode(
-        token,
-        signing_key,
-        algorithms=algorithms,
+    # (siempre, también con claims de la caché compartida)
+    validate_claims(
+        claims,
         issuer=settings.oidc_issuer_expected.rstrip("/"),
-        options={
-            "verify_aud": False,  # aud se verifica en require_* por endpoint
-        },
+        audience=None,
         leeway=settings.oidc_leeway_seconds,
     )
+    if cached is None and shared is not None:
+        shared.put_claims(token, claims)
+    return claims
 
 
 def _get_bearer_token(req: Request) -> str:
@@ -137,6 +328,9 @@ def get_claims(req: Request) -> Dict[str, Any]:
 
     try:
         claims = _decode_and_verify(token)
+        # Logout / revocación admin: lookup local O(1), sin llamar a Keycloak
+        if get_revocation_list().is_revoked(claims):
+            raise InvalidTokenError("Token has been revoked")
         return claims
     except ExpiredSignatureError:
         raise _unauthorized(request_id, "Token expired")
@@ -0,0 +1,162 @@
+# services/orders-api/app/security/introspection.py
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+from jwt.exceptions import PyJWTError
+
+from app.core import deadline
+from app.core.logging import logger
+
+
+class IntrospectionError(PyJWTError):
+    """
+    El endpoint de introspección no respondió (red / 5xx / credenciales): 401 igual que un JWT
+    inválido.
+    """
+
+
+def cache_key(token: str) -> str:
+    # El token en claro nunca se guarda como clave (logs/heap dumps)
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class IntrospectionCache:
+    """
+    Cache LRU acotada de respuestas RFC 7662 (positivas y negativas). No thread-safe por sí
+    sola: TokenIntrospector la usa bajo su lock.
+
+    - active=true: hasta min(exp del token, max_ttl). Nunca más allá de la vida del token.
+    - active=false: negative_ttl (evita que un token basura/revocado golpee Keycloak en bucle).
+    """
+
+    def __init__(self, *, max_entries: int, max_ttl: float, negative_ttl: float) -> None:
+        self._max_entries = max(1, max_entries)
+        self._max_ttl = max_ttl
+        self._negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def expires_at(self, response: Dict[str, Any], now: float) -> float:
+        if not response.get("active"):
+            return now + self._negative_ttl
+        expires = now + self._max_ttl
+        exp = response.get("exp")
+        if isinstance(exp, (int, float)):
+            expires = min(expires, float(exp))
+        return expires
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, response = entry
+        if time.time() >= expires:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        now = time.time()
+        expires = self.expires_at(response, now)
+        if expires <= now:
+            return
+        self._entries[key] = (expires, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+class _InFlight:
+    __slots__ = ("done", "response", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.response: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class TokenIntrospector:
+    """
+    [PERF] Introspección RFC 7662 (tokens opacos) con cache + single-flight.
+
+    get_claims corre en el threadpool de FastAPI: N threads con el mismo token comparten UNA
+    llamada en vuelo (el primero llama, el resto espera su resultado) y las siguientes salen
+    de la cache hasta que el token caduca => ~1 llamada por token y vida del token.
+    """
+
+    def __init__(
+        self,
+        *,
+        client_id: str,
+        client_secret: Optional[str],
+        max_entries: int = 10_000,
+        max_ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        timeout_seconds: float = 3.0,
+    ) -> None:
+        self._auth = (client_id, client_secret or "")
+        self._timeout = timeout_seconds
+        self._cache = IntrospectionCache(
+            max_entries=max_entries, max_ttl=max_ttl, negative_ttl=negative_ttl
+        )
+        self._inflight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+
+    def introspect(self, token: str, endpoint: Callable[[], str]) -> Dict[str, Any]:
+        key = cache_key(token)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlight()
+                self._inflight[key] = call
+
+        if not leader:
+            # El seguidor no espera más allá de su propio deadline (DeadlineExceeded => 504)
+            if not call.done.wait(timeout=deadline.bounded_timeout(self._timeout + 1.0)):
+                deadline.check()
+                raise IntrospectionError("Token introspection timed out")
+            if call.error is not None:
+                raise call.error
+            return call.response
+
+        try:
+            response = self._post(endpoint(), token)
+            if not isinstance(response, dict):
+                raise ValueError("Invalid introspection response")
+        except (httpx.HTTPError, ValueError) as e:
+            # Errores de transporte NO se cachean: el siguiente request reintenta
+            logger.warning("Token introspection failed: %s", e)
+            call.error = IntrospectionError(f"Token introspection failed: {e}")
+            raise call.error from e
+        else:
+            call.response = response
+            with self._lock:
+                self._cache.put(key, response)
+            return response
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+
+    def _post(self, url: str, token: str) -> Dict[str, Any]:
+        with httpx.Client(timeout=self._timeout) as client:
+            resp = client.post(
+                url,
+                data={"token": token, "token_type_hint": "access_token"},
+                auth=self._auth,
+            )
+            resp.raise_for_status()
+            return resp.json()
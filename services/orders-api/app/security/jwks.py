@@ -0,0 +1,230 @@
+# services/orders-api/app/security/jwks.py
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from jwt import PyJWK
+from jwt.algorithms import Algorithm, get_default_algorithms
+from jwt.exceptions import (
+    DecodeError,
+    ExpiredSignatureError,
+    ImmatureSignatureError,
+    InvalidAlgorithmError,
+    InvalidAudienceError,
+    InvalidIssuedAtError,
+    InvalidIssuerError,
+    InvalidKeyError,
+    InvalidSignatureError,
+    InvalidTokenError,
+    MissingRequiredClaimError,
+    PyJWKError,
+)
+
+# Algoritmos asimétricos soportados (JWS). `none` y HS* quedan fuera a propósito:
+# con HS* un atacante podría firmar con la clave PÚBLICA como secreto (algorithm confusion).
+ASYMMETRIC_ALGORITHMS = (
+    "RS256", "RS384", "RS512",
+    "PS256", "PS384", "PS512",
+    "ES256", "ES384", "ES512",
+    "EdDSA",
+)
+
+_ALGORITHMS: Dict[str, Algorithm] = {
+    name: alg for name, alg in get_default_algorithms().items() if name in ASYMMETRIC_ALGORITHMS
+}
+
+
+def allowed_algorithms(configured: Iterable[str]) -> List[str]:
+    """Filtra OIDC_ALGORITHMS a los asimétricos soportados (en el orden configurado)."""
+    return [a for a in configured if a in ASYMMETRIC_ALGORITHMS]
+
+
+# =========================
+# Token: header parseado UNA vez
+# =========================
+
+def _b64decode(segment: bytes, name: str) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+    except (binascii.Error, ValueError) as e:
+        raise DecodeError(f"Invalid {name} padding") from e
+
+
+class ParsedToken:
+    """
+    [PERF] JWS compacto partido y con el header decodificado una sola vez.
+
+    El mismo objeto sirve para elegir la clave (kid/alg) y para verificar la firma: no hay un
+    `get_unverified_header` + `jwt.decode` que decodifiquen el header dos veces por request.
+    El payload solo se decodifica después de validar la firma.
+    """
+
+    __slots__ = ("header", "signing_input", "payload_segment", "signature")
+
+    def __init__(self, token: str) -> None:
+        raw = token.encode("utf-8")
+        try:
+            signing_input, crypto_segment = raw.rsplit(b".", 1)
+            header_segment, payload_segment = signing_input.split(b".", 1)
+        except ValueError as e:
+            raise DecodeError("Not enough segments") from e
+
+        try:
+            header = json.loads(_b64decode(header_segment, "header"))
+        except ValueError as e:
+            raise DecodeError(f"Invalid header string: {e}") from e
+        if not isinstance(header, dict):
+            raise DecodeError("Invalid header string: must be a json object")
+        if "kid" in header and not isinstance(header["kid"], str):
+            raise InvalidTokenError("Key ID header parameter must be a string")
+        # No soportamos extensiones críticas (incluye b64=false / payload detached)
+        if "crit" in header:
+            raise InvalidTokenError("Unsupported critical header parameters")
+
+        self.header: Dict[str, Any] = header
+        self.signing_input = signing_input
+        self.payload_segment = payload_segment
+        self.signature = _b64decode(crypto_segment, "crypto")
+
+    @property
+    def alg(self) -> Optional[str]:
+        return self.header.get("alg")
+
+    @property
+    def kid(self) -> Optional[str]:
+        return self.header.get("kid")
+
+
+# =========================
+# Índice de claves
+# =========================
+
+class KeyEntry:
+    """Clave pública lista para verificar (objeto `cryptography`) + algoritmos permitidos."""
+
+    __slots__ = ("kid", "key", "algorithms")
+
+    def __init__(self, kid: Optional[str], key: Any, algorithms: Dict[str, Algorithm]) -> None:
+        self.kid = kid
+        self.key = key
+        self.algorithms = algorithms
+
+    def verify(self, token: ParsedToken, alg: str) -> Dict[str, Any]:
+        """Verifica la firma con `alg` y devuelve el payload (dict)."""
+        algorithm = self.algorithms.get(alg)
+        if algorithm is None:
+            raise InvalidAlgorithmError(f'Key "{self.kid}" is not published for alg "{alg}"')
+        if not algorithm.verify(token.signing_input, self.key, token.signature):
+            raise InvalidSignatureError("Signature verification failed")
+        try:
+            payload = json.loads(_b64decode(token.payload_segment, "payload"))
+        except ValueError as e:
+            raise DecodeError(f"Invalid payload string: {e}") from e
+        if not isinstance(payload, dict):
+            raise DecodeError("Invalid payload string: must be a json object")
+        return payload
+
+
+class KeyIndex:
+    """
+    [PERF] Índice kid -> KeyEntry construido UNA vez por descarga del JWKS.
+
+    Inmutable: el verificador lo sustituye entero (una asignación de referencia = swap atómico),
+    así que una request nunca ve un índice a medio construir. Cada clave solo es válida para el
+    `alg` que publica el JWKS (Keycloak publica un kid por proveedor/algoritmo), así que un
+    token no puede usar una clave RSA con ES256 ni una EC con RS256.
+    """
+
+    def __init__(self, jwks: Dict[str, Any], *, jwks_url: Optional[str] = None) -> None:
+        self.jwks_url = jwks_url
+        self.fetched_at = time.monotonic()
+        self._by_kid: Dict[str, KeyEntry] = {}
+        self._by_alg: Dict[str, List[KeyEntry]] = {}
+        for data in jwks.get("keys") or []:
+            if not isinstance(data, dict) or data.get("use") not in (None, "sig"):
+                continue
+            try:
+                jwk = PyJWK(data)
+            except (PyJWKError, InvalidKeyError):
+                # kty/crv no soportado o clave malformada: se ignora esa clave, no el set entero
+                continue
+            alg = jwk.algorithm_name
+            if alg not in _ALGORITHMS:
+                continue
+            entry = KeyEntry(jwk.key_id, jwk.key, {alg: _ALGORITHMS[alg]})
+            if jwk.key_id:
+                self._by_kid.setdefault(jwk.key_id, entry)
+            self._by_alg.setdefault(alg, []).append(entry)
+
+    def get(self, kid: Optional[str], alg: str) -> Optional[KeyEntry]:
+        if kid:
+            entry = self._by_kid.get(kid)
+            return entry if entry is not None and alg in entry.algorithms else None
+        # Token sin kid: solo si hay UNA clave para ese alg (sin ambigüedad)
+        candidates = self._by_alg.get(alg, [])
+        return candidates[0] if len(candidates) == 1 else None
+
+    def algorithms(self) -> List[str]:
+        return sorted(self._by_alg)
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+# =========================
+# Claims registrados (misma semántica que jwt.decode)
+# =========================
+
+def validate_claims(
+    payload: Dict[str, Any],
+    *,
+    issuer: Optional[str],
+    audience: Optional[str],
+    leeway: float,
+) -> None:
+    now = time.time()
+
+    if "iat" in payload:
+        try:
+            iat = int(payload["iat"])
+        except (TypeError, ValueError, OverflowError):
+            raise InvalidIssuedAtError("Issued At claim (iat) must be an integer.") from None
+        if iat > now + leeway:
+            raise ImmatureSignatureError("The token is not yet valid (iat)")
+
+    if "nbf" in payload:
+        try:
+            nbf = int(payload["nbf"])
+        except (TypeError, ValueError, OverflowError):
+            raise DecodeError("Not Before claim (nbf) must be an integer.") from None
+        if nbf > now + leeway:
+            raise ImmatureSignatureError("The token is not yet valid (nbf)")
+
+    if "exp" in payload:
+        try:
+            exp = int(payload["exp"])
+        except (TypeError, ValueError, OverflowError):
+            raise DecodeError("Expiration Time claim (exp) must be an integer.") from None
+        if exp <= now - leeway:
+            raise ExpiredSignatureError("Signature has expired")
+
+    if issuer is not None:
+        if "iss" not in payload:
+            raise MissingRequiredClaimError("iss")
+        if payload["iss"] != issuer:
+            raise InvalidIssuerError("Invalid issuer")
+
+    if audience is not None:
+        aud = payload.get("aud")
+        if not aud:
+            raise MissingRequiredClaimError("aud")
+        if isinstance(aud, str):
+            aud = [aud]
+        if not isinstance(aud, list) or any(not isinstance(a, str) for a in aud):
+            raise InvalidAudienceError("Invalid claim format in token")
+        if audience not in aud:
+            raise InvalidAudienceError("Audience doesn't match")
@@ -0,0 +1,118 @@
+# services/orders-api/app/security/revocation.py
+"""
+Lista local de revocaciones (jti / sid) consultada tras verificar cada token.
+
+- O(1) por request: dos dicts digest -> expiración; sin revocaciones, una comparación.
+- Compacta: se guarda un digest de 12 bytes por id (no el string), con la expiración en int.
+- Incremental: deltas por webhook (POST /v1/internal/revocations, RBAC) y/o poll de un feed
+  (REVOCATION_FEED_URL?since=<cursor>) cada pocos segundos.
+- Cada entrada caduca cuando ya no puede existir un token vivo al que aplique
+  (expires_at del evento o REVOCATION_RETENTION_SECONDS).
+
+Ojo con N workers: el webhook solo llega a un proceso; para que la revocación aplique en
+todos, usar el poll (cada worker consume el feed) o hacer fan-out del webhook.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.logging import logger
+
+REVOCATION_KINDS = ("jti", "sid")
+
+
+def _digest(value: str) -> bytes:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=12).digest()
+
+
+class RevocationList:
+    def __init__(self, *, retention_seconds: float) -> None:
+        self._retention = retention_seconds
+        self._entries: Dict[str, Dict[bytes, int]] = {kind: {} for kind in REVOCATION_KINDS}
+        self.cursor: Optional[str] = None
+
+    def __len__(self) -> int:
+        return sum(len(e) for e in self._entries.values())
+
+    def revoke(self, kind: str, value: str, expires_at: Optional[int] = None) -> None:
+        if kind not in self._entries:
+            raise ValueError(f"Unsupported revocation type: {kind}")
+        expires = int(expires_at) if expires_at else int(time.time() + self._retention)
+        self._entries[kind][_digest(value)] = expires
+
+    def apply(self, revocations: Iterable[Mapping[str, Any]]) -> int:
+        applied = 0
+        for item in revocations:
+            self.revoke(item["type"], item["value"], item.get("expires_at"))
+            applied += 1
+        self.prune()
+        return applied
+
+    def is_revoked(self, claims: Mapping[str, Any]) -> bool:
+        # [PERF] Hot path: sin revocaciones no se calcula ningún digest
+        jti_entries, sid_entries = self._entries["jti"], self._entries["sid"]
+        if jti_entries:
+            jti = claims.get("jti")
+            if isinstance(jti, str) and _digest(jti) in jti_entries:
+                return True
+        if sid_entries:
+            sid = claims.get("sid")
+            if isinstance(sid, str) and _digest(sid) in sid_entries:
+                return True
+        return False
+
+    def prune(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        removed = 0
+        for kind, entries in self._entries.items():
+            expired = [k for k, exp in entries.items() if exp <= now]
+            for k in expired:
+                del entries[k]
+            removed += len(expired)
+        return removed
+
+
+@lru_cache(maxsize=1)
+def get_revocation_list() -> RevocationList:
+    return RevocationList(retention_seconds=settings.revocation_retention_seconds)
+
+
+# =========================
+# Poll incremental del feed
+# =========================
+
+async def _fetch_feed(url: str, cursor: Optional[str]) -> Dict[str, Any]:
+    params = {"since": cursor} if cursor else {}
+    async with httpx.AsyncClient(timeout=settings.oidc_http_timeout_seconds) as client:
+        r = await client.get(url, params=params)
+        r.raise_for_status()
+        return r.json()
+
+
+async def poll_once(revocations: RevocationList, url: str) -> int:
+    """Un ciclo de poll: pide los deltas desde el último cursor y los aplica."""
+    page = await _fetch_feed(url, revocations.cursor)
+    applied = revocations.apply(page.get("revocations") or [])
+    if page.get("cursor"):
+        revocations.cursor = str(page["cursor"])
+    return applied
+
+
+async def poll_loop() -> None:
+    """Tarea de fondo (lifespan): consume el feed de revocaciones cada N segundos."""
+    revocations = get_revocation_list()
+    while True:
+        try:
+            applied = await poll_once(revocations, settings.revocation_feed_url)
+            if applied:
+                logger.info("revocations applied: %s", applied)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("revocation poll failed: %s", e)
+        await asyncio.sleep(settings.revocation_poll_interval_seconds)
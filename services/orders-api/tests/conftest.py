@@ -0,0 +1,67 @@
+# services/orders-api/tests/conftest.py
+# Tests offline: SQLite en memoria + claims inyectados (sin Keycloak ni PostgreSQL).
+from typing import Any, Dict, Iterable
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models  # noqa: F401  (registra tablas en Base.metadata)
+from app.core.db import Base, get_db
+from app.main import app
+
+
+@pytest.fixture
+def engine():
+    eng = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(eng)
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def db_session(session_factory):
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _claims(roles: Iterable[str]) -> Dict[str, Any]:
+    return {
+        "sub": "user-1",
+        "azp": "asrp-frontend",
+        "resource_access": {"asrp-orders": {"roles": list(roles)}},
+    }
+
+
+@pytest.fixture
+def api_client(monkeypatch, session_factory):
+    """TestClient con get_db -> SQLite y roles orders_read + orders_write."""
+    from app.security import deps
+
+    def _get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(deps, "get_claims", lambda req: _claims(["orders_read", "orders_write"]))
+    app.dependency_overrides[get_db] = _get_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
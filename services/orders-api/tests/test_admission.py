@@ -0,0 +1,138 @@
+# services/orders-api/tests/test_admission.py
+# Unit tests: admission control (límite in-flight, cola acotada, AIMD, 503 + Retry-After, métricas).
+import asyncio
+import contextlib
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.main import app as orders_app
+from app.middlewares import admission
+from app.middlewares.admission import AdaptiveLimit, AdmissionControlMiddleware, AdmissionLimiter
+
+
+def _limiter(limit=1, max_queue=1, queue_timeout=0.2):
+    return AdmissionLimiter(
+        "t", AdaptiveLimit(limit), max_queue=max_queue, queue_timeout=queue_timeout
+    )
+
+
+def test_limiter_queues_then_rejects_when_queue_is_full():
+    async def _run():
+        limiter = _limiter(limit=1, max_queue=1, queue_timeout=1.0)
+        assert await limiter.acquire() is True
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        assert await limiter.acquire() is False  # cola llena => rechazo inmediato
+
+        limiter.release(0.01)  # hand-off directo al que esperaba
+        assert await waiter is True
+        assert (limiter.in_flight, limiter.queued, limiter.rejected_total) == (1, 0, 1)
+
+    asyncio.run(_run())
+
+
+def test_limiter_rejects_after_queue_timeout():
+    async def _run():
+        limiter = _limiter(limit=1, max_queue=4, queue_timeout=0.05)
+        await limiter.acquire()
+        assert await limiter.acquire() is False
+        assert limiter.queued == 0 and limiter.rejected_total == 1
+
+    asyncio.run(_run())
+
+
+def test_aimd_backs_off_on_slow_responses_and_recovers():
+    limit = AdaptiveLimit(20, min_limit=2, latency_target_ms=100)
+    limit.on_sample(0.5, in_flight=20, now=10.0)
+    assert limit.value == 18
+    limit.on_sample(0.5, in_flight=20, now=10.01)  # misma ventana: no vuelve a bajar
+    assert limit.value == 18
+
+    for _ in range(200):
+        limit.on_sample(0.01, in_flight=18)
+    assert limit.value == 20  # sube aditivamente hasta el máximo configurado
+
+    fixed = AdaptiveLimit(8, latency_target_ms=0)
+    fixed.on_sample(5.0, in_flight=8)
+    assert fixed.value == 8
+
+
+def test_cancelled_slow_request_still_feeds_aimd():
+    async def _hang(scope, receive, send):
+        await asyncio.sleep(10)
+
+    async def _run():
+        middleware = AdmissionControlMiddleware(
+            _hang, service="test-cancel", default_limit=10, latency_target_ms=10
+        )
+        scope = {"type": "http", "path": "/slow", "method": "GET"}
+        # Cancelada por el deadline: la muestra (lenta) cuenta igual
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(middleware(scope, None, None), timeout=0.05)
+        return middleware.limiter_for("/slow")
+
+    limiter = asyncio.run(_run())
+    assert limiter.in_flight == 0 and limiter.limit.value == 9
+
+def _slow_app(gate: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await gate.wait()
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        service="test-api",
+        default_limit=1,
+        max_queue=0,
+        retry_after_seconds=2,
+    )
+    return app
+
+
+def test_middleware_sheds_load_with_503_and_exempts_health():
+    async def _run():
+        gate = asyncio.Event()
+        transport = httpx.ASGITransport(app=_slow_app(gate))
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            first = asyncio.create_task(client.get("/slow"))
+            await asyncio.sleep(0.05)
+
+            shed = await client.get("/slow")
+            health = await client.get("/health")
+            gate.set()
+            return shed, health, await first
+
+    shed, health, first = asyncio.run(_run())
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "2"
+    assert shed.json()["error"] == "overloaded"
+    assert health.status_code == 200 and first.status_code == 200
+
+    text = admission.render_metrics()
+    assert 'asrp_admission_rejected_total{service="test-api",route="default"} 1' in text
+    assert 'asrp_admission_in_flight{service="test-api",route="default"} 0' in text
+
+
+def test_route_limits_pick_longest_prefix():
+    assert admission.parse_route_limits("/v1=10, /v1/products=4,bogus") == [
+        ("/v1/products", 4),
+        ("/v1", 10),
+    ]
+
+
+def test_metrics_endpoint_exposes_gauges():
+    with TestClient(orders_app) as client:
+        r = client.get("/metrics")
+    assert r.status_code == 200
+    assert "# TYPE asrp_admission_in_flight gauge" in r.text
+    assert 'route="/v1/orders"' in r.text
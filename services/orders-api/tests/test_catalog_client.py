@@ -0,0 +1,150 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.clients.catalog import CatalogAuthError, CatalogClient, CatalogUnavailable, CircuitBreaker
+
+
+def _transport(calls, *, status_code=200):
+    def handler(request: httpx.Request) -> httpx.Response:
+        skus = request.url.params.get_list("sku")
+        calls.append(skus)
+        if status_code != 200:
+            return httpx.Response(status_code)
+        known = [s for s in skus if not s.startswith("UNKNOWN")]
+        products = [{"id": i, "sku": s, "name": s} for i, s in enumerate(known)]
+        return httpx.Response(200, json=products)
+
+    return httpx.MockTransport(handler)
+
+
+def _client(calls, **kwargs) -> CatalogClient:
+    status_code = kwargs.pop("status_code", 200)
+    transport = _transport(calls, status_code=status_code)
+    return CatalogClient("http://catalog", transport=transport, **kwargs)
+
+
+def test_100_line_order_costs_one_round_trip():
+    calls = []
+
+    async def run():
+        client = _client(calls)
+        try:
+            return await client.missing_skus([f"SKU-{i}" for i in range(100)] + ["UNKNOWN-1"])
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == ["UNKNOWN-1"]
+    assert len(calls) == 1
+    assert len(calls[0]) == 101
+
+
+def test_concurrent_lookups_are_coalesced_and_cached():
+    calls = []
+
+    async def run():
+        client = _client(calls, batch_window_seconds=0.01)
+        try:
+            await asyncio.gather(*(client.get_products([f"SKU-{i % 5}"]) for i in range(50)))
+            await client.get_products(["SKU-0", "SKU-1"])  # cache hit
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    assert sorted(calls[0]) == [f"SKU-{i}" for i in range(5)]
+
+
+def test_circuit_breaker_fails_fast_after_threshold():
+    calls = []
+
+    async def run():
+        client = _client(calls, status_code=503, breaker=CircuitBreaker(2, reset_seconds=60))
+        try:
+            for i in range(5):
+                with pytest.raises(CatalogUnavailable):
+                    await client.get_products([f"SKU-{i}"])
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_token_provider_failure_does_not_open_the_breaker():
+    calls = []
+    token_ok = False
+
+    async def token():
+        if not token_ok:
+            raise httpx.ConnectError("idp down")
+        return "t"
+
+    async def run():
+        nonlocal token_ok
+        breaker = CircuitBreaker(1, reset_seconds=60)
+        client = _client(calls, breaker=breaker, token_provider=token)
+        try:
+            for i in range(3):
+                with pytest.raises(CatalogAuthError):
+                    await client.get_products([f"SKU-{i}"])
+            assert breaker.state == "closed"
+            token_ok = True
+            await client.get_products(["SKU-9"])
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    assert calls == [["SKU-9"]]
+
+
+
+def test_create_order_rejects_unknown_skus(api_client, monkeypatch):
+    from app.main import app
+
+    class _FakeCatalog:
+        async def missing_skus(self, skus):
+            return [s for s in skus if s.startswith("UNKNOWN")]
+
+    monkeypatch.setattr("app.core.config.settings.catalog_validation_enabled", True)
+    monkeypatch.setattr(app.state, "catalog_client", _FakeCatalog(), raising=False)
+
+    body = {
+        "lines": [
+            {"sku": "SKU-1", "quantity": 1, "unit_price": "1.00"},
+            {"sku": "UNKNOWN-9", "quantity": 1, "unit_price": "1.00"},
+        ]
+    }
+    r = api_client.post("/v1/orders", json=body)
+    assert r.status_code == 422
+    assert r.json()["detail"]["skus"] == ["UNKNOWN-9"]
+
+
+def test_idempotent_replay_does_not_call_catalog(api_client, monkeypatch):
+    from app import idempotency
+    from app.main import app
+
+    calls = []
+
+    class _FakeCatalog:
+        async def missing_skus(self, skus):
+            calls.append(skus)
+            if len(calls) > 1:
+                raise CatalogUnavailable("catalog down")
+            return []
+
+    monkeypatch.setattr("app.core.config.settings.catalog_validation_enabled", True)
+    monkeypatch.setattr(app.state, "catalog_client", _FakeCatalog(), raising=False)
+    idempotency.front_cache.clear()
+
+    body = {"lines": [{"sku": "SKU-1", "quantity": 1, "unit_price": "1.00"}]}
+    h = {"Idempotency-Key": "k-catalog"}
+    first = api_client.post("/v1/orders", json=body, headers=h)
+    idempotency.front_cache.clear()  # replay desde la tabla, con catalog-api caído
+    again = api_client.post("/v1/orders", json=body, headers=h)
+
+    assert first.status_code == again.status_code == 201
+    assert again.headers["Idempotency-Replayed"] == "true"
+    assert len(calls) == 1
+    idempotency.front_cache.clear()
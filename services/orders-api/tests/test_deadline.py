@@ -0,0 +1,137 @@
+# services/orders-api/tests/test_deadline.py
+# Unit tests: deadline del request (504, propagación a catalog-api, breaker, transacciones DB).
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.clients.catalog import CatalogClient
+from app.core import db, deadline
+from app.main import app
+
+
+def _slow_catalog(seen_headers, delay=0.0):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen_headers.append(request.headers.get(deadline.TIMEOUT_HEADER))
+        await asyncio.sleep(delay)
+        skus = request.url.params.get_list("sku")
+        return httpx.Response(200, json=[{"id": i, "sku": s} for i, s in enumerate(skus)])
+
+    return httpx.MockTransport(handler)
+
+
+def test_remaining_budget_is_propagated_to_catalog():
+    seen = []
+
+    async def run():
+        client = CatalogClient("http://catalog", transport=_slow_catalog(seen))
+        token = deadline.start(1500)
+        try:
+            await client.get_products(["SKU-1"])
+        finally:
+            deadline.reset(token)
+            await client.aclose()
+
+    asyncio.run(run())
+    assert 0 < int(seen[0]) <= 1500
+
+
+def test_exhausted_budget_does_not_open_the_breaker():
+    seen = []
+
+    async def run():
+        client = CatalogClient(
+            "http://catalog",
+            transport=_slow_catalog(seen, delay=0.5),
+            timeout_seconds=2.0,
+            batch_window_seconds=0,
+        )
+        token = deadline.start(50)
+        try:
+            with pytest.raises(deadline.DeadlineExceeded):
+                await client.get_products(["SKU-1"])
+        finally:
+            deadline.reset(token)
+        try:
+            return client.breaker.allow(), client.breaker._failures
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == (True, 0)
+
+
+def test_cancelled_request_does_not_cancel_shared_lookup():
+    seen = []
+
+    async def run():
+        client = CatalogClient(
+            "http://catalog",
+            transport=_slow_catalog(seen, delay=0.05),
+            batch_window_seconds=0.01,
+        )
+        try:
+            impatient = asyncio.create_task(client.get_products(["SKU-1"]))
+            patient = asyncio.create_task(client.get_products(["SKU-1"]))
+            await asyncio.sleep(0.02)
+            impatient.cancel()
+            return await patient
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run())["SKU-1"]["sku"] == "SKU-1"
+    assert len(seen) == 1
+
+
+def test_expired_budget_blocks_new_transactions():
+    factory = sessionmaker(bind=create_engine("sqlite://"))
+    event.listen(factory, "after_begin", db._apply_request_deadline)
+    session = factory()
+    token = deadline.start(-1)
+    try:
+        with pytest.raises(deadline.DeadlineExceeded):
+            session.execute(text("SELECT 1"))
+    finally:
+        deadline.reset(token)
+        session.close()
+
+
+def test_zero_budget_is_rejected_with_504():
+    with TestClient(app) as client:
+        r = client.get("/v1/orders", headers={"X-Request-Timeout-Ms": "0"})
+        assert r.status_code == 504
+        assert r.json()["error"] == "deadline_exceeded"
+        assert client.get("/health", headers={"X-Request-Timeout-Ms": "0"}).status_code == 200
+
+
+def test_half_open_probe_hitting_the_caller_deadline_releases_the_breaker():
+    from app.clients.catalog import CircuitBreaker
+
+    seen = []
+
+    async def run():
+        breaker = CircuitBreaker(1, reset_seconds=0.0)
+        breaker.record_failure()  # abierto; reset 0 => half-open
+        client = CatalogClient(
+            "http://catalog",
+            transport=_slow_catalog(seen, delay=0.5),
+            timeout_seconds=2.0,
+            batch_window_seconds=0,
+            breaker=breaker,
+        )
+        token = deadline.start(50)
+        try:
+            with pytest.raises(deadline.DeadlineExceeded):
+                await client.get_products(["SKU-1"])  # la sonda agota el deadline
+        finally:
+            deadline.reset(token)
+        try:
+            # Sin veredicto: la siguiente llamada vuelve a sondear (y con éxito cierra el circuito)
+            await client.get_products(["SKU-2"])
+            return breaker.state, breaker.probing
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == ("closed", False)
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import idempotency
+from app.models import IdempotencyKey, Order
+
+
+@pytest.fixture(autouse=True)
+def _clear_front_cache():
+    idempotency.front_cache.clear()
+    yield
+    idempotency.front_cache.clear()
+
+
+_BODY = {"lines": [{"sku": "SKU-001", "quantity": 1, "unit_price": "5.00"}]}
+
+
+def test_replay_returns_stored_response_without_new_order(api_client, db_session):
+    h = {"Idempotency-Key": "k-1"}
+    r1 = api_client.post("/v1/orders", json=_BODY, headers=h)
+    r2 = api_client.post("/v1/orders", json=_BODY, headers=h)
+
+    assert r1.status_code == r2.status_code == 201
+    assert r1.content == r2.content
+    assert r1.headers["Idempotency-Replayed"] == "false"
+    assert r2.headers["Idempotency-Replayed"] == "true"
+    assert db_session.query(Order).count() == 1
+
+
+def test_replay_from_db_when_front_cache_is_cold(api_client, db_session):
+    h = {"Idempotency-Key": "k-2"}
+    r1 = api_client.post("/v1/orders", json=_BODY, headers=h)
+    idempotency.front_cache.clear()
+    r2 = api_client.post("/v1/orders", json=_BODY, headers=h)
+
+    assert r2.headers["Idempotency-Replayed"] == "true"
+    assert r1.json()["id"] == r2.json()["id"]
+    assert db_session.query(Order).count() == 1
+
+
+def test_same_key_different_payload_is_rejected(api_client):
+    h = {"Idempotency-Key": "k-3"}
+    assert api_client.post("/v1/orders", json=_BODY, headers=h).status_code == 201
+    other = {"lines": [{"sku": "SKU-999", "quantity": 3, "unit_price": "1.00"}]}
+    assert api_client.post("/v1/orders", json=other, headers=h).status_code == 422
+
+
+def test_failed_write_does_not_leave_a_key_behind(db_session):
+    def _boom():
+        raise RuntimeError("write failed")
+
+    with pytest.raises(RuntimeError):
+        idempotency.execute_once(
+            db_session, scope="u", key="k-4", body_fingerprint="x", handler=_boom
+        )
+    assert db_session.query(IdempotencyKey).count() == 0
+
+
+def test_expired_key_is_reclaimed_and_purged(db_session):
+    idempotency.execute_once(
+        db_session, scope="u", key="k-5", body_fingerprint="a", handler=lambda: (201, "{}")
+    )
+    db_session.query(IdempotencyKey).update(
+        {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}
+    )
+    db_session.commit()
+    idempotency.front_cache.clear()
+
+    # Expirada => se reclama como nueva aunque cambie el payload
+    _, replayed = idempotency.execute_once(
+        db_session, scope="u", key="k-5", body_fingerprint="b", handler=lambda: (201, "{}")
+    )
+    assert replayed is False
+
+    db_session.query(IdempotencyKey).update(
+        {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}
+    )
+    db_session.commit()
+    assert idempotency.purge_expired(db_session) == 1
+    assert db_session.query(IdempotencyKey).count() == 0
@@ -0,0 +1,122 @@
+# services/orders-api/tests/test_introspection.py
+# Unit tests (sin Keycloak): introspección RFC 7662 para tokens opacos, cache + single-flight.
+import threading
+import time
+
+import httpx
+import pytest
+from jwt.exceptions import InvalidIssuerError, PyJWTError
+
+from app.core.config import settings
+from app.security import deps
+from app.security.introspection import IntrospectionCache, IntrospectionError, TokenIntrospector
+
+ISSUER = "http://keycloak.test/realms/asrp"
+OPAQUE = "opaque-3f9c2a7d1e"
+
+
+class _FakeIntrospectionEndpoint:
+    def __init__(self):
+        self.calls = 0
+        self.responses = {}
+
+    def __call__(self, url, token):
+        self.calls += 1
+        time.sleep(0.05)  # los threads concurrentes se solapan con la llamada en vuelo
+        return self.responses.get(token, {"active": False})
+
+
+def _active(**overrides):
+    now = int(time.time())
+    return {
+        "active": True,
+        "iss": ISSUER,
+        "aud": "asrp-orders",
+        "sub": "integration-1",
+        "exp": now + 300,
+        **overrides,
+    }
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    endpoint = _FakeIntrospectionEndpoint()
+    introspector = TokenIntrospector(client_id="asrp-orders", client_secret="s3cret")
+    monkeypatch.setattr(introspector, "_post", endpoint)
+    monkeypatch.setattr(settings, "oidc_introspection_enabled", True)
+    monkeypatch.setattr(settings, "oidc_introspection_url", "http://keycloak.test/introspect")
+    monkeypatch.setattr(settings, "oidc_issuer_expected_override", ISSUER)
+    monkeypatch.setitem(deps._introspector_cache, "introspector", introspector)
+    return endpoint
+
+
+def test_opaque_token_is_introspected_once_then_cached(endpoint):
+    endpoint.responses[OPAQUE] = _active()
+    for _ in range(5):
+        assert deps._decode_and_verify(OPAQUE)["sub"] == "integration-1"
+    assert endpoint.calls == 1
+
+
+def test_concurrent_requests_share_one_inflight_call(endpoint):
+    endpoint.responses[OPAQUE] = _active()
+    results = []
+
+    def _worker():
+        results.append(deps._decode_and_verify(OPAQUE))
+
+    threads = [threading.Thread(target=_worker) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(results) == 16
+    assert endpoint.calls == 1
+
+
+def test_inactive_token_is_rejected_and_negatively_cached(endpoint):
+    for _ in range(3):
+        with pytest.raises(PyJWTError):
+            deps._decode_and_verify("revoked-token")
+    assert endpoint.calls == 1
+
+
+def test_introspected_issuer_is_validated(endpoint):
+    endpoint.responses[OPAQUE] = _active(iss="http://evil.test/realms/asrp")
+    with pytest.raises(InvalidIssuerError):
+        deps._decode_and_verify(OPAQUE)
+
+
+def test_transport_errors_are_not_cached(endpoint, monkeypatch):
+    introspector = deps._introspector_cache["introspector"]
+
+    def _down(url, token):
+        raise httpx.ConnectError("keycloak down")
+
+    monkeypatch.setattr(introspector, "_post", _down)
+    with pytest.raises(IntrospectionError):
+        deps._decode_and_verify(OPAQUE)
+
+    endpoint.responses[OPAQUE] = _active()
+    monkeypatch.setattr(introspector, "_post", endpoint)
+    assert deps._decode_and_verify(OPAQUE)["sub"] == "integration-1"
+
+
+def test_opaque_token_rejected_without_call_when_disabled(endpoint, monkeypatch):
+    monkeypatch.setattr(settings, "oidc_introspection_enabled", False)
+    with pytest.raises(PyJWTError):
+        deps._decode_and_verify(OPAQUE)
+    assert endpoint.calls == 0
+
+
+def test_cache_ttl_is_bounded_by_token_expiry_and_size():
+    cache = IntrospectionCache(max_entries=2, max_ttl=300, negative_ttl=30)
+    now = time.time()
+    assert cache.expires_at({"active": True, "exp": now + 5}, now) == now + 5
+    assert cache.expires_at({"active": True, "exp": now + 3600}, now) == now + 300
+    assert cache.expires_at({"active": False}, now) == now + 30
+
+    cache.put("expired", {"active": True, "exp": now - 1})
+    assert cache.get("expired") is None
+    for key in ("a", "b", "c"):
+        cache.put(key, {"active": True, "exp": now + 60})
+    assert len(cache) == 2 and cache.get("a") is None
@@ -0,0 +1,172 @@
+# services/orders-api/tests/test_jwks.py
+# Unit tests (sin Keycloak): JWKS con algoritmos mixtos, selección por kid + alg, índice de claves.
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm, RSAAlgorithm
+from jwt.exceptions import ExpiredSignatureError, InvalidIssuerError, PyJWTError
+
+from app.core.config import settings
+from app.security import deps
+
+ISSUER = "http://keycloak.test/realms/asrp"
+AUDIENCE = "asrp-orders"
+ALL_ALGS = ["RS256", "ES256", "EdDSA"]
+
+_KEYS = {
+    "RS256": (
+        "rsa-1", rsa.generate_private_key(public_exponent=65537, key_size=2048), RSAAlgorithm
+    ),
+    "ES256": ("ec-1", ec.generate_private_key(ec.SECP256R1()), ECAlgorithm),
+    "EdDSA": ("ed-1", ed25519.Ed25519PrivateKey.generate(), OKPAlgorithm),
+}
+
+
+def _jwks(keys_by_alg=None):
+    keys = []
+    for alg, (kid, key, algorithm) in (keys_by_alg or _KEYS).items():
+        jwk = json.loads(algorithm.to_jwk(key.public_key()))
+        jwk.update({"kid": kid, "alg": alg, "use": "sig"})
+        keys.append(jwk)
+    return {"keys": keys}
+
+
+def _token(alg, *, kid=None, key=None, **overrides):
+    default_kid, default_key, _ = _KEYS.get(alg, (None, None, None))
+    now = int(time.time())
+    claims = {"iss": ISSUER, "aud": AUDIENCE, "sub": "u1", "iat": now, "exp": now + 60, **overrides}
+    headers = {"kid": kid or default_kid}
+    return jwt.encode(claims, key or default_key, algorithm=alg, headers=headers)
+
+
+class _FakeJWKSEndpoint:
+    def __init__(self):
+        self.jwks = _jwks()
+        self.fetches = 0
+
+    def __call__(self, jwks_url):
+        self.fetches += 1
+        time.sleep(0.05)  # los threads concurrentes llegan al lock mientras "descarga"
+        return self.jwks
+
+
+@pytest.fixture
+def endpoint():
+    return _FakeJWKSEndpoint()
+
+
+@pytest.fixture
+def verifier(monkeypatch, endpoint):
+    # _verify cambia OIDC_ALGORITHMS por test; monkeypatch restaura el original
+    monkeypatch.setattr(settings, "oidc_algorithms", settings.oidc_algorithms)
+    monkeypatch.setattr(deps, "_fetch_jwks", endpoint)
+    monkeypatch.setattr(deps, "_get_jwks_url", lambda: "http://keycloak.test/certs")
+    monkeypatch.setitem(deps._key_index_cache, "index", None)
+    monkeypatch.setitem(deps._key_index_cache, "retry_at", 0.0)
+    monkeypatch.setattr(settings, "oidc_issuer_expected_override", ISSUER)
+    return deps
+
+
+def _verify(verifier, token, algorithms=ALL_ALGS):
+    settings.oidc_algorithms = ",".join(algorithms)
+    return verifier._decode_and_verify(token)
+
+
+@pytest.mark.parametrize("alg", ALL_ALGS)
+def test_mixed_jwks_verifies_each_algorithm(verifier, alg):
+    assert _verify(verifier, _token(alg))["sub"] == "u1"
+
+
+def test_key_index_is_built_once_per_jwks(verifier, endpoint):
+    _verify(verifier, _token("RS256"))
+    index = verifier._key_index_cache["index"]
+    _verify(verifier, _token("ES256"))
+    assert verifier._key_index_cache["index"] is index
+    assert endpoint.fetches == 1
+    assert index.algorithms() == ["ES256", "EdDSA", "RS256"]
+
+
+def test_hs256_with_public_key_as_secret_is_rejected(verifier):
+    _, rsa_key, _ = _KEYS["RS256"]
+    pem = rsa_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    # PyJWT se niega a firmarlo: lo montamos a mano (header.payload.HMAC(pem))
+    def _b64(data):
+        return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+    header = _b64(json.dumps({"alg": "HS256", "typ": "JWT", "kid": "rsa-1"}).encode())
+    claims = {"iss": ISSUER, "aud": AUDIENCE, "sub": "attacker", "exp": int(time.time()) + 60}
+    payload = _b64(json.dumps(claims).encode())
+    signature = _b64(hmac.new(pem, header + b"." + payload, hashlib.sha256).digest())
+    forged = b".".join([header, payload, signature]).decode()
+    with pytest.raises(PyJWTError):
+        _verify(verifier, forged, algorithms=ALL_ALGS + ["HS256"])
+
+
+def test_key_is_only_valid_for_its_published_alg(verifier):
+    # Firmado con EC pero apuntando al kid RSA: la clave RSA no está publicada para ES256
+    with pytest.raises(PyJWTError):
+        _verify(verifier, _token("ES256", kid="rsa-1"))
+
+
+def test_algorithm_not_in_allow_list_is_rejected(verifier):
+    with pytest.raises(PyJWTError):
+        _verify(verifier, _token("EdDSA"), algorithms=["RS256"])
+
+
+def test_unknown_kid_refreshes_once_and_swaps_index(verifier, endpoint):
+    _verify(verifier, _token("RS256"))
+    old_index = verifier._key_index_cache["index"]
+    old_index.fetched_at -= 60  # fuera del cooldown de refresh
+
+    # Rotación en el IdP: kid nuevo publicado
+    new_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    endpoint.jwks = _jwks({**_KEYS, "RS256": ("rsa-2", new_key, RSAAlgorithm)})
+    token = _token("RS256", kid="rsa-2", key=new_key)
+
+    results = []
+    def _worker():
+        results.append(_verify(verifier, token))
+
+    threads = [threading.Thread(target=_worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 8 and all(c["sub"] == "u1" for c in results)
+    assert endpoint.fetches == 2  # single-flight: 8 requests => 1 descarga
+    assert verifier._key_index_cache["index"] is not old_index
+
+
+def test_failed_refresh_keeps_previous_keys(verifier, endpoint, monkeypatch):
+    _verify(verifier, _token("RS256"))
+    verifier._key_index_cache["index"].fetched_at -= settings.oidc_jwks_cache_seconds + 1
+
+    def _down(jwks_url):
+        raise deps.httpx.ConnectError("keycloak down")
+
+    monkeypatch.setattr(deps, "_fetch_jwks", _down)
+    assert _verify(verifier, _token("ES256"))["sub"] == "u1"
+    assert deps.jwks_status() == (True, True)
+
+
+@pytest.mark.parametrize(
+    "overrides, error",
+    [
+        ({"exp": int(time.time()) - 120}, ExpiredSignatureError),
+        ({"iss": "http://evil.test/realms/asrp"}, InvalidIssuerError),
+    ],
+)
+def test_registered_claims_are_validated(verifier, overrides, error):
+    with pytest.raises(error):
+        _verify(verifier, _token("ES256", **overrides))
@@ -0,0 +1,149 @@
+# services/orders-api/tests/test_order_events.py
+# Unit tests: SSE de estado de pedidos (hub en proceso, after_commit, sondeo del outbox, replay).
+import asyncio
+import time
+
+from app import order_events, repositories
+from app.core.config import settings
+from app.models import OutboxEvent
+from app.order_events import OrderEventHub
+from app.schemas import OrderCreate
+
+
+def _payload() -> OrderCreate:
+    return OrderCreate(lines=[{"sku": "SKU-001", "quantity": 1, "unit_price": "5.00"}])
+
+
+def _msg(event_id: int, order_id: int):
+    return event_id, order_id, f"id: {event_id}\n\n".encode()
+
+
+def test_hub_filters_by_order_and_evicts_slow_consumers():
+    hub = OrderEventHub(queue_size=2, max_subscribers=3, poll_interval=0)
+
+    async def run():
+        everything, only_7, slow = hub.subscribe(), hub.subscribe([7]), hub.subscribe([8])
+        assert hub.full()
+        hub.publish([_msg(1, 7), _msg(2, 8), _msg(2, 8)])  # el duplicado (mismo id) se ignora
+        assert everything.queue.qsize() == 2
+        assert only_7.queue.qsize() == 1 and slow.queue.qsize() == 1
+        hub.publish([_msg(3, 8)])
+        # `everything` no drenó: cola llena => expulsado, sin frenar al resto
+        assert everything.evicted and not slow.evicted and slow.queue.qsize() == 2
+        hub.unsubscribe(only_7)
+        hub.unsubscribe(only_7)
+        return hub.stats()
+
+    assert asyncio.run(run()) == {"subscribers": 1, "published_total": 3, "evicted_total": 1}
+
+
+def test_local_commit_is_pushed_and_rollback_is_not(session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "order_events_poll_seconds", 0)
+    order_events.get_order_event_hub.cache_clear()
+    hub = order_events.get_order_event_hub()
+
+    def write(commit):
+        with session_factory() as db:
+            repositories.create_order(db, _payload(), commit=commit)
+            if not commit:
+                db.flush()
+                db.rollback()
+
+    async def run():
+        sub = hub.subscribe()
+        await asyncio.to_thread(write, False)
+        await asyncio.to_thread(write, True)  # el commit corre en otro thread (como el threadpool)
+        event_id, order_id, body = await asyncio.wait_for(sub.queue.get(), 2)
+        return sub.queue.qsize(), event_id, order_id, body
+
+    try:
+        pending, event_id, order_id, body = asyncio.run(run())
+    finally:
+        order_events.get_order_event_hub.cache_clear()
+    assert pending == 0 and order_id == 1
+    assert body.startswith(f"id: {event_id}\nevent: order.created\ndata: ".encode())
+    assert b'"status":"created"' in body
+
+
+def test_poll_picks_up_other_workers_commits_and_waits_for_gaps(session_factory, monkeypatch):
+    monkeypatch.setattr(order_events, "_session", session_factory)
+    hub = OrderEventHub(poll_interval=0, gap_timeout=5)
+    with session_factory() as db:
+        repositories.create_order(db, _payload())
+
+    async def run():
+        sub = hub.subscribe()
+        await hub.poll_once()  # arranque: cursor al final, no reenvía lo viejo
+        assert hub._cursor == 1 and sub.queue.empty()
+        # Otro worker (sin hub suscrito): solo lo ve el sondeo
+        with session_factory() as db:
+            repositories.create_order(db, _payload())
+        await hub.poll_once()
+        return (await sub.queue.get())[0]
+
+    assert asyncio.run(run()) == 2 and hub._cursor == 2
+
+    # Hueco (id 3 aún sin confirmar): el cursor espera; pasado gap_timeout lo salta
+    hub._advance_cursor([4], now=100.0)
+    assert hub._cursor == 2
+    hub._advance_cursor([4], now=106.0)
+    assert hub._cursor == 4 and hub._gaps == {}
+
+
+def test_stream_replays_after_last_event_id_pings_and_ends_at_token_expiry(
+    session_factory, monkeypatch
+):
+    monkeypatch.setattr(order_events, "_session", session_factory)
+    with session_factory() as db:
+        for _ in range(3):
+            repositories.create_order(db, _payload())
+        ids = [e.id for e in db.query(OutboxEvent).order_by(OutboxEvent.id)]
+    hub = OrderEventHub(poll_interval=0)
+
+    async def run():
+        chunks = []
+        gen = order_events.stream(
+            hub, [2, 3], last_event_id=ids[1], heartbeat_seconds=0.05, expires_at=time.time() + 0.3
+        )
+        async for chunk in gen:
+            chunks.append(chunk)
+            if chunk.startswith(b"id:"):
+                hub.publish([_msg(ids[2], 3), _msg(99, 3)])  # ids[2] ya reenviado: no se duplica
+        return chunks
+
+    started = time.monotonic()
+    chunks = asyncio.run(run())
+    assert time.monotonic() - started < 2
+    events = [c.split(b"\n", 1)[0] for c in chunks if c.startswith(b"id:")]
+    assert events == [f"id: {ids[2]}".encode(), b"id: 99"]
+    assert chunks[0].startswith(b"retry: ") and b": ping\n\n" in chunks
+    assert hub.subscribers == 0
+
+
+def test_events_endpoint_streams_with_sse_headers(api_client, session_factory, monkeypatch):
+    from app.security import deps
+
+    with session_factory() as db:
+        order = repositories.create_order(db, _payload())
+    monkeypatch.setattr(order_events, "_session", session_factory)
+    hub = OrderEventHub(poll_interval=0)
+    monkeypatch.setattr(order_events, "get_order_event_hub", lambda: hub)
+    claims = {
+        "sub": "u1",
+        "exp": time.time() + 0.5,
+        "resource_access": {"asrp-orders": {"roles": ["orders_read"]}},
+    }
+    monkeypatch.setattr(deps, "get_claims", lambda req: claims)
+
+    response = api_client.get(
+        "/v1/orders/events", params={"order_id": order.id}, headers={"Last-Event-ID": "0"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: order.created" in response.text
+    assert api_client.get("/v1/orders/events", headers={"Last-Event-ID": "x"}).status_code == 400
+
+    full = OrderEventHub(max_subscribers=0, poll_interval=0)
+    monkeypatch.setattr(order_events, "get_order_event_hub", lambda: full)
+    response = api_client.get("/v1/orders/events")
+    assert response.status_code == 503 and response.headers["Retry-After"] == "5"
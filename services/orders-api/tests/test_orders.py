@@ -0,0 +1,137 @@
+from decimal import Decimal
+
+import pytest
+
+from app import repositories
+from app.models import OrderLine
+from app.schemas import OrderCreate
+
+
+def _payload(n_lines: int = 3) -> OrderCreate:
+    return OrderCreate(
+        customer_ref="C-1",
+        lines=[
+            {"sku": f"SKU-{i:03d}", "quantity": i, "unit_price": "1.50"}
+            for i in range(1, n_lines + 1)
+        ],
+    )
+
+
+def test_create_order_inserts_header_and_lines_in_one_transaction(db_session):
+    order = repositories.create_order(db_session, _payload(100))
+
+    assert order.line_count == 100
+    assert order.total_amount == Decimal("1.50") * sum(range(1, 101))
+    assert db_session.query(OrderLine).filter_by(order_id=order.id).count() == 100
+
+    stored = repositories.get_order(db_session, order.id)
+    assert [ln.line_no for ln in stored.lines] == list(range(1, 101))
+
+
+def test_create_order_uses_multi_row_insert_for_lines(engine, db_session):
+    from sqlalchemy import event
+
+    statements = []
+
+    def _capture(conn, cursor, statement, params, context, executemany):
+        statements.append((statement, executemany))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        repositories.create_order(db_session, _payload(50))
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    line_inserts = [
+        s for s in statements if s[0].lstrip().upper().startswith("INSERT INTO ORDER_LINES")
+    ]
+    assert len(line_inserts) == 1
+    assert not line_inserts[0][1]  # una sola sentencia multi-row, no executemany
+
+
+def test_keyset_pagination_walks_all_orders_without_duplicates(db_session):
+    created = [repositories.create_order(db_session, _payload(1)).id for _ in range(7)]
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = repositories.list_orders(db_session, limit=3, cursor=cursor)
+        seen.extend(o.id for o in rows)
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(created)
+    assert len(seen) == len(set(seen))
+
+
+def test_invalid_cursor_raises_value_error(db_session):
+    with pytest.raises(ValueError):
+        repositories.list_orders(db_session, cursor="not-a-cursor")
+
+
+def test_orders_api_create_and_list(api_client):
+    r = api_client.post(
+        "/v1/orders",
+        json={"lines": [{"sku": "SKU-001", "quantity": 2, "unit_price": "9.99"}]},
+    )
+    assert r.status_code == 201, r.text
+    order_id = r.json()["id"]
+
+    r = api_client.get("/v1/orders", params={"limit": 10})
+    assert r.status_code == 200, r.text
+    assert [o["id"] for o in r.json()["items"]] == [order_id]
+
+    r = api_client.get(f"/v1/orders/{order_id}")
+    assert r.status_code == 200
+    assert r.json()["lines"][0]["sku"] == "SKU-001"
+
+    assert api_client.get("/v1/orders", params={"cursor": "%%%"}).status_code == 400
+
+
+def test_sparse_fieldset_selects_only_requested_columns(engine, db_session):
+    from sqlalchemy import event
+
+    for _ in range(3):
+        repositories.create_order(db_session, _payload(2))
+    statements = []
+
+    def _capture(conn, cursor, statement, params, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        rows, cursor = repositories.list_orders(db_session, limit=2, columns=("status",))
+        detail = repositories.get_order(db_session, rows[0].id, columns=("currency",))
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    assert cursor is not None and rows[0].status == "created"
+    select_list = statements[0].split("FROM")[0]
+    assert "status" in select_list
+    assert "total_amount" not in select_list and "customer_ref" not in select_list
+    # Sin "lines" en el fieldset: ni una query a order_lines
+    assert detail == {"id": rows[0].id, "currency": "EUR"}
+    assert not any("order_lines" in s for s in statements)
+
+
+def test_orders_api_sparse_fieldsets(api_client):
+    for _ in range(3):
+        line = {"sku": "SKU-001", "quantity": 2, "unit_price": "9.99"}
+        r = api_client.post("/v1/orders", json={"lines": [line]})
+    order_id = r.json()["id"]
+
+    page = api_client.get("/v1/orders", params={"limit": 2, "fields": "total_amount, id"}).json()
+    assert page["items"][0] == {"id": order_id, "total_amount": "19.98"}
+    params = {"cursor": page["next_cursor"], "fields": "id"}
+    rest = api_client.get("/v1/orders", params=params).json()
+    assert len(rest["items"]) == 1 and rest["next_cursor"] is None
+
+    detail = api_client.get(f"/v1/orders/{order_id}", params={"fields": "status,lines"}).json()
+    assert detail == {
+        "status": "created",
+        "lines": [{"line_no": 1, "sku": "SKU-001", "quantity": 2, "unit_price": "9.99"}],
+    }
+
+    r = api_client.get("/v1/orders", params={"fields": "id,password"})
+    assert r.status_code == 400 and r.json()["detail"]["fields"] == ["password"]
+    assert api_client.get(f"/v1/orders/{order_id}", params={"fields": ","}).status_code == 400
+    assert api_client.get("/v1/orders/999", params={"fields": "id"}).status_code == 404
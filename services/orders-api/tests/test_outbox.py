@@ -0,0 +1,87 @@
+import pytest
+
+from app import outbox, repositories
+from app.models import OutboxEvent
+from app.schemas import OrderCreate
+
+
+def _payload() -> OrderCreate:
+    return OrderCreate(lines=[{"sku": "SKU-001", "quantity": 2, "unit_price": "3.00"}])
+
+
+def test_create_order_writes_outbox_event_in_same_transaction(db_session):
+    order = repositories.create_order(db_session, _payload())
+
+    event = db_session.query(OutboxEvent).one()
+    assert event.event_type == "order.created"
+    assert event.aggregate_id == str(order.id)
+    assert event.payload["lines"][0]["sku"] == "SKU-001"
+
+
+def test_uncommitted_order_leaves_no_event(db_session):
+    repositories.create_order(db_session, _payload(), commit=False)
+    db_session.rollback()
+    assert db_session.query(OutboxEvent).count() == 0
+
+
+def test_relay_publishes_once_and_consumer_tracks_offsets(db_session, session_factory, tmp_path):
+    for _ in range(3):
+        repositories.create_order(db_session, _payload())
+
+    sink = outbox.FileSink(str(tmp_path / "outbox.jsonl"))
+    relay = outbox.OutboxRelay(session_factory, sink, batch_size=10)
+    assert relay.drain_once() == 3
+    assert relay.drain_once() == 0
+
+    offsets = [m["offset"] for m in sink.read(after_offset=0)]
+    assert offsets == sorted(offsets) and len(offsets) == 3
+    assert sink.read(after_offset=offsets[-1]) == []
+
+
+def test_lower_id_committed_after_higher_id_was_relayed_is_not_lost(
+    db_session, session_factory, tmp_path
+):
+    # Los ids se asignan en el INSERT: una transacción con id 1 puede confirmar
+    # después de que el 2 ya se haya publicado
+    from datetime import datetime, timezone
+
+    def _event(event_id):
+        return OutboxEvent(
+            id=event_id,
+            aggregate_type="order",
+            aggregate_id=str(event_id),
+            event_type="order.created",
+            payload={},
+            created_at=datetime.now(timezone.utc),
+        )
+
+    memory, file = outbox.InMemorySink(), outbox.FileSink(str(tmp_path / "outbox.jsonl"))
+    for sink in (memory, file):
+        db_session.query(OutboxEvent).delete()
+        db_session.add(_event(2))
+        db_session.commit()
+        relay = outbox.OutboxRelay(session_factory, sink)
+        assert relay.drain_once() == 1
+        seen = sink.read(after_offset=0)
+
+        db_session.add(_event(1))  # confirma tarde
+        db_session.commit()
+        assert relay.drain_once() == 1
+
+        late = sink.read(after_offset=seen[-1]["offset"])
+        assert [m["eventId"] for m in late] == [1]
+        assert [m["eventId"] for m in sink.read()] == [2, 1]
+
+    # Reenvío at-least-once del mismo evento: el sink en memoria lo deduplica por eventId
+    memory.publish([outbox.to_message(_event(1))])
+    assert len(memory.read()) == 2
+
+
+def test_relay_requires_an_explicit_durable_sink(monkeypatch):
+    # Sin OUTBOX_SINK el relay no arranca (un sink en memoria perdería los eventos publicados)
+    monkeypatch.setattr(outbox.settings, "outbox_sink", "")
+    with pytest.raises(ValueError, match="OUTBOX_SINK"):
+        outbox.build_sink()
+    monkeypatch.setattr(outbox.settings, "outbox_sink", "memory")
+    with pytest.raises(ValueError, match="OUTBOX_SINK"):
+        outbox.build_sink()
@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_ready_is_503_before_startup():
+    # Sin lifespan (TestClient sin context manager) no hay warm-up => not ready
+    c = TestClient(app)
+    r = c.get("/ready")
+    assert r.status_code == 503
+    assert r.json()["status"] == "not_ready"
+
+
+def test_ready_reports_checks_after_startup(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.warmup_enabled", False)
+    with TestClient(app) as c:
+        r = c.get("/ready")
+    data = r.json()
+    assert data["service"] == "orders-api"
+    assert set(data["checks"]) >= {"warmup", "jwks"}
+
+
+def test_ready_with_warmup_disabled_repairs_and_reports_200(monkeypatch):
+    # WARMUP_ENABLED=false: el warm-up no bloquea /ready; lo que falta lo relanza el probe
+    import time
+
+    from app.core import readiness
+    from app.core.config import settings
+    from app.security import deps
+
+    state = {"jwks": False, "db": False}
+
+    async def _warm_oidc():
+        state["jwks"] = True
+
+    async def _warm_db():
+        state["db"] = True
+
+    monkeypatch.setattr(settings, "warmup_enabled", False)
+    monkeypatch.setattr(settings, "readiness_cache_seconds", 0.0)
+    monkeypatch.setattr(settings, "outbox_relay_enabled", False)
+    monkeypatch.setattr(deps, "jwks_status", lambda: (state["jwks"], False))
+    monkeypatch.setattr(readiness, "pool_has_connection", lambda: state["db"])
+    monkeypatch.setattr(readiness, "default_steps", lambda: {"oidc": _warm_oidc, "db": _warm_db})
+
+    with TestClient(app) as c:
+        first = c.get("/ready")
+        deadline = time.monotonic() + 2
+        r = c.get("/ready")
+        while r.status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            r = c.get("/ready")
+
+    assert first.json()["checks"]["warmup"] is True
+    assert r.status_code == 200, r.text
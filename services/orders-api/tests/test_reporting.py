@@ -0,0 +1,94 @@
+# services/orders-api/tests/test_reporting.py
+import re
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import event, update
+
+from app import reporting, repositories
+from app.models import Order, OrderDailyStat
+from app.schemas import OrderCreate
+
+
+def _payload(currency: str = "EUR") -> OrderCreate:
+    return OrderCreate(
+        currency=currency, lines=[{"sku": "SKU-1", "quantity": 2, "unit_price": "5.00"}]
+    )
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def test_create_order_maintains_daily_aggregate(db_session):
+    for _ in range(5):
+        repositories.create_order(db_session, _payload())
+    repositories.create_order(db_session, _payload("usd"))
+
+    stats = reporting.daily_stats(db_session, date_from=_today(), date_to=_today())
+
+    assert [(s.status, s.currency, s.orders, s.total_amount) for s in stats] == [
+        ("created", "EUR", 5, Decimal("50.00")),
+        ("created", "USD", 1, Decimal("10.00")),
+    ]
+
+
+def test_daily_stats_never_reads_orders_table(engine, db_session):
+    repositories.create_order(db_session, _payload())
+    statements = []
+
+    def _capture(conn, cursor, statement, params, context, executemany):
+        statements.append(statement.lower())
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        reporting.daily_stats(db_session, date_from=_today() - timedelta(days=30), date_to=_today())
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    assert statements and not any(re.search(r"\b(from|join)\s+orders\b", s) for s in statements)
+
+
+def test_status_change_moves_bucket(db_session):
+    order = repositories.create_order(db_session, _payload())
+    reporting.record_status_change(
+        db_session,
+        created_at=order.created_at,
+        currency=order.currency,
+        total_amount=order.total_amount,
+        old_status="created",
+        new_status="shipped",
+    )
+    db_session.commit()
+
+    stats = reporting.daily_stats(db_session, date_from=_today(), date_to=_today())
+    assert [(s.status, s.orders) for s in stats] == [("shipped", 1)]
+
+
+def test_rebuild_recomputes_from_orders(db_session):
+    for _ in range(3):
+        repositories.create_order(db_session, _payload())
+    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+    db_session.execute(update(Order).where(Order.id == 1).values(created_at=yesterday))
+    db_session.query(OrderDailyStat).delete()
+    db_session.commit()
+
+    assert reporting.rebuild(db_session, date_from=yesterday.date(), date_to=_today()) == 2
+
+    stats = reporting.daily_stats(db_session, date_from=yesterday.date(), date_to=_today())
+    assert [(s.day, s.orders) for s in stats] == [(yesterday.date(), 1), (_today(), 2)]
+
+
+def test_daily_report_endpoint(api_client):
+    api_client.post("/v1/orders", json=_payload().model_dump(mode="json"))
+
+    r = api_client.get("/v1/reports/orders/daily", params={"status": "created"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["date_to"] == _today().isoformat()
+    assert [(i["status"], i["orders"]) for i in body["items"]] == [("created", 1)]
+
+    r = api_client.get(
+        "/v1/reports/orders/daily", params={"date_from": "2020-01-01", "date_to": "2026-01-01"}
+    )
+    assert r.status_code == 400
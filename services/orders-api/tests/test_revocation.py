@@ -0,0 +1,122 @@
+# services/orders-api/tests/test_revocation.py
+# Unit tests (sin Keycloak): lista de revocaciones jti/sid, poll incremental y webhook RBAC.
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.security import deps, revocation
+from app.security.revocation import RevocationList
+
+CLAIMS = {"sub": "u1", "jti": "8f0c2c5e-jti", "sid": "session-42", "resource_access": {}}
+
+
+@pytest.fixture
+def revocations(monkeypatch):
+    rl = RevocationList(retention_seconds=60)
+    monkeypatch.setattr(revocation, "get_revocation_list", lambda: rl)
+    monkeypatch.setattr(deps, "get_revocation_list", lambda: rl)
+    from app.api import routes
+
+    monkeypatch.setattr(routes, "get_revocation_list", lambda: rl)
+    return rl
+
+
+def _request(token="t"):
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+def test_revoked_jti_and_sid_are_detected():
+    rl = RevocationList(retention_seconds=60)
+    assert rl.is_revoked(CLAIMS) is False
+    rl.revoke("jti", "8f0c2c5e-jti")
+    assert rl.is_revoked(CLAIMS) is True
+    assert rl.is_revoked({"jti": "other", "sid": "session-42"}) is False
+
+    rl.revoke("sid", "session-42")
+    assert rl.is_revoked({"jti": "other", "sid": "session-42"}) is True
+    with pytest.raises(ValueError):
+        rl.revoke("sub", "u1")
+
+
+def test_entries_expire_with_the_tokens_they_cover():
+    rl = RevocationList(retention_seconds=60)
+    now = int(time.time())
+    rl.apply([
+        {"type": "jti", "value": "old", "expires_at": now - 1},
+        {"type": "sid", "value": "s", "expires_at": now + 60},
+    ])
+    assert len(rl) == 1  # apply() poda lo caducado
+    assert rl.prune(now=now + 61) == 1
+    assert len(rl) == 0
+
+
+def test_poll_applies_deltas_incrementally(monkeypatch):
+    rl = RevocationList(retention_seconds=60)
+    seen_cursors = []
+    pages = [
+        {"cursor": "c1", "revocations": [{"type": "jti", "value": "a"}]},
+        {
+            "cursor": "c2",
+            "revocations": [{"type": "sid", "value": "s1"}, {"type": "jti", "value": "b"}],
+        },
+        {"cursor": None, "revocations": []},
+    ]
+
+    async def _fake_feed(url, cursor):
+        seen_cursors.append(cursor)
+        return pages[len(seen_cursors) - 1]
+
+    monkeypatch.setattr(revocation, "_fetch_feed", _fake_feed)
+
+    async def _run():
+        url = "http://identity.test/v1/revocations"
+        return [await revocation.poll_once(rl, url) for _ in pages]
+
+    assert asyncio.run(_run()) == [1, 2, 0]
+    assert seen_cursors == [None, "c1", "c2"]
+    assert rl.cursor == "c2" and len(rl) == 3
+
+
+def test_revoked_token_is_rejected_by_get_claims(revocations, monkeypatch):
+    monkeypatch.setattr(deps, "_decode_and_verify", lambda token: dict(CLAIMS))
+    assert deps.get_claims(_request())["sub"] == "u1"
+
+    revocations.revoke("sid", "session-42")
+    with pytest.raises(HTTPException) as exc:
+        deps.get_claims(_request())
+    assert exc.value.status_code == 401
+
+
+def test_webhook_requires_role(api_client):
+    r = api_client.post(
+        "/v1/internal/revocations", json={"revocations": [{"type": "jti", "value": "x"}]}
+    )
+    assert r.status_code == 403
+
+
+def test_webhook_applies_batch(api_client, revocations, monkeypatch):
+    roles = {"roles": [settings.revocation_webhook_role]}
+    role_claims = {"sub": "keycloak-bridge", "resource_access": {settings.oidc_audience: roles}}
+    monkeypatch.setattr(deps, "get_claims", lambda req: role_claims)
+
+    r = api_client.post(
+        "/v1/internal/revocations",
+        json={
+            "revocations": [
+                {"type": "jti", "value": "8f0c2c5e-jti"},
+                {"type": "sid", "value": "s-1"},
+            ]
+        },
+    )
+    assert r.status_code == 200
+    assert r.json() == {"applied": 2, "size": 2}
+    assert revocations.is_revoked(CLAIMS) is True
+
+    r = api_client.post(
+        "/v1/internal/revocations", json={"revocations": [{"type": "sub", "value": "u1"}]}
+    )
+    assert r.status_code == 422
@@ -0,0 +1,154 @@
+# services/orders-api/tests/test_shared_auth.py
+# Unit tests: caché OIDC compartida entre workers del pod (JWKS publicado + tabla mmap de tokens
+# verificados).
+import json
+import os
+import stat
+import threading
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jwt.algorithms import ECAlgorithm, RSAAlgorithm
+
+from app.core.config import settings
+from app.security import deps
+from app.security import jwks as jwks_mod
+from app.security.shared_auth import SharedAuthCache
+
+ISSUER = "http://keycloak.test/realms/asrp"
+AUDIENCE = "asrp-orders"
+JWKS_URL = "http://keycloak.test/certs"
+
+_KEYS = {
+    "RS256": (
+        "rsa-1", rsa.generate_private_key(public_exponent=65537, key_size=2048), RSAAlgorithm
+    ),
+    "ES256": ("ec-1", ec.generate_private_key(ec.SECP256R1()), ECAlgorithm),
+}
+
+
+def _jwks(keys_by_alg=None):
+    keys = []
+    for alg, (kid, key, algorithm) in (keys_by_alg or _KEYS).items():
+        jwk = json.loads(algorithm.to_jwk(key.public_key()))
+        jwk.update({"kid": kid, "alg": alg, "use": "sig"})
+        keys.append(jwk)
+    return {"keys": keys}
+
+
+def _token(alg, *, kid=None, key=None, **overrides):
+    default_kid, default_key, _ = _KEYS[alg]
+    now = int(time.time())
+    claims = {"iss": ISSUER, "aud": AUDIENCE, "sub": "u1", "iat": now, "exp": now + 60, **overrides}
+    headers = {"kid": kid or default_kid}
+    return jwt.encode(claims, key or default_key, algorithm=alg, headers=headers)
+
+
+class _FakeJWKSEndpoint:
+    def __init__(self):
+        self.jwks = _jwks()
+        self.fetches = 0
+
+    def __call__(self, jwks_url):
+        self.fetches += 1
+        return self.jwks
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    fake = _FakeJWKSEndpoint()
+    monkeypatch.setattr(settings, "oidc_algorithms", "RS256,ES256")
+    monkeypatch.setattr(settings, "oidc_issuer_expected_override", ISSUER)
+    monkeypatch.setattr(deps, "_fetch_jwks", fake)
+    monkeypatch.setattr(deps, "_get_jwks_url", lambda: JWKS_URL)
+    for key in ("index", "retry_at", "fetched_wall"):
+        monkeypatch.setitem(deps._key_index_cache, key, None if key == "index" else 0.0)
+    return fake
+
+
+def _new_worker(monkeypatch, tmp_path):
+    # Proceso nuevo del mismo pod: estado en memoria vacío, mismo directorio compartido
+    shared = SharedAuthCache(str(tmp_path))
+    monkeypatch.setattr(deps, "_get_shared_auth", lambda: shared)
+    deps._key_index_cache.update({"index": None, "retry_at": 0.0, "fetched_wall": 0.0})
+    return shared
+
+
+def test_claims_are_shared_and_size_is_bounded(tmp_path):
+    a = SharedAuthCache(str(tmp_path), slots=8, slot_bytes=256)
+    b = SharedAuthCache(str(tmp_path), slots=8, slot_bytes=256)
+    exp = int(time.time()) + 60
+    assert a.put_claims("tok-1", {"sub": "u1", "exp": exp})
+    assert b.get_claims("tok-1") == {"sub": "u1", "exp": exp}
+    assert not a.put_claims("big", {"sub": "u1", "exp": exp, "blob": "x" * 500})
+    assert not a.put_claims("expired", {"sub": "u1", "exp": int(time.time()) - 1})
+    for i in range(100):
+        a.put_claims(f"tok-{i}", {"sub": str(i), "exp": exp})
+    assert os.path.getsize(a.tokens_path) == 64 + 8 * 256
+
+
+def test_second_worker_reuses_jwks_and_verified_token(tmp_path, monkeypatch, endpoint):
+    token = _token("RS256")
+    _new_worker(monkeypatch, tmp_path)
+    assert deps._decode_and_verify(token)["sub"] == "u1"
+
+    _new_worker(monkeypatch, tmp_path)
+    verifies = []
+    original = jwks_mod.KeyEntry.verify
+
+    def _counting(self, *a):
+        verifies.append(1)
+        return original(self, *a)
+
+    monkeypatch.setattr(jwks_mod.KeyEntry, "verify", _counting)
+    assert deps._decode_and_verify(token)["sub"] == "u1"
+    assert endpoint.fetches == 1 and verifies == []
+
+    # Los claims compartidos se revalidan: un issuer distinto sigue fallando
+    monkeypatch.setattr(settings, "oidc_issuer_expected_override", "http://evil.test/realms/asrp")
+    with pytest.raises(jwt.InvalidIssuerError):
+        deps._decode_and_verify(token)
+
+
+def test_key_rotation_is_fetched_once_per_pod(tmp_path, monkeypatch, endpoint):
+    _new_worker(monkeypatch, tmp_path)
+    deps._decode_and_verify(_token("RS256"))
+    old = dict(deps._key_index_cache)
+
+    new_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    endpoint.jwks = _jwks({**_KEYS, "RS256": ("rsa-2", new_key, RSAAlgorithm)})
+    for sub in ("u1", "u2"):
+        # Cada worker llega con el índice viejo (fuera del cooldown) y ve un kid nuevo
+        _new_worker(monkeypatch, tmp_path)
+        deps._key_index_cache.update(old)
+        deps._key_index_cache["index"].fetched_at = time.monotonic() - 60
+        token = _token("RS256", kid="rsa-2", key=new_key, sub=sub)
+        assert deps._decode_and_verify(token)["sub"] == sub
+    assert endpoint.fetches == 2
+
+
+def test_waits_for_the_worker_that_is_fetching(tmp_path, monkeypatch, endpoint):
+    other = SharedAuthCache(str(tmp_path))
+    _new_worker(monkeypatch, tmp_path)
+    with other.jwks_fetch_lock() as leader:
+        assert leader
+        threading.Timer(0.1, lambda: other.store_jwks(JWKS_URL, _jwks(), time.time())).start()
+        assert deps._decode_and_verify(_token("ES256"))["sub"] == "u1"
+    assert endpoint.fetches == 0
+
+
+def test_directory_is_private_and_an_insecure_one_is_rejected(tmp_path):
+    url = "http://keycloak.test/certs"
+    cache = SharedAuthCache(str(tmp_path / "oidc"))
+    cache.store_jwks(url, {"keys": []}, 1.0)
+    assert stat.S_IMODE(os.stat(cache.directory).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(cache.jwks_path).st_mode) == 0o600
+    assert cache.load_jwks(url) == ({"keys": []}, 1.0)
+
+    # Escribible por otros (p. ej. creado antes por otro usuario bajo /tmp): no se confía en él
+    os.chmod(cache.directory, 0o777)
+    other = SharedAuthCache(cache.directory)
+    assert other.load_jwks(url) is None
+    assert other.get_claims("token") is None